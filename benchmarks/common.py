@@ -0,0 +1,80 @@
+"""
+Shared helpers for the benchmark scripts.
+
+load_sample_mart() rebuilds the forecasting input (ds, sku, y, is_promo) from the
+bundled sample CSV the same way stg_vitamarkets -> mart_sales_summary does, and
+load_sample_history() preprocesses it like the pipeline, so model benchmarks run
+without a database.
+"""
+
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+SAMPLE_CSV = ROOT / "vitamarkets_ultrarealistic_sampledataset.csv"
+MART_KEYS = ["date", "sku", "category", "channel", "country", "customer_segment"]
+
+
+def load_sample_groups(path=SAMPLE_CSV):
+    """{sku: category} from the sample CSV (what pooled.load_sku_groups reads)."""
+    raw = pd.read_csv(path, usecols=["sku", "category"])
+    return raw.groupby("sku")["category"].min().to_dict()
+
+
+def load_sample_mart(path=SAMPLE_CSV):
+    """Mart-grain rows from the sample CSV, as forecasting.HISTORY_QUERY returns them."""
+    raw = pd.read_csv(path).dropna(subset=["units_sold", "order_value"])
+    raw["units_sold"] = raw["units_sold"].round()
+    mart = raw.groupby(MART_KEYS, as_index=False).agg(
+        y=("units_sold", "sum"), is_promo=("promo_flag", "max")
+    )
+    df = mart.rename(columns={"date": "ds"})[["ds", "sku", "y", "is_promo"]]
+    df["is_promo"] = df["is_promo"].fillna(0)
+    return df
+
+
+def load_sample_history(path=SAMPLE_CSV):
+    """Sample history preprocessed like the v2 pipeline (vitamarkets.preprocessing)."""
+    from vitamarkets.preprocessing import preprocess
+
+    return preprocess(load_sample_mart(path))["history"]
+
+
+def run_prophet(df, holidays_df):
+    """Per-SKU Prophet (forecast_sku) sequentially. Returns (metrics_df, seconds)."""
+    from vitamarkets.forecasting import forecast_sku
+
+    started = time.perf_counter()
+    metrics = []
+    for sku, sub in df.groupby("sku"):
+        _, outcome = forecast_sku(sub, sku, holidays_df, "bench")
+        if isinstance(outcome, dict):
+            metrics.append(outcome)
+    return pd.DataFrame(metrics), time.perf_counter() - started
+
+
+def environment():
+    """Machine/library metadata stored with benchmark results."""
+    import numpy as np
+
+    from vitamarkets.resources import available_cpus
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": available_cpus(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def write_json(path, payload):
+    Path(path).write_text(json.dumps(payload, indent=2, default=str))
+    print(f"Results written to {path}")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Typical dashboard queries on plain vs. materialized contract views.
+
+Writes a synthetic run (--skus SKUs, --days of actuals plus FORECAST_DAYS of forecasts
+each, as the pipeline publishes them) to a scratch schema, then times each query
+against the views as they were (plain views with ORDER BY over the run table) and as
+publish.publish_views() now creates them (sorted, uniquely indexed materialized
+views). Also timed: publishing itself (plain views, the first materialized build, and
+a concurrent and a blocking refresh for each following run), and delta publishing
+(vitamarkets.delta_publish): a first publish of every SKU, then a run in which only
+--changed-pct of the SKUs' forecasts move.
+
+    full_import      SELECT * FROM simple_prophet_forecast (Power BI import mode)
+    one_sku          one SKU's rows from simple_prophet_forecast, by date
+    sku_window       one SKU's forecast rows for the next 30 days
+    daily_totals     units per day across SKUs, forecast rows only
+    freshness        MAX(ds), MAX(forecast_run_id)
+    worst_skus       top 20 SKUs by MAPE from forecast_error_metrics
+
+Usage:
+    python benchmarks/dashboard_views.py
+    python benchmarks/dashboard_views.py --skus 2000 --days 730 --json results.json
+    python benchmarks/dashboard_views.py --embedded /tmp/bench_pg
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+from common import environment, write_json
+from end_to_end import connect
+
+from vitamarkets.config import FORECAST_DAYS
+
+QUERIES = {
+    "full_import": "SELECT * FROM {schema}.simple_prophet_forecast",
+    "one_sku": (
+        "SELECT ds, yhat, yhat_lower, yhat_upper, data_type "
+        "FROM {schema}.simple_prophet_forecast WHERE sku = 'SKU_{mid:05d}' ORDER BY ds"
+    ),
+    "sku_window": (
+        "SELECT ds, yhat FROM {schema}.simple_prophet_forecast "
+        "WHERE sku = 'SKU_{mid:05d}' AND data_type = 'forecast' "
+        "AND ds BETWEEN DATE '{last}' AND DATE '{last}' + 30 ORDER BY ds"
+    ),
+    "daily_totals": (
+        "SELECT ds, SUM(yhat) AS units FROM {schema}.simple_prophet_forecast "
+        "WHERE data_type = 'forecast' GROUP BY ds ORDER BY ds"
+    ),
+    "freshness": "SELECT MAX(ds), MAX(forecast_run_id) FROM {schema}.simple_prophet_forecast",
+    "worst_skus": (
+        "SELECT sku, test_mape_pct, test_mae FROM {schema}.forecast_error_metrics "
+        "ORDER BY test_mape_pct DESC LIMIT 20"
+    ),
+}
+
+
+def synthetic_run(n_skus, n_days, run_id, seed=0):
+    """(forecasts, metrics) shaped like a pipeline run: actual + forecast rows per SKU."""
+    rng = np.random.default_rng(seed)
+    skus = np.array([f"SKU_{i:05d}" for i in range(n_skus)])
+    history = pd.date_range("2022-01-01", periods=n_days)
+    future = pd.date_range(history[-1] + pd.Timedelta(days=1), periods=FORECAST_DAYS)
+
+    def rows(dates, kind):
+        yhat = rng.gamma(2.0, 10.0, n_skus * len(dates))
+        return pd.DataFrame(
+            {
+                "ds": np.tile(dates, n_skus),
+                "yhat": yhat,
+                "yhat_lower": yhat * 0.7,
+                "yhat_upper": yhat * 1.3,
+                "sku": np.repeat(skus, len(dates)),
+                "run_id": run_id,
+                "type": kind,
+            }
+        )
+
+    forecasts = pd.concat([rows(history, "actual"), rows(history.append(future), "forecast")])
+    metrics = pd.DataFrame(
+        {
+            "sku": skus,
+            "test_mae": rng.gamma(2.0, 3.0, n_skus),
+            "test_rmse": rng.gamma(2.0, 4.0, n_skus),
+            "test_mape_pct": rng.gamma(2.0, 10.0, n_skus),
+            "test_bias": rng.normal(0, 1, n_skus),
+            "test_coverage_pct": rng.uniform(60, 95, n_skus),
+            "n_train": n_days - 30,
+            "n_test": 30,
+            "run_id": run_id,
+        }
+    )
+    return forecasts, metrics, history[-1].date()
+
+
+def time_queries(engine, params, repeat):
+    """{query: median seconds} (rows fetched to the client, as a dashboard would)."""
+    from sqlalchemy import text
+
+    timings = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            statement = text(sql.format(**params))
+            conn.execute(statement).fetchall()  # warm the cache
+            seconds = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(statement).fetchall()
+                seconds.append(time.perf_counter() - started)
+            timings[name] = float(np.median(seconds))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--skus", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=730, help="Days of actuals per SKU")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    parser.add_argument(
+        "--changed-pct", type=float, default=1.0, help="%% of SKUs moved for the delta run"
+    )
+    parser.add_argument("--embedded", help="Start a pgserver PostgreSQL in this directory")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+
+    from vitamarkets.delta_publish import write_delta_tables
+    from vitamarkets.publish import publish_views, view_statements, write_run_tables
+
+    engine = connect(args.embedded)
+    schema = f"bench_{uuid.uuid4().hex[:10]}"
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+
+    results = {
+        "environment": {**environment(), "database": engine.dialect.server_version_info},
+        "skus": args.skus,
+        "days": args.days,
+        "publish": {},
+    }
+    try:
+        forecasts, metrics, last = synthetic_run(args.skus, args.days, "run1")
+        tables = write_run_tables(engine, forecasts, metrics, "run1", schema=schema)
+        results["rows"] = len(forecasts)
+        params = {"schema": schema, "mid": args.skus // 2, "last": last}
+        print(f"{len(forecasts):,} forecast rows, {args.skus:,} SKUs")
+
+        with engine.begin() as conn:
+            # Planner statistics for the run tables, as autovacuum would have by now
+            for table in tables:
+                conn.execute(text(f"ANALYZE {schema}.{table}"))
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            for statement in view_statements(*tables, schema=schema):
+                conn.execute(text(statement))
+        results["publish"]["plain"] = time.perf_counter() - started
+        plain = time_queries(engine, params, args.repeat)
+
+        started = time.perf_counter()
+        publish_views(engine, *tables, schema=schema)
+        results["publish"]["materialized_build"] = time.perf_counter() - started
+        materialized = time_queries(engine, params, args.repeat)
+
+        for seed, mode in enumerate(["concurrent", "blocking"], start=1):
+            run_id = f"run{seed + 1}"
+            forecasts, metrics, _ = synthetic_run(args.skus, args.days, run_id, seed=seed)
+            started = time.perf_counter()
+            tables = write_run_tables(engine, forecasts, metrics, run_id, schema=schema)
+            results["publish"][f"{mode}_write"] = time.perf_counter() - started
+            started = time.perf_counter()
+            publish_views(engine, *tables, schema=schema, concurrent=mode == "concurrent")
+            results["publish"][f"{mode}_refresh"] = time.perf_counter() - started
+
+        # Delta publishing: every SKU is new, then only --changed-pct of them move
+        for run_id, changed in [("run4", None), ("run5", args.changed_pct / 100)]:
+            if changed is not None:
+                moved = metrics["sku"].head(max(1, round(args.skus * changed)))
+                shift = forecasts["sku"].isin(moved)
+                forecasts = forecasts.assign(yhat=forecasts["yhat"] + shift, run_id=run_id)
+                metrics = metrics.assign(run_id=run_id)
+            started = time.perf_counter()
+            *tables, report = write_delta_tables(engine, forecasts, metrics, run_id, schema=schema)
+            step = "delta_first" if changed is None else "delta"
+            results["publish"][f"{step}_write"] = time.perf_counter() - started
+            started = time.perf_counter()
+            publish_views(engine, *tables, schema=schema)
+            results["publish"][f"{step}_refresh"] = time.perf_counter() - started
+        results["delta"] = report
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+
+    results["queries"] = {
+        name: {"plain_s": plain[name], "materialized_s": materialized[name]} for name in QUERIES
+    }
+    print(f"\n  {'query':<14} {'plain ms':>10} {'matview ms':>11} {'speedup':>8}")
+    for name in QUERIES:
+        before, after = plain[name], materialized[name]
+        print(f"  {name:<14} {before * 1000:10.1f} {after * 1000:11.1f} {before / after:7.1f}x")
+    print("\n  publish: " + ", ".join(f"{k} {v:.2f}s" for k, v in results["publish"].items()))
+    delta = results["delta"]
+    print(
+        f"  delta run: {delta['updated']} SKUs updated, {delta['rows_written']:,} rows "
+        f"written, {delta['rows_skipped']:,} skipped"
+    )
+
+    if args.json:
+        write_json(args.json, results)
+
+
+if __name__ == "__main__":
+    main()
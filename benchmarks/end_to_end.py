@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+End-to-end stage benchmark at several synthetic data scales, with baseline comparison.
+
+For each scale (number of SKUs) it generates raw data with vitamarkets.synthetic and
+runs every pipeline stage against PostgreSQL in a scratch schema (dropped afterwards):
+
+    generate       synthetic raw rows to CSV
+    csv_ingest     COPY the CSV into vitamarkets_raw
+    mart_build     the dbt models (stg_vitamarkets view, mart_sales_summary table),
+                   rendered from vitamarkets_dbt and run as plain SQL
+    mart_read      forecasting.load_history()
+    preprocess     vitamarkets.preprocessing.preprocess()
+    fit, predict   Prophet per SKU on the first --fit-skus SKUs (fit and predict timed
+                   separately; rows = SKUs)
+    baseline       seasonal-naive holdout + forecast for every SKU (one panel pass)
+    metrics        vitamarkets.metrics.score() on the holdout, MASE-scaled
+    db_write       publish.write_run_tables() for every SKU's actuals + forecasts
+    view_publish   publish.publish_views()
+
+Each stage is measured with vitamarkets.profiling.stage() (wall/CPU seconds, peak
+RSS, rows; traced Python memory only with --trace-memory, since tracemalloc slows
+to_csv/to_sql several fold). Results are saved as JSON with environment metadata; with --baseline,
+each stage's wall time is compared with the same scale in a saved result and the
+script exits 1 when one is slower by more than --threshold (per-stage overrides with
+--stage-threshold fit=0.5) and by at least --min-seconds.
+
+The database is DB_URI / PG_* (as db.get_engine) or, with --embedded DIR, a throwaway
+PostgreSQL started by pgserver (pip install pgserver) in DIR. With --backend duckdb
+the ingest, mart, read, write and publish stages use the DuckDB/Parquet store
+(vitamarkets.storage) in a temporary directory instead; a PostgreSQL result passed as
+--baseline then gives the per-stage comparison between the two backends.
+
+Usage:
+    python benchmarks/end_to_end.py --scales 100,1000 --json results.json
+    python benchmarks/end_to_end.py --json new.json --baseline results.json --threshold 0.2
+    python benchmarks/end_to_end.py --embedded /tmp/bench_pg --scales 50 --fit-skus 2
+    python benchmarks/end_to_end.py --backend duckdb --json duckdb.json --baseline results.json
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from common import environment, write_json
+
+from vitamarkets.config import FORECAST_DAYS, TEST_DAYS
+from vitamarkets.dbt_runner import render_model
+from vitamarkets.profiling import stage, start_profile, summary_lines, write_profile
+
+DEFAULT_THRESHOLD = 0.25
+
+
+def connect(embedded=None):
+    """SQLAlchemy engine for DB_URI / PG_*, or a pgserver instance in `embedded`."""
+    if embedded is None:
+        from db import get_engine
+
+        return get_engine()
+    try:
+        import pgserver
+    except ImportError as e:
+        raise ImportError("--embedded needs pgserver: pip install pgserver") from e
+    from sqlalchemy import create_engine
+
+    return create_engine(pgserver.get_server(embedded).get_uri())
+
+
+def baseline_panel(history):
+    """Seasonal-naive holdout + FORECAST_DAYS forecast for every SKU, in run-table rows."""
+    from vitamarkets.baselines import seasonal_naive_panel
+
+    Y = history.pivot(index="ds", columns="sku", values="y")
+    dates = pd.date_range(Y.index[0], Y.index[-1] + pd.Timedelta(days=FORECAST_DAYS))
+    Y = Y.reindex(dates)
+    last_row = Y.notna().to_numpy()[::-1].argmax(axis=0)
+    fit_end_row = len(dates) - 1 - last_row - TEST_DAYS
+    yhat, lower, upper = seasonal_naive_panel(Y.to_numpy(), dates, fit_end_row)
+
+    rows = pd.DataFrame(
+        {
+            "ds": np.tile(dates, Y.shape[1]),
+            "sku": np.repeat(Y.columns.astype(str), len(dates)),
+            "y": Y.to_numpy().ravel(order="F"),
+            "yhat": yhat.ravel(order="F"),
+            "yhat_lower": lower.ravel(order="F"),
+            "yhat_upper": upper.ravel(order="F"),
+            "row": np.tile(np.arange(len(dates)), Y.shape[1]),
+            "fit_end_row": np.repeat(fit_end_row, len(dates)),
+        }
+    )
+    in_fit = rows["row"] <= rows["fit_end_row"]
+    holdout = ~in_fit & rows["y"].notna()
+    future = rows["row"] > rows["fit_end_row"] + TEST_DAYS
+    return rows[holdout].reset_index(drop=True), rows[future].reset_index(drop=True)
+
+
+def postgres_stages(engine, scoped, schema):
+    """Storage stages against a scratch schema: COPY, rendered dbt SQL, publish.*."""
+    from sqlalchemy import text
+
+    from vitamarkets import synthetic
+    from vitamarkets.forecasting import load_history
+    from vitamarkets.publish import publish_views, write_run_tables
+
+    def ingest(csv_path):
+        conn = scoped.raw_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(synthetic.RAW_DDL.format(schema=schema))
+            with open(csv_path) as f:
+                cursor.copy_expert(
+                    f"COPY {schema}.{synthetic.RAW_TABLE} FROM STDIN WITH (FORMAT csv, HEADER)",
+                    f,
+                )
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def build_mart():
+        with scoped.begin() as conn:
+            conn.execute(text(f"CREATE VIEW stg_vitamarkets AS {render_model('stg_vitamarkets')}"))
+            conn.execute(
+                text(f"CREATE TABLE mart_sales_summary AS {render_model('mart_sales_summary')}")
+            )
+            return conn.execute(text("SELECT COUNT(*) FROM mart_sales_summary")).scalar()
+
+    return {
+        "load_raw": ingest,
+        "build_mart": build_mart,
+        "load_history": lambda: load_history(scoped),
+        "write_run": lambda *run: write_run_tables(engine, *run, schema=schema),
+        "publish_views": lambda *tables: publish_views(engine, *tables, schema=schema),
+    }
+
+
+def run_scale(engine, schema, n_skus, args, work_dir):
+    """Every stage for one scale; returns the profile's stage records."""
+    from sqlalchemy import create_engine
+
+    from vitamarkets import synthetic
+    from vitamarkets.metrics import naive_scale, score
+    from vitamarkets.preprocessing import preprocess
+    from vitamarkets.storage import open_backend
+
+    profile = start_profile(
+        work_dir,
+        f"end_to_end --backend {args.backend} --scales {n_skus}",
+        trace_memory=args.trace_memory,
+    )
+    scoped = None
+    if args.backend == "duckdb":
+        storage = open_backend("duckdb", Path(work_dir) / f"store_{n_skus}")
+    else:
+        # Unqualified names (forecasting queries, rendered models) resolve to the scratch schema
+        scoped = create_engine(engine.url, connect_args={"options": f"-csearch_path={schema}"})
+        storage = postgres_stages(engine, scoped, schema)
+    csv_path = Path(work_dir) / f"raw_{n_skus}.csv"
+    run_id = f"bench{n_skus}"
+
+    try:
+        with stage(profile, "generate") as record:
+            chunks = synthetic.generate(
+                n_skus, years=args.years, seed=0, n_jobs=args.n_jobs, as_csv=True
+            )
+            record["rows"] = synthetic.write_csv(chunks, csv_path)
+
+        with stage(profile, "csv_ingest") as record:
+            record["rows"] = storage["load_raw"](csv_path)
+
+        with stage(profile, "mart_build") as record:
+            record["rows"] = storage["build_mart"]()
+
+        with stage(profile, "mart_read") as record:
+            df_raw = storage["load_history"]()
+            record["rows"] = len(df_raw)
+
+        with stage(profile, "preprocess") as record:
+            history = preprocess(df_raw)["history"]
+            record["rows"] = len(history)
+
+        fit_models = {}
+        fit_skus = sorted(history["sku"].unique())[: args.fit_skus]
+        if fit_skus:
+            from prophet import Prophet
+
+            with stage(profile, "fit") as record:
+                for sku in fit_skus:
+                    model = Prophet(interval_width=0.8)
+                    model.fit(history.loc[history["sku"] == sku, ["ds", "y"]])
+                    fit_models[sku] = model
+                record["rows"] = len(fit_models)
+
+            with stage(profile, "predict") as record:
+                for model in fit_models.values():
+                    model.predict(model.make_future_dataframe(periods=FORECAST_DAYS))
+                record["rows"] = len(fit_models)
+
+        with stage(profile, "baseline") as record:
+            holdout, future = baseline_panel(history)
+            record["rows"] = len(holdout) + len(future)
+
+        with stage(profile, "metrics") as record:
+            scores = score(holdout, scale=naive_scale(history))
+            record["rows"] = len(holdout)
+
+        columns = ["ds", "yhat", "yhat_lower", "yhat_upper", "sku", "type"]
+        actuals = history.assign(yhat=history["y"], yhat_lower=history["y"])
+        forecasts = pd.concat(
+            [
+                actuals.assign(yhat_upper=history["y"], type="actual")[columns],
+                future.assign(type="forecast")[columns],
+            ],
+            ignore_index=True,
+        ).assign(run_id=run_id)
+        n_train = history.groupby("sku").size() - TEST_DAYS
+        metrics_df = pd.DataFrame(
+            {
+                "sku": scores.index.astype(str),
+                "test_mae": scores["mae"].to_numpy(),
+                "test_rmse": scores["rmse"].to_numpy(),
+                "test_mape_pct": scores["mape_pct"].to_numpy(),
+                "test_bias": scores["bias"].to_numpy(),
+                "test_coverage_pct": scores["coverage_pct"].to_numpy(),
+                "n_train": n_train.reindex(scores.index).to_numpy(),
+                "n_test": scores["n"].to_numpy(),
+                "run_id": run_id,
+            }
+        )
+
+        with stage(profile, "db_write") as record:
+            tables = storage["write_run"](forecasts, metrics_df, run_id)
+            record["rows"] = len(forecasts) + len(metrics_df)
+
+        with stage(profile, "view_publish"):
+            storage["publish_views"](*tables)
+    finally:
+        write_profile(profile)
+        if scoped is not None:
+            scoped.dispose()
+        csv_path.unlink(missing_ok=True)
+
+    for line in summary_lines(profile):
+        print(f"  {line}")
+    return {record["stage"]: record for record in profile["stages"]}
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, stage_thresholds=None, min_seconds=0.1):
+    """
+    Rows (scale, stage, base_s, new_s, ratio, status) for every stage in both results.
+
+    status is "regression" when new_s > base_s * (1 + threshold) and the slowdown is at
+    least min_seconds, "improved" for the mirror case, "ok" otherwise.
+    """
+    stage_thresholds = stage_thresholds or {}
+    rows = []
+    for scale, measured in results["scales"].items():
+        saved = baseline["scales"].get(scale, {})
+        for name, record in measured["stages"].items():
+            if name not in saved.get("stages", {}):
+                continue
+            base_s = saved["stages"][name]["wall_seconds"]
+            new_s = record["wall_seconds"]
+            limit = stage_thresholds.get(name, threshold)
+            status = "ok"
+            if new_s > base_s * (1 + limit) and new_s - base_s >= min_seconds:
+                status = "regression"
+            elif base_s > new_s * (1 + limit) and base_s - new_s >= min_seconds:
+                status = "improved"
+            rows.append((scale, name, base_s, new_s, new_s / base_s if base_s else np.nan, status))
+    return rows
+
+
+def parse_stage_thresholds(values):
+    """['fit=0.5', ...] -> {'fit': 0.5}."""
+    thresholds = {}
+    for value in values:
+        name, _, limit = value.partition("=")
+        thresholds[name] = float(limit)
+    return thresholds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--scales", default="100,1000", help="Comma-separated SKU counts")
+    parser.add_argument("--years", type=int, default=3, help="Years of daily history")
+    parser.add_argument("--fit-skus", type=int, default=3, help="SKUs fitted with Prophet")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Workers for data generation")
+    parser.add_argument(
+        "--backend",
+        choices=["postgres", "duckdb"],
+        default="postgres",
+        help="Storage for the ingest/mart/write/publish stages",
+    )
+    parser.add_argument("--embedded", help="Start a pgserver PostgreSQL in this directory")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record py_peak_mb via tracemalloc (slows allocation-heavy stages)",
+    )
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare with results saved by an earlier --json")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument(
+        "--stage-threshold",
+        action="append",
+        default=[],
+        metavar="STAGE=FRACTION",
+        help="Per-stage threshold, e.g. fit=0.5 (repeatable)",
+    )
+    parser.add_argument(
+        "--min-seconds", type=float, default=0.1, help="Ignore slowdowns smaller than this"
+    )
+    args = parser.parse_args()
+
+    from sqlalchemy import text
+
+    engine = schema = None
+    if args.backend == "duckdb":
+        import duckdb
+
+        database = f"duckdb {duckdb.__version__}"
+    else:
+        engine = connect(args.embedded)
+        database = engine.dialect.server_version_info
+        schema = f"bench_{uuid.uuid4().hex[:10]}"
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+
+    results = {
+        "environment": {**environment(), "database": database},
+        "backend": args.backend,
+        "years": args.years,
+        "fit_skus": args.fit_skus,
+        "scales": {},
+    }
+    started = time.perf_counter()
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            for n_skus in [int(s) for s in args.scales.split(",")]:
+                print(f"\n{n_skus:,} SKUs x {args.years} years ({args.backend})")
+                stages = run_scale(engine, schema, n_skus, args, work_dir)
+                results["scales"][str(n_skus)] = {"skus": n_skus, "stages": stages}
+                if engine is not None:
+                    with engine.begin() as conn:
+                        conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+                        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    finally:
+        if engine is not None:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+    print(f"\nTotal {time.perf_counter() - started:.1f}s")
+
+    if args.json:
+        write_json(args.json, results)
+
+    if args.baseline:
+        import json
+
+        baseline = json.loads(Path(args.baseline).read_text())
+        rows = compare(
+            results,
+            baseline,
+            args.threshold,
+            parse_stage_thresholds(args.stage_threshold),
+            args.min_seconds,
+        )
+        print(
+            f"\nvs {args.baseline} ({baseline.get('backend', 'postgres')}, "
+            f"threshold {args.threshold:.0%})"
+        )
+        print(f"  {'scale':>7} {'stage':<14} {'base s':>9} {'new s':>9} {'ratio':>7}  status")
+        for scale, name, base_s, new_s, ratio, status in rows:
+            print(f"  {scale:>7} {name:<14} {base_s:9.2f} {new_s:9.2f} {ratio:7.2f}  {status}")
+        regressions = [row for row in rows if row[-1] == "regression"]
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
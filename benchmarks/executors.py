@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Process vs. thread executors for the per-SKU Prophet stage.
+
+Each executor x worker-count combination runs in a fresh interpreter and reports:
+
+    startup   seconds until every worker can fit (Prophet imported in each loky
+              worker, once for the thread pool)
+    wall      forecast_all wall time on warmed workers, and SKUs/second
+    python    share of fit time spent GIL-bound in Python (metrics["python_seconds"])
+    memory    peak PSS of the whole process tree (parent, workers, cmdstan), so pages
+              shared between processes are not double counted
+
+Linux only (reads /proc).
+
+Usage:
+    python benchmarks/executors.py
+    python benchmarks/executors.py --workers 1,2,4,8 --replicate 4
+    python benchmarks/executors.py --json results.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import warnings
+from pathlib import Path
+
+from common import ROOT, environment, load_sample_history, write_json
+
+from vitamarkets.resources import available_cpus
+
+EXECUTORS = ("processes", "threads")
+
+
+def _children(pid):
+    """Direct child pids of `pid`."""
+    children = []
+    for task in Path(f"/proc/{pid}/task").glob("*"):
+        try:
+            children += [int(c) for c in (task / "children").read_text().split()]
+        except OSError:
+            continue
+    return children
+
+
+def tree_pss_mb(pid=None):
+    """Proportional set size of `pid` and all its descendants, in MB."""
+    total_kb = 0
+    pending = [pid or os.getpid()]
+    while pending:
+        pid = pending.pop()
+        try:
+            for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+                if line.startswith("Pss:"):
+                    total_kb += int(line.split()[1])
+                    break
+        except OSError:
+            continue
+        pending += _children(pid)
+    return total_kb / 1024
+
+
+class PeakMemory:
+    """Sample tree_pss_mb() in the background and keep the maximum."""
+
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, tree_pss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, tree_pss_mb())
+
+
+def warm_up():
+    """Task that makes a worker ready to fit: import the forecasting stack."""
+    import prophet  # noqa: F401
+
+    import vitamarkets.forecasting  # noqa: F401
+
+    return os.getpid()
+
+
+def run_one(executor, n_workers, replicate):
+    """One measurement in this interpreter; returns a result dict."""
+    from joblib import Parallel, delayed, parallel_backend
+    from prophet_lite import replicate as replicate_skus
+
+    from vitamarkets.forecasting import build_holidays, forecast_all
+
+    warnings.filterwarnings("ignore")
+    df = replicate_skus(load_sample_history(), replicate)
+    holidays_df = build_holidays()
+    skus = sorted(df["sku"].unique())
+
+    with PeakMemory() as memory:
+        started = time.perf_counter()
+        backend = "threading" if executor == "threads" else "loky"
+        with parallel_backend(backend):
+            # loky keeps these workers for the forecast_all call below
+            Parallel(n_jobs=n_workers)(delayed(warm_up)() for _ in range(n_workers))
+        startup = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _, metrics, _ = forecast_all(
+            df, skus, holidays_df, "bench", n_jobs=n_workers, executor=executor, verbose=0
+        )
+        wall = time.perf_counter() - started
+
+    fit = sum(m["fit_seconds"] for m in metrics)
+    python = sum(m["python_seconds"] for m in metrics)
+    return {
+        "executor": executor,
+        "workers": n_workers,
+        "skus": len(metrics),
+        "startup_seconds": round(startup, 2),
+        "wall_seconds": round(wall, 2),
+        "skus_per_second": round(len(metrics) / wall, 2),
+        "python_share_pct": round(100 * python / fit, 1) if fit else None,
+        "peak_pss_mb": round(memory.peak),
+    }
+
+
+def main():
+    cpus = available_cpus()
+    default_workers = sorted({1, 2, max(1, cpus // 2), cpus})
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--workers",
+        default=",".join(map(str, default_workers)),
+        help="Comma-separated worker counts",
+    )
+    parser.add_argument("--replicate", type=int, default=2, help="Copies of each sample SKU")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--one", nargs=2, metavar=("EXECUTOR", "WORKERS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.one:
+        print(json.dumps(run_one(args.one[0], int(args.one[1]), args.replicate)))
+        return
+
+    # Workers must import vitamarkets from the repo root
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(ROOT), str(ROOT / "benchmarks")])}
+    results = []
+    for n_workers in (int(w) for w in args.workers.split(",")):
+        for executor in EXECUTORS:
+            out = subprocess.run(
+                [sys.executable, __file__, "--one", executor, str(n_workers)]
+                + ["--replicate", str(args.replicate)],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+            r = results[-1]
+            print(
+                f"{r['executor']:>10} x{r['workers']:<3} startup {r['startup_seconds']:6.2f} s  "
+                f"wall {r['wall_seconds']:7.2f} s  {r['skus_per_second']:5.2f} SKUs/s  "
+                f"python {r['python_share_pct']:5.1f}%  peak PSS {r['peak_pss_mb']:6d} MB",
+                flush=True,
+            )
+
+    if args.json:
+        write_json(args.json, {"environment": environment(), "results": results})
+
+
+if __name__ == "__main__":
+    main()
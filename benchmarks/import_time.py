@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the pipeline CLI.
+
+Runs `python -X importtime` in a fresh interpreter for the CLI module itself and for
+each subcommand's lazy imports (vitamarkets.pipeline.STAGE_IMPORTS), then compares the
+cumulative import time against a per-subcommand budget.
+
+Usage:
+    python benchmarks/import_time.py            # print table
+    python benchmarks/import_time.py --check    # exit 1 if any budget is exceeded
+    python benchmarks/import_time.py --top 15   # show slowest modules per subcommand
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from vitamarkets.pipeline import STAGE_IMPORTS  # noqa: E402
+
+# Budgets in milliseconds of cumulative import time (cold-ish cache, laptop class CPU).
+# "cli" is what every subcommand (and --help) pays before any stage runs.
+BUDGETS_MS = {
+    "cli": 150,
+    "etl": 150,
+    "report": 1500,
+    "forecast": 6000,
+    "metrics": 7000,
+}
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(modules):
+    """
+    Import vitamarkets.pipeline plus `modules` in a fresh interpreter.
+
+    Returns (total_ms, [(cumulative_ms, module), ...]) where total is the sum of the
+    cumulative times of top-level imports.
+    """
+    stmt = "; ".join(["import vitamarkets.pipeline"] + [f"import {m}" for m in modules])
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", stmt],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import failed for {modules}:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    per_module = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative_us = int(match.group(2))
+        depth = len(match.group(3)) - 1
+        per_module.append((cumulative_us / 1000, match.group(4)))
+        if depth == 0:
+            total_us += cumulative_us
+    return total_us / 1000, per_module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time budgets per CLI subcommand")
+    parser.add_argument("--check", action="store_true", help="Exit 1 when a budget is exceeded")
+    parser.add_argument("--top", type=int, default=0, help="Show N slowest modules per subcommand")
+    args = parser.parse_args()
+
+    targets = {"cli": []}
+    targets.update(STAGE_IMPORTS)
+
+    print(f"{'Subcommand':<12} {'Import ms':>10} {'Budget ms':>10}  Status")
+    print("-" * 46)
+    over_budget = []
+    for name, modules in targets.items():
+        total_ms, per_module = measure(modules)
+        budget = BUDGETS_MS.get(name)
+        ok = budget is None or total_ms <= budget
+        if not ok:
+            over_budget.append(name)
+        print(f"{name:<12} {total_ms:>10.0f} {budget or '-':>10}  {'OK' if ok else 'OVER'}")
+        for ms, module in sorted(per_module, reverse=True)[: args.top]:
+            print(f"    {ms:>8.1f} ms  {module}")
+
+    if over_budget and args.check:
+        print(f"\nOver budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
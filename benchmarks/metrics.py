@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Grouped metrics kernel vs. the previous per-SKU sklearn/NumPy calls.
+
+Scores a synthetic 30-day holdout (default 10,000 SKUs) two ways:
+
+    per_sku   a Python loop over SKUs with sklearn MAE/RMSE plus NumPy MAPE, bias and
+              coverage, as forecast_sku and pipeline.compute_metrics used to
+    grouped   vitamarkets.metrics.score(): all eight metrics in one bincount pass,
+              per SKU and per horizon step
+
+Usage:
+    python benchmarks/metrics.py
+    python benchmarks/metrics.py --skus 50000 --json results.json
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from common import environment, write_json
+
+from vitamarkets.metrics import score
+
+
+def synthetic_holdout(n_skus, days=30, seed=0):
+    """Aligned (sku, horizon, y, yhat, yhat_lower, yhat_upper) rows."""
+    rng = np.random.default_rng(seed)
+    level = np.repeat(rng.gamma(2.0, 10.0, n_skus), days)
+    y = rng.poisson(level).astype(float)
+    yhat = level * rng.normal(1.0, 0.1, len(level))
+    return pd.DataFrame(
+        {
+            "sku": np.repeat([f"SKU-{i:05d}" for i in range(n_skus)], days),
+            "horizon": np.tile(np.arange(1, days + 1), n_skus),
+            "y": y,
+            "yhat": yhat,
+            "yhat_lower": yhat * 0.7,
+            "yhat_upper": yhat * 1.3,
+        }
+    )
+
+
+def per_sku(frame):
+    """The previous path: one sklearn/NumPy call set per SKU."""
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+    rows = []
+    for sku, sub in frame.groupby("sku"):
+        y_true, y_pred = sub["y"].values, sub["yhat"].values
+        lower, upper = sub["yhat_lower"].values, sub["yhat_upper"].values
+        rows.append(
+            {
+                "sku": sku,
+                "test_mae": mean_absolute_error(y_true, y_pred),
+                "test_rmse": np.sqrt(mean_squared_error(y_true, y_pred)),
+                "test_mape_pct": np.mean(np.abs((y_true - y_pred) / np.maximum(y_true, 1))) * 100,
+                "test_bias": np.mean(y_pred - y_true),
+                "test_coverage_pct": np.mean((y_true >= lower) & (y_true <= upper)) * 100,
+            }
+        )
+    return pd.DataFrame(rows).set_index("sku")
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--skus", type=int, default=10_000)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    frame = synthetic_holdout(args.skus)
+    print(f"{args.skus:,} SKUs x 30 holdout days: {len(frame):,} rows")
+
+    legacy, legacy_s = timed(per_sku, frame)
+    grouped, grouped_s = timed(score, frame)
+    _, horizon_s = timed(score, frame, by="horizon")
+
+    np.testing.assert_allclose(grouped["mae"], legacy["test_mae"])
+    np.testing.assert_allclose(grouped["mape_pct"], legacy["test_mape_pct"])
+    np.testing.assert_allclose(grouped["coverage_pct"], legacy["test_coverage_pct"])
+
+    print(f"  per_sku (5 metrics)          {legacy_s:8.3f} s")
+    print(f"  grouped by sku (8 metrics)   {grouped_s:8.3f} s   {legacy_s / grouped_s:6.0f}x")
+    print(f"  grouped by horizon           {horizon_s:8.3f} s")
+
+    if args.json:
+        write_json(
+            args.json,
+            {
+                "environment": environment(),
+                "skus": args.skus,
+                "seconds": {"per_sku": legacy_s, "grouped": grouped_s, "by_horizon": horizon_s},
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Pooled group fits vs. per-SKU Prophet on the sample dataset.
+
+Runs per-SKU Prophet on the SKUs that pass the standard eligibility filter and the
+pooled engine (vitamarkets.pooled, grouped by category) on the SKUs that pass the
+relaxed pooled filter, then reports wall time, peak memory (this process and the
+cmdstan child processes) and holdout accuracy per SKU. Needs CmdStan.
+
+Usage:
+    python benchmarks/pooled.py
+    python benchmarks/pooled.py --skip-prophet
+    python benchmarks/pooled.py --json results.json
+"""
+
+import argparse
+import resource
+import time
+import warnings
+
+import pandas as pd
+from common import environment, load_sample_groups, load_sample_mart, run_prophet, write_json
+
+from vitamarkets import pooled
+from vitamarkets.config import POOLED_MIN_N_DAYS, POOLED_MIN_SPAN_DAYS
+from vitamarkets.forecasting import build_holidays, select_eligible_skus
+from vitamarkets.preprocessing import preprocess
+
+ACCURACY_COLUMNS = ["test_mape_pct", "test_mae", "test_coverage_pct"]
+
+
+def peak_rss_mb():
+    """Peak RSS of this process and of its largest finished child (Linux: KiB)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return round(own, 1), round(children, 1)
+
+
+def run_pooled(df, sku_groups, holidays_df):
+    started = time.perf_counter()
+    results, failed = pooled.forecast_pooled(df, sku_groups, holidays_df, "bench")
+    for reason in failed:
+        print(f"  ! {reason}")
+    return pd.DataFrame([m for _, m in results]), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--skip-prophet", action="store_true")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    prepared = preprocess(load_sample_mart())
+    df, stats = prepared["history"], prepared["stats"]
+    holidays_df = build_holidays()
+    standard = select_eligible_skus(stats)
+    relaxed = select_eligible_skus(
+        stats, min_span_days=POOLED_MIN_SPAN_DAYS, min_n_days=POOLED_MIN_N_DAYS
+    )
+    print(f"Eligible SKUs: {len(standard)} per-SKU Prophet, {len(relaxed)} pooled")
+
+    seconds, memory, frames = {}, {}, {}
+    # Pooled first so the child-process peak reflects cmdstan's pooled fits
+    pooled_metrics, seconds["pooled"] = run_pooled(
+        df[df["sku"].isin(relaxed)], load_sample_groups(), holidays_df
+    )
+    memory["pooled"] = peak_rss_mb()
+    frames["pooled"] = pooled_metrics.set_index("sku")[ACCURACY_COLUMNS]
+
+    if not args.skip_prophet:
+        prophet_metrics, seconds["prophet"] = run_prophet(df[df["sku"].isin(standard)], holidays_df)
+        memory["prophet"] = peak_rss_mb()
+        frames["prophet"] = prophet_metrics.set_index("sku")[ACCURACY_COLUMNS]
+
+    print()
+    for engine, secs in seconds.items():
+        own, child = memory[engine]
+        n = len(frames[engine])
+        print(
+            f"  {engine:<8} {secs:8.2f} s  {n / secs:6.2f} SKUs/s  "
+            f"peak RSS {own:.0f} MB (largest cmdstan child {child:.0f} MB)"
+        )
+
+    comparison = pd.concat(frames, axis=1)
+    print("\nHoldout accuracy per SKU (blank = not eligible for that engine):")
+    print(comparison.round(1).to_string())
+    print("\nMedians over SKUs both engines forecast:")
+    print(comparison.dropna().median().unstack(0).round(1).to_string())
+
+    if args.json:
+        write_json(
+            args.json,
+            {
+                "environment": environment(),
+                "seconds": seconds,
+                "peak_rss_mb": memory,
+                "per_sku": comparison.round(3).to_dict(),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
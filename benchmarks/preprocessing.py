@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Vectorized preprocessing vs. the previous per-SKU callback path at scale.
+
+Generates a synthetic mart history (default 10,000 SKUs x 8 years of days, ~2% of
+SKU-days missing) and times:
+
+    legacy       clean + eligibility stats + groupby("sku").apply(clip_outliers), the
+                 code previously copied across the forecasting entry points
+    preprocess   vitamarkets.preprocessing.preprocess() with each gap fill policy
+
+Usage:
+    python benchmarks/preprocessing.py
+    python benchmarks/preprocessing.py --skus 1000 --years 4 --skip-legacy
+    python benchmarks/preprocessing.py --json results.json
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from common import environment, write_json
+
+from vitamarkets.forecasting import select_eligible_skus
+from vitamarkets.preprocessing import FILL_POLICIES, preprocess
+
+
+def synthetic_history(n_skus, years, missing=0.02, seed=0):
+    """Mart-like rows (ds, sku, y, is_promo) with random gaps; sku is categorical."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2017-01-01", periods=365 * years, freq="D")
+    skus = pd.Categorical.from_codes(
+        np.repeat(np.arange(n_skus, dtype=np.int32), len(dates)),
+        categories=[f"SKU-{i:05d}" for i in range(n_skus)],
+    )
+    level = np.repeat(rng.gamma(2.0, 10.0, n_skus), len(dates))
+    df = pd.DataFrame(
+        {
+            "ds": np.tile(dates.to_numpy(), n_skus),
+            "sku": skus,
+            "y": rng.poisson(level).astype(float),
+            "is_promo": (rng.random(len(level)) < 0.05).astype(np.int8),
+        }
+    )
+    return df[rng.random(len(df)) >= missing].reset_index(drop=True)
+
+
+def legacy_preprocess(df_raw):
+    """The pre-refactor path: per-SKU Python callback for the 99th-percentile clip."""
+    df = df_raw.copy()
+    df = df[df["y"] >= 0].dropna(subset=["y", "ds"])
+    df["ds"] = pd.to_datetime(df["ds"])
+    stats = (
+        df.groupby("sku", observed=True)
+        .agg(
+            first_date=("ds", "min"),
+            last_date=("ds", "max"),
+            total_units=("y", "sum"),
+            n_days=("ds", "nunique"),
+        )
+        .reset_index()
+    )
+    stats["span_days"] = (stats["last_date"] - stats["first_date"]).dt.days
+
+    def clip_outliers(sub):
+        clip_val = sub["y"].quantile(0.99)
+        sub = sub.copy()
+        sub["y"] = sub["y"].clip(upper=clip_val * 1.2)
+        return sub
+
+    return df.groupby("sku", group_keys=False, observed=True).apply(clip_outliers), stats
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--skus", type=int, default=10_000)
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--skip-legacy", action="store_true")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    df, gen_seconds = timed(synthetic_history, args.skus, args.years)
+    print(
+        f"{args.skus:,} SKUs x {args.years} years: {len(df):,} rows (generated in {gen_seconds:.1f}s)"
+    )
+
+    results = {}
+    if not args.skip_legacy:
+        (_, stats), results["legacy"] = timed(legacy_preprocess, df)
+        del stats
+    for policy in FILL_POLICIES:
+        prepared, results[f"preprocess[{policy}]"] = timed(preprocess, df, fill=policy)
+        eligible = select_eligible_skus(prepared["stats"])
+        rows = len(prepared["history"])
+        mb = prepared["history"].memory_usage(deep=True).sum() / 1e6
+        print(
+            f"  fill={policy:<12} {rows:,} SKU-days, {len(eligible):,} eligible SKUs, "
+            f"{mb:,.0f} MB"
+        )
+        del prepared
+
+    print()
+    for name, seconds in results.items():
+        print(f"  {name:<24} {seconds:8.2f} s   {len(df) / seconds / 1e6:6.2f} M rows/s")
+    if "legacy" in results:
+        print(f"  speedup (fill=none)      {results['legacy'] / results['preprocess[none]']:8.1f}x")
+
+    if args.json:
+        write_json(
+            args.json,
+            {
+                "environment": environment(),
+                "skus": args.skus,
+                "years": args.years,
+                "rows": len(df),
+                "seconds": results,
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Prophet vs. the batched lite engine on the sample dataset.
+
+Runs both engines on the same SKUs (sequential per-SKU Prophet via forecast_sku, and
+one prophet_lite.forecast_batch call) and reports holdout accuracy per SKU plus wall
+time and SKUs/second for each.
+
+Usage:
+    python benchmarks/prophet_lite.py
+    python benchmarks/prophet_lite.py --skip-prophet          # lite timing only
+    python benchmarks/prophet_lite.py --replicate 50 --skip-prophet   # 50 varied copies
+    python benchmarks/prophet_lite.py --json results.json
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from common import environment, load_sample_history, run_prophet, write_json
+
+from vitamarkets import prophet_lite
+from vitamarkets.forecasting import build_holidays
+
+ACCURACY_COLUMNS = ["test_mape_pct", "test_mae", "test_coverage_pct"]
+
+
+def replicate(df, copies, seed=0):
+    """
+    `copies` renamed copies of every SKU, to measure throughput at scale.
+
+    Each copy drops its own random ~5% of days, ends up to two weeks earlier and is
+    rescaled, so copies have distinct observed days and holdout cutoffs (per-SKU masks)
+    like real SKUs do, rather than sharing one fit mask.
+    """
+    if copies <= 1:
+        return df
+    rng = np.random.default_rng(seed)
+    last = df.groupby("sku")["ds"].transform("max")
+    frames = []
+    for i in range(copies):
+        keep = (rng.random(len(df)) > 0.05) & (
+            df["ds"] <= last - pd.Timedelta(days=int(rng.integers(0, 15)))
+        )
+        frames.append(df[keep].assign(sku=df["sku"] + f" #{i}", y=df["y"] * rng.uniform(0.5, 2.0)))
+    return pd.concat(frames, ignore_index=True)
+
+
+def run_lite(df, holidays_df):
+    started = time.perf_counter()
+    results, _ = prophet_lite.forecast_batch(df, holidays_df, "bench")
+    return pd.DataFrame([m for _, m in results]), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--skip-prophet", action="store_true")
+    parser.add_argument(
+        "--replicate",
+        type=int,
+        default=1,
+        help="Copies of each SKU, each with its own gaps and end date",
+    )
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    df = replicate(load_sample_history(), args.replicate)
+    holidays_df = build_holidays()
+    n_skus = df["sku"].nunique()
+
+    timings = {}
+    lite_metrics, timings["lite"] = run_lite(df, holidays_df)
+    frames = {"lite": lite_metrics.set_index("sku")[ACCURACY_COLUMNS]}
+    if not args.skip_prophet:
+        prophet_metrics, timings["prophet"] = run_prophet(df, holidays_df)
+        frames["prophet"] = prophet_metrics.set_index("sku")[ACCURACY_COLUMNS]
+
+    print(f"\n{n_skus} SKUs, {len(df):,} rows")
+    for engine, seconds in timings.items():
+        print(f"  {engine:<8} {seconds:8.2f} s   {n_skus / seconds:10.1f} SKUs/s")
+    if "prophet" in timings:
+        print(f"  speedup  {timings['prophet'] / timings['lite']:8.1f}x")
+
+    comparison = pd.concat(frames, axis=1)
+    if args.replicate == 1:
+        print("\nHoldout accuracy per SKU:")
+        print(comparison.round(1).to_string())
+    print("\nMedians:")
+    print(comparison.median().unstack(0).round(1).to_string())
+
+    if args.json:
+        write_json(
+            args.json,
+            {
+                "environment": environment(),
+                "n_skus": n_skus,
+                "rows": len(df),
+                "seconds": timings,
+                "median": comparison.median().unstack(0).to_dict(),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo service-level simulation: throughput and memory vs. chunk budget.
+
+Builds synthetic run output (default 5,000 SKUs, 365 days of actuals + fitted rows,
+90 forecast days) and runs vitamarkets.simulation.simulate() with a 14-day lead time
+under several per-chunk memory budgets, reporting SKU-simulations/sec (SKU x sample
+paths per second of simulation), the chunk array size and peak traced memory (which
+includes the pandas setup shared by every budget).
+
+Usage:
+    python benchmarks/simulation.py
+    python benchmarks/simulation.py --skus 20000 --samples 2000 --json results.json
+"""
+
+import argparse
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from common import environment, write_json
+
+from vitamarkets.simulation import simulate
+
+BUDGETS_MB = (16, 64, 256)
+
+
+def synthetic_run(n_skus, days=365, horizon=90, seed=0):
+    """Actual, in-sample fitted and future forecast rows as a run's all_forecasts."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=days + horizon, freq="D")
+    skus = np.array([f"SKU-{i:05d}" for i in range(n_skus)])
+    level = rng.gamma(2.0, 10.0, n_skus)
+    fitted = np.repeat(level, days + horizon)
+    forecasts = pd.DataFrame(
+        {
+            "ds": np.tile(dates, n_skus),
+            "sku": np.repeat(skus, days + horizon),
+            "yhat": fitted,
+            "yhat_lower": fitted * 0.7,
+            "yhat_upper": fitted * 1.3,
+            "type": "forecast",
+        }
+    )
+    actual = rng.poisson(np.repeat(level, days)).astype(float)
+    actuals = pd.DataFrame(
+        {
+            "ds": np.tile(dates[:days], n_skus),
+            "sku": np.repeat(skus, days),
+            "yhat": actual,
+            "yhat_lower": actual,
+            "yhat_upper": actual,
+            "type": "actual",
+        }
+    )
+    return pd.concat([actuals, forecasts], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--skus", type=int, default=5_000)
+    parser.add_argument("--samples", type=int, default=1_000)
+    parser.add_argument("--lead-time", type=int, default=14)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    run = synthetic_run(args.skus)
+    positions = pd.DataFrame(
+        {
+            "sku": run["sku"].unique(),
+            "channel": "ALL",
+            "country": "ALL",
+            "on_hand": 0.0,
+            "on_order": 0.0,
+            "lead_time_days": args.lead_time,
+            "service_level": np.nan,
+        }
+    )
+    print(
+        f"{args.skus:,} SKUs x {args.samples:,} samples x {args.lead_time}-day lead time "
+        f"({args.skus * args.samples:,} simulations)"
+    )
+
+    results = {}
+    for budget in BUDGETS_MB:
+        tracemalloc.start()
+        _, stats = simulate(run, positions, n_samples=args.samples, max_bytes=budget * 2**20)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+        results[f"{budget}MB"] = {**stats, "peak_mb": peak_mb}
+        print(
+            f"  budget {budget:4d} MB  {stats['chunks']:4d} chunks of {stats['chunk_mb']:5.1f} MB  "
+            f"setup {stats['setup_seconds']:5.2f} s  simulate {stats['simulate_seconds']:5.2f} s  "
+            f"{stats['sims_per_second']:11,.0f} sims/s  peak {peak_mb:5.0f} MB"
+        )
+
+    if args.json:
+        write_json(
+            args.json,
+            {
+                "environment": environment(),
+                "skus": args.skus,
+                "samples": args.samples,
+                "lead_time_days": args.lead_time,
+                "budgets": results,
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
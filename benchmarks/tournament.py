@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Cheap-first tournament vs. Prophet for every SKU on the sample dataset.
+
+Scores the cheap candidates (tournament.forecast_cheap), fits Prophet only on the SKUs
+no cheap model wins, and compares against fitting Prophet on all SKUs: share of SKUs
+that skipped Prophet, wall time of both strategies and median holdout MAPE.
+
+Usage:
+    python benchmarks/tournament.py
+    python benchmarks/tournament.py --max-mape 15
+    python benchmarks/tournament.py --json results.json
+"""
+
+import argparse
+import time
+import warnings
+
+import pandas as pd
+from common import environment, load_sample_history, run_prophet, write_json
+
+from vitamarkets import tournament
+from vitamarkets.forecasting import build_holidays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--max-mape", type=float, default=tournament.DEFAULT_MAX_MAPE)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    df = load_sample_history()
+    holidays_df = build_holidays()
+
+    started = time.perf_counter()
+    results, prophet_skus, scores, _ = tournament.forecast_cheap(
+        df, holidays_df, "bench", args.max_mape
+    )
+    cheap_seconds = time.perf_counter() - started
+
+    all_prophet, all_seconds = run_prophet(df[df["sku"].isin(scores.index)], holidays_df)
+    all_prophet = all_prophet.set_index("sku")
+    # Prophet results for the SKUs the tournament hands over are the same fits
+    tournament_seconds = cheap_seconds + all_prophet.loc[prophet_skus, "fit_seconds"].sum()
+    mixed = pd.concat(
+        [
+            pd.Series({m["sku"]: m["test_mape_pct"] for _, m in results}),
+            all_prophet.loc[prophet_skus, "test_mape_pct"],
+        ]
+    )
+    summary = tournament.summarize(scores, cheap_seconds, all_prophet["fit_seconds"])
+
+    print(f"\n{len(scores)} SKUs, threshold {args.max_mape:g}% holdout MAPE")
+    print(scores.round(1).to_string())
+    print(
+        f"\nSkipped Prophet: {summary['skipped_prophet']}/{summary['skus']} SKUs "
+        f"({summary['skipped_share_pct']}%) {summary['winners']}"
+    )
+    print(
+        f"  prophet-all  {all_seconds:8.2f} s   median MAPE {all_prophet['test_mape_pct'].median():5.1f}%"
+    )
+    print(f"  tournament   {tournament_seconds:8.2f} s   median MAPE {mixed.median():5.1f}%")
+    print(f"  saved        {all_seconds - tournament_seconds:8.2f} s")
+
+    if args.json:
+        write_json(
+            args.json,
+            {
+                "environment": environment(),
+                "max_mape": args.max_mape,
+                "summary": summary,
+                "seconds": {"prophet_all": all_seconds, "tournament": tournament_seconds},
+                "median_mape": {
+                    "prophet_all": all_prophet["test_mape_pct"].median(),
+                    "tournament": mixed.median(),
+                },
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
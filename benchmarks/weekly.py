@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Weekly-grain vs. daily Prophet fits on the sample dataset.
+
+Forecasts every SKU twice with forecast_sku (grain="daily" and grain="weekly") and
+reports per-SKU fit seconds and daily holdout MAPE/coverage, so SKUs that lose little
+accuracy at weekly grain can be moved to --weekly-skus.
+
+Usage:
+    python benchmarks/weekly.py
+    python benchmarks/weekly.py --json results.json
+"""
+
+import argparse
+import warnings
+
+import pandas as pd
+from common import environment, load_sample_history, write_json
+
+from vitamarkets.forecasting import build_holidays, forecast_sku
+
+COLUMNS = ["fit_seconds", "test_mape_pct", "test_coverage_pct"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    df = load_sample_history()
+    holidays_df = build_holidays()
+
+    rows = {}
+    for grain in ("daily", "weekly"):
+        for sku, sub in df.groupby("sku"):
+            _, outcome = forecast_sku(sub, sku, holidays_df, "bench", grain=grain)
+            if isinstance(outcome, dict):
+                rows[grain, sku] = {c: outcome[c] for c in COLUMNS}
+    comparison = pd.DataFrame(rows).T.unstack(0).swaplevel(axis=1).sort_index(axis=1)
+    speedup = comparison["daily"]["fit_seconds"] / comparison["weekly"]["fit_seconds"]
+    comparison[("weekly", "speedup")] = speedup
+
+    print(f"\n{len(comparison)} SKUs")
+    print(comparison.round(2).to_string())
+    totals = comparison.xs("fit_seconds", axis=1, level=1).sum()
+    print(
+        f"\nTotal fit time: daily {totals['daily']:.1f} s, weekly {totals['weekly']:.1f} s "
+        f"({totals['daily'] / totals['weekly']:.1f}x)"
+    )
+    print(
+        "Median MAPE: "
+        + ", ".join(
+            f"{g} {comparison[g]['test_mape_pct'].median():.1f}%" for g in ("daily", "weekly")
+        )
+    )
+
+    if args.json:
+        write_json(
+            args.json,
+            {
+                "environment": environment(),
+                "total_fit_seconds": totals.to_dict(),
+                "per_sku": {
+                    sku: {f"{g}_{c}": v for (g, c), v in row.items()}
+                    for sku, row in comparison.iterrows()
+                },
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,15 @@ import pandas as pd
 from sqlalchemy import text
 
 from db import get_engine  # <- central, secure DB connector (loads .env inside)
+from vitamarkets.rollups import refresh_rollups
+from vitamarkets.series_stats import refresh_series_stats
 
 
 def load_actuals(csv_path: str = "data/actuals_latest.csv") -> int:
     """
-    Read the latest actuals CSV, validate/clean, and load into public.mart_sales_summary.
+    Read the latest actuals CSV, validate/clean, and load into public.mart_sales_summary,
+    then rebuild public.sku_series_stats (forecast eligibility) and the KPI rollup
+    tables (dashboards).
     Returns the number of rows loaded.
     """
     if not os.path.exists(csv_path):
@@ -58,6 +62,15 @@ def load_actuals(csv_path: str = "data/actuals_latest.csv") -> int:
         )
 
     print(f"[OK] Loaded {len(df):,} rows into public.mart_sales_summary")
+
+    # 4) Eligibility stats: the replace may restate or drop past days, which an
+    # incremental merge (only days after each SKU's last_date) would miss
+    updated = refresh_series_stats(engine, full_refresh=True)
+    print(f"[OK] Rebuilt public.sku_series_stats for {updated:,} SKUs")
+
+    # 5) KPI rollups: rebuilt for the same reason
+    written = refresh_rollups(engine, full_refresh=True)
+    print(f"[OK] Rebuilt {sum(written.values()):,} KPI rollup rows")
     return len(df)
 
 
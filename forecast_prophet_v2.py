@@ -7,531 +7,13 @@ DO NOT DELETE — This is the upgraded parallel version with:
 • Multiplicative seasonality + better outlier handling
 • Full logging, run_id versioning, error resilience
 
-Old v1 remains in prophet_improved.py for rollback and comparison.
-"""
-
-import logging
-import os
-import sys
-import warnings
-from datetime import datetime
-
-import numpy as np
-import pandas as pd
-from joblib import Parallel, delayed
-from prophet import Prophet
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-from sqlalchemy import text
-
-# Force UTF-8 output on Windows to prevent UnicodeEncodeError
-if sys.platform == "win32":
-    sys.stdout.reconfigure(encoding="utf-8")
-
-warnings.filterwarnings("ignore")
-
-from db import get_engine  # noqa: E402
-
-# ------------------- CONFIG -------------------
-FORECAST_DAYS = 90
-TEST_DAYS_CV = 30  # For final holdout
-RUN_ID = datetime.now().strftime("%Y%m%d_%H%M")
-OUTPUT_DIR = f"prophet_forecasts_{RUN_ID}"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# Table naming strategy
-USE_VERSIONED_TABLES = (
-    True  # If True: prophet_forecasts_20251207_1915; If False: simple_prophet_forecast
-)
-STABLE_VIEW_FORECASTS = "v_forecast_daily_latest"
-STABLE_VIEW_METRICS = "v_forecast_sku_metrics_latest"
-
-# Purchase recommendation parameters
-SUPPLIER_LEAD_TIME_DAYS = 14  # Typical supplier lead time
-SERVICE_LEVEL_Z_SCORE = 1.28  # 90% service level (z-score)
-ON_HAND_INVENTORY = {  # Simulated current inventory by SKU
-    "Flagship Growth": 450,
-    "New Launch": 200,
-    "Classic Seasonal": 300,
-    "Slow Decliner": 150,
-    "Promo Dependent": 250,
-    "Supply Disrupted": 100,
-    "Viral Spike": 180,
-    "Cannibalized": 120,
-}
-
-# Logging setup
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    handlers=[
-        logging.FileHandler(os.path.join(OUTPUT_DIR, "forecast_run.log")),
-        logging.StreamHandler(),
-    ],
-)
-log = logging.getLogger()
+The implementation lives in vitamarkets.forecasting so it can be imported as a
+library; this file is the command-line wrapper.
 
-log.info("=" * 70)
-log.info("VITA MARKETS FORECASTING PIPELINE v2.0")
-log.info("=" * 70)
-
-# ------------------- DB CONNECTION -------------------
-engine = get_engine()
-
-# ------------------- 1. DATA INGESTION -------------------
-log.info("[1/7] Loading data from mart_sales_summary...")
-query = """
-SELECT
-    date::date as ds,
-    sku,
-    total_units_sold as y,
-    COALESCE(promo_flag, 0) as is_promo
-FROM mart_sales_summary
-WHERE date >= '2018-01-01'
-ORDER BY sku, date
+Old v1 remains in prophet_improved.py for rollback and comparison.
 """
-df_raw = pd.read_sql(query, engine)
-log.info(f"   -> Loaded {len(df_raw):,} rows across {df_raw['sku'].nunique()} SKUs")
-
-# ------------------- 2. PREPROCESSING -------------------
-log.info("[2/7] Cleaning & preparing data...")
-df = df_raw.copy()
-df = df[df["y"] >= 0].dropna(subset=["y", "ds"])
-df["ds"] = pd.to_datetime(df["ds"])
-
-log.info(f"   -> {len(df):,} rows after cleaning")
-
-# ------------------- 3. ELIGIBLE SKUs FILTER -------------------
-log.info("[3/7] Filtering eligible SKUs (730+ days span, 500+ units)...")
-sku_stats = (
-    df.groupby("sku")
-    .agg(
-        first_date=("ds", "min"),
-        last_date=("ds", "max"),
-        total_units=("y", "sum"),
-        n_days=("ds", "nunique"),
-    )
-    .reset_index()
-)
-sku_stats["span_days"] = (sku_stats["last_date"] - sku_stats["first_date"]).dt.days
-
-eligible_skus = sku_stats[
-    (sku_stats["span_days"] >= 730)
-    & (sku_stats["total_units"] > 500)
-    & (sku_stats["n_days"] >= 700)
-]["sku"].tolist()
-
-log.info(f"   -> {len(eligible_skus)} SKUs eligible out of {sku_stats['sku'].nunique()} total")
-
-# ------------------- 4. DYNAMIC HOLIDAYS -------------------
-log.info("[4/7] Building dynamic holiday calendar (2018–2026)...")
-
-holiday_events = [
-    ("Black Friday", "11-29", 7),
-    ("Christmas", "12-25", 10),
-    ("New Year", "01-01", 7),
-    ("Cyber Monday", "12-02", 5),
-    ("Thanksgiving", "11-28", 5),
-]
-
-holidays_list = []
-for name, date_str, window in holiday_events:
-    for year in range(2018, 2027):
-        try:
-            date = pd.to_datetime(f"{year}-{date_str}")
-            holidays_list.append(
-                {
-                    "holiday": name,
-                    "ds": date,
-                    "lower_window": -window,
-                    "upper_window": window,
-                }
-            )
-        except Exception:
-            continue
-
-holidays_df = pd.DataFrame(holidays_list)
-log.info(f"   -> {len(holidays_df)} holiday occurrences added")
-
-
-# ------------------- 5. PARALLEL FORECASTING FUNCTION -------------------
-def forecast_sku(sku_id):
-    """Forecast a single SKU with error handling."""
-    try:
-        sub = df[df["sku"] == sku_id].sort_values("ds").reset_index(drop=True)
-        if len(sub) < 365:
-            return None, f"Insufficient data for {sku_id}"
-
-        # Clip extreme outliers (99th percentile)
-        q99 = sub["y"].quantile(0.99)
-        sub = sub.copy()
-        sub["y"] = sub["y"].clip(upper=q99 * 1.2)
-
-        # Check for regressor availability
-        has_promo = "is_promo" in sub.columns and sub["is_promo"].nunique() > 1
-
-        # Final holdout evaluation (last 30 days)
-        cutoff = sub["ds"].max() - pd.Timedelta(days=TEST_DAYS_CV)
-        train_cv = sub[sub["ds"] <= cutoff]
-        test_cv = sub[sub["ds"] > cutoff]
-
-        if len(test_cv) < 10:
-            return None, f"Insufficient test data ({len(test_cv)} days) for {sku_id}"
-
-        # Fit model on training data
-        m = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=True,
-            daily_seasonality=False,
-            holidays=holidays_df,
-            seasonality_mode="multiplicative",
-            interval_width=0.80,
-            changepoint_prior_scale=0.05,
-            seasonality_prior_scale=10.0,
-        )
-
-        if has_promo:
-            m.add_regressor("is_promo", standardize=False)
-
-        m.fit(train_cv[["ds", "y"] + (["is_promo"] if has_promo else [])])
-
-        # Test set prediction
-        future_test = test_cv[["ds"]].copy()
-        if has_promo:
-            future_test = future_test.merge(sub[["ds", "is_promo"]], on="ds", how="left")
-        forecast_test = m.predict(future_test)
-
-        y_true = test_cv["y"].values
-        y_pred = forecast_test["yhat"].values
-        lower = forecast_test["yhat_lower"].values
-        upper = forecast_test["yhat_upper"].values
-
-        mae = mean_absolute_error(y_true, y_pred)
-        rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-        mape = np.mean(np.abs((y_true - y_pred) / np.where(y_true == 0, 1, y_true))) * 100
-        bias = np.mean(y_pred - y_true)
-        coverage = np.mean((y_true >= lower) & (y_true <= upper)) * 100
-
-        # Final production forecast on full data
-        m_full = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=True,
-            daily_seasonality=False,
-            holidays=holidays_df,
-            seasonality_mode="multiplicative",
-            interval_width=0.80,
-            changepoint_prior_scale=0.05,
-            seasonality_prior_scale=10.0,
-        )
-
-        if has_promo:
-            m_full.add_regressor("is_promo", standardize=False)
-
-        m_full.fit(sub[["ds", "y"] + (["is_promo"] if has_promo else [])])
-
-        future = m_full.make_future_dataframe(periods=FORECAST_DAYS)
-        if has_promo:
-            # Forward-fill promo flag
-            last_promo = sub["is_promo"].iloc[-1]
-            future = future.merge(sub[["ds", "is_promo"]], on="ds", how="left")
-            future["is_promo"] = future["is_promo"].fillna(last_promo)
-
-        forecast_full = m_full.predict(future)
-        forecast_full["sku"] = sku_id
-        forecast_full["run_id"] = RUN_ID
-
-        metrics = {
-            "sku": sku_id,
-            "run_id": RUN_ID,
-            "n_train": len(train_cv),
-            "n_test": len(test_cv),
-            "test_mae": mae,
-            "test_rmse": rmse,
-            "test_mape_pct": mape,
-            "test_bias": bias,
-            "test_coverage_pct": coverage,
-        }
-
-        out_forecast = forecast_full[
-            ["ds", "yhat", "yhat_lower", "yhat_upper", "sku", "run_id"]
-        ].copy()
-        out_forecast["type"] = "forecast"
-
-        # Add actuals overlay
-        actuals = sub[["ds", "y"]].copy()
-        actuals["yhat"] = actuals["y"]
-        actuals["yhat_lower"] = actuals["y"]
-        actuals["yhat_upper"] = actuals["y"]
-        actuals["sku"] = sku_id
-        actuals["run_id"] = RUN_ID
-        actuals["type"] = "actual"
-        actuals = actuals[["ds", "yhat", "yhat_lower", "yhat_upper", "sku", "run_id", "type"]]
-
-        combined = pd.concat([actuals, out_forecast], ignore_index=True)
-
-        return combined, metrics
-
-    except Exception as e:
-        return None, f"Error on {sku_id}: {str(e)}"
-
-
-# ------------------- 6. RUN IN PARALLEL -------------------
-log.info(f"[5/7] Forecasting {len(eligible_skus)} SKUs in parallel...")
-
-results = Parallel(n_jobs=-1, backend="loky", verbose=10)(
-    delayed(forecast_sku)(sku) for sku in eligible_skus
-)
-
-forecast_dfs = [r[0] for r in results if r[0] is not None]
-metrics_list = [r[1] for r in results if isinstance(r[1], dict)]
-
-failed_skus = [r[1] for r in results if isinstance(r[1], str)]
-if failed_skus:
-    log.warning(f"{len(failed_skus)} SKUs failed:")
-    for fail in failed_skus[:5]:
-        log.warning(f"  {fail}")
-
-# ------------------- 7. EXPORT RESULTS -------------------
-log.info("[6/7] Exporting forecasts and metrics...")
-
-if forecast_dfs:
-    all_forecasts = pd.concat(forecast_dfs, ignore_index=True)
-    metrics_df = pd.DataFrame(metrics_list)
-
-    # Save locally
-    all_forecasts.to_csv(os.path.join(OUTPUT_DIR, "prophet_forecasts.csv"), index=False)
-    metrics_df.to_csv(os.path.join(OUTPUT_DIR, "forecast_error_metrics.csv"), index=False)
-
-    # Save to PostgreSQL (versioned or fixed table names)
-    log.info("[7/7] Writing results to PostgreSQL...")
-
-    if USE_VERSIONED_TABLES:
-        table_forecasts = f"prophet_forecasts_{RUN_ID}"
-        table_metrics = f"prophet_forecast_metrics_{RUN_ID}"
-    else:
-        table_forecasts = "simple_prophet_forecast"
-        table_metrics = "forecast_error_metrics"
-
-    all_forecasts.to_sql(table_forecasts, engine, schema="public", if_exists="replace", index=False)
-    metrics_df.to_sql(table_metrics, engine, schema="public", if_exists="replace", index=False)
-
-    # Sanity check: verify written data
-    with engine.connect() as conn:
-        result = conn.execute(text(f"SELECT COUNT(*), MAX(ds) FROM public.{table_forecasts}"))
-        row = result.fetchone()
-        row_count, max_date = row[0], row[1]
-        log.info(f"   -> Wrote {row_count:,} rows to {table_forecasts}, max date: {max_date}")
-
-        result_metrics = conn.execute(text(f"SELECT COUNT(*) FROM public.{table_metrics}"))
-        metrics_count = result_metrics.scalar()
-        log.info(f"   -> Wrote {metrics_count:,} rows to {table_metrics}")
-
-    # Create/update stable views pointing to latest run
-    log.info(
-        f"   -> Creating stable views ({STABLE_VIEW_FORECASTS}, {STABLE_VIEW_METRICS}) and compatibility views..."
-    )
-    with engine.begin() as conn:
-        # Drop compatibility views first to allow column shape changes safely
-        conn.execute(text("DROP VIEW IF EXISTS public.simple_prophet_forecast"))
-        conn.execute(text("DROP VIEW IF EXISTS public.forecast_error_metrics"))
-        conn.execute(text(f"DROP VIEW IF EXISTS public.{STABLE_VIEW_FORECASTS}"))
-        conn.execute(text(f"DROP VIEW IF EXISTS public.{STABLE_VIEW_METRICS}"))
-
-        # View 1: Latest forecast data (stable contract)
-        conn.execute(
-            text(
-                f"""
-            CREATE OR REPLACE VIEW public.{STABLE_VIEW_FORECASTS} AS
-            SELECT
-                CAST(ds AS date) AS forecast_date,
-                sku,
-                yhat AS predicted_units,
-                yhat_lower AS lower_bound_80pct,
-                yhat_upper AS upper_bound_80pct,
-                type AS data_type,
-                run_id AS forecast_run_id
-            FROM public.{table_forecasts}
-            ORDER BY sku, ds
-        """
-            )
-        )
-
-        # View 2: Latest metrics (stable contract)
-        conn.execute(
-            text(
-                f"""
-            CREATE OR REPLACE VIEW public.{STABLE_VIEW_METRICS} AS
-            SELECT
-                sku,
-                test_mae AS mean_absolute_error,
-                test_rmse AS root_mean_squared_error,
-                test_mape_pct AS mean_absolute_pct_error,
-                test_bias AS forecast_bias,
-                test_coverage_pct AS prediction_interval_coverage_pct,
-                n_train AS training_days,
-                n_test AS test_days,
-                run_id AS forecast_run_id
-            FROM public.{table_metrics}
-            ORDER BY test_mape_pct ASC
-        """
-            )
-        )
-
-        # Compatibility view: legacy Power BI queries still hit simple_prophet_forecast
-        conn.execute(
-            text(
-                """
-            CREATE OR REPLACE VIEW public.simple_prophet_forecast AS
-            SELECT
-                forecast_date AS ds,
-                sku,
-                predicted_units AS yhat,
-                lower_bound_80pct AS yhat_lower,
-                upper_bound_80pct AS yhat_upper,
-                data_type,
-                forecast_run_id
-            FROM public.v_forecast_daily_latest
-        """
-            )
-        )
-
-        # Compatibility view: legacy metrics table name
-        conn.execute(
-            text(
-                """
-            CREATE OR REPLACE VIEW public.forecast_error_metrics AS
-            SELECT
-                sku,
-                mean_absolute_error AS test_mae,
-                root_mean_squared_error AS test_rmse,
-                mean_absolute_pct_error AS test_mape_pct,
-                forecast_bias AS test_bias,
-                prediction_interval_coverage_pct AS test_coverage_pct,
-                training_days AS n_train,
-                test_days AS n_test,
-                forecast_run_id AS run_id
-            FROM public.v_forecast_sku_metrics_latest
-        """
-            )
-        )
-
-    log.info("   -> Stable and compatibility views updated successfully")
-
-    # ------------------- FINAL SUMMARY -------------------
-    log.info("\n" + "=" * 70)
-    log.info("FORECASTING COMPLETE — RUN SUMMARY")
-    log.info("=" * 70)
-
-    median_mape = metrics_df["test_mape_pct"].median()
-    log.info(f"Successful SKUs: {len(metrics_df)} / {len(eligible_skus)}")
-    log.info(f"Median MAPE: {median_mape:.1f}%")
-    log.info(f"Median MAE: {metrics_df['test_mae'].median():.1f}")
-    log.info(f"Median Coverage (80% PI): {metrics_df['test_coverage_pct'].median():.1f}%")
-
-    quality_map = {
-        10: "EXCELLENT",
-        15: "GOOD",
-        20: "ACCEPTABLE",
-    }
-    quality = next((v for k, v in quality_map.items() if median_mape < k), "NEEDS IMPROVEMENT")
-    log.info(f"\nFORECAST QUALITY: {quality}")
-
-    log.info(f"\nResults saved in: {OUTPUT_DIR}")
-
-    # ------------------- PURCHASE RECOMMENDATIONS -------------------
-    log.info("\n" + "=" * 70)
-    log.info("PURCHASE RECOMMENDATIONS — NEXT REORDER CYCLE")
-    log.info("=" * 70)
-    log.info(
-        f"Lead Time: {SUPPLIER_LEAD_TIME_DAYS} days | Service Level: 90% (z={SERVICE_LEVEL_Z_SCORE})"
-    )
-    log.info("\n" + "-" * 70)
-
-    # Calculate purchase recommendations for each SKU
-    recommendations = []
-    for sku in metrics_df["sku"].unique():
-        sku_forecasts = all_forecasts[
-            (all_forecasts["sku"] == sku) & (all_forecasts["data_type"] == "forecast")
-        ].copy()
-
-        if len(sku_forecasts) == 0:
-            continue
-
-        # Get next reorder cycle demand (lead time period)
-        reorder_cycle_demand = sku_forecasts.nsmallest(SUPPLIER_LEAD_TIME_DAYS, "ds")["yhat"].sum()
-
-        # Calculate safety stock: z * std_dev * sqrt(lead_time)
-        forecast_std = sku_forecasts.nsmallest(30, "ds")["yhat"].std()
-        safety_stock = SERVICE_LEVEL_Z_SCORE * forecast_std * np.sqrt(SUPPLIER_LEAD_TIME_DAYS)
-
-        # Current inventory (simulated)
-        current_inventory = ON_HAND_INVENTORY.get(sku, 0)
-
-        # Reorder point = lead time demand + safety stock
-        reorder_point = reorder_cycle_demand + safety_stock
-
-        # Purchase recommendation = max(0, reorder_point - current_inventory)
-        purchase_qty = max(0, reorder_point - current_inventory)
-
-        # Get MAPE for this SKU
-        sku_mape = metrics_df[metrics_df["sku"] == sku]["test_mape_pct"].values[0]
-
-        recommendations.append(
-            {
-                "sku": sku,
-                "current_inventory": int(current_inventory),
-                "forecast_demand_14d": int(reorder_cycle_demand),
-                "safety_stock": int(safety_stock),
-                "reorder_point": int(reorder_point),
-                "purchase_qty": int(purchase_qty),
-                "forecast_quality": "HIGH"
-                if sku_mape < 15
-                else "MEDIUM"
-                if sku_mape < 25
-                else "LOW",
-                "mape_pct": round(sku_mape, 1),
-            }
-        )
-
-    # Sort by purchase quantity (highest first)
-    recommendations = sorted(recommendations, key=lambda x: x["purchase_qty"], reverse=True)
-
-    # Print recommendations
-    for rec in recommendations:
-        status = "⚠️ REORDER NOW" if rec["purchase_qty"] > 0 else "✅ Stock OK"
-        log.info(f"\n{rec['sku']}  |  {status}")
-        log.info(f"  On Hand: {rec['current_inventory']} units")
-        log.info(
-            f"  14-Day Demand: {rec['forecast_demand_14d']} units (MAPE: {rec['mape_pct']}% - {rec['forecast_quality']} confidence)"
-        )
-        log.info(f"  Safety Stock: {rec['safety_stock']} units (90% service level)")
-        log.info(f"  → PURCHASE: {rec['purchase_qty']} units")
 
-    # Save recommendations to CSV
-    recommendations_df = pd.DataFrame(recommendations)
-    recommendations_df.to_csv(os.path.join(OUTPUT_DIR, "purchase_recommendations.csv"), index=False)
-    log.info(f"\n📊 Purchase recommendations saved: {OUTPUT_DIR}/purchase_recommendations.csv")
-    log.info("Next: Refresh Power BI -> Check 'Forecast vs Actuals' dashboard")
+from vitamarkets.forecasting import main
 
-    # Print Power BI connection contract
-    log.info("\n" + "=" * 70)
-    log.info("POWER BI CONNECTION CONTRACT")
-    log.info("=" * 70)
-    log.info("Power BI should query these compatibility views (auto-update every run):")
-    log.info("")
-    log.info("  1) Forecast Data: public.simple_prophet_forecast")
-    log.info("     SELECT ds, sku, yhat, yhat_lower, yhat_upper, data_type, forecast_run_id")
-    log.info("     FROM public.simple_prophet_forecast;")
-    log.info("")
-    log.info("  2) Accuracy Metrics: public.forecast_error_metrics")
-    log.info("     SELECT sku, test_mape_pct, test_mae, test_rmse, test_bias, test_coverage_pct")
-    log.info("     FROM public.forecast_error_metrics;")
-    log.info("")
-    log.info("Sanity check SQL:")
-    log.info("  SELECT MAX(ds), MAX(forecast_run_id) FROM public.simple_prophet_forecast;")
-    log.info("  SELECT MAX(mean_absolute_pct_error) FROM public.v_forecast_sku_metrics_latest;")
-    log.info("")
-    log.info("DO NOT query versioned tables directly (prophet_forecasts_YYYYMMDD_HHMM).")
-    log.info("=" * 70)
-else:
-    log.error("No forecasts generated. Check logs above.")
-    log.info("=" * 70)
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,8 @@ warnings.filterwarnings("ignore")
 
 # Import secure DB connection function
 from db import get_engine  # noqa: E402
+from vitamarkets.forecasting import select_eligible_skus  # noqa: E402
+from vitamarkets.preprocessing import preprocess  # noqa: E402
 
 # --- CONFIG ---
 FORECAST_DAYS = 90
@@ -47,48 +49,25 @@ print(f"   → Loaded {len(df):,} rows")
 
 # --- 2. CLEAN & PREP ---
 print("\n[2/7] Cleaning and preparing data...")
-df = df[df["total_units_sold"] >= 0].copy()
-df = df.dropna(subset=["total_units_sold"])
 df = df.rename(columns={"date": "ds", "total_units_sold": "y"})
-df["ds"] = pd.to_datetime(df["ds"])
-print(f"   → {len(df):,} rows after cleaning")
+prepared = preprocess(df, clip_factor=1.0)
+df, sku_stats = prepared["history"], prepared["stats"]
+print(f"   → {len(df):,} SKU-days after cleaning")
 
 # --- 3. AUTO-FILTER ELIGIBLE SKUs ---
 print("\n[3/7] Filtering eligible SKUs (2+ years data, 500+ units)...")
-sku_stats = (
-    df.groupby("sku")
-    .agg(
-        n_obs=("ds", "count"),
-        first_date=("ds", "min"),
-        last_date=("ds", "max"),
-        total_units=("y", "sum"),
-    )
-    .reset_index()
-)
-sku_stats["span_days"] = (sku_stats["last_date"] - sku_stats["first_date"]).dt.days
-eligible_skus = sku_stats[(sku_stats["span_days"] >= 730) & (sku_stats["total_units"] > 500)][
-    "sku"
-].tolist()
+eligible_skus = select_eligible_skus(sku_stats, min_n_days=0)
 
 print(f"   → {len(eligible_skus)} SKUs eligible for forecasting:")
 for sku in eligible_skus:
-    stats = sku_stats[sku_stats["sku"] == sku].iloc[0]
+    stats = sku_stats.loc[sku]
     print(f"      • {sku}: {stats['span_days']} days, {stats['total_units']:.0f} units")
 
 df = df[df["sku"].isin(eligible_skus)]
 
 # --- 4. OUTLIER HANDLING ---
-print("\n[4/7] Clipping outliers (99th percentile per SKU)...")
-
-
-def clip_outliers(sub):
-    clip_val = sub["y"].quantile(0.99)
-    sub["y"] = sub["y"].clip(upper=clip_val)
-    return sub
-
-
-df = df.groupby("sku", group_keys=False).apply(clip_outliers)
-print("   → Outliers clipped")
+# Clipped at the 99th percentile per SKU by preprocess() above
+print("\n[4/7] Outliers clipped (99th percentile per SKU)")
 
 # --- 5. TRAIN/TEST SPLIT & FORECASTING ---
 print("\n[5/7] Training Prophet models with holdout test set...")
@@ -22,10 +22,8 @@ if exist ".venv\Scripts\python.exe" (
 rem === Helper that stops on error ===
 set "FAILED="
 call :STEP "%PY% --version"                       || goto :FAIL
-call :STEP "%PY% etl\refresh_actuals.py"          || goto :FAIL
-call :STEP "%PY% prophet_improved.py"             || goto :FAIL
-rem Optional sanity check
-call :STEP "%PY% checkcsv.py"                     || goto :FAIL
+rem Stage DAG: dbt, actuals load, forecast, CSV check (see vitamarkets\daily.py)
+call :STEP "%PY% scripts\run_daily.py"            || goto :FAIL
 
 echo [%date% %time%] SUCCESS >> "%LOG%"
 echo DONE. See "%LOG%"
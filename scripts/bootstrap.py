@@ -6,7 +6,8 @@ This script:
 1. Checks if PostgreSQL is reachable
 2. Creates schema and tables (idempotent)
 3. Loads sample data from CSV into vitamarkets_raw
-4. Prints row counts for verification
+4. Seeds sample on-hand stock into inventory_positions (purchase recommendations)
+5. Prints row counts for verification
 
 Usage:
     python scripts/bootstrap.py
@@ -27,6 +28,18 @@ ROOT = Path(__file__).parent.parent
 SQL_INIT = ROOT / "sql" / "init.sql"
 SAMPLE_DATA = ROOT / "vitamarkets_ultrarealistic_sampledataset.csv"
 
+# Simulated on-hand stock per SKU for the demo (lead time/service level use defaults)
+SAMPLE_ON_HAND = {
+    "Flagship Growth": 450,
+    "New Launch": 200,
+    "Classic Seasonal": 300,
+    "Slow Decliner": 150,
+    "Promo Dependent": 250,
+    "Supply Disrupted": 100,
+    "Viral Spike": 180,
+    "Cannibalized": 120,
+}
+
 
 def check_db_connection(engine):
     """Test if database is reachable."""
@@ -98,6 +111,27 @@ def load_sample_data(engine):
     print(f"✅ Loaded {len(df):,} rows into vitamarkets_raw")
 
 
+def seed_sample_inventory(engine):
+    """Insert SAMPLE_ON_HAND into inventory_positions, keeping any existing positions."""
+    from vitamarkets.purchasing import INVENTORY_DDL, INVENTORY_TABLE
+
+    print(f"\n📦 Seeding sample stock into {INVENTORY_TABLE}...")
+    with engine.begin() as conn:
+        conn.execute(text(INVENTORY_DDL))
+        for sku, on_hand in SAMPLE_ON_HAND.items():
+            conn.execute(
+                text(
+                    f"""
+                    INSERT INTO public.{INVENTORY_TABLE} (sku, on_hand)
+                    VALUES (:sku, :on_hand)
+                    ON CONFLICT DO NOTHING
+                    """
+                ),
+                {"sku": sku, "on_hand": on_hand},
+            )
+    print(f"✅ {len(SAMPLE_ON_HAND)} sample positions in {INVENTORY_TABLE}")
+
+
 def print_row_counts(engine):
     """Print row counts for all tables."""
     print("\n📈 Table row counts:")
@@ -107,6 +141,7 @@ def print_row_counts(engine):
         "mart_sales_summary",
         "simple_prophet_forecast",
         "forecast_error_metrics",
+        "inventory_positions",
     ]
 
     with engine.connect() as conn:
@@ -148,7 +183,14 @@ def main():
         print(f"\n❌ Failed to load sample data: {e}")
         sys.exit(1)
 
-    # Step 4: Print verification
+    # Step 4: Seed sample inventory
+    try:
+        seed_sample_inventory(engine)
+    except Exception as e:
+        print(f"\n❌ Failed to seed sample inventory: {e}")
+        sys.exit(1)
+
+    # Step 5: Print verification
     print_row_counts(engine)
 
     print("\n" + "=" * 70)
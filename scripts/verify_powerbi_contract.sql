@@ -54,9 +54,10 @@ BEGIN
 
     SELECT string_agg(req.column_name, ', ') INTO missing_forecast_view
     FROM (VALUES ('forecast_date'), ('sku'), ('predicted_units'), ('lower_bound_80pct'), ('upper_bound_80pct'), ('data_type'), ('forecast_run_id')) AS req(column_name)
-    LEFT JOIN information_schema.columns c
-           ON c.table_schema = 'public' AND c.table_name = 'v_forecast_daily_latest' AND c.column_name = req.column_name
-    WHERE c.column_name IS NULL;
+    -- Materialized view: information_schema.columns doesn't list its columns
+    LEFT JOIN pg_attribute a
+           ON a.attrelid = to_regclass('public.v_forecast_daily_latest') AND a.attname = req.column_name AND NOT a.attisdropped
+    WHERE a.attname IS NULL;
 
     IF missing_forecast_view IS NOT NULL THEN
         RAISE EXCEPTION 'Missing columns in v_forecast_daily_latest: %', missing_forecast_view;
@@ -66,9 +67,10 @@ BEGIN
 
     SELECT string_agg(req.column_name, ', ') INTO missing_metrics_view
     FROM (VALUES ('sku'), ('mean_absolute_error'), ('root_mean_squared_error'), ('mean_absolute_pct_error'), ('forecast_bias'), ('prediction_interval_coverage_pct'), ('training_days'), ('test_days'), ('forecast_run_id')) AS req(column_name)
-    LEFT JOIN information_schema.columns c
-           ON c.table_schema = 'public' AND c.table_name = 'v_forecast_sku_metrics_latest' AND c.column_name = req.column_name
-    WHERE c.column_name IS NULL;
+    -- Materialized view: information_schema.columns doesn't list its columns
+    LEFT JOIN pg_attribute a
+           ON a.attrelid = to_regclass('public.v_forecast_sku_metrics_latest') AND a.attname = req.column_name AND NOT a.attisdropped
+    WHERE a.attname IS NULL;
 
     IF missing_metrics_view IS NOT NULL THEN
         RAISE EXCEPTION 'Missing columns in v_forecast_sku_metrics_latest: %', missing_metrics_view;
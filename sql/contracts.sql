@@ -2,6 +2,8 @@
 -- POWER BI DATA CONTRACT (REBUILD VIEWS FROM LATEST VERSIONED TABLES)
 -- Run this script after a forecast run to re-point stable +
 -- compatibility views at the most recent prophet_* tables.
+-- Rebuilds the same layout as vitamarkets/publish.py: materialized
+-- stable views over *_source views, compatibility views on top.
 -- ====================================================================
 
 DO $$
@@ -31,15 +33,24 @@ BEGIN
         RAISE EXCEPTION 'No prophet forecast tables found. Run the forecast pipeline first.';
     END IF;
 
-    -- Drop then recreate to enforce schema
+    -- Drop then recreate to enforce schema (the stable views may be plain views from
+    -- an older release or materialized views)
     EXECUTE 'DROP VIEW IF EXISTS public.simple_prophet_forecast';
     EXECUTE 'DROP VIEW IF EXISTS public.forecast_error_metrics';
-    EXECUTE 'DROP VIEW IF EXISTS public.v_forecast_daily_latest';
-    EXECUTE 'DROP VIEW IF EXISTS public.v_forecast_sku_metrics_latest';
+    IF EXISTS (SELECT 1 FROM pg_matviews WHERE schemaname = 'public' AND matviewname = 'v_forecast_daily_latest') THEN
+        EXECUTE 'DROP MATERIALIZED VIEW public.v_forecast_daily_latest CASCADE';
+    END IF;
+    IF EXISTS (SELECT 1 FROM pg_matviews WHERE schemaname = 'public' AND matviewname = 'v_forecast_sku_metrics_latest') THEN
+        EXECUTE 'DROP MATERIALIZED VIEW public.v_forecast_sku_metrics_latest CASCADE';
+    END IF;
+    EXECUTE 'DROP VIEW IF EXISTS public.v_forecast_daily_latest CASCADE';
+    EXECUTE 'DROP VIEW IF EXISTS public.v_forecast_sku_metrics_latest CASCADE';
+    EXECUTE 'DROP VIEW IF EXISTS public.v_forecast_daily_latest_source CASCADE';
+    EXECUTE 'DROP VIEW IF EXISTS public.v_forecast_sku_metrics_latest_source CASCADE';
 
-    -- Canonical daily forecast view
+    -- Plain views over the run tables that the materialized views refresh from
     EXECUTE format($f$
-        CREATE OR REPLACE VIEW public.v_forecast_daily_latest AS
+        CREATE VIEW public.v_forecast_daily_latest_source AS
         SELECT
             CAST(ds AS date) AS forecast_date,
             sku,
@@ -49,12 +60,10 @@ BEGIN
             type AS data_type,
             run_id AS forecast_run_id
         FROM public.%I
-        ORDER BY sku, ds
     $f$, latest_forecast_table);
 
-    -- Canonical metrics view
     EXECUTE format($f$
-        CREATE OR REPLACE VIEW public.v_forecast_sku_metrics_latest AS
+        CREATE VIEW public.v_forecast_sku_metrics_latest_source AS
         SELECT
             sku,
             test_mae AS mean_absolute_error,
@@ -66,11 +75,26 @@ BEGIN
             n_test AS test_days,
             run_id AS forecast_run_id
         FROM public.%I
-        ORDER BY test_mape_pct ASC
     $f$, latest_metrics_table);
 
+    -- Canonical daily forecast view (materialized; unique index for REFRESH CONCURRENTLY)
+    EXECUTE $v$
+        CREATE MATERIALIZED VIEW public.v_forecast_daily_latest AS
+        SELECT * FROM public.v_forecast_daily_latest_source
+        ORDER BY sku, forecast_date
+    $v$;
+    EXECUTE 'CREATE UNIQUE INDEX ON public.v_forecast_daily_latest (sku, forecast_date, data_type)';
+
+    -- Canonical metrics view
+    EXECUTE $v$
+        CREATE MATERIALIZED VIEW public.v_forecast_sku_metrics_latest AS
+        SELECT * FROM public.v_forecast_sku_metrics_latest_source
+        ORDER BY mean_absolute_pct_error
+    $v$;
+    EXECUTE 'CREATE UNIQUE INDEX ON public.v_forecast_sku_metrics_latest (sku)';
+
     -- Compatibility: legacy forecast view
-    EXECUTE $$
+    EXECUTE $v$
         CREATE OR REPLACE VIEW public.simple_prophet_forecast AS
         SELECT
             forecast_date AS ds,
@@ -81,10 +105,10 @@ BEGIN
             data_type,
             forecast_run_id
         FROM public.v_forecast_daily_latest
-    $$;
+    $v$;
 
     -- Compatibility: legacy metrics view
-    EXECUTE $$
+    EXECUTE $v$
         CREATE OR REPLACE VIEW public.forecast_error_metrics AS
         SELECT
             sku,
@@ -97,10 +121,10 @@ BEGIN
             test_days AS n_test,
             forecast_run_id AS run_id
         FROM public.v_forecast_sku_metrics_latest
-    $$;
+    $v$;
 END $$;
 
-COMMENT ON VIEW public.v_forecast_daily_latest IS 'Latest forecast run (actuals + predictions).';
-COMMENT ON VIEW public.v_forecast_sku_metrics_latest IS 'Latest per-SKU forecast accuracy metrics.';
+COMMENT ON MATERIALIZED VIEW public.v_forecast_daily_latest IS 'Latest forecast run (actuals + predictions).';
+COMMENT ON MATERIALIZED VIEW public.v_forecast_sku_metrics_latest IS 'Latest per-SKU forecast accuracy metrics.';
 COMMENT ON VIEW public.simple_prophet_forecast IS 'Compatibility view for legacy Power BI queries (ds/yhat naming).';
 COMMENT ON VIEW public.forecast_error_metrics IS 'Compatibility metrics view for legacy Power BI queries.';
@@ -2,12 +2,50 @@
 Pytest configuration for test suite.
 
 This file adds the project root to the Python path so that tests can import
-modules from the project.
+modules from the project, and provides the throwaway-schema fixture shared by the
+PostgreSQL tests.
 """
 
 import sys
+import uuid
 from pathlib import Path
 
+import pytest
+
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
+
+
+@pytest.fixture
+def schema(request):
+    """
+    A throwaway PostgreSQL schema, yielded as (engine, name) and dropped afterwards.
+
+    Skips when no database is reachable or it isn't PostgreSQL. Parametrize it
+    indirectly with SQL (a template over {schema}) to create tables in it first, e.g.
+    @pytest.mark.parametrize("schema", [MART_DDL], indirect=True).
+    """
+    from sqlalchemy import text
+
+    from db import get_engine
+
+    module = request.module.__name__.rsplit(".", 1)[-1]
+    try:
+        engine = get_engine()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception:
+        pytest.skip(f"Database not configured for {module}")
+    if engine.dialect.name != "postgresql":
+        pytest.skip(f"{module} requires PostgreSQL")
+
+    name = f"{module}_{uuid.uuid4().hex[:10]}"
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {name}"))
+        setup = getattr(request, "param", None)
+        if setup:
+            conn.execute(text(setup.format(schema=name)))
+    yield engine, name
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {name} CASCADE"))
@@ -0,0 +1,80 @@
+"""
+Tests for per-SKU run checkpoints
+
+These tests use a temporary SQLite checkpoint file.
+"""
+
+import numpy as np
+import pandas as pd
+
+from vitamarkets.checkpoint import completed_skus, load_run, save_sku
+
+
+def _combined(sku, n=3):
+    return pd.DataFrame(
+        {
+            "ds": pd.date_range("2024-01-01", periods=n),
+            "yhat": [10.0] * n,
+            "yhat_lower": [8.0] * n,
+            "yhat_upper": [12.0] * n,
+            "sku": [sku] * n,
+            "run_id": ["20240101_0000"] * n,
+            "type": ["forecast"] * n,
+        }
+    )
+
+
+def _metrics(sku, fit_status="prophet"):
+    return {
+        "sku": sku,
+        "run_id": "20240101_0000",
+        "n_train": 1000,
+        "n_test": 30,
+        "test_mae": np.nan if fit_status == "failed" else 1.5,
+        "test_rmse": 2.0,
+        "test_mape_pct": 5.0,
+        "test_bias": 0.1,
+        "test_coverage_pct": 80.0,
+        "fit_status": fit_status,
+        "fit_seconds": 2.5,
+    }
+
+
+class TestCheckpoint:
+    """Test checkpoint store round trips"""
+
+    def test_missing_store_has_no_completed_skus(self, tmp_path):
+        """Test a run that never started resumes from scratch"""
+        assert completed_skus(tmp_path / "checkpoints.sqlite") == set()
+
+    def test_completed_skus_excludes_failures(self, tmp_path):
+        """Test failed SKUs are refitted on resume"""
+        path = tmp_path / "checkpoints.sqlite"
+        save_sku(path, "A", _combined("A"), _metrics("A"))
+        save_sku(path, "B", None, _metrics("B", fit_status="failed"))
+
+        assert completed_skus(path) == {"A"}
+
+    def test_resave_replaces_previous_attempt(self, tmp_path):
+        """Test re-checkpointing a SKU does not duplicate its rows"""
+        path = tmp_path / "checkpoints.sqlite"
+        save_sku(path, "A", None, _metrics("A", fit_status="failed"))
+        save_sku(path, "A", _combined("A"), _metrics("A", fit_status="retried"))
+        save_sku(path, "A", _combined("A"), _metrics("A", fit_status="retried"))
+
+        all_forecasts, metrics_df = load_run(path)
+
+        assert len(all_forecasts) == 3
+        assert metrics_df["fit_status"].tolist() == ["retried"]
+
+    def test_load_run_assembles_all_skus(self, tmp_path):
+        """Test the publish step gets every SKU back with parsed dates"""
+        path = tmp_path / "checkpoints.sqlite"
+        save_sku(path, "B", _combined("B"), _metrics("B"))
+        save_sku(path, "A", _combined("A", n=5), _metrics("A"))
+
+        all_forecasts, metrics_df = load_run(path)
+
+        assert len(all_forecasts) == 8
+        assert metrics_df["sku"].tolist() == ["A", "B"]
+        assert all_forecasts["ds"].dtype == "datetime64[ns]"
@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import inspect
+
+from db import get_engine
+
+REQUIRED = {
+    "period_start",
+    "category",
+    "channel",
+    "country",
+    "customer_segment",
+    "total_units_sold",
+    "total_order_value",
+    "transaction_count",
+    "n_days",
+    "updated_at",
+}
+
+
+@pytest.fixture(scope="module")
+def pg_engine():
+    try:
+        engine = get_engine()
+    except Exception:
+        pytest.skip("Database not configured for contract check")
+    if engine.dialect.name != "postgresql":
+        pytest.skip("Contract check requires PostgreSQL")
+    return engine
+
+
+def _assert_rollup(engine, table_name):
+    inspector = inspect(engine)
+    if table_name not in inspector.get_table_names(schema="public"):
+        pytest.skip(f"public.{table_name} table not found")
+    cols = {col["name"] for col in inspector.get_columns(table_name, schema="public")}
+    missing = REQUIRED - cols
+    assert not missing, f"Missing columns in public.{table_name}: {sorted(missing)}"
+    key = inspector.get_pk_constraint(table_name, schema="public")["constrained_columns"]
+    assert key == ["period_start", "category", "channel", "country", "customer_segment"]
+
+
+def test_kpi_rollup_daily_columns(pg_engine):
+    _assert_rollup(pg_engine, "kpi_rollup_daily")
+
+
+def test_kpi_rollup_weekly_columns(pg_engine):
+    _assert_rollup(pg_engine, "kpi_rollup_weekly")
+
+
+def test_kpi_rollup_monthly_columns(pg_engine):
+    _assert_rollup(pg_engine, "kpi_rollup_monthly")
@@ -0,0 +1,213 @@
+"""
+Tests for the daily stage DAG runner
+"""
+
+import json
+import threading
+from graphlib import CycleError
+
+import pytest
+
+from vitamarkets import daily
+from vitamarkets.daily import RUNS_FILE, dependencies, run_dag
+
+
+def _stages(root, calls, fail=()):
+    """raw.csv -> clean -> report, with an independent check of raw.csv alongside."""
+
+    def stage(name, write=None):
+        def run():
+            calls.append(name)
+            if name in fail:
+                raise RuntimeError(f"{name} broke")
+            if write:
+                (root / write).write_text(f"{name} output")
+
+        return run
+
+    return {
+        "clean": {
+            "run": stage("clean", "clean.csv"),
+            "inputs": ["file:raw.csv"],
+            "outputs": ["file:clean.csv"],
+        },
+        "report": {
+            "run": stage("report", "report.md"),
+            "inputs": ["file:clean.csv"],
+            "outputs": ["file:report.md"],
+        },
+        "check": {"run": stage("check"), "inputs": ["file:raw.csv"], "outputs": []},
+    }
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "raw.csv").write_text("a,b\n1,2\n")
+    return tmp_path
+
+
+def _statuses(record):
+    return {name: result["status"] for name, result in record["stages"].items()}
+
+
+class TestDependencies:
+    """Test the graph built from declared inputs and outputs"""
+
+    def test_writers_of_inputs_and_after(self, root):
+        """Test a stage waits for the writers of its inputs and its explicit 'after'"""
+        stages = _stages(root, [])
+        stages["check"]["after"] = ["clean"]
+
+        assert dependencies(stages) == {"clean": set(), "report": {"clean"}, "check": {"clean"}}
+
+    def test_cycle_rejected(self, root):
+        """Test a cycle is refused before any stage runs"""
+        calls = []
+        stages = _stages(root, calls)
+        stages["clean"]["inputs"].append("file:report.md")
+
+        with pytest.raises(CycleError):
+            run_dag(stages, root=root, log_dir=root / "logs")
+        assert calls == []
+
+
+class TestRunDag:
+    """Test concurrency, skipping, resume and run records"""
+
+    def test_independent_stages_run_concurrently(self, root):
+        """Test two stages with no dependency between them are in flight at once"""
+        barrier = threading.Barrier(2, timeout=5)
+        stages = {
+            name: {"run": barrier.wait, "inputs": ["file:raw.csv"], "outputs": []}
+            for name in ("left", "right")
+        }
+
+        record = run_dag(stages, root=root, log_dir=root / "logs", max_workers=2)
+
+        assert _statuses(record) == {"left": "ran", "right": "ran"}
+
+    def test_skips_until_inputs_change(self, root):
+        """Test a rerun skips up-to-date stages and reruns a changed input's downstream"""
+        calls = []
+        logs = root / "logs"
+        run_dag(_stages(root, calls), root=root, log_dir=logs)
+        assert sorted(calls) == ["check", "clean", "report"]
+
+        calls.clear()
+        record = run_dag(_stages(root, calls), root=root, log_dir=logs)
+        assert calls == []
+        assert set(_statuses(record).values()) == {"skipped"}
+
+        (root / "raw.csv").write_text("a,b\n1,3\n")
+        run_dag(_stages(root, calls), root=root, log_dir=logs)
+        assert sorted(calls) == ["check", "clean", "report"]
+
+    def test_missing_output_and_forced_stage_rerun(self, root):
+        """Test a deleted output or --from reruns that stage and what depends on it"""
+        calls = []
+        logs = root / "logs"
+        run_dag(_stages(root, calls), root=root, log_dir=logs)
+
+        calls.clear()
+        (root / "report.md").unlink()
+        run_dag(_stages(root, calls), root=root, log_dir=logs)
+        assert calls == ["report"]
+
+        calls.clear()
+        run_dag(_stages(root, calls), root=root, log_dir=logs, force=["clean"])
+        assert calls == ["clean", "report"]
+
+    def test_failure_blocks_downstream_and_resumes(self, root):
+        """Test a failed stage blocks dependents only, and the next run starts from it"""
+        calls = []
+        logs = root / "logs"
+        (root / "clean.csv").write_text("stale")
+        stages = _stages(root, calls, fail=["report"])
+        stages["publish"] = {
+            "run": lambda: calls.append("publish"),
+            "inputs": ["file:report.md"],
+            "outputs": [],
+        }
+
+        record = run_dag(stages, root=root, log_dir=logs)
+        assert _statuses(record) == {
+            "clean": "ran",
+            "check": "ran",
+            "report": "failed",
+            "publish": "blocked",
+        }
+
+        calls.clear()
+        stages = _stages(root, calls)
+        stages["publish"] = {
+            "run": lambda: calls.append("publish"),
+            "inputs": ["file:report.md"],
+            "outputs": [],
+        }
+        record = run_dag(stages, root=root, log_dir=logs)
+        assert calls == ["report", "publish"]
+        assert _statuses(record)["clean"] == "skipped"
+
+    def test_run_record_has_durations(self, root):
+        """Test every run appends per-stage status, reason and seconds to the run log"""
+        logs = root / "logs"
+        run_dag(_stages(root, []), root=root, log_dir=logs)
+        run_dag(_stages(root, []), root=root, log_dir=logs)
+
+        runs = [json.loads(line) for line in (logs / RUNS_FILE).read_text().splitlines()]
+        assert len(runs) == 2
+        first = runs[0]["stages"]["clean"]
+        assert first["status"] == "ran" and first["seconds"] >= 0
+        assert first["reason"] == "no successful run recorded"
+        assert runs[1]["stages"]["clean"]["reason"] == "up to date"
+
+    def test_stage_details_recorded(self, root):
+        """Test a dict returned by a stage (e.g. dbt per-model timings) lands in the record"""
+        models = {"models": {"mart_sales_summary": {"status": "success", "seconds": 1.5}}}
+        stages = {"dbt_run": {"run": lambda: models, "inputs": ["file:raw.csv"], "outputs": []}}
+
+        record = run_dag(stages, root=root, log_dir=root / "logs")
+
+        assert record["stages"]["dbt_run"]["details"] == models
+
+
+class TestMain:
+    """Test the daily CLI's argument handling"""
+
+    @pytest.fixture
+    def calls(self, tmp_path, monkeypatch):
+        """Record daily_stages/run_dag arguments instead of running the DAG."""
+        calls = {}
+
+        def stages(full_dbt=False):
+            calls["full_dbt"] = full_dbt
+            return {"dbt_run": {}, "forecast": {}}
+
+        def run(stages, force=(), max_workers=4):
+            calls.update(force=force, max_workers=max_workers)
+            return {"stages": {}}
+
+        monkeypatch.setattr(daily, "daily_stages", stages)
+        monkeypatch.setattr(daily, "run_dag", run)
+        monkeypatch.setattr(daily, "log_run", lambda record: None)
+        monkeypatch.setattr(daily, "LOG_DIR", tmp_path)
+        # Keep the root logger free of a handler on tmp_path
+        monkeypatch.setattr(daily.logging, "basicConfig", lambda **kwargs: None)
+        return calls
+
+    def test_defaults(self, calls):
+        """Test a plain run builds changed dbt models only and resumes as recorded"""
+        daily.main([])
+
+        assert calls == {"full_dbt": False, "force": [], "max_workers": 4}
+
+    def test_flags(self, calls):
+        """Test --full-dbt, --from and --workers reach the stages and the runner"""
+        daily.main(["--full-dbt", "--from", "forecast", "--workers", "2"])
+
+        assert calls == {"full_dbt": True, "force": ["forecast"], "max_workers": 2}
+
+    def test_unknown_stage(self, calls):
+        """Test --from with an unknown stage exits with a usage error"""
+        with pytest.raises(SystemExit):
+            daily.main(["--from", "nope"])
@@ -0,0 +1,127 @@
+"""
+Tests for in-process dbt selection and deps caching (no dbt invocation needed)
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from vitamarkets import dbt_runner
+from vitamarkets.dbt_runner import CHANGED_SELECTORS, save_state, selectors
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A dbt project dir with packages.yml + package-lock.yml and an installed package."""
+    (tmp_path / "packages.yml").write_text("packages:\n  - package: dbt-labs/dbt_utils\n")
+    (tmp_path / "package-lock.yml").write_text("sha1_hash: abc\n")
+    (tmp_path / "dbt_packages").mkdir()
+    monkeypatch.setattr(dbt_runner, "DBT_DIR", tmp_path)
+    monkeypatch.setattr(dbt_runner, "DEPS_HASH_FILE", tmp_path / "dbt_packages" / ".deps_hash")
+    return tmp_path
+
+
+class TestSelection:
+    """Test which models a run selects from the saved state"""
+
+    def test_no_state_builds_everything(self, tmp_path):
+        """Test the first run (no saved manifest) and full=True select every model"""
+        assert selectors(tmp_path / "missing") == []
+
+        save_state(self._target(tmp_path), tmp_path / "state")
+        assert selectors(tmp_path / "state", full=True) == []
+
+    def test_changed_models_and_fresher_sources(self, tmp_path):
+        """Test saved manifest + sources select modified models and fresher sources' children"""
+        state = tmp_path / "state"
+        save_state(self._target(tmp_path), state)
+
+        assert selectors(state) == ["--select", *CHANGED_SELECTORS, "--state", str(state)]
+
+    def test_without_freshness_results_only_modified(self, tmp_path):
+        """Test a state without sources.json falls back to state:modified+ alone"""
+        target = self._target(tmp_path)
+        (target / "sources.json").unlink()
+        save_state(target, tmp_path / "state")
+
+        assert selectors(tmp_path / "state")[1:-2] == ["state:modified+"]
+
+    @staticmethod
+    def _target(tmp_path):
+        target = tmp_path / "target"
+        target.mkdir()
+        (target / "manifest.json").write_text("{}")
+        (target / "sources.json").write_text("{}")
+        return target
+
+
+class TestDepsCache:
+    """Test dbt deps is skipped while the package files are unchanged"""
+
+    def test_matching_hash_skips_deps(self, project):
+        """Test an install recorded for the current package files is reused"""
+        dbt_runner.DEPS_HASH_FILE.write_text(dbt_runner.deps_hash())
+
+        assert dbt_runner.ensure_deps() is False
+
+    def test_lock_change_invalidates(self, project):
+        """Test editing package-lock.yml changes the deps hash"""
+        before = dbt_runner.deps_hash()
+        (project / "package-lock.yml").write_text("sha1_hash: def\n")
+
+        assert dbt_runner.deps_hash() != before
+
+
+class _Runner:
+    """Stands in for dbtRunner: `run` returns the next list of model names in `runs`."""
+
+    def __init__(self, runs):
+        self.runs = list(runs)
+        self.calls = []
+
+    def invoke(self, args):
+        self.calls.append(args)
+        results = [
+            SimpleNamespace(node=SimpleNamespace(name=name), status="success", execution_time=1.0)
+            for name in self.runs.pop(0)
+        ]
+        return SimpleNamespace(result=SimpleNamespace(results=results), success=True)
+
+
+class TestRunModels:
+    """Test the run step's fallback when the state selection is empty"""
+
+    @pytest.fixture
+    def runner(self, monkeypatch, tmp_path):
+        saved = []
+        monkeypatch.setattr(dbt_runner, "check_freshness", lambda runner: {})
+        monkeypatch.setattr(
+            dbt_runner, "selectors", lambda full=False: ["--select", "x", "--state", "s"]
+        )
+        monkeypatch.setattr(dbt_runner, "save_state", lambda: saved.append(True))
+
+        def make(runs):
+            fake = _Runner(runs)
+            monkeypatch.setattr(dbt_runner, "parse", lambda: fake)
+            fake.saved = saved
+            return fake
+
+        return make
+
+    def test_changed_models_built(self, runner):
+        """Test a selection that matches models builds only those"""
+        fake = runner([["stg_vitamarkets"]])
+
+        build = dbt_runner.run_models()
+
+        assert len(fake.calls) == 1 and build["models"].keys() == {"stg_vitamarkets"}
+
+    def test_empty_selection_rebuilds_everything(self, runner):
+        """Test raw rows restated without newer dates (nothing selected) get a full build"""
+        fake = runner([[], ["stg_vitamarkets", "mart_sales_summary"]])
+
+        build = dbt_runner.run_models()
+
+        assert "--select" in fake.calls[0] and "--select" not in fake.calls[1]
+        assert build["models"].keys() == {"stg_vitamarkets", "mart_sales_summary"}
+        assert build["select"].startswith("all") and fake.saved == [True]
@@ -0,0 +1,270 @@
+"""
+Tests for delta publishing. Hashing runs anywhere; the publish tests need a reachable
+PostgreSQL (DB_URI / PG_*) and are skipped otherwise.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vitamarkets.config import STABLE_VIEW_FORECASTS
+from vitamarkets.delta_publish import (
+    CHANGE_LOG_TABLE,
+    FORECASTS_TABLE,
+    METRICS_TABLE,
+    sku_hashes,
+    write_delta_tables,
+)
+from vitamarkets.forecasting import prophet_predict
+from vitamarkets.publish import publish_views
+
+
+def _run(run_id, skus=("A", "B", "C"), shift=None):
+    """(forecasts, metrics) for a run; `shift` {sku: amount} moves that SKU's forecast."""
+    shift = shift or {}
+    dates = pd.date_range("2024-01-01", periods=4)
+    forecasts = pd.concat(
+        pd.DataFrame(
+            {
+                "ds": dates,
+                "yhat": [10.0 + i + shift.get(sku, 0) for i in range(len(dates))],
+                "yhat_lower": 8.0,
+                "yhat_upper": 12.0,
+            }
+        ).assign(sku=sku, run_id=run_id, type=kind)
+        for sku in skus
+        for kind in ("actual", "forecast")
+    )
+    metrics = pd.DataFrame(
+        {
+            "sku": list(skus),
+            "test_mae": 1.0,
+            "test_rmse": 1.2,
+            "test_mape_pct": 10.0,
+            "test_bias": 0.1,
+            "test_coverage_pct": 80.0,
+            "n_train": 700,
+            "n_test": 30,
+            "run_id": run_id,
+            "fit_seconds": 3.5,
+        }
+    )
+    return forecasts, metrics
+
+
+def _failed_run(run_id, failed):
+    """A run where `failed`'s fit failed: no forecast rows, a metrics row without scores."""
+    forecasts, metrics = _run(run_id)
+    scores = [c for c in metrics.columns if c.startswith("test_")]
+    metrics.loc[metrics["sku"] == failed, [*scores, "n_train", "n_test"]] = np.nan
+    return forecasts[forecasts["sku"] != failed], metrics.assign(
+        fit_status=np.where(metrics["sku"] == failed, "failed", "prophet")
+    )
+
+
+@pytest.fixture(scope="module")
+def refits():
+    """Two Prophet runs (r1, r2) over the same noisy history of one SKU."""
+    pytest.importorskip("prophet")
+    from vitamarkets.forecasting import PREDICT_SEED, build_holidays, forecast_sku
+
+    rng = np.random.default_rng(0)
+    ds = pd.date_range("2022-01-03", periods=730, freq="D")
+    history = pd.DataFrame(
+        {"ds": ds, "y": 20 + 5 * (ds.dayofweek >= 5) + rng.normal(0, 3, len(ds)), "is_promo": 0}
+    )
+    holidays = build_holidays()
+    runs = []
+    for run_id in ("r1", "r2"):
+        forecasts, metrics = forecast_sku(history, "A", holidays, run_id, predict_seed=PREDICT_SEED)
+        assert metrics["model"] == "prophet"
+        runs.append((forecasts, pd.DataFrame([metrics])))
+    return runs
+
+
+def _change_log(engine, schema, run_id):
+    return dict(
+        pd.read_sql(
+            f"SELECT sku, change FROM {schema}.{CHANGE_LOG_TABLE} WHERE run_id = '{run_id}'",
+            engine,
+        ).values
+    )
+
+
+class TestSkuHashes:
+    """Test per-SKU content hashes"""
+
+    def test_stable_across_runs_and_order(self):
+        """Test hashes ignore the run id, row order and columns that aren't published"""
+        forecasts, metrics = _run("r1")
+        again, metrics_again = _run("r2")
+        metrics_again["fit_seconds"] = 99.0
+
+        assert sku_hashes(forecasts, metrics) == sku_hashes(
+            again.sample(frac=1, random_state=0), metrics_again
+        )
+
+    def test_tolerance(self):
+        """Test changes below the tolerance keep the hash and changes at it move it"""
+        forecasts, metrics = _run("r1")
+        before = sku_hashes(forecasts, metrics, tolerance=0.01)
+
+        small = sku_hashes(*_run("r2", shift={"A": 0.001}), tolerance=0.01)
+        large = sku_hashes(*_run("r2", shift={"A": 0.01}), tolerance=0.01)
+
+        assert small == before
+        assert large["A"] != before["A"] and large["B"] == before["B"]
+
+    def test_metrics_hashed(self):
+        """Test a metric change alone changes the SKU's hash"""
+        forecasts, metrics = _run("r1")
+        moved = metrics.assign(test_mape_pct=[10.0, 10.0, 12.5])
+
+        assert sku_hashes(forecasts, moved)["C"] != sku_hashes(forecasts, metrics)["C"]
+
+    def test_failed_sku_hashed(self):
+        """Test a SKU with metrics but no forecast rows (failed fit) still gets a hash"""
+        forecasts, metrics = _failed_run("r1", "C")
+
+        hashes = sku_hashes(forecasts, metrics)
+
+        assert set(hashes) == {"A", "B", "C"}
+        assert hashes == sku_hashes(*_failed_run("r2", "C"))
+
+
+class TestWriteDeltaTables:
+    """Test only changed SKUs are rewritten and logged"""
+
+    def test_first_publish_adds_everything(self, schema):
+        """Test the first delta publish writes every SKU and logs them as added"""
+        engine, name = schema
+        forecasts, metrics = _run("r1")
+
+        *tables, report = write_delta_tables(engine, forecasts, metrics, "r1", schema=name)
+
+        assert tables == [FORECASTS_TABLE, METRICS_TABLE]
+        assert report["added"] == 3 and report["rows_written"] == len(forecasts)
+        assert report["rows_skipped"] == 0
+        assert set(_change_log(engine, name, "r1").values()) == {"added"}
+
+    def test_only_changed_skus_rewritten(self, schema):
+        """Test a run moving one SKU rewrites its rows only; the others keep their run id"""
+        engine, name = schema
+        write_delta_tables(engine, *_run("r1"), "r1", schema=name)
+
+        report = write_delta_tables(engine, *_run("r2", shift={"B": 1.0}), "r2", schema=name)[2]
+
+        assert (report["updated"], report["unchanged"]) == (1, 2)
+        assert report["rows_written"] == 8 and report["rows_skipped"] == 16
+        published = pd.read_sql(f"SELECT * FROM {name}.{FORECASTS_TABLE}", engine)
+        assert published.groupby("sku")["run_id"].first().to_dict() == {
+            "A": "r1",
+            "B": "r2",
+            "C": "r1",
+        }
+        assert published.loc[published["sku"] == "B", "yhat"].min() == 11.0
+        assert _change_log(engine, name, "r2") == {"B": "updated"}
+
+    def test_removed_and_added(self, schema):
+        """Test SKUs missing from a run are deleted and new ones inserted"""
+        engine, name = schema
+        write_delta_tables(engine, *_run("r1"), "r1", schema=name)
+
+        report = write_delta_tables(engine, *_run("r2", skus=("A", "B", "D")), "r2", schema=name)[2]
+
+        assert (report["added"], report["removed"], report["rows_deleted"]) == (1, 1, 8)
+        assert _change_log(engine, name, "r2") == {"C": "removed", "D": "added"}
+        metrics = pd.read_sql(f"SELECT sku FROM {name}.{METRICS_TABLE} ORDER BY sku", engine)
+        assert metrics["sku"].tolist() == ["A", "B", "D"]
+
+    def test_failed_sku_keeps_metrics(self, schema):
+        """Test a SKU whose fit failed publishes its failed metrics row instead of vanishing"""
+        engine, name = schema
+        write_delta_tables(engine, *_run("r1"), "r1", schema=name)
+        report = write_delta_tables(engine, *_failed_run("r2", "C"), "r2", schema=name)[2]
+
+        assert (report["updated"], report["removed"], report["rows_deleted"]) == (1, 0, 8)
+        assert _change_log(engine, name, "r2") == {"C": "updated"}
+        metrics = pd.read_sql(f"SELECT * FROM {name}.{METRICS_TABLE} ORDER BY sku", engine)
+        assert metrics["sku"].tolist() == ["A", "B", "C"]
+        failed = metrics.set_index("sku").loc["C"]
+        assert pd.isna(failed["test_mae"]) and failed["run_id"] == "r2"
+        published = pd.read_sql(f"SELECT DISTINCT sku FROM {name}.{FORECASTS_TABLE}", engine)
+        assert set(published["sku"]) == {"A", "B"}
+
+        again = write_delta_tables(engine, *_failed_run("r3", "C"), "r3", schema=name)[2]
+        assert (again["updated"], again["unchanged"]) == (0, 3)
+
+    def test_views_follow_published_tables(self, schema):
+        """Test the contract views read the published tables across delta publishes"""
+        engine, name = schema
+        publish_views(
+            engine, *write_delta_tables(engine, *_run("r1"), "r1", schema=name)[:2], schema=name
+        )
+
+        tables = write_delta_tables(engine, *_run("r2", shift={"A": 2.0}), "r2", schema=name)[:2]
+        publish_views(engine, *tables, schema=name)
+
+        view = pd.read_sql(f"SELECT * FROM {name}.{STABLE_VIEW_FORECASTS}", engine)
+        assert len(view) == 24
+        assert set(view.loc[view["sku"] == "A", "forecast_run_id"]) == {"r2"}
+        assert set(view.loc[view["sku"] != "A", "forecast_run_id"]) == {"r1"}
+
+
+class _SamplingModel:
+    """Stands in for a fitted Prophet: predict draws from numpy's global RNG."""
+
+    def predict(self, future):
+        return np.random.normal(size=len(future))
+
+
+class TestPredictSeed:
+    """Test seeded predicts are reproducible and leave the global RNG alone"""
+
+    def test_seeded_predict_reproducible(self):
+        """Test two predicts with the same seed draw the same samples"""
+        future = pd.DataFrame({"ds": pd.date_range("2024-01-01", periods=5)})
+
+        first = prophet_predict(_SamplingModel(), future, seed=0)
+
+        np.testing.assert_array_equal(first, prophet_predict(_SamplingModel(), future, seed=0))
+
+    def test_global_rng_restored(self):
+        """Test other users of numpy's global RNG see the stream they would without it"""
+        future = pd.DataFrame({"ds": pd.date_range("2024-01-01", periods=5)})
+        np.random.seed(123)
+        expected = np.random.random(3)
+
+        np.random.seed(123)
+        prophet_predict(_SamplingModel(), future, seed=0)
+
+        np.testing.assert_array_equal(np.random.random(3), expected)
+
+    def test_unseeded_predict_not_reset(self):
+        """Test runs without a seed (no delta publishing) keep drawing fresh samples"""
+        future = pd.DataFrame({"ds": pd.date_range("2024-01-01", periods=5)})
+        first = prophet_predict(_SamplingModel(), future)
+
+        assert not np.array_equal(first, prophet_predict(_SamplingModel(), future))
+
+
+class TestRefits:
+    """Test refitting Prophet on unchanged data publishes nothing"""
+
+    def test_refit_hashes_equal(self, refits):
+        """Test two fits of the same history (sampled intervals included) hash the same"""
+        (first, first_metrics), (second, second_metrics) = refits
+
+        pd.testing.assert_series_equal(first["yhat_upper"], second["yhat_upper"])
+        assert sku_hashes(first, first_metrics) == sku_hashes(second, second_metrics)
+
+    def test_refit_publishes_nothing(self, schema, refits):
+        """Test delta-publishing the second fit writes no rows and logs no change"""
+        engine, name = schema
+        (first, first_metrics), (second, second_metrics) = refits
+        write_delta_tables(engine, first, first_metrics, "r1", schema=name)
+
+        report = write_delta_tables(engine, second, second_metrics, "r2", schema=name)[2]
+
+        assert (report["updated"], report["unchanged"], report["rows_written"]) == (0, 1, 0)
+        assert _change_log(engine, name, "r2") == {}
@@ -3,8 +3,12 @@ Tests for forecast evaluation functions
 """
 
 import numpy as np
+import pandas as pd
+import pytest
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 
+from vitamarkets.metrics import METRICS, naive_scale, score, score_one
+
 
 class TestForecastEval:
     """Test forecast evaluation metric calculations"""
@@ -118,3 +122,95 @@ class TestForecastEval:
 
         rmse = np.sqrt(mean_squared_error(y_true, y_pred))
         assert rmse == 5.0
+
+
+def _holdout():
+    """Two SKUs x 3 horizon steps with 80% intervals."""
+    return pd.DataFrame(
+        {
+            "sku": ["A"] * 3 + ["B"] * 3,
+            "horizon": [1, 2, 3] * 2,
+            "y": [100.0, 0.0, 300.0, 10.0, 20.0, 30.0],
+            "yhat": [110.0, 5.0, 290.0, 10.0, 25.0, 20.0],
+            "yhat_lower": [90.0, 0.0, 280.0, 8.0, 21.0, 15.0],
+            "yhat_upper": [130.0, 10.0, 320.0, 12.0, 30.0, 25.0],
+        }
+    )
+
+
+class TestAccuracyMetrics:
+    """Test the grouped metrics kernel against the per-SKU formulas"""
+
+    def test_matches_per_sku_formulas(self):
+        """Test one grouped pass equals sklearn/NumPy computed SKU by SKU"""
+        frame = _holdout()
+        scores = score(frame)
+
+        for sku, sub in frame.groupby("sku"):
+            y, yhat = sub["y"].to_numpy(), sub["yhat"].to_numpy()
+            row = scores.loc[sku]
+            assert row["mae"] == pytest.approx(mean_absolute_error(y, yhat))
+            assert row["rmse"] == pytest.approx(np.sqrt(mean_squared_error(y, yhat)))
+            assert row["mape_pct"] == pytest.approx(
+                np.mean(np.abs(yhat - y) / np.maximum(y, 1)) * 100
+            )
+            assert row["wape_pct"] == pytest.approx(np.abs(yhat - y).sum() / y.sum() * 100)
+            assert row["bias"] == pytest.approx(np.mean(yhat - y))
+        assert scores["coverage_pct"].tolist() == pytest.approx([100.0, 100 / 3])
+
+    def test_mape_floors_fractional_actuals(self):
+        """Test actuals below one are divided by one, as the per-SKU MAPE did"""
+        frame = pd.DataFrame(
+            {
+                "sku": ["A"] * 4 + ["B"] * 3,
+                "y": [0.0, 0.25, 0.5, 4.0, 0.1, 1.5, 0.9],
+                "yhat": [1.0, 0.75, 0.0, 5.0, 0.6, 1.0, 2.0],
+            }
+        )
+        scores = score(frame)
+
+        for sku, sub in frame.groupby("sku"):
+            y_true, y_pred = sub["y"].to_numpy(), sub["yhat"].to_numpy()
+            mape = np.mean(np.abs((y_true - y_pred) / np.maximum(y_true, 1))) * 100
+            assert scores.loc[sku, "mape_pct"] == pytest.approx(mape)
+        assert scores.loc["A", "mape_pct"] == pytest.approx((1 + 0.5 + 0.5 + 0.25) / 4 * 100)
+
+    def test_group_by_horizon_and_cutoff(self):
+        """Test the same kernel groups by horizon step or several keys at once"""
+        frame = _holdout().assign(cutoff="2024-06-30")
+
+        by_horizon = score(frame, by="horizon")
+        by_both = score(frame, by=["cutoff", "horizon"])
+
+        assert by_horizon.index.tolist() == [1, 2, 3]
+        assert by_horizon["n"].tolist() == [2, 2, 2]
+        assert by_horizon.loc[3, "mae"] == pytest.approx(10.0)
+        np.testing.assert_allclose(by_both["mae"].to_numpy(), by_horizon["mae"].to_numpy())
+
+    def test_mase_uses_seasonal_naive_scale(self):
+        """Test MASE divides by the in-sample 7-day naive MAE of each SKU"""
+        ds = pd.date_range("2024-01-01", periods=21, freq="D")
+        train = pd.DataFrame({"sku": "A", "ds": ds, "y": np.tile([10.0, 12.0, 14.0], 7)})
+
+        scale = naive_scale(train)
+        scores = score(_holdout().query("sku == 'A'"), scale=scale)
+
+        expected = np.abs(train["y"].to_numpy()[7:] - train["y"].to_numpy()[:-7]).mean()
+        assert scale["A"] == pytest.approx(expected)
+        assert scores.loc["A", "mase"] == pytest.approx(scores.loc["A", "mae"] / expected)
+
+    def test_pinball_and_coverage_need_intervals(self):
+        """Test point-only rows still score, with interval metrics left NaN"""
+        point_only = score(_holdout()[["sku", "y", "yhat"]])
+
+        assert point_only["pinball"].isna().all()
+        assert point_only["coverage_pct"].isna().all()
+        assert point_only["mae"].notna().all()
+
+    def test_pinball_of_perfect_median(self):
+        """Test pinball loss only counts the interval ends when yhat is exact"""
+        metrics = score_one([10.0], [10.0], lower=[8.0], upper=[14.0])
+
+        # (0.1 * 2 + 0 + 0.1 * 4) / 3
+        assert metrics["test_pinball"] == pytest.approx(0.2)
+        assert set(metrics) == {f"test_{name}" for name in METRICS}
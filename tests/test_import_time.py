@@ -0,0 +1,52 @@
+"""
+Tests that CLI entrypoints keep heavy dependencies out of module import.
+
+Each check runs in a fresh interpreter so modules imported by other tests don't leak in.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def _loaded_modules(stmt):
+    """Return the set of top-level packages in sys.modules after running `stmt`."""
+    code = f"{stmt}; import sys; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return set(proc.stdout.split())
+
+
+class TestLazyImports:
+    """Test that importing entrypoints does not pull in forecasting dependencies"""
+
+    def test_pipeline_import_is_light(self):
+        """Test vitamarkets.pipeline imports no pandas/numpy/prophet/sklearn/sqlalchemy"""
+        loaded = _loaded_modules("import vitamarkets.pipeline")
+
+        for heavy in ["pandas", "numpy", "prophet", "sklearn", "sqlalchemy", "cmdstanpy"]:
+            assert heavy not in loaded
+
+    def test_forecasting_import_skips_prophet(self):
+        """Test vitamarkets.forecasting can be imported without loading Prophet"""
+        loaded = _loaded_modules("import vitamarkets.forecasting")
+
+        assert "prophet" not in loaded
+        assert "sklearn" not in loaded
+        assert "joblib" not in loaded
+
+    def test_v2_script_has_no_import_side_effects(self):
+        """Test importing forecast_prophet_v2 does not connect to the DB or run forecasts"""
+        loaded = _loaded_modules("import forecast_prophet_v2")
+
+        assert "prophet" not in loaded
+        assert "db" not in loaded
+
+    def test_stage_imports_cover_cli_stages(self):
+        """Test every CLI stage declares its lazy imports for the import-time benchmark"""
+        from vitamarkets.pipeline import STAGE_IMPORTS
+
+        assert set(STAGE_IMPORTS) == {"etl", "forecast", "metrics", "report"}
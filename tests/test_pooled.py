@@ -0,0 +1,165 @@
+"""
+Tests for pooled multi-SKU fitting
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vitamarkets.forecasting import build_holidays
+from vitamarkets.pooled import (
+    STAN_FILE,
+    forecast_pooled,
+    initial_values,
+    predict,
+    split_groups,
+    stan_data,
+)
+from vitamarkets.prophet_lite import feature_blocks
+
+
+def _features(days=400):
+    dates = pd.date_range("2022-01-01", periods=days, freq="D")
+    return feature_blocks(dates, dates[days - 60], build_holidays())
+
+
+def _params(features, K, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "level": rng.uniform(0.3, 0.6, K),
+        "slope": rng.normal(0, 0.1, K),
+        "delta": rng.normal(0, 0.01, (features["changepoint"].shape[1], K)),
+        "season_beta": rng.normal(0, 0.05, (features["seasonality"].shape[1], K)),
+        "holiday_beta": rng.normal(0, 0.05, (features["holiday"].shape[1], K)),
+        "promo_beta": rng.uniform(0, 0.5, K),
+        "sigma": np.full(K, 0.05),
+    }
+
+
+class TestSplitGroups:
+    """Test SKU grouping"""
+
+    def test_groups_by_category(self):
+        """Test SKUs are grouped by their category, unknown SKUs together"""
+        groups = split_groups(["A", "B", "C", "D"], {"A": "Tech", "B": "Home", "C": "Tech"})
+
+        assert groups == {"Home": ["B"], "Tech": ["A", "C"], "ungrouped": ["D"]}
+
+    def test_large_groups_are_chunked(self):
+        """Test no group exceeds the size cap and every SKU is kept once"""
+        skus = [f"S{i:02d}" for i in range(25)]
+        groups = split_groups(skus, {sku: "Tech" for sku in skus}, max_group_size=10)
+
+        assert list(groups) == ["Tech #1", "Tech #2", "Tech #3"]
+        assert max(len(m) for m in groups.values()) <= 10
+        assert sorted(sum(groups.values(), [])) == skus
+
+
+class TestStanData:
+    """Test data passed to the Stan program"""
+
+    def test_observations_indexed_and_scaled(self):
+        """Test observations are 1-indexed, scaled per SKU and cut at the last fitted day"""
+        features = _features()
+        K = 3
+        Z = np.zeros((400, K))
+        Z[::9, 1] = 1
+        params = _params(features, K)
+        yhat, _, _ = predict(params, features, Z, np.ones(K))
+        mask = np.zeros((400, K), dtype=bool)
+        mask[:340, 0] = mask[50:340, 1] = mask[:300, 2] = True
+
+        data, scale = stan_data(features, yhat * 100, Z, mask)
+
+        assert data["T"] == 340
+        assert data["N"] == mask.sum()
+        assert data["obs_t"].min() == 1 and data["obs_k"].max() == K
+        assert data["y"].max() == pytest.approx(1.0)
+        obs_t, obs_k = data["obs_t"] - 1, data["obs_k"] - 1
+        np.testing.assert_allclose(data["y"] * scale[obs_k], yhat[obs_t, obs_k] * 100)
+
+    def test_initial_values_shapes(self):
+        """Test inits match the declared parameter shapes"""
+        features = _features()
+        mask = np.ones((400, 2), dtype=bool)
+        data, _ = stan_data(features, np.ones((400, 2)), np.zeros((400, 2)), mask)
+
+        inits = initial_values(data)
+
+        assert inits["delta"].shape == (data["S"], 2)
+        assert inits["season_raw"].shape == (data["F"], 2)
+        np.testing.assert_allclose(inits["level"], 1.0)
+
+    def test_intervals_bracket_forecast(self):
+        """Test lower <= yhat <= upper and non-negative bounds"""
+        features = _features()
+        yhat, lower, upper = predict(
+            _params(features, 2), features, np.zeros((400, 2)), np.array([10.0, 20.0])
+        )
+
+        assert (lower >= 0).all()
+        assert (lower <= yhat).all() and (yhat <= upper).all()
+
+
+def _cmdstan_available():
+    try:
+        import cmdstanpy
+
+        cmdstanpy.cmdstan_path()
+    except Exception:
+        return False
+    return True
+
+
+@pytest.mark.skipif(not _cmdstan_available(), reason="CmdStan not installed")
+class TestPooledFit:
+    """End-to-end pooled fit (needs CmdStan to compile the model)"""
+
+    def test_forecasts_short_series(self):
+        """Test a short SKU is forecast alongside a long one in the same group"""
+        ds = pd.date_range("2021-01-01", periods=800, freq="D")
+        weekly = np.tile([10, 12, 14, 16, 18, 30, 35], 115)[:800]
+        df = pd.concat(
+            [
+                pd.DataFrame({"ds": ds, "sku": "LONG", "y": weekly, "is_promo": 0}),
+                pd.DataFrame({"ds": ds[-200:], "sku": "SHORT", "y": weekly[-200:], "is_promo": 0}),
+            ]
+        )
+
+        results, failed = forecast_pooled(df, {"LONG": "T", "SHORT": "T"}, build_holidays(), "r")
+
+        assert failed == []
+        assert {m["sku"] for _, m in results} == {"LONG", "SHORT"}
+        assert all(m["fit_status"] == "pooled" for _, m in results)
+
+
+def test_failed_group_gets_metrics_rows(monkeypatch):
+    """Test SKUs of a group whose fit raises get fit_status "failed" rows"""
+    from vitamarkets import pooled
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("optimizer diverged")
+
+    monkeypatch.setattr(pooled, "load_model", lambda: None)
+    monkeypatch.setattr(pooled, "fit_group", fail)
+    ds = pd.date_range("2021-01-01", periods=400, freq="D")
+    df = pd.concat(
+        pd.DataFrame({"ds": ds, "sku": sku, "y": 10.0, "is_promo": 0}) for sku in ("A", "B")
+    )
+
+    results, failed = forecast_pooled(df, {"A": "T", "B": "T"}, build_holidays(), "r")
+
+    assert len(failed) == 2
+    assert [combined for combined, _ in results] == [None, None]
+    metrics = pd.DataFrame([m for _, m in results])
+    assert sorted(metrics["sku"]) == ["A", "B"]
+    assert (metrics["fit_status"] == "failed").all()
+    assert metrics["test_mape_pct"].isna().all()
+    assert (metrics["n_train"] + metrics["n_test"] == 400).all()
+    assert "error" not in metrics
+
+
+def test_stan_program_is_packaged():
+    """Test the Stan source ships inside the package"""
+    assert STAN_FILE.exists()
+    assert "season_mu" in STAN_FILE.read_text()
@@ -0,0 +1,110 @@
+"""
+Tests for the shared preprocessing stage
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vitamarkets.forecasting import select_eligible_skus
+from vitamarkets.preprocessing import fill_gaps, preprocess
+
+
+def _mart_rows():
+    """Two mart rows per day for A (channels), a gap on Jan 3 and bad rows."""
+    return pd.DataFrame(
+        {
+            "ds": ["2024-01-01", "2024-01-01", "2024-01-02", "2024-01-04", "2024-01-05", None],
+            "sku": ["A", "A", "A", "A", "A", "A"],
+            "y": [2.0, 3.0, 4.0, 8.0, -1.0, 5.0],
+            "is_promo": [0, 1, 0, 0, 0, 0],
+        }
+    )
+
+
+class TestPreprocess:
+    """Test clean + SKU-day aggregation + stats"""
+
+    def test_bad_rows_dropped_and_days_summed(self):
+        """Test negative/null rows are dropped and channel rows are summed per day"""
+        history = preprocess(_mart_rows(), clip_factor=10)["history"]
+
+        assert history["ds"].dt.strftime("%m-%d").tolist() == ["01-01", "01-02", "01-04"]
+        assert history["y"].tolist() == [5.0, 4.0, 8.0]
+        assert history["is_promo"].tolist() == [1, 0, 0]
+
+    def test_stats_are_sku_indexed(self):
+        """Test eligibility stats come from observed SKU-days, one row per SKU"""
+        stats = preprocess(_mart_rows(), fill="zero")["stats"]
+
+        assert stats.index.tolist() == ["A"]
+        row = stats.loc["A"]
+        assert (row["n_days"], row["span_days"], row["total_units"]) == (3, 3, 17.0)
+        assert row["n_filled"] == 1
+
+    def test_quantile_clip_per_sku(self):
+        """Test each SKU is capped at factor x its own quantile"""
+        ds = pd.date_range("2024-01-01", periods=100, freq="D")
+        df = pd.concat(
+            [
+                pd.DataFrame({"ds": ds, "sku": "LOW", "y": np.r_[np.ones(99), 1000.0]}),
+                pd.DataFrame({"ds": ds, "sku": "HIGH", "y": np.arange(100.0)}),
+            ]
+        )
+
+        prepared = preprocess(df, clip_quantile=0.9, clip_factor=1.0)
+
+        caps = prepared["stats"]["clip_value"]
+        history = prepared["history"].groupby("sku")["y"].max()
+        assert history["LOW"] == pytest.approx(caps["LOW"]) == pytest.approx(1.0)
+        assert history["HIGH"] == pytest.approx(caps["HIGH"]) == pytest.approx(89.1)
+
+    def test_eligibility_from_stats(self):
+        """Test select_eligible_skus reads the SKU-indexed stats"""
+        stats = preprocess(_mart_rows())["stats"]
+
+        assert select_eligible_skus(stats, min_span_days=3, min_total_units=0, min_n_days=3) == [
+            "A"
+        ]
+        assert select_eligible_skus(stats, min_span_days=4, min_total_units=0, min_n_days=0) == []
+
+
+class TestFillGaps:
+    """Test calendar gap filling policies"""
+
+    def _daily(self):
+        return pd.DataFrame(
+            {
+                "sku": ["A", "A", "B", "B"],
+                "ds": pd.to_datetime(["2024-01-01", "2024-01-04", "2024-01-01", "2024-01-03"]),
+                "y": [1.0, 4.0, 10.0, 30.0],
+                "is_promo": [1, 0, 0, 0],
+            }
+        )
+
+    @pytest.mark.parametrize(
+        "policy, expected",
+        [
+            ("zero", [1.0, 0.0, 0.0, 4.0, 10.0, 0.0, 30.0]),
+            ("ffill", [1.0, 1.0, 1.0, 4.0, 10.0, 10.0, 30.0]),
+            ("interpolate", [1.0, 2.0, 3.0, 4.0, 10.0, 20.0, 30.0]),
+        ],
+    )
+    def test_policies_stay_within_each_sku(self, policy, expected):
+        """Test every SKU gets a full calendar and fills never cross SKU blocks"""
+        full = fill_gaps(self._daily(), policy)
+
+        assert full["sku"].tolist() == ["A"] * 4 + ["B"] * 3
+        assert full.groupby("sku")["ds"].diff().dropna().dt.days.eq(1).all()
+        np.testing.assert_allclose(full["y"], expected)
+
+    def test_none_leaves_gaps(self):
+        """Test the default policy returns the observed rows unchanged"""
+        daily = self._daily()
+
+        assert fill_gaps(daily, "none") is daily
+
+    def test_unknown_policy_rejected(self):
+        """Test a typo in the policy name fails loudly"""
+        with pytest.raises(ValueError, match="Unknown gap fill policy"):
+            fill_gaps(self._daily(), "backfill")
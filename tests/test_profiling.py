@@ -0,0 +1,101 @@
+"""
+Tests for per-stage run profiles (--profile)
+"""
+
+import json
+import pstats
+
+import numpy as np
+import pytest
+
+from vitamarkets.profiling import (
+    PROFILE_FILE,
+    stage,
+    start_profile,
+    summary_lines,
+    write_profile,
+)
+
+
+class TestStage:
+    """Test what a profiled stage records"""
+
+    def test_records_time_memory_and_rows(self, tmp_path):
+        """Test a stage records wall/CPU time, peak allocation and caller-set rows"""
+        profile = start_profile(tmp_path, "test")
+
+        with stage(profile, "allocate") as record:
+            block = np.ones(4 * 2**20)  # 32 MB
+            record["rows"] = len(block)
+        del block
+        with stage(profile, "idle"):
+            pass
+        write_profile(profile)
+
+        allocate, idle = profile["stages"]
+        assert [allocate["stage"], idle["stage"]] == ["allocate", "idle"]
+        assert allocate["rows"] == 4 * 2**20 and idle["rows"] is None
+        assert allocate["py_peak_mb"] >= 32 > idle["py_peak_mb"]
+        assert allocate["wall_seconds"] >= 0 and allocate["cpu_seconds"] >= 0
+
+    def test_failed_stage_recorded_and_raised(self, tmp_path):
+        """Test an exception is re-raised and the stage kept with its error"""
+        profile = start_profile(tmp_path, "test")
+
+        with pytest.raises(ValueError):
+            with stage(profile, "broken"):
+                raise ValueError("bad rows")
+        write_profile(profile)
+
+        assert profile["stages"][0]["error"] == "ValueError: bad rows"
+
+    def test_untraced_profile(self, tmp_path):
+        """Test trace_memory=False still times stages but leaves py_peak_mb empty"""
+        profile = start_profile(tmp_path, "bench", trace_memory=False)
+
+        with stage(profile, "write") as record:
+            record["rows"] = 1
+        write_profile(profile)
+
+        assert record["py_peak_mb"] is None and record["wall_seconds"] >= 0
+        assert summary_lines(profile)[1].split()[4] == "-"
+
+    def test_disabled_profile_is_noop(self):
+        """Test stage(None, ...) still yields a record but measures nothing"""
+        with stage(None, "anything") as record:
+            record["rows"] = 3
+
+        assert record == {"stage": "anything", "rows": 3}
+
+
+class TestOutputs:
+    """Test the JSON profile, pstats dumps and summary table"""
+
+    def test_json_written_next_to_outputs(self, tmp_path):
+        """Test run_profile.json lands in the output dir with every stage and a total"""
+        profile = start_profile(tmp_path, "vitamarkets.pipeline --forecast")
+        for name in ("mart_read", "fit_predict"):
+            with stage(profile, name) as record:
+                record["rows"] = 10
+
+        path = write_profile(profile)
+
+        assert path == tmp_path / PROFILE_FILE
+        saved = json.loads(path.read_text())
+        assert saved["command"] == "vitamarkets.pipeline --forecast"
+        assert [s["stage"] for s in saved["stages"]] == ["mart_read", "fit_predict"]
+        assert saved["total_wall_seconds"] == pytest.approx(
+            sum(s["wall_seconds"] for s in saved["stages"]), abs=1e-3
+        )
+        assert len(summary_lines(saved)) == 3
+
+    def test_pstats_dump_per_stage(self, tmp_path):
+        """Test pstats=True writes a loadable cProfile dump for each stage"""
+        profile = start_profile(tmp_path, "test", pstats=True)
+
+        with stage(profile, "sort") as record:
+            sorted(np.random.default_rng(0).random(1000).tolist())
+        write_profile(profile)
+
+        stats = pstats.Stats(record["pstats"])
+        assert any(func[2] == "<built-in method builtins.sorted>" for func in stats.stats)
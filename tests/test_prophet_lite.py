@@ -0,0 +1,123 @@
+"""
+Tests for the batched lite forecasting engine
+"""
+
+import numpy as np
+import pandas as pd
+
+from vitamarkets import prophet_lite
+from vitamarkets.forecasting import FORECAST_COLUMNS, build_holidays
+from vitamarkets.prophet_lite import design_matrix, forecast_batch, ridge_solve
+
+
+def _history(skus=("A", "B"), days=800, promo_sku=None):
+    ds = pd.date_range("2021-01-01", periods=days, freq="D")
+    rng = np.random.default_rng(0)
+    frames = []
+    for i, sku in enumerate(skus):
+        weekly = np.tile([10, 12, 14, 16, 18, 30, 35], days // 7 + 1)[:days]
+        promo = (np.arange(days) % 30 < 5).astype(int) if sku == promo_sku else np.zeros(days)
+        y = (weekly * (1 + i) * (1 + promo) + rng.normal(0, 1, days)).clip(min=0)
+        frames.append(pd.DataFrame({"ds": ds, "sku": sku, "y": y, "is_promo": promo}))
+    return pd.concat(frames, ignore_index=True)
+
+
+class TestRidgeSolve:
+    """Test the batched least-squares solve"""
+
+    def test_matches_per_sku_solve(self):
+        """Test batched coefficients equal separate per-SKU ridge solves"""
+        rng = np.random.default_rng(1)
+        X = rng.normal(size=(200, 5))
+        Y = rng.normal(size=(200, 3))
+        Z = np.zeros((200, 3))
+        Z[:, 2] = rng.integers(0, 2, 200)
+        mask = np.ones((200, 3), dtype=bool)
+        mask[150:, 1] = False
+        penalty = np.full(5, 0.5)
+
+        coef = ridge_solve(X, np.where(mask, Y, 0), mask, Z, penalty, promo_penalty=0.5)
+
+        for k in range(3):
+            Xk = np.hstack([X, Z[:, [k]]])[mask[:, k]]
+            expected = np.linalg.solve(Xk.T @ Xk + 0.5 * np.eye(6), Xk.T @ Y[mask[:, k], k])
+            np.testing.assert_allclose(coef[:, k], expected, atol=1e-8)
+
+    def test_distinct_masks_across_chunks(self, monkeypatch):
+        """Test SKUs that each have their own mask are solved correctly in every chunk"""
+        monkeypatch.setattr(prophet_lite, "SOLVE_CHUNK", 2)
+        rng = np.random.default_rng(2)
+        X = rng.normal(size=(120, 4))
+        Y = rng.normal(size=(120, 5))
+        Z = np.where(np.arange(5) % 2 == 0, rng.integers(0, 2, (120, 5)), 0).astype(float)
+        mask = rng.random((120, 5)) > 0.3
+        penalty = np.full(4, 0.2)
+
+        coef = ridge_solve(X, Y, mask, Z, penalty, promo_penalty=0.5)
+
+        for k in range(5):
+            Xk = np.hstack([X, Z[:, [k]]])[mask[:, k]]
+            reg = np.diag([*penalty, 0.5 if Z[:, k].any() else 0.0])
+            if not Z[:, k].any():
+                Xk, reg = Xk[:, :4], reg[:4, :4]
+            expected = np.linalg.solve(Xk.T @ Xk + reg, Xk.T @ Y[mask[:, k], k])
+            np.testing.assert_allclose(coef[: len(expected), k], expected, atol=1e-8)
+            if not Z[:, k].any():
+                assert coef[4, k] == 0
+
+
+class TestDesignMatrix:
+    """Test the shared design matrix"""
+
+    def test_penalty_matches_columns(self):
+        """Test there is one penalty per column and the intercept is unpenalized"""
+        dates = pd.date_range("2021-01-01", periods=100, freq="D")
+        X, penalty = design_matrix(dates, dates[-1], build_holidays())
+
+        assert X.shape == (100, len(penalty))
+        assert penalty[0] == 0
+        np.testing.assert_array_equal(X[:, 0], 1)
+
+
+class TestForecastBatch:
+    """Test the end-to-end batched forecast"""
+
+    def test_output_schema(self):
+        """Test output matches the forecast_sku row and metrics contract"""
+        results, failed = forecast_batch(_history(), build_holidays(), "run1", periods=30)
+
+        assert failed == []
+        assert len(results) == 2
+        combined, metrics = results[0]
+        assert list(combined.columns) == FORECAST_COLUMNS
+        assert set(combined["type"]) == {"actual", "forecast"}
+        assert (combined["type"] == "forecast").sum() == 800 + 30
+        assert metrics["fit_status"] == "lite"
+        assert metrics["n_test"] == 30
+
+    def test_learns_weekly_pattern_and_promo(self):
+        """Test a clean weekly series with promo lift is fitted closely"""
+        results, _ = forecast_batch(_history(promo_sku="B"), build_holidays(), "run1")
+
+        mape = {m["sku"]: m["test_mape_pct"] for _, m in results}
+        assert mape["A"] < 10
+        assert mape["B"] < 10
+
+    def test_short_history_reported(self):
+        """Test SKUs below the minimum history are skipped with a reason"""
+        df = pd.concat([_history(("A",)), _history(("SHORT",), days=200)])
+
+        results, failed = forecast_batch(df, build_holidays(), "run1")
+
+        assert [m["sku"] for _, m in results] == ["A"]
+        assert failed == ["Insufficient data for SHORT"]
+
+    def test_intervals_contain_forecast(self):
+        """Test yhat_lower <= yhat <= yhat_upper with non-negative bounds"""
+        results, _ = forecast_batch(_history(), build_holidays(), "run1")
+        fc = results[0][0]
+        fc = fc[fc["type"] == "forecast"]
+
+        assert (fc["yhat_lower"] >= 0).all()
+        assert (fc["yhat_lower"] <= fc["yhat"] + 1e-9).all()
+        assert (fc["yhat"] <= fc["yhat_upper"] + 1e-9).all()
@@ -0,0 +1,158 @@
+"""
+Tests for publishing run tables and the materialized contract views. They need a
+reachable PostgreSQL (DB_URI / PG_*) and are skipped otherwise.
+"""
+
+import pandas as pd
+from sqlalchemy import text
+
+from vitamarkets.config import STABLE_VIEW_FORECASTS, STABLE_VIEW_METRICS
+from vitamarkets.publish import (
+    publish_views,
+    relation_kinds,
+    view_statements,
+    write_run_tables,
+)
+
+VIEW_COLUMNS = {
+    STABLE_VIEW_FORECASTS: [
+        "forecast_date",
+        "sku",
+        "predicted_units",
+        "lower_bound_80pct",
+        "upper_bound_80pct",
+        "data_type",
+        "forecast_run_id",
+    ],
+    STABLE_VIEW_METRICS: [
+        "sku",
+        "mean_absolute_error",
+        "root_mean_squared_error",
+        "mean_absolute_pct_error",
+        "forecast_bias",
+        "prediction_interval_coverage_pct",
+        "training_days",
+        "test_days",
+        "forecast_run_id",
+    ],
+    "simple_prophet_forecast": [
+        "ds",
+        "sku",
+        "yhat",
+        "yhat_lower",
+        "yhat_upper",
+        "data_type",
+        "forecast_run_id",
+    ],
+    "forecast_error_metrics": [
+        "sku",
+        "test_mae",
+        "test_rmse",
+        "test_mape_pct",
+        "test_bias",
+        "test_coverage_pct",
+        "n_train",
+        "n_test",
+        "run_id",
+    ],
+}
+
+
+def _write(engine, schema, run_id, skus=("A", "B")):
+    """Write a small run (actual and forecast rows on the same dates); returns its tables."""
+    dates = pd.date_range("2024-01-01", periods=3)
+    forecasts = pd.concat(
+        pd.DataFrame({"ds": dates, "yhat": 1.0, "yhat_lower": 0.5, "yhat_upper": 1.5}).assign(
+            sku=sku, run_id=run_id, type=kind
+        )
+        for sku in skus
+        for kind in ("actual", "forecast")
+    )
+    metrics = pd.DataFrame(
+        {
+            "sku": list(skus),
+            "test_mae": 1.0,
+            "test_rmse": 1.2,
+            "test_mape_pct": range(len(skus)),
+            "test_bias": 0.1,
+            "test_coverage_pct": 80.0,
+            "n_train": 700,
+            "n_test": 30,
+            "run_id": run_id,
+        }
+    )
+    return write_run_tables(engine, forecasts, metrics, run_id, schema=schema)
+
+
+def _view_oids(engine, schema):
+    with engine.connect() as conn:
+        return {
+            name: conn.execute(
+                text("SELECT to_regclass(:name)::oid"), {"name": f"{schema}.{name}"}
+            ).scalar()
+            for name in (STABLE_VIEW_FORECASTS, STABLE_VIEW_METRICS)
+        }
+
+
+class TestPublishViews:
+    """Test the stable views are materialized, indexed and refreshed in place"""
+
+    def test_first_publish(self, schema):
+        """Test stable views are uniquely indexed materialized views with contract columns"""
+        engine, name = schema
+
+        publish_views(engine, *_write(engine, name, "r1"), schema=name)
+
+        with engine.connect() as conn:
+            assert relation_kinds(conn, name) == {
+                STABLE_VIEW_FORECASTS: "m",
+                STABLE_VIEW_METRICS: "m",
+            }
+            unique = conn.execute(
+                text(
+                    "SELECT tablename FROM pg_indexes "
+                    "WHERE schemaname = :schema AND indexdef LIKE 'CREATE UNIQUE%'"
+                ),
+                {"schema": name},
+            ).scalars()
+            assert set(unique) == {STABLE_VIEW_FORECASTS, STABLE_VIEW_METRICS}
+        for view, columns in VIEW_COLUMNS.items():
+            assert list(pd.read_sql(f"SELECT * FROM {name}.{view}", engine).columns) == columns
+
+    def test_republish_refreshes_in_place(self, schema):
+        """Test a later run refreshes the same materialized views with the new rows"""
+        engine, name = schema
+        publish_views(engine, *_write(engine, name, "r1"), schema=name)
+        before = _view_oids(engine, name)
+
+        publish_views(engine, *_write(engine, name, "r2", skus=("C",)), schema=name)
+
+        assert _view_oids(engine, name) == before
+        forecasts = pd.read_sql(f"SELECT * FROM {name}.simple_prophet_forecast", engine)
+        assert set(forecasts["forecast_run_id"]) == {"r2"} and set(forecasts["sku"]) == {"C"}
+        metrics = pd.read_sql(f"SELECT * FROM {name}.forecast_error_metrics", engine)
+        assert metrics["run_id"].tolist() == ["r2"]
+
+    def test_rebuild_after_cascade(self, schema):
+        """Test republishing a run whose tables were replaced (and views dropped) rebuilds"""
+        engine, name = schema
+        publish_views(engine, *_write(engine, name, "r1"), schema=name)
+
+        publish_views(engine, *_write(engine, name, "r1", skus=("A", "B", "C")), schema=name)
+
+        metrics = pd.read_sql(f"SELECT * FROM {name}.{STABLE_VIEW_METRICS}", engine)
+        assert metrics["sku"].tolist() == ["A", "B", "C"]
+
+    def test_upgrade_from_plain_views(self, schema):
+        """Test plain stable views from an older release are replaced by materialized ones"""
+        engine, name = schema
+        tables = _write(engine, name, "r1")
+        with engine.begin() as conn:
+            for statement in view_statements(*tables, schema=name):
+                conn.execute(text(statement))
+
+        publish_views(engine, *tables, schema=name)
+
+        with engine.connect() as conn:
+            assert set(relation_kinds(conn, name).values()) == {"m"}
+        assert len(pd.read_sql(f"SELECT * FROM {name}.simple_prophet_forecast", engine)) == 12
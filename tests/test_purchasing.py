@@ -0,0 +1,108 @@
+"""
+Tests for purchase recommendations
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vitamarkets.purchasing import ALL, recommend
+
+Z80 = NormalDist().inv_cdf(0.9)  # half-width of an 80% interval in sigmas
+
+
+def _run(skus=("A", "B"), days=5, horizon=20, daily=10.0, sigma=2.0):
+    """Run output: `days` actuals, then in-sample and future forecast rows per SKU."""
+    frames = []
+    for sku in skus:
+        history = pd.date_range("2024-01-01", periods=days, freq="D")
+        future = pd.date_range(history[-1] + pd.Timedelta(days=1), periods=horizon, freq="D")
+        actual = pd.DataFrame({"ds": history, "yhat": 999.0, "type": "actual"})
+        fitted = pd.DataFrame({"ds": history, "yhat": 999.0, "type": "forecast"})
+        ahead = pd.DataFrame({"ds": future, "yhat": daily, "type": "forecast"})
+        frames.append(pd.concat([actual, fitted, ahead]).assign(sku=sku))
+    out = pd.concat(frames, ignore_index=True)
+    out["yhat_lower"] = out["yhat"] - Z80 * sigma
+    out["yhat_upper"] = out["yhat"] + Z80 * sigma
+    return out
+
+
+def _metrics(skus=("A", "B"), mape=(10.0, 30.0)):
+    return pd.DataFrame({"sku": list(skus), "test_mape_pct": list(mape)})
+
+
+def _positions(rows):
+    columns = ["sku", "channel", "country", "on_hand", "on_order", "lead_time_days"]
+    return pd.DataFrame(rows, columns=columns).assign(service_level=np.nan)
+
+
+class TestRecommend:
+    """Test lead-time demand, safety stock and reorder quantities"""
+
+    def test_lead_time_window_is_future_only(self):
+        """Test demand sums the first lead_time_days after the last actual, not fitted rows"""
+        positions = _positions([("A", ALL, ALL, 0, 0, 7), ("B", ALL, ALL, 0, 0, 14)])
+
+        recs = recommend(_run(), _metrics(), positions).set_index("sku")
+
+        assert recs.loc["A", "lead_time_demand"] == pytest.approx(70.0)
+        assert recs.loc["B", "lead_time_demand"] == pytest.approx(140.0)
+        # z(90%) x sigma x sqrt(lead time), with independent daily errors
+        assert recs.loc["A", "safety_stock"] == pytest.approx(
+            NormalDist().inv_cdf(0.9) * 2 * 7**0.5
+        )
+
+    def test_purchase_nets_stock_and_rounds_up(self):
+        """Test purchase_qty = ceil(max(0, reorder point - on hand - on order))"""
+        positions = _positions([("A", ALL, ALL, 30, 15, 7), ("B", ALL, ALL, 500, 0, 7)])
+
+        recs = recommend(_run(sigma=0.0), _metrics(), positions).set_index("sku")
+
+        assert recs.loc["A", "purchase_qty"] == 25
+        assert recs.loc["B", "purchase_qty"] == 0
+        assert recs.index[0] == "A"  # largest purchase first
+        assert recs["forecast_quality"].tolist() == ["HIGH", "LOW"]
+
+    def test_missing_positions_use_defaults(self):
+        """Test SKUs without an inventory row get 0 on hand and the default lead time"""
+        recs = recommend(_run(), _metrics(), _positions([]), lead_time_days=10, service_level=0.95)
+
+        assert recs["on_hand"].eq(0).all()
+        assert recs["lead_time_days"].eq(10).all()
+        assert recs["lead_time_demand"].tolist() == pytest.approx([100.0, 100.0])
+        assert recs["safety_stock"].iloc[0] == pytest.approx(
+            NormalDist().inv_cdf(0.95) * 2 * 10**0.5
+        )
+
+    def test_split_by_channel(self):
+        """Test channel recommendations split demand by share and sum finer positions"""
+        shares = pd.DataFrame(
+            {"sku": ["A", "A"], "channel": ["web", "amazon"], "share": [0.75, 0.25]}
+        )
+        positions = _positions(
+            [
+                ("A", "web", "US", 10, 0, 4),
+                ("A", "web", "CA", 5, 0, 4),
+                ("A", "amazon", "US", 0, 0, 4),
+            ]
+        )
+
+        recs = recommend(
+            _run(skus=("A",), sigma=0.0),
+            _metrics(skus=("A",), mape=(10.0,)),
+            positions,
+            by="channel",
+            shares=shares,
+        ).set_index("channel")
+
+        assert recs.loc["web", "on_hand"] == 15
+        assert recs.loc["web", "lead_time_demand"] == pytest.approx(30.0)
+        assert recs.loc["amazon", "purchase_qty"] == 10
+        assert recs["country"].eq(ALL).all()
+
+    def test_unknown_split_rejected(self):
+        """Test splitting by a column positions don't have fails loudly"""
+        with pytest.raises(ValueError, match="Can only split"):
+            recommend(_run(), _metrics(), _positions([]), by="region")
@@ -0,0 +1,129 @@
+"""
+Tests for worker x thread layout planning
+"""
+
+import os
+
+import pytest
+
+from vitamarkets.resources import (
+    THREAD_ENV_VARS,
+    THREAD_STARTUP_SECONDS,
+    apply_thread_limits,
+    candidate_layouts,
+    load_layout,
+    plan_layout,
+    resolve_layout,
+    save_layout,
+    thread_limits,
+)
+
+
+class TestThreadLimits:
+    """Test per-worker thread caps"""
+
+    def test_all_runtimes_capped(self):
+        """Test every BLAS/OpenMP/Stan variable is set to the limit"""
+        env = thread_limits(2)
+
+        assert set(env) == set(THREAD_ENV_VARS)
+        assert all(v == "2" for v in env.values())
+
+    def test_env_restored_after_block(self, monkeypatch):
+        """Test the variables are capped inside the block and put back after it"""
+        monkeypatch.setenv("OMP_NUM_THREADS", "8")
+        monkeypatch.delenv("MKL_NUM_THREADS", raising=False)
+
+        with apply_thread_limits(1):
+            assert all(os.environ[var] == "1" for var in THREAD_ENV_VARS)
+
+        assert os.environ["OMP_NUM_THREADS"] == "8"
+        assert "MKL_NUM_THREADS" not in os.environ
+
+    def test_loaded_pools_restored_after_block(self):
+        """Test pools already loaded in this process get their threads back (threadpoolctl)"""
+        threadpoolctl = pytest.importorskip("threadpoolctl")
+        import numpy  # noqa: F401  (loads its BLAS)
+
+        with threadpoolctl.threadpool_limits(limits=2):
+            with apply_thread_limits(1):
+                assert all(pool["num_threads"] == 1 for pool in threadpoolctl.threadpool_info())
+
+            assert all(pool["num_threads"] == 2 for pool in threadpoolctl.threadpool_info())
+
+
+class TestPlanLayout:
+    """Test worker count planning from fit cost"""
+
+    def test_never_oversubscribes(self):
+        """Test workers x threads never exceeds available CPUs"""
+        for threads in (1, 2, 4):
+            layout = plan_layout(5000, fit_seconds=3.0, cpus=32, threads_per_worker=threads)
+            assert layout["n_workers"] * layout["threads_per_worker"] <= 32
+
+    def test_many_skus_use_all_cores(self):
+        """Test a large run uses one single-threaded worker per core"""
+        layout = plan_layout(5000, fit_seconds=3.0, cpus=32)
+
+        assert layout == {"n_workers": 32, "threads_per_worker": 1}
+
+    def test_small_run_limits_workers(self):
+        """Test cheap runs don't start more workers than the work amortizes"""
+        layout = plan_layout(8, fit_seconds=2.5, cpus=32)
+
+        assert layout["n_workers"] == 2  # 8 x 2.5s = 20s of work / (2s startup x 5)
+
+    def test_threads_amortize_sooner(self):
+        """Test cheap thread startup lets the same small run use more workers"""
+        layout = plan_layout(8, fit_seconds=2.5, cpus=32, startup_seconds=THREAD_STARTUP_SECONDS)
+
+        assert layout["n_workers"] == 8
+
+    def test_never_more_workers_than_skus(self):
+        """Test worker count is capped at the SKU count"""
+        layout = plan_layout(3, fit_seconds=600.0, cpus=32)
+
+        assert layout["n_workers"] == 3
+
+
+class TestCandidateLayouts:
+    """Test calibration candidates"""
+
+    def test_candidates_fit_machine(self):
+        """Test candidate layouts stay within the core count and are unique"""
+        layouts = candidate_layouts(cpus=8)
+
+        assert {"n_workers": 8, "threads_per_worker": 1} in layouts
+        assert {"n_workers": 2, "threads_per_worker": 4} in layouts
+        assert all(lay["n_workers"] * lay["threads_per_worker"] <= 8 for lay in layouts)
+        assert len(layouts) == len(
+            {(lay["n_workers"], lay["threads_per_worker"]) for lay in layouts}
+        )
+
+
+class TestResolveLayout:
+    """Test layout resolution order"""
+
+    def test_explicit_n_jobs_wins(self):
+        """Test --n-jobs overrides calibration and planning"""
+        layout = resolve_layout(100, n_jobs=4, threads_per_worker=2)
+
+        assert layout == {"n_workers": 4, "threads_per_worker": 2}
+
+    def test_saved_layout_round_trip(self, tmp_path):
+        """Test a layout calibrated on this machine is loaded back"""
+        from vitamarkets.resources import available_cpus
+
+        path = tmp_path / "layout.json"
+        save_layout({"n_workers": 3, "threads_per_worker": 2, "cpus": available_cpus()}, path)
+
+        assert load_layout(path)["n_workers"] == 3
+
+    def test_layout_from_other_machine_ignored(self, tmp_path):
+        """Test a layout calibrated on a different core count is not reused"""
+        from vitamarkets.resources import available_cpus
+
+        path = tmp_path / "layout.json"
+        save_layout({"n_workers": 3, "threads_per_worker": 2, "cpus": available_cpus() + 1}, path)
+
+        assert load_layout(path) is None
@@ -0,0 +1,171 @@
+"""KPI rollup tests; need a reachable PostgreSQL (DB_URI / PG_*), skipped otherwise."""
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from vitamarkets.purchasing import ALL
+from vitamarkets.rollups import DIMENSIONS, MEASURES, ROLLUP_TABLES, refresh_rollups
+
+# Created in each test's schema (conftest.schema)
+MART_DDL = """
+CREATE TABLE {schema}.mart_sales_summary (
+    date DATE, sku TEXT, category TEXT, channel TEXT, country TEXT,
+    customer_segment TEXT, total_units_sold DOUBLE PRECISION,
+    total_order_value DOUBLE PRECISION, transaction_count BIGINT
+)
+"""
+
+
+def _land(engine, schema, start, days):
+    """Append mart rows for `days` days from `start`: 2 SKUs x 2 channels x 2 countries."""
+    rows = [
+        {
+            "date": date.date(),
+            "sku": sku,
+            "category": category,
+            "channel": channel,
+            "country": country,
+            "customer_segment": "Retail" if channel == "Online" else None,
+            "total_units_sold": float(i % 7 + 1),
+            "total_order_value": round((i % 5 + 1) * 9.99, 2),
+            "transaction_count": i % 3 + 1,
+        }
+        for i, (date, (sku, category), channel, country) in enumerate(
+            (date, sku, channel, country)
+            for date in pd.date_range(start, periods=days)
+            for sku in (("A", "Vitamins"), ("B", "Protein"))
+            for channel in ("Online", "Store")
+            for country in ("US", "CA")
+        )
+    ]
+    pd.DataFrame(rows).to_sql(
+        "mart_sales_summary", engine, schema=schema, if_exists="append", index=False
+    )
+
+
+def _rollup(engine, schema, table):
+    key = ["period_start", *DIMENSIONS]
+    return (
+        pd.read_sql(f"SELECT * FROM {schema}.{table}", engine)
+        .sort_values(key)
+        .reset_index(drop=True)
+    )
+
+
+def _rebuilt(engine, schema):
+    """Every rollup table as a full refresh builds it (in a copy of the schema's mart)."""
+    copy = f"{schema}_full"
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {copy}"))
+        conn.execute(
+            text(f"CREATE TABLE {copy}.mart_sales_summary AS TABLE {schema}.mart_sales_summary")
+        )
+    try:
+        refresh_rollups(engine, full_refresh=True, schema=copy)
+        return {table: _rollup(engine, copy, table) for table in ROLLUP_TABLES}
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {copy} CASCADE"))
+
+
+def _assert_same(actual, expected):
+    columns = ["period_start", *DIMENSIONS, *MEASURES, "n_days"]
+    pd.testing.assert_frame_equal(actual[columns], expected[columns], check_dtype=False)
+
+
+@pytest.mark.parametrize("schema", [MART_DDL], indirect=True, ids=["mart"])
+class TestRefreshRollups:
+    """Test the rollup tables aggregate the mart and are maintained incrementally"""
+
+    def test_first_refresh_builds(self, schema):
+        """Test an empty table is built from the whole mart, weeks starting on Monday"""
+        engine, name = schema
+        _land(engine, name, "2024-01-01", 14)
+
+        refresh_rollups(engine, schema=name)
+
+        weekly = _rollup(engine, name, "kpi_rollup_weekly")
+        totals = weekly[(weekly[list(DIMENSIONS)] == ALL).all(axis=1)]
+        assert [str(d) for d in totals["period_start"]] == ["2024-01-01", "2024-01-08"]
+        assert totals["n_days"].tolist() == [7, 7]
+        mart = pd.read_sql(f"SELECT * FROM {name}.mart_sales_summary", engine)
+        assert totals["total_units_sold"].sum() == mart["total_units_sold"].sum()
+        assert totals["transaction_count"].sum() == mart["transaction_count"].sum()
+
+    def test_grouping_sets_consistent(self, schema):
+        """Test each single-dimension split sums to the portfolio total, UNKNOWN for gaps"""
+        engine, name = schema
+        _land(engine, name, "2024-01-01", 10)
+
+        refresh_rollups(engine, schema=name)
+
+        monthly = _rollup(engine, name, "kpi_rollup_monthly")
+        total = monthly[(monthly[list(DIMENSIONS)] == ALL).all(axis=1)]
+        for dim in DIMENSIONS:
+            others = [d for d in DIMENSIONS if d != dim]
+            split = monthly[(monthly[others] == ALL).all(axis=1) & (monthly[dim] != ALL)]
+            assert split["total_order_value"].sum() == pytest.approx(
+                float(total["total_order_value"].sum())
+            )
+        assert set(monthly["customer_segment"]) == {ALL, "Retail", "UNKNOWN"}
+        cube = monthly[(monthly[["category", "channel", "country"]] != ALL).all(axis=1)]
+        assert len(cube) == 2 * 2 * 2 and set(cube["customer_segment"]) == {ALL}
+
+    def test_incremental_matches_full_refresh(self, schema):
+        """Test appending days and refreshing equals rebuilding every grain from scratch"""
+        engine, name = schema
+        _land(engine, name, "2024-01-01", 40)
+        refresh_rollups(engine, schema=name)
+
+        _land(engine, name, "2024-02-10", 30)
+        written = refresh_rollups(engine, schema=name)
+
+        expected = _rebuilt(engine, name)
+        for table in ROLLUP_TABLES:
+            _assert_same(_rollup(engine, name, table), expected[table])
+        # Only periods from the latest one on: Feb 9 onward, the week of Feb 5, February
+        assert written["kpi_rollup_daily"] < len(expected["kpi_rollup_daily"])
+        assert written["kpi_rollup_monthly"] < len(expected["kpi_rollup_monthly"])
+
+    def test_untouched_periods_kept(self, schema):
+        """Test periods before the latest are not rewritten by an incremental refresh"""
+        engine, name = schema
+        _land(engine, name, "2024-01-01", 20)
+        refresh_rollups(engine, schema=name)
+        before = _rollup(engine, name, "kpi_rollup_weekly")
+
+        _land(engine, name, "2024-01-21", 5)
+        refresh_rollups(engine, schema=name)
+
+        after = _rollup(engine, name, "kpi_rollup_weekly")
+        old = pd.Timestamp("2024-01-15").date()
+        kept = before[before["period_start"] < old].merge(after, on=["period_start", *DIMENSIONS])
+        assert len(kept) == (before["period_start"] < old).sum()
+        assert (kept["updated_at_x"] == kept["updated_at_y"]).all()
+        assert (
+            after[after["period_start"] >= old]["updated_at"] > before["updated_at"].max()
+        ).all()
+
+    def test_since_recomputes_restated_days(self, schema):
+        """Test --since picks up a restated past day that the default refresh would miss"""
+        engine, name = schema
+        _land(engine, name, "2024-01-01", 40)
+        refresh_rollups(engine, schema=name)
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    f"UPDATE {name}.mart_sales_summary SET total_units_sold = total_units_sold + 1 "
+                    "WHERE date = '2024-01-03'"
+                )
+            )
+
+        refresh_rollups(engine, schema=name)
+        assert not _rollup(engine, name, "kpi_rollup_daily").equals(
+            _rebuilt(engine, name)["kpi_rollup_daily"]
+        )
+
+        refresh_rollups(engine, since="2024-01-03", schema=name)
+        expected = _rebuilt(engine, name)
+        for table in ROLLUP_TABLES:
+            _assert_same(_rollup(engine, name, table), expected[table])
@@ -0,0 +1,164 @@
+"""
+Tests for straggler-aware ordering, per-SKU fit budgets and the seasonal-naive fallback
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vitamarkets import forecasting
+from vitamarkets.baselines import seasonal_naive
+from vitamarkets.scheduling import (
+    expected_fit_seconds,
+    load_past_fit_seconds,
+    order_longest_first,
+    save_fit_seconds,
+    status_counts,
+)
+
+
+class TestOrdering:
+    """Test longest-expected-first ordering"""
+
+    def test_orders_by_series_length_without_history(self):
+        """Test longer series are submitted first when no fit times are known"""
+        lengths = {"Short": 400, "Long": 2900, "Medium": 1200}
+
+        assert order_longest_first(lengths) == ["Long", "Medium", "Short"]
+
+    def test_past_fit_time_overrides_length(self):
+        """Test a slow SKU from a previous run moves ahead of longer series"""
+        lengths = {"A": 1000, "B": 1000, "Slow": 500}
+        past = {"A": 2.0, "B": 2.0, "Slow": 60.0}
+
+        assert order_longest_first(lengths, past)[0] == "Slow"
+
+    def test_unknown_skus_scaled_from_known(self):
+        """Test SKUs without history are estimated at the known seconds-per-row rate"""
+        lengths = {"Known": 1000, "New": 2000}
+        past = {"Known": 4.0}
+
+        cost = expected_fit_seconds(lengths, past)
+
+        assert cost["Known"] == 4.0
+        assert cost["New"] == 8.0
+
+    def test_fit_times_round_trip(self, tmp_path):
+        """Test fit times merge into the saved history"""
+        path = tmp_path / "fit_times.json"
+        save_fit_seconds(pd.DataFrame({"sku": ["A"], "fit_seconds": [1.5]}), path)
+        save_fit_seconds(pd.DataFrame({"sku": ["B"], "fit_seconds": [2.5]}), path)
+
+        assert load_past_fit_seconds(path) == {"A": 1.5, "B": 2.5}
+
+    def test_batch_fit_times_not_saved(self, tmp_path):
+        """Test amortized batch timings don't enter the Prophet fit-time history"""
+        path = tmp_path / "fit_times.json"
+        metrics_df = pd.DataFrame(
+            {"sku": ["A", "B"], "fit_seconds": [4.0, 0.01], "fit_status": ["prophet", "cheap"]}
+        )
+
+        save_fit_seconds(metrics_df, path)
+
+        assert load_past_fit_seconds(path) == {"A": 4.0}
+
+
+class TestStatusCounts:
+    """Test fit outcome summary"""
+
+    def test_all_statuses_reported(self):
+        """Test every outcome is counted, including ones that did not occur"""
+        metrics_df = pd.DataFrame({"fit_status": ["prophet", "prophet", "fallback"]})
+
+        counts = status_counts(metrics_df)
+
+        assert counts.to_dict() == {
+            "prophet": 2,
+            "retried": 0,
+            "fallback": 1,
+            "failed": 0,
+            "lite": 0,
+            "pooled": 0,
+            "cheap": 0,
+        }
+
+
+class TestSeasonalNaive:
+    """Test the fallback model"""
+
+    def _weekly_series(self, weeks=20):
+        ds = pd.date_range("2024-01-01", periods=7 * weeks, freq="D")  # starts on a Monday
+        return pd.DataFrame({"ds": ds, "y": np.tile([10, 20, 30, 40, 50, 60, 70], weeks)})
+
+    def test_output_matches_prophet_columns(self):
+        """Test fallback output can replace Prophet's predict() output"""
+        train = self._weekly_series()
+        future = pd.DataFrame({"ds": pd.date_range("2024-05-20", periods=14, freq="D")})
+
+        out = seasonal_naive(train, future)
+
+        assert list(out.columns) == ["ds", "yhat", "yhat_lower", "yhat_upper"]
+        assert len(out) == 14
+
+    def test_repeats_weekly_pattern(self):
+        """Test future days get the recent value for their weekday"""
+        train = self._weekly_series()
+        future = pd.DataFrame({"ds": pd.date_range("2024-05-20", periods=7, freq="D")})
+
+        out = seasonal_naive(train, future)
+
+        assert out["yhat"].tolist() == [10, 20, 30, 40, 50, 60, 70]
+        assert (out["yhat_lower"] <= out["yhat"]).all()
+        assert (out["yhat_upper"] >= out["yhat"]).all()
+
+
+class TestFitBudget:
+    """Test fit_timeout bounds a SKU's Prophet fits together"""
+
+    FIT_SECONDS = 0.2
+
+    @pytest.fixture
+    def timeouts(self, monkeypatch):
+        """Replace Prophet with a fit that takes FIT_SECONDS or raises at its timeout."""
+        seen = []
+
+        def fake_fit_predict(train, future, holidays_df, has_promo, fit_kwargs, *args):
+            timeout = fit_kwargs.get("timeout")
+            seen.append(timeout)
+            if timeout is not None and timeout < self.FIT_SECONDS:
+                time.sleep(timeout)
+                raise RuntimeError("cmdstan optimize timed out")
+            time.sleep(self.FIT_SECONDS)
+            return pd.DataFrame(
+                {"ds": future["ds"].to_numpy(), "yhat": 1.0, "yhat_lower": 0.0, "yhat_upper": 2.0}
+            )
+
+        monkeypatch.setattr(forecasting, "prophet_fit_predict", fake_fit_predict)
+        return seen
+
+    @staticmethod
+    def _history():
+        ds = pd.date_range("2023-01-02", periods=400, freq="D")
+        return pd.DataFrame({"ds": ds, "y": 10.0 + ds.dayofweek, "is_promo": 0})
+
+    def test_fits_share_one_deadline(self, timeouts):
+        """Test later fits get the time left and a spent budget skips to the fallback"""
+        started = time.perf_counter()
+
+        _, metrics = forecasting.forecast_sku(self._history(), "A", None, "r1", fit_timeout=0.3)
+
+        # holdout fit (whole budget), full fit (what's left, times out); retry skipped
+        assert len(timeouts) == 2
+        assert timeouts[0] == pytest.approx(0.3, abs=0.05)
+        assert timeouts[1] < self.FIT_SECONDS
+        assert metrics["fit_status"] == "fallback"
+        assert time.perf_counter() - started < 0.3 + self.FIT_SECONDS
+
+    def test_no_timeout_is_unbounded(self, timeouts):
+        """Test fit_timeout=None passes no timeout to the optimizer"""
+        _, metrics = forecasting.forecast_sku(self._history(), "A", None, "r1", fit_timeout=None)
+
+        assert timeouts == [None, None]
+        assert metrics["fit_status"] == "prophet"
@@ -0,0 +1,88 @@
+"""sku_series_stats tests; need a reachable PostgreSQL (DB_URI / PG_*), skipped otherwise."""
+
+import pandas as pd
+import pytest
+
+from vitamarkets.forecasting import select_eligible_skus
+from vitamarkets.preprocessing import preprocess
+from vitamarkets.series_stats import load_series_stats, refresh_series_stats
+
+# Created in each test's schema (conftest.schema)
+MART_DDL = """
+CREATE TABLE {schema}.mart_sales_summary (
+    date DATE, sku TEXT, channel TEXT, total_units_sold BIGINT, promo_flag BIGINT
+)
+"""
+
+
+def _land(engine, schema, rows):
+    """Append mart rows (date, sku, channel, units)."""
+    mart = pd.DataFrame(rows, columns=["date", "sku", "channel", "total_units_sold"])
+    mart.assign(date=pd.to_datetime(mart["date"]).dt.date).to_sql(
+        "mart_sales_summary", engine, schema=schema, if_exists="append", index=False
+    )
+
+
+def _mart_history(engine, schema):
+    return pd.read_sql(
+        f"""
+        SELECT date AS ds, sku, total_units_sold AS y
+        FROM {schema}.mart_sales_summary WHERE date >= '2018-01-01'
+        """,
+        engine,
+    )
+
+
+@pytest.mark.parametrize("schema", [MART_DDL], indirect=True, ids=["mart"])
+class TestSeriesStats:
+    def test_incremental_matches_full_rebuild(self, schema):
+        """Merging new days batch by batch gives the same stats as a rebuild."""
+        engine, name = schema
+        _land(
+            engine,
+            name,
+            [
+                ("2017-12-31", "A", "web", 99),  # before HISTORY_START
+                ("2024-01-01", "A", "web", 2),
+                ("2024-01-01", "A", "amazon", 3),
+                ("2024-01-03", "A", "web", 4),
+                ("2024-01-02", "B", "web", -1),  # negative units are dropped
+                ("2024-01-03", "B", "web", 6),
+            ],
+        )
+        assert refresh_series_stats(engine, schema=name) == 2
+
+        _land(engine, name, [("2024-01-05", "A", "web", 10), ("2024-01-05", "C", "web", 7)])
+        assert refresh_series_stats(engine, schema=name) == 2
+        incremental = load_series_stats(engine, schema=name)
+
+        refresh_series_stats(engine, full_refresh=True, schema=name)
+        rebuilt = load_series_stats(engine, schema=name)
+
+        pd.testing.assert_frame_equal(incremental, rebuilt)
+        assert incremental.loc["A", ["n_days", "span_days", "total_units"]].tolist() == [3, 4, 19]
+
+    def test_refresh_without_new_days_is_noop(self, schema):
+        """A second refresh with no new actuals touches nothing."""
+        engine, name = schema
+        _land(engine, name, [("2024-01-01", "A", "web", 5)])
+        refresh_series_stats(engine, schema=name)
+
+        assert refresh_series_stats(engine, schema=name) == 0
+
+    def test_matches_preprocessing_stats(self, schema):
+        """Table stats equal the in-memory stats, so eligibility doesn't change."""
+        engine, name = schema
+        days = pd.date_range("2022-01-01", periods=800, freq="D")
+        rows = [(d, "LONG", ch, 1) for d in days for ch in ("web", "amazon")]
+        rows += [(d, "SHORT", "web", 5) for d in days[-200:]]
+        _land(engine, name, rows)
+
+        table = load_series_stats(engine, schema=name)  # built on first read
+        memory = preprocess(_mart_history(engine, name))["stats"]
+
+        cols = ["first_date", "last_date", "total_units", "n_days", "span_days"]
+        pd.testing.assert_frame_equal(
+            table[cols], memory[cols], check_dtype=False, check_index_type=False
+        )
+        assert select_eligible_skus(table) == select_eligible_skus(memory) == ["LONG"]
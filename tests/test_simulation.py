@@ -0,0 +1,117 @@
+"""
+Tests for the Monte Carlo service-level simulation
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vitamarkets.purchasing import ALL, recommend
+from vitamarkets.simulation import residual_pool, simulate
+
+Z90 = 1.2815515655446004
+
+
+def _run(skus=("A", "B"), days=400, horizon=30, level=50.0, sigma=2.0, seed=0):
+    """Run output per SKU: actuals = fitted level + N(0, sigma) noise, then a flat forecast."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for sku in skus:
+        history = pd.date_range("2024-01-01", periods=days, freq="D")
+        future = pd.date_range(history[-1] + pd.Timedelta(days=1), periods=horizon, freq="D")
+        y = level + rng.normal(0, sigma, days)
+        frames += [
+            pd.DataFrame({"ds": history, "yhat": y, "type": "actual"}),
+            pd.DataFrame({"ds": history.append(future), "yhat": level, "type": "forecast"}),
+        ]
+        frames[-2]["sku"] = frames[-1]["sku"] = sku
+    out = pd.concat(frames, ignore_index=True)
+    is_forecast = out["type"] == "forecast"
+    out["yhat_lower"] = out["yhat"] - np.where(is_forecast, Z90 * sigma, 0)
+    out["yhat_upper"] = out["yhat"] + np.where(is_forecast, Z90 * sigma, 0)
+    return out
+
+
+def _positions(rows=()):
+    columns = ["sku", "channel", "country", "on_hand", "on_order", "lead_time_days"]
+    return pd.DataFrame(list(rows), columns=columns).assign(service_level=np.nan)
+
+
+class TestSimulate:
+    """Test bootstrapped lead-time demand and simulated reorder points"""
+
+    def test_residual_pool_keeps_recent_days(self):
+        """Test the pool holds actual - fitted for each SKU's last `days` days, in order"""
+        run = _run(days=10)
+        pool, offsets, lengths = residual_pool(run, days=4)
+
+        assert lengths.to_dict() == {"A": 4, "B": 4}
+        actual_b = run[(run["sku"] == "B") & (run["type"] == "actual")]["yhat"]
+        np.testing.assert_allclose(
+            pool[offsets["B"] : offsets["B"] + 4], actual_b.to_numpy()[-4:] - 50.0
+        )
+
+    def test_matches_normal_theory_for_iid_errors(self):
+        """Test with normal iid residuals the reorder point agrees with the interval formula"""
+        run = _run(skus=("A",), days=3000)
+        positions = _positions([("A", ALL, ALL, 0, 0, 1)])
+
+        sims, stats = simulate(run, positions, service_levels=[0.9], n_samples=20_000)
+        recs = recommend(run, pd.DataFrame({"sku": ["A"], "test_mape_pct": [5.0]}), positions)
+
+        pool, _, _ = residual_pool(run)
+
+        assert stats["targets"] == 1 and stats["sims_per_second"] > 0
+        assert sims["mean_lead_time_demand"].iloc[0] == pytest.approx(50 + pool.mean(), abs=0.05)
+        assert sims["reorder_point"].iloc[0] == pytest.approx(50 + np.quantile(pool, 0.9), abs=0.1)
+        assert sims["reorder_point"].iloc[0] == pytest.approx(
+            recs["reorder_point"].iloc[0], abs=0.5
+        )
+        assert sims["fill_rate_pct"].iloc[0] > 99
+
+    def test_chunking_does_not_change_results(self):
+        """Test a one-target-per-chunk budget gives the same output as one big chunk"""
+        run = _run(skus=("A", "B", "C"))
+        positions = _positions([("B", ALL, ALL, 600, 100, 21)])
+
+        whole, whole_stats = simulate(run, positions, n_samples=200)
+        chunked, chunked_stats = simulate(run, positions, n_samples=200, max_bytes=1)
+
+        assert whole_stats["chunks"] == 1 and chunked_stats["chunks"] == 3
+        pd.testing.assert_frame_equal(whole, chunked)
+
+    def test_stock_and_levels(self):
+        """Test stockout chance, purchase qty and reorder points rising with service level"""
+        positions = _positions([("A", ALL, ALL, 10_000, 0, 7), ("B", ALL, ALL, 0, 0, 7)])
+
+        sims, _ = simulate(_run(), positions, n_samples=500)
+        a, b = (sims[sims["sku"] == sku] for sku in ("A", "B"))
+
+        assert set(sims["service_level"]) == {0.90, 0.95, 0.98, 0.99}
+        assert a["stockout_pct"].eq(0).all() and a["purchase_qty"].eq(0).all()
+        assert b["stockout_pct"].eq(100).all()
+        assert b["reorder_point"].is_monotonic_increasing
+        assert (b["purchase_qty"] == np.ceil(b["reorder_point"])).all()
+        assert sims["lead_time_days"].eq(7).all()
+
+    def test_split_by_channel_scales_paths(self):
+        """Test each channel gets its share of the SKU's simulated demand (own draws)"""
+        shares = pd.DataFrame(
+            {"sku": ["A", "A"], "channel": ["web", "amazon"], "share": [0.8, 0.2]}
+        )
+
+        sims, stats = simulate(
+            _run(skus=("A",)),
+            _positions(),
+            service_levels=[0.9],
+            n_samples=500,
+            by="channel",
+            shares=shares,
+        )
+        web, amazon = (sims.set_index("channel").loc[ch] for ch in ("web", "amazon"))
+
+        assert stats["targets"] == 2
+        assert web["mean_lead_time_demand"] == pytest.approx(
+            4 * amazon["mean_lead_time_demand"], rel=0.01
+        )
+        assert web["country"] == ALL
@@ -0,0 +1,145 @@
+"""
+Tests for the storage backends. The DuckDB backend runs on the sample CSV in a
+temporary Parquet store and is skipped without duckdb installed.
+"""
+
+import pandas as pd
+import pytest
+
+from vitamarkets.preprocessing import preprocess
+from vitamarkets.storage import OPERATIONS, SAMPLE_CSV, open_backend
+
+duckdb = pytest.importorskip("duckdb")
+
+# The columns tests/test_contract_views.py requires of the Postgres views
+VIEW_COLUMNS = {
+    "simple_prophet_forecast": [
+        "ds",
+        "sku",
+        "yhat",
+        "yhat_lower",
+        "yhat_upper",
+        "data_type",
+        "forecast_run_id",
+    ],
+    "forecast_error_metrics": [
+        "sku",
+        "test_mae",
+        "test_rmse",
+        "test_mape_pct",
+        "test_bias",
+        "test_coverage_pct",
+        "n_train",
+        "n_test",
+        "run_id",
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def backend(tmp_path_factory):
+    """A DuckDB store holding the sample's raw load and mart."""
+    backend = open_backend("duckdb", tmp_path_factory.mktemp("store"))
+    backend["load_raw"](SAMPLE_CSV)
+    backend["build_mart"]()
+    return backend
+
+
+def _run(run_id, skus=("A", "B")):
+    forecasts = pd.DataFrame(
+        {
+            "ds": pd.to_datetime(["2024-01-01", "2024-01-02"] * len(skus)),
+            "yhat": 1.0,
+            "yhat_lower": 0.5,
+            "yhat_upper": 1.5,
+            "sku": [sku for sku in skus for _ in range(2)],
+            "run_id": run_id,
+            "type": "forecast",
+        }
+    )
+    metrics = pd.DataFrame(
+        {
+            "sku": list(skus),
+            "test_mae": 1.0,
+            "test_rmse": 1.2,
+            "test_mape_pct": 10.0,
+            "test_bias": 0.1,
+            "test_coverage_pct": 80.0,
+            "n_train": 700,
+            "n_test": 30,
+            "run_id": run_id,
+        }
+    )
+    return forecasts, metrics
+
+
+class TestOpenBackend:
+    """Test backend selection"""
+
+    def test_duckdb_operations(self, tmp_path):
+        """Test the DuckDB backend has every operation and no SQLAlchemy engine"""
+        backend = open_backend("duckdb", tmp_path)
+
+        assert backend["engine"] is None
+        assert all(callable(backend[op]) for op in OPERATIONS)
+
+    def test_unknown_backend(self):
+        """Test an unknown backend name raises ValueError"""
+        with pytest.raises(ValueError, match="sqlite"):
+            open_backend("sqlite")
+
+
+class TestDuckDBStore:
+    """Test the DuckDB backend keeps the Postgres contract"""
+
+    def test_mart_grain(self, backend):
+        """Test the mart has the dbt model's columns, one row per date/SKU/location"""
+        mart = backend["read_relation"]("mart_sales_summary")
+        raw = pd.read_csv(SAMPLE_CSV).dropna(subset=["units_sold", "order_value"])
+        key = ["date", "sku", "category", "channel", "country", "customer_segment"]
+
+        assert list(mart.columns[:6]) == key
+        assert len(mart) == len(raw.drop_duplicates(key))
+        assert mart["total_units_sold"].sum() == raw["units_sold"].round().sum()
+
+    def test_series_stats_match_preprocessing(self, backend):
+        """Test SQL eligibility stats equal preprocessing.sku_stats on the loaded history"""
+        stats = backend["series_stats"]()
+        expected = preprocess(backend["load_history"](), fill="none")["stats"]
+
+        columns = ["first_date", "last_date", "total_units", "n_days", "span_days"]
+        pd.testing.assert_frame_equal(
+            stats[columns], expected[columns], check_dtype=False, check_index_type=False
+        )
+
+    def test_history_for_skus(self, backend):
+        """Test history can be limited to given SKUs and has the forecasting columns"""
+        skus = sorted(backend["sku_groups"]())[:2]
+
+        history = backend["load_history"](skus)
+
+        assert list(history.columns) == ["ds", "sku", "y", "is_promo"]
+        assert sorted(history["sku"].unique()) == skus
+
+    def test_publish_contract_views(self, backend):
+        """Test published views have the contract columns and follow the latest run"""
+        tables = backend["write_run"](*_run("r1"), "r1")
+        backend["publish_views"](*tables)
+        tables = backend["write_run"](*_run("r2", skus=("C",)), "r2")
+        backend["publish_views"](*tables)
+
+        for view, columns in VIEW_COLUMNS.items():
+            assert list(backend["read_relation"](view).columns) == columns
+        forecasts = backend["read_relation"]("simple_prophet_forecast")
+        assert set(forecasts["forecast_run_id"]) == {"r2"} and set(forecasts["sku"]) == {"C"}
+
+    def test_failed_publish_keeps_views(self, backend):
+        """Test publishing a missing run table fails and leaves the views on the last run"""
+        tables = backend["write_run"](*_run("r3"), "r3")
+        backend["publish_views"](*tables)
+
+        with pytest.raises(duckdb.Error):
+            backend["publish_views"]("prophet_forecasts_missing", tables[1])
+
+        metrics = backend["read_relation"]("forecast_error_metrics")
+        assert set(metrics["run_id"]) == {"r3"}
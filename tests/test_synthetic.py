@@ -0,0 +1,139 @@
+"""
+Tests for the synthetic load-test data generator. The COPY test needs a reachable
+PostgreSQL (DB_URI / PG_*) and is skipped otherwise.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vitamarkets.config import ROOT
+from vitamarkets.synthetic import (
+    ARCHETYPES,
+    RAW_COLUMNS,
+    RAW_TABLE,
+    copy_rows,
+    generate,
+    write_csv,
+)
+
+SAMPLE_CSV = ROOT / "vitamarkets_ultrarealistic_sampledataset.csv"
+
+
+@pytest.fixture(scope="module")
+def frame():
+    """Two SKUs per archetype, 3 channels x 2 countries, four years."""
+    return pd.concat(generate(2 * len(ARCHETYPES), seed=7), ignore_index=True)
+
+
+def _sku(frame, archetype):
+    rows = frame[frame["archetype"] == archetype]
+    return rows[rows["sku"] == rows["sku"].iloc[0]]
+
+
+class TestGenerate:
+    """Test the schema, grain and chunking of generated rows"""
+
+    def test_columns_match_sample(self, frame):
+        """Test the columns are the sample CSV's, in order, and the raw table key is unique"""
+        assert list(pd.read_csv(SAMPLE_CSV, nrows=0).columns) == RAW_COLUMNS
+        assert list(frame.columns) == RAW_COLUMNS
+        key = ["date", "sku", "channel", "country", "customer_segment"]
+        assert not frame.duplicated(key).any()
+        assert frame.groupby(["date", "sku"], observed=True).size().eq(6).all()
+
+    def test_seed_and_chunking(self):
+        """Test a seed reproduces the rows, and chunks hold whole SKUs up to chunk_rows"""
+        chunks = list(generate(6, years=1, chunk_rows=2000, seed=1))
+        again = pd.concat(generate(6, years=1, chunk_rows=2000, seed=1))
+
+        pd.testing.assert_frame_equal(pd.concat(chunks), again)
+        assert len(chunks) == 6
+        assert all(chunk["sku"].nunique() == 1 for chunk in chunks)
+        other = pd.concat(generate(6, years=1, chunk_rows=2000, seed=2))
+        assert not np.array_equal(other["units_sold"], again["units_sold"])
+
+    def test_dimension_counts(self):
+        """Test channel/country/segment counts beyond the named lists get generated names"""
+        rows = pd.concat(generate(2, channels=7, countries=1, segments=5, years=1))
+
+        assert rows["channel"].nunique() == 7 and "channel_7" in set(rows["channel"])
+        assert set(rows["country"]) == {"US"}
+        assert "segment_5" in set(rows["customer_segment"])
+
+    def test_missing_values(self, frame):
+        """Test about the sample's share of units/order_value is missing and tagged"""
+        assert 0.002 < frame["units_sold"].isna().mean() < 0.01
+        missing_order = frame["order_value"].isna()
+        assert frame.loc[missing_order, "event"].str.endswith("|missing").all()
+
+
+class TestArchetypes:
+    """Test each archetype keeps the shape it has in the sample data"""
+
+    def test_growth_and_decline(self, frame):
+        """Test yearly mean units rise for growth SKUs and fall for slow decliners"""
+        for archetype, sign in (("growth", 1), ("decline", -1)):
+            rows = _sku(frame, archetype)
+            yearly = rows.groupby(rows["date"].str[:4])["units_sold"].mean()
+            assert (np.sign(np.diff(yearly)) == sign).all()
+
+    def test_seasonal_peak(self, frame):
+        """Test seasonal SKUs sell far more in spring than in early autumn"""
+        rows = _sku(frame, "seasonal")
+        month = rows["date"].str[5:7]
+        spring = rows.loc[month.isin(["03", "04"]), "units_sold"].mean()
+        autumn = rows.loc[month.isin(["09"]), "units_sold"].mean()
+        assert spring > 5 * autumn
+
+    def test_lifecycle_dates(self, frame):
+        """Test launches, discontinuations and supply outages show up in the rows"""
+        launch = _sku(frame, "launch")
+        assert launch["date"].min() == launch["launch_date"].iloc[0] > "2022-06-01"
+        assert launch["event"].eq("|launch_campaign").any()
+
+        stable = _sku(frame, "stable")
+        last = stable["discontinue_date"].iloc[0]
+        assert stable["date"].max() == last
+        assert stable.loc[stable["discontinued_flag"] == 1, "date"].unique().tolist() == [last]
+
+        disrupted = _sku(frame, "disrupted")
+        daily = disrupted.groupby("date", observed=True)["units_sold"].sum()
+        assert (daily.rolling(30).max() == 0).any()
+
+        assert _sku(frame, "promo")["event"].eq("prime_day").any()
+        assert _sku(frame, "viral")["event"].str.contains("viral_campaign").any()
+
+
+class TestWriters:
+    """Test the CSV and COPY writers"""
+
+    def test_csv_round_trip(self, tmp_path):
+        """Test the CSV reads back with the sample header and the generated rows"""
+        path = tmp_path / "synthetic.csv"
+
+        rows = write_csv(generate(3, years=1, chunk_rows=3000, as_csv=True), path)
+
+        written = pd.read_csv(path)
+        expected = pd.concat(generate(3, years=1, chunk_rows=3000))
+        assert rows == len(written) == len(expected)
+        assert list(written.columns) == RAW_COLUMNS
+        assert written["units_sold"].sum() == expected["units_sold"].sum()
+        assert written["sku"].tolist() == expected["sku"].astype(str).tolist()
+
+
+class TestCopy:
+    """Test COPY into vitamarkets_raw"""
+
+    def test_copy_and_replace(self, schema):
+        """Test COPY creates and fills the table, and replace=True truncates first"""
+        engine, name = schema
+
+        copy_rows(engine, generate(4, years=1, as_csv=True), schema=name)
+        rows = copy_rows(engine, generate(2, years=1, as_csv=True), schema=name, replace=True)
+
+        loaded = pd.read_sql(
+            f"SELECT COUNT(*) AS n, COUNT(DISTINCT sku) AS skus FROM {name}.{RAW_TABLE}",
+            engine,
+        ).iloc[0]
+        assert loaded["n"] == rows and loaded["skus"] == 2
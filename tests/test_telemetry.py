@@ -0,0 +1,125 @@
+"""
+Tests for per-SKU fit telemetry. The table/view tests need a reachable PostgreSQL
+(DB_URI / PG_*) and are skipped otherwise.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vitamarkets.telemetry import (
+    TELEMETRY_COLUMNS,
+    TELEMETRY_TABLE,
+    TELEMETRY_VIEW,
+    fit_telemetry,
+    parse_optimizer_output,
+    telemetry_frame,
+    write_telemetry,
+)
+
+LBFGS_OUTPUT = """
+Initial log joint probability = -6.52457
+    Iter      log prob        ||dx||      ||grad||       alpha      alpha0  # evals  Notes
+      99       562.313   1.06069e-05       99.1123      0.8524      0.8524      122
+    Iter      log prob        ||dx||      ||grad||       alpha      alpha0  # evals  Notes
+     139       562.314   2.46226e-08       99.0336      0.9083      0.9083      170
+Optimization terminated normally:
+  Convergence detected: relative gradient magnitude is below tolerance
+"""
+
+NEWTON_OUTPUT = """
+Initial log joint probability = -34.1
+Iteration  1. Log joint probability =    101.2. Improved by 135.3.
+Iteration  2. Log joint probability =    140.8. Improved by 39.6.
+Iteration  3. Log joint probability =    141.9. Improved by 1.07.
+"""
+
+
+def _metrics(sku, fit_seconds, **overrides):
+    return {
+        "sku": sku,
+        "run_id": "run1",
+        "n_train": 700,
+        "n_test": 30,
+        "fit_status": "prophet",
+        "fit_seconds": fit_seconds,
+        "python_seconds": fit_seconds / 4,
+        "model": "prophet",
+        "grain": "daily",
+        **fit_telemetry(
+            {
+                "optimize_seconds": fit_seconds / 2,
+                "predict_seconds": fit_seconds / 4,
+                "optimizer_iterations": int(fit_seconds * 100),
+                "optimizer_status": "relative gradient magnitude is below tolerance",
+            }
+        ),
+        **overrides,
+    }
+
+
+class TestOptimizerOutput:
+    """Test iterations and status parsed from cmdstan optimize output"""
+
+    def test_lbfgs(self):
+        """Test the last LBFGS progress row and the convergence reason are read"""
+        assert parse_optimizer_output(LBFGS_OUTPUT) == (
+            139,
+            "relative gradient magnitude is below tolerance",
+        )
+
+    def test_newton_and_missing(self):
+        """Test Newton iterations are counted, and empty output yields Nones"""
+        assert parse_optimizer_output(NEWTON_OUTPUT) == (3, "newton")
+        assert parse_optimizer_output("") == (None, None)
+
+
+class TestTelemetryFrame:
+    """Test the per-SKU rows built from a run's metrics"""
+
+    def test_rows_from_metrics(self):
+        """Test one row per SKU in table column order with n_obs = n_train + n_test"""
+        batched = _metrics("B", 0.1, fit_status="lite", model="lite", **fit_telemetry())
+        frame = telemetry_frame(pd.DataFrame([_metrics("A", 2.0), batched]), "run1")
+
+        assert list(frame.columns) == TELEMETRY_COLUMNS
+        assert frame["n_obs"].tolist() == [730, 730]
+        assert frame["optimizer_iterations"].tolist()[0] == 200
+        assert frame["optimizer_iterations"].isna().tolist() == [False, True]
+        assert np.isnan(frame.loc[1, "optimize_seconds"])
+        assert frame["worker_id"].notna().all()
+
+
+class TestWriteTelemetry:
+    """Test the telemetry table and its per-run summary view"""
+
+    def test_rewrite_replaces_run(self, schema):
+        """Test rewriting a run replaces its rows and leaves other runs alone"""
+        engine, name = schema
+        metrics = pd.DataFrame([_metrics(f"SKU{i}", float(i)) for i in range(1, 6)])
+
+        write_telemetry(engine, metrics, "run1", schema=name)
+        write_telemetry(engine, metrics.head(2), "run2", schema=name)
+        assert write_telemetry(engine, metrics.head(3), "run1", schema=name) == 3
+
+        counts = pd.read_sql(
+            f"SELECT run_id, COUNT(*) AS n FROM {name}.{TELEMETRY_TABLE} GROUP BY run_id",
+            engine,
+        ).set_index("run_id")["n"]
+        assert counts.to_dict() == {"run1": 3, "run2": 2}
+
+    def test_summary_view(self, schema):
+        """Test the view's percentiles, throughput and slowest SKUs per run"""
+        engine, name = schema
+        metrics = pd.DataFrame([_metrics(f"SKU{i:02d}", float(i)) for i in range(1, 21)])
+        write_telemetry(engine, metrics, "run1", schema=name)
+
+        summary = pd.read_sql(f"SELECT * FROM {name}.{TELEMETRY_VIEW}", engine).iloc[0]
+
+        assert summary["skus"] == 20 and summary["workers"] == 1
+        assert summary["p50_fit_seconds"] == pytest.approx(10.5)
+        assert summary["max_fit_seconds"] == 20
+        assert summary["fit_seconds_per_1k_obs"] == pytest.approx(1000 * 210 / (20 * 730))
+        assert summary["max_iterations"] == 2000
+        assert summary["slowest_skus"][:3] == ["SKU20", "SKU19", "SKU18"]
+        assert len(summary["slowest_skus"]) == 10
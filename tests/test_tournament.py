@@ -0,0 +1,110 @@
+"""
+Tests for the cheap-first model tournament
+"""
+
+import numpy as np
+import pandas as pd
+
+from vitamarkets.baselines import seasonal_naive, seasonal_naive_panel
+from vitamarkets.forecasting import build_holidays
+from vitamarkets.prophet_lite import prepare_panel
+from vitamarkets.tournament import (
+    CANDIDATES,
+    candidate_forecasts,
+    forecast_cheap,
+    score_candidates,
+    summarize,
+)
+
+
+def _history(days=800):
+    ds = pd.date_range("2021-01-01", periods=days, freq="D")
+    rng = np.random.default_rng(0)
+    weekly = np.tile([10, 12, 14, 16, 18, 30, 35], days // 7 + 1)[:days]
+    noisy = rng.gamma(0.3, 40, days)
+    return pd.concat(
+        [
+            pd.DataFrame({"ds": ds, "sku": "STABLE", "y": weekly * 3.0, "is_promo": 0}),
+            pd.DataFrame({"ds": ds, "sku": "NOISY", "y": noisy, "is_promo": 0}),
+        ],
+        ignore_index=True,
+    )
+
+
+class TestSeasonalNaivePanel:
+    """Test the vectorized seasonal naive baseline"""
+
+    def test_matches_per_sku_baseline(self):
+        """Test each panel column equals seasonal_naive on that SKU alone"""
+        dates = pd.date_range("2022-01-01", periods=120, freq="D")
+        rng = np.random.default_rng(2)
+        Y = rng.poisson(20, (120, 2)).astype(float)
+        Y[:30, 1] = np.nan
+        fit_end = np.array([99, 89])
+
+        yhat, lower, upper = seasonal_naive_panel(Y, dates, fit_end)
+
+        for k in range(2):
+            rows = ~np.isnan(Y[: fit_end[k] + 1, k])
+            train = pd.DataFrame(
+                {"ds": dates[: fit_end[k] + 1][rows], "y": Y[: fit_end[k] + 1, k][rows]}
+            )
+            future = pd.DataFrame({"ds": dates[fit_end[k] + 1 :]})
+            expected = seasonal_naive(train, future)
+            np.testing.assert_allclose(yhat[fit_end[k] + 1 :, k], expected["yhat"])
+            np.testing.assert_allclose(lower[fit_end[k] + 1 :, k], expected["yhat_lower"])
+            np.testing.assert_allclose(upper[fit_end[k] + 1 :, k], expected["yhat_upper"])
+
+
+class TestScoreCandidates:
+    """Test winner selection and the Prophet threshold"""
+
+    def test_best_model_and_threshold(self):
+        """Test the lowest MAPE wins and the threshold decides who needs Prophet"""
+        panel = prepare_panel(_history())
+        candidates = candidate_forecasts(panel, build_holidays())
+
+        scores = score_candidates(panel, candidates, max_mape=20)
+
+        mape = scores[[f"mape_{name}" for name in CANDIDATES]]
+        np.testing.assert_allclose(scores["best_mape"], mape.min(axis=1))
+        assert (scores["best_model"] == mape.idxmin(axis=1).str.removeprefix("mape_")).all()
+        assert (scores["needs_prophet"] == (scores["best_mape"] > 20)).all()
+        assert not score_candidates(panel, candidates, max_mape=1e9)["needs_prophet"].any()
+
+
+class TestForecastCheap:
+    """Test the cheap stage end to end"""
+
+    def test_stable_sku_skips_prophet(self):
+        """Test a clean weekly SKU is won by a cheap model and a noisy one goes to Prophet"""
+        results, prophet_skus, scores, failed = forecast_cheap(_history(), build_holidays(), "r")
+
+        assert failed == []
+        assert prophet_skus == ["NOISY"]
+        assert [m["sku"] for _, m in results] == ["STABLE"]
+        metrics = results[0][1]
+        assert metrics["fit_status"] == "cheap"
+        assert metrics["model"] == scores.loc["STABLE", "best_model"]
+        assert metrics["test_mape_pct"] <= 20
+
+
+class TestSummarize:
+    """Test the tournament summary"""
+
+    def test_time_saved_uses_measured_fits(self):
+        """Test avoided Prophet time uses this run's median fit time per worker"""
+        scores = pd.DataFrame(
+            {
+                "best_model": ["lite", "lite", "seasonal_naive"],
+                "needs_prophet": [False, False, True],
+            },
+            index=["A", "B", "C"],
+        )
+
+        summary = summarize(scores, 1.0, {"C": 10.0}, n_workers=2)
+
+        assert summary["skipped_prophet"] == 2
+        assert summary["skipped_share_pct"] == 66.7
+        assert summary["winners"] == {"lite": 2}
+        assert summary["est_wall_seconds_saved"] == 9.0
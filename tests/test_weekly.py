@@ -0,0 +1,103 @@
+"""
+Tests for weekly-grain fitting with daily disaggregation
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from vitamarkets.forecasting import build_holidays
+from vitamarkets.weekly import (
+    daily_values,
+    dow_profile,
+    to_weekly,
+    week_start,
+    weekly_fit_predict,
+    weekly_holidays,
+)
+
+PATTERN = np.array([10, 12, 14, 16, 18, 30, 40], dtype=float)
+
+
+def _history(days=728, start="2022-01-03"):
+    ds = pd.date_range(start, periods=days, freq="D")
+    return pd.DataFrame({"ds": ds, "y": PATTERN[ds.dayofweek], "is_promo": 0})
+
+
+class TestBuckets:
+    """Test weekly aggregation"""
+
+    def test_buckets_end_on_anchor(self):
+        """Test the last bucket ends on the anchor day and later days start new buckets"""
+        anchor = pd.Timestamp("2024-03-20")
+        ds = pd.to_datetime(["2024-03-14", "2024-03-20", "2024-03-21", "2024-03-13"])
+
+        starts = week_start(ds, anchor)
+
+        assert list(starts) == list(
+            pd.to_datetime(["2024-03-14", "2024-03-14", "2024-03-21", "2024-03-07"])
+        )
+
+    def test_gaps_do_not_bias_weeks(self):
+        """Test weeks with missing days are scaled to 7x the mean observed day"""
+        df = pd.DataFrame(
+            {"ds": pd.date_range("2024-01-01", periods=14, freq="D"), "y": 5.0, "is_promo": 0}
+        )
+        df = df.drop(index=[2, 3, 9])
+
+        weekly = to_weekly(daily_values(df), df["ds"].max())
+
+        np.testing.assert_allclose(weekly["y"], [35.0, 35.0])
+
+    def test_duplicate_rows_averaged(self):
+        """Test mart rows for the same day are averaged like Prophet sees them"""
+        df = pd.DataFrame({"ds": pd.to_datetime(["2024-01-01"] * 2), "y": [4.0, 6.0]})
+
+        assert daily_values(df)["y"].tolist() == [5.0]
+
+
+class TestProfile:
+    """Test the day-of-week split"""
+
+    def test_recovers_weekday_shape(self):
+        """Test the profile equals the weekday pattern relative to its mean"""
+        df = _history()
+
+        profile = dow_profile(daily_values(df), df["ds"].max())
+
+        np.testing.assert_allclose(profile, PATTERN / PATTERN.mean())
+
+    def test_holiday_windows_mark_weeks(self):
+        """Test each day of a holiday window maps to its bucket, once"""
+        holidays = pd.DataFrame(
+            {
+                "holiday": ["h"],
+                "ds": pd.to_datetime(["2024-01-07"]),
+                "lower_window": [-1],
+                "upper_window": [1],
+            }
+        )
+
+        weeks = weekly_holidays(holidays, pd.Timestamp("2024-01-07"))
+
+        assert list(weeks["ds"]) == list(pd.to_datetime(["2024-01-01", "2024-01-08"]))
+        assert (weeks[["lower_window", "upper_window"]] == 0).all().all()
+
+
+class TestWeeklyFitPredict:
+    """Test the end-to-end weekly fit (Prophet)"""
+
+    def test_daily_output_follows_weekday_pattern(self):
+        """Test daily rows are returned for every requested day with the weekday shape"""
+        pytest.importorskip("prophet")
+        train = _history()
+        future = pd.DataFrame({"ds": pd.date_range(train["ds"].max(), periods=29)[1:]})
+
+        forecast = weekly_fit_predict(train, future, build_holidays(), has_promo=False)
+
+        assert list(forecast.columns) == ["ds", "yhat", "yhat_lower", "yhat_upper"]
+        assert len(forecast) == 28
+        assert (forecast["yhat_lower"] <= forecast["yhat"]).all()
+        assert (forecast["yhat"] <= forecast["yhat_upper"]).all()
+        by_weekday = forecast.groupby(forecast["ds"].dt.dayofweek)["yhat"].mean()
+        np.testing.assert_allclose(by_weekday, PATTERN, rtol=0.1)
@@ -0,0 +1,203 @@
+"""Work-queue tests; need a reachable PostgreSQL (DB_URI / PG_*), skipped otherwise."""
+
+import multiprocessing
+import os
+import uuid
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from db import get_engine
+from vitamarkets.resources import THREAD_ENV_VARS
+from vitamarkets.work_queue import (
+    claim_batch,
+    complete_job,
+    enqueue_run,
+    extend_leases,
+    fail_exhausted_jobs,
+    load_run_results,
+    publish_run,
+    run_complete,
+    run_status,
+)
+
+
+@pytest.fixture(scope="module")
+def pg_engine():
+    try:
+        engine = get_engine()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception:
+        pytest.skip("Database not configured for work-queue tests")
+    if engine.dialect.name != "postgresql":
+        pytest.skip("Work queue requires PostgreSQL")
+    return engine
+
+
+@pytest.fixture
+def run_id(pg_engine):
+    run_id = f"test_{uuid.uuid4().hex[:10]}"
+    yield run_id
+    with pg_engine.begin() as conn:
+        conn.execute(text("DELETE FROM public.forecast_runs WHERE run_id = :r"), {"r": run_id})
+        for table in ("forecast_queue_forecasts", "forecast_queue_metrics"):
+            conn.execute(text(f"DELETE FROM public.{table} WHERE run_id = :r"), {"r": run_id})
+
+
+def _metrics(sku, run_id):
+    return {"sku": sku, "run_id": run_id, "fit_status": "prophet", "fit_seconds": 0.1}
+
+
+def _forecast(sku, run_id):
+    return pd.DataFrame(
+        {
+            "ds": pd.date_range("2024-01-01", periods=3),
+            "yhat": [1.0, 2.0, 3.0],
+            "yhat_lower": [0.5, 1.5, 2.5],
+            "yhat_upper": [1.5, 2.5, 3.5],
+            "sku": sku,
+            "run_id": run_id,
+            "type": "forecast",
+        }
+    )
+
+
+def _drain(run_id, worker_id, done):
+    """Local worker process: claim and complete until nothing is claimable."""
+    engine = get_engine()
+    while True:
+        skus = claim_batch(engine, run_id, worker_id, batch_size=2)
+        if not skus:
+            break
+        for sku in skus:
+            assert complete_job(engine, run_id, sku, worker_id, None, _metrics(sku, run_id))
+            done.put((worker_id, sku))
+
+
+class TestClaiming:
+    def test_claims_most_expensive_first(self, pg_engine, run_id):
+        """Claims follow expected cost, highest first."""
+        enqueue_run(pg_engine, run_id, {"A": 1.0, "B": 30.0, "C": 10.0})
+        assert claim_batch(pg_engine, run_id, "w1", batch_size=2) == ["B", "C"]
+        assert claim_batch(pg_engine, run_id, "w2", batch_size=2) == ["A"]
+        assert claim_batch(pg_engine, run_id, "w3", batch_size=2) == []
+
+    def test_enqueue_is_idempotent(self, pg_engine, run_id):
+        """Re-enqueueing adds only new SKUs and keeps existing job state."""
+        enqueue_run(pg_engine, run_id, {"A": 1.0})
+        claim_batch(pg_engine, run_id, "w1")
+        assert enqueue_run(pg_engine, run_id, {"A": 1.0, "B": 2.0}) == 2
+        assert run_status(pg_engine, run_id)["running"] == 1
+
+    def test_worker_processes_claim_each_sku_once(self, pg_engine, run_id):
+        """Concurrent worker processes never claim the same SKU (SKIP LOCKED)."""
+        skus = [f"SKU{i:03d}" for i in range(40)]
+        enqueue_run(pg_engine, run_id, {sku: float(i) for i, sku in enumerate(skus)})
+
+        done = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=_drain, args=(run_id, f"w{i}", done)) for i in range(4)
+        ]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join(timeout=60)
+        assert all(proc.exitcode == 0 for proc in procs)
+
+        completed = [done.get(timeout=5) for _ in skus]
+        assert sorted(sku for _, sku in completed) == skus
+        assert run_complete(pg_engine, run_id)
+
+
+class TestLeases:
+    def test_expired_lease_is_reclaimed(self, pg_engine, run_id):
+        """A crashed worker's job becomes claimable once its lease expires."""
+        enqueue_run(pg_engine, run_id, {"A": 1.0})
+        assert claim_batch(pg_engine, run_id, "crashed", lease_seconds=0) == ["A"]
+        assert claim_batch(pg_engine, run_id, "w2") == ["A"]
+
+        # The original worker lost the job, so its late result is discarded
+        assert not complete_job(pg_engine, run_id, "A", "crashed", None, _metrics("A", run_id))
+        assert complete_job(pg_engine, run_id, "A", "w2", None, _metrics("A", run_id))
+
+    def test_heartbeat_keeps_job(self, pg_engine, run_id):
+        """Extending the lease keeps the job away from other workers."""
+        enqueue_run(pg_engine, run_id, {"A": 1.0})
+        claim_batch(pg_engine, run_id, "w1", lease_seconds=0)
+        assert extend_leases(pg_engine, run_id, "w1", lease_seconds=300) == 1
+        assert claim_batch(pg_engine, run_id, "w2") == []
+
+    def test_exhausted_job_fails(self, pg_engine, run_id):
+        """Jobs that keep losing their lease fail after max attempts instead of blocking."""
+        enqueue_run(pg_engine, run_id, {"A": 1.0})
+        for attempt in range(2):
+            assert claim_batch(pg_engine, run_id, f"w{attempt}", lease_seconds=0, max_attempts=2)
+        assert fail_exhausted_jobs(pg_engine, run_id, max_attempts=2) == 1
+        assert run_status(pg_engine, run_id)["failed"] == 1
+
+    def test_exhausted_job_recorded_as_failed(self, pg_engine, run_id):
+        """A failed job still gets a metrics row, so the published run lists every SKU."""
+        enqueue_run(pg_engine, run_id, {"A": 1.0, "B": 1.0})
+        claim_batch(pg_engine, run_id, "w1", batch_size=1, lease_seconds=0, max_attempts=1)
+        claim_batch(pg_engine, run_id, "w2", max_attempts=1)
+        complete_job(pg_engine, run_id, "B", "w2", _forecast("B", run_id), _metrics("B", run_id))
+        assert fail_exhausted_jobs(pg_engine, run_id, max_attempts=1) == 1
+
+        all_forecasts, metrics_df = load_run_results(pg_engine, run_id)
+
+        assert set(all_forecasts["sku"]) == {"B"}
+        assert dict(zip(metrics_df["sku"], metrics_df["fit_status"])) == {
+            "A": "failed",
+            "B": "prophet",
+        }
+        assert metrics_df.loc[metrics_df["sku"] == "A", "test_mae"].isna().all()
+
+
+class TestBarrier:
+    def test_publish_waits_for_all_jobs(self, pg_engine, run_id):
+        """Views are not flipped while any job is still pending or running."""
+        enqueue_run(pg_engine, run_id, {"A": 1.0, "B": 1.0})
+        claim_batch(pg_engine, run_id, "w1", batch_size=1)
+        assert not run_complete(pg_engine, run_id)
+        with pytest.raises(RuntimeError, match="pending/running"):
+            publish_run(pg_engine, run_id)
+
+    def test_results_written_with_completion(self, pg_engine, run_id):
+        """Forecast rows and metrics land in the queue tables when the job completes."""
+        enqueue_run(pg_engine, run_id, {"A": 1.0})
+        claim_batch(pg_engine, run_id, "w1")
+        complete_job(pg_engine, run_id, "A", "w1", _forecast("A", run_id), _metrics("A", run_id))
+
+        with pg_engine.connect() as conn:
+            n_rows = conn.execute(
+                text("SELECT COUNT(*) FROM public.forecast_queue_forecasts WHERE run_id = :r"),
+                {"r": run_id},
+            ).scalar()
+            fit_status = conn.execute(
+                text("SELECT fit_status FROM public.forecast_jobs WHERE run_id = :r"),
+                {"r": run_id},
+            ).scalar()
+        assert n_rows == 3
+        assert fit_status == "prophet"
+
+
+def test_in_process_worker_single_threaded(monkeypatch):
+    """`worker --processes 1` runs under the same one-thread limits as local processes."""
+    import db
+    from vitamarkets import work_queue
+
+    seen = {}
+
+    def fake_worker(engine, run_id, **kwargs):
+        seen.update({var: os.environ.get(var) for var in THREAD_ENV_VARS})
+
+    monkeypatch.setattr(db, "get_engine", lambda: None)
+    monkeypatch.setattr(work_queue, "run_worker", fake_worker)
+    monkeypatch.setenv("OMP_NUM_THREADS", "8")
+
+    work_queue.main(["worker", "--run-id", "r", "--processes", "1"])
+
+    assert set(seen.values()) == {"1"}
+    assert os.environ["OMP_NUM_THREADS"] == "8"
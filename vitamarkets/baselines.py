@@ -0,0 +1,84 @@
+"""
+Cheap baseline forecasters.
+
+Used as the fallback when a Prophet fit times out or fails. Output matches Prophet's
+predict() columns (ds, yhat, yhat_lower, yhat_upper) so callers can swap them.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+def _daily_series(train):
+    """One value per calendar day (mean of duplicate rows, gaps forward-filled)."""
+    daily = train.groupby("ds")["y"].mean().sort_index()
+    return daily.asfreq("D").ffill()
+
+
+def seasonal_naive(train, future, profile_weeks=4, interval_width=0.80):
+    """
+    Weekly seasonal-naive forecast with residual-quantile prediction intervals.
+
+    In-sample dates get y(t - 7 days); dates after the training window get the mean of
+    the last `profile_weeks` values for that weekday. Interval bounds are empirical
+    quantiles of the in-sample residuals.
+    """
+    daily = _daily_series(train)
+    fitted = daily.shift(7).fillna(daily)
+
+    recent = daily.iloc[-7 * profile_weeks :]
+    profile = recent.groupby(recent.index.dayofweek).mean()
+
+    alpha = (1 - interval_width) / 2
+    q_lo, q_hi = np.quantile((daily - fitted).to_numpy(), [alpha, 1 - alpha])
+
+    ds = pd.to_datetime(future["ds"]).reset_index(drop=True)
+    yhat = ds.map(fitted)
+    out_of_sample = yhat.isna()
+    yhat[out_of_sample] = ds[out_of_sample].dt.dayofweek.map(profile).to_numpy()
+    yhat = yhat.fillna(daily.iloc[-1]).astype(float)
+
+    return pd.DataFrame(
+        {
+            "ds": ds,
+            "yhat": yhat,
+            "yhat_lower": (yhat + q_lo).clip(lower=0),
+            "yhat_upper": yhat + q_hi,
+        }
+    )
+
+
+def seasonal_naive_panel(Y, dates, fit_end_row, profile_weeks=4, interval_width=0.80):
+    """
+    seasonal_naive for every SKU of a calendar x SKU panel at once.
+
+    Y has NaN where a SKU has no observation; `fit_end_row` is each SKU's last
+    training row. Rows up to it get the in-sample fit y(t - 7 days) (gaps
+    forward-filled), later rows the weekday profile of the last `profile_weeks` weeks.
+    Returns (yhat, lower, upper) matrices shaped like Y.
+    """
+    n_rows, n_skus = Y.shape
+    row = np.arange(n_rows)[:, None]
+    in_fit = row <= fit_end_row
+    daily = pd.DataFrame(np.where(in_fit, Y, np.nan)).ffill().to_numpy()
+    daily = np.where(in_fit, daily, np.nan)
+    fitted = np.vstack([np.full((7, n_skus), np.nan), daily[:-7]])
+    fitted = np.where(np.isnan(fitted), daily, fitted)
+
+    window = fit_end_row[None, :] - np.arange(7 * profile_weeks)[:, None]
+    window = np.clip(window, 0, None)
+    recent = daily[window, np.arange(n_skus)[None, :]]
+    weekday = dates.dayofweek.to_numpy()
+    with warnings.catch_warnings():
+        # SKUs with fewer than profile_weeks of history leave some weekdays empty
+        warnings.simplefilter("ignore", RuntimeWarning)
+        profile = np.vstack(
+            [np.nanmean(np.where(weekday[window] == d, recent, np.nan), axis=0) for d in range(7)]
+        )
+    yhat = np.where(in_fit, fitted, profile[weekday])
+
+    alpha = (1 - interval_width) / 2
+    q_lo, q_hi = np.nanquantile(daily - fitted, [alpha, 1 - alpha], axis=0)
+    return yhat, (yhat + q_lo).clip(min=0), yhat + q_hi
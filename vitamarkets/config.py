@@ -0,0 +1,71 @@
+"""
+Shared configuration for the Vita Markets forecasting package.
+
+Only standard-library imports belong here: every CLI entrypoint imports this module,
+so anything heavy would be paid by `--help` and `--report` as well.
+"""
+
+import sys
+from pathlib import Path
+
+# Repo root (holds db.py, the dbt project and output folders)
+ROOT = Path(__file__).parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Forecast horizon and holdout
+FORECAST_DAYS = 90
+TEST_DAYS = 30
+
+# Output locations
+OUTPUT_DIR = ROOT / "prophet_forecasts"
+REPORTS_DIR = ROOT / "reports"
+DBT_DIR = ROOT / "vitamarkets_dbt" / "vitamarkets"
+LOG_DIR = ROOT / "logs"
+# Parquet store for the embedded DuckDB backend (vitamarkets.duckdb_store)
+LOCAL_STORE_DIR = ROOT / "local_store"
+
+# First mart date used for fitting and for public.sku_series_stats
+HISTORY_START = "2018-01-01"
+
+# SKU eligibility (see docs/FORECASTING_POLICIES.md)
+MIN_SPAN_DAYS = 730
+MIN_TOTAL_UNITS = 500
+MIN_N_DAYS = 700
+
+# Relaxed eligibility for pooled fits (--model pooled): short series borrow the
+# group's seasonality, so they no longer need two full years of history
+POOLED_MIN_SPAN_DAYS = 180
+POOLED_MIN_N_DAYS = 120
+
+# Purchase recommendations (vitamarkets.purchasing) for SKUs whose inventory position
+# doesn't set its own lead time / service level
+DEFAULT_LEAD_TIME_DAYS = 14
+DEFAULT_SERVICE_LEVEL = 0.90
+
+# Target service levels reported by the Monte Carlo simulation (--simulate)
+SIMULATED_SERVICE_LEVELS = (0.90, 0.95, 0.98, 0.99)
+
+# Power BI contract (see docs/DATA_CONTRACT.md)
+STABLE_VIEW_FORECASTS = "v_forecast_daily_latest"
+STABLE_VIEW_METRICS = "v_forecast_sku_metrics_latest"
+
+# Delta publishing (--delta-publish, vitamarkets.delta_publish): forecast and metric
+# values are compared at this resolution, so smaller changes don't republish a SKU
+DELTA_TOLERANCE = 0.01
+
+# Holiday calendar: (name, MM-DD, +/- window days)
+HOLIDAY_EVENTS = [
+    ("Black Friday", "11-29", 7),
+    ("Christmas", "12-25", 10),
+    ("New Year", "01-01", 7),
+    ("Cyber Monday", "12-02", 5),
+    ("Thanksgiving", "11-28", 5),
+]
+HOLIDAY_YEARS = (2018, 2026)
+
+# Preprocessing (see vitamarkets.preprocessing): calendar gap fill policy and the
+# per-SKU outlier cap (CLIP_FACTOR x the CLIP_QUANTILE of the SKU's daily units)
+GAP_FILL_POLICY = "none"
+CLIP_QUANTILE = 0.99
+CLIP_FACTOR = 1.2
@@ -0,0 +1,379 @@
+"""
+Daily run as a DAG of in-process stages (replaces the sequential scripts/run_daily.py).
+
+Each stage declares the artifacts it reads and writes:
+
+    file:<path>    a file under the repo root, fingerprinted by content hash
+    dir:<path>     every file below a directory, by content hash
+    table:<name>   a public table or view, by storage id and row-change counters
+
+A stage depends on the stages that write its inputs (plus any listed in "after"), and
+stages whose dependencies are done run concurrently on a thread pool. A stage is
+skipped when it is up to date: its last success saw the same input fingerprints, no
+dependency has succeeded since, and its outputs still exist. Only successes are
+recorded, so rerunning after a failure resumes at the failed stage (its dependents
+follow); --from STAGE reruns a stage and everything downstream, --force the whole DAG.
+
+Usage:
+    python -m vitamarkets.daily                 # or: python scripts/run_daily.py
+    python -m vitamarkets.daily --from forecast
+    python -m vitamarkets.daily --force
+
+Per-stage status and duration of every run are appended to logs/daily_runs.jsonl.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from graphlib import TopologicalSorter
+
+from vitamarkets.config import DBT_DIR, LOG_DIR, ROOT
+
+log = logging.getLogger(__name__)
+
+STATE_FILE = "daily_state.json"
+RUNS_FILE = "daily_runs.jsonl"
+
+ACTUALS_CSV = "data/actuals_latest.csv"
+DBT_PROJECT = DBT_DIR.relative_to(ROOT).as_posix()
+
+TABLE_FINGERPRINT_SQL = """
+SELECT c.oid, c.relfilenode, s.n_tup_ins, s.n_tup_upd, s.n_tup_del
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+WHERE n.nspname = 'public' AND c.relname = :name
+"""
+
+
+# ------------------- STAGES -------------------
+def dbt_deps():
+    from vitamarkets.dbt_runner import ensure_deps
+
+    ensure_deps()
+
+
+def load_actuals():
+    from etl.refresh_actuals import load_actuals
+
+    load_actuals(str(ROOT / ACTUALS_CSV))
+
+
+def forecast():
+    from vitamarkets.forecasting import run
+
+    all_forecasts, _ = run()
+    if all_forecasts is None:
+        raise RuntimeError("Forecasting produced no forecasts")
+
+
+def check_actuals():
+    from checkcsv import summarize
+
+    summarize(ROOT / ACTUALS_CSV)
+
+
+def daily_stages(full_dbt=False):
+    """
+    The daily job: dbt deps -> dbt run -> load actuals -> forecast, with the actuals
+    CSV check running alongside. {name: {"run", "inputs", "outputs", "after"}}.
+
+    dbt runs in-process (vitamarkets.dbt_runner); with full_dbt=False only models
+    downstream of changed SQL or fresher sources are rebuilt.
+    """
+
+    def dbt_run():
+        from vitamarkets.dbt_runner import run_models
+
+        return run_models(full=full_dbt)
+
+    return {
+        "dbt_deps": {
+            "run": dbt_deps,
+            "inputs": [f"file:{DBT_PROJECT}/packages.yml", f"file:{DBT_PROJECT}/package-lock.yml"],
+            "outputs": [f"dir:{DBT_PROJECT}/dbt_packages"],
+        },
+        "dbt_run": {
+            "run": dbt_run,
+            "inputs": [
+                f"file:{DBT_PROJECT}/dbt_project.yml",
+                f"dir:{DBT_PROJECT}/models",
+                f"dir:{DBT_PROJECT}/dbt_packages",
+                "table:vitamarkets_raw",
+            ],
+            "outputs": ["table:stg_vitamarkets", "table:mart_sales_summary"],
+        },
+        "load_actuals": {
+            "run": load_actuals,
+            "inputs": [f"file:{ACTUALS_CSV}"],
+            "outputs": [
+                "table:mart_sales_summary",
+                "table:sku_series_stats",
+                "table:kpi_rollup_daily",
+                "table:kpi_rollup_weekly",
+                "table:kpi_rollup_monthly",
+            ],
+            # Both write the mart; the actuals CSV replaces what dbt built
+            "after": ["dbt_run"],
+        },
+        "forecast": {
+            "run": forecast,
+            "inputs": [
+                "table:mart_sales_summary",
+                "table:sku_series_stats",
+                "table:inventory_positions",
+            ],
+            "outputs": ["table:purchase_recommendations"],
+        },
+        "check_actuals": {
+            "run": check_actuals,
+            "inputs": [f"file:{ACTUALS_CSV}"],
+            "outputs": [],
+        },
+    }
+
+
+# ------------------- FINGERPRINTS -------------------
+def _hash_files(paths, root):
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.relative_to(root).as_posix().encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(artifact, root=ROOT, engine=None):
+    """Fingerprint of a file:/dir:/table: artifact, or None if it doesn't exist."""
+    kind, _, name = artifact.partition(":")
+    if kind == "file":
+        path = root / name
+        return _hash_files([path], root) if path.is_file() else None
+    if kind == "dir":
+        path = root / name
+        if not path.is_dir():
+            return None
+        return _hash_files(sorted(p for p in path.rglob("*") if p.is_file()), root)
+    if kind == "table":
+        from sqlalchemy import text
+
+        with engine.connect() as conn:
+            row = conn.execute(text(TABLE_FINGERPRINT_SQL), {"name": name}).fetchone()
+        return None if row is None else "/".join(str(v) for v in row)
+    raise ValueError(f"Unknown artifact kind {kind!r} in {artifact!r}")
+
+
+# ------------------- DAG -------------------
+def dependencies(stages):
+    """{stage: set of stages it waits for}: writers of its inputs plus "after"."""
+    writers = {}
+    for name, stage in stages.items():
+        for artifact in stage["outputs"]:
+            writers.setdefault(artifact, set()).add(name)
+    upstream = {}
+    for name, stage in stages.items():
+        deps = set(stage.get("after", []))
+        for artifact in stage["inputs"]:
+            deps |= writers.get(artifact, set())
+        upstream[name] = deps - {name}
+    unknown = set().union(*upstream.values()) - set(stages)
+    if unknown:
+        raise ValueError(f"Unknown stages in 'after': {sorted(unknown)}")
+    return upstream
+
+
+def stale_reason(name, stage, inputs, state, upstream, output_exists):
+    """Why `name` must run, or None if it is up to date."""
+    last = state.get(name)
+    if last is None:
+        return "no successful run recorded"
+    missing = [a for a in stage["outputs"] if not output_exists(a)]
+    if missing:
+        return f"missing output {', '.join(missing)}"
+    if not stage["inputs"]:
+        return "no declared inputs"
+    changed = [a for a, fp in inputs.items() if fp != last["inputs"].get(a)]
+    if changed:
+        return f"changed {', '.join(changed)}"
+    newer = sorted(u for u in upstream if state.get(u, {}).get("finished", 0) > last["finished"])
+    if newer:
+        return f"{', '.join(newer)} ran since"
+    return None
+
+
+def _timed(func):
+    """(seconds, error, details): details is what the stage returned, if a dict."""
+    started = time.perf_counter()
+    try:
+        details = func()
+        return time.perf_counter() - started, None, details if isinstance(details, dict) else None
+    except (Exception, SystemExit) as e:  # a stage's sys.exit() must not end the run
+        log.exception("Stage raised")
+        return time.perf_counter() - started, f"{type(e).__name__}: {e}", None
+
+
+def _load_state(path):
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def run_dag(stages, root=ROOT, log_dir=LOG_DIR, force=(), max_workers=4, engine=None):
+    """
+    Run `stages` (daily_stages() layout) in dependency order, independent stages
+    concurrently. Stages in `force` ("all" for every one) run even if up to date.
+
+    A failed stage blocks its dependents; other branches keep going. Returns the run
+    record {"started_at", "seconds", "stages": {name: {status, seconds, reason}}},
+    which is also appended to <log_dir>/daily_runs.jsonl. A stage that returns a dict
+    (dbt_run: per-model status and seconds) has it stored as the stage's "details".
+    """
+    upstream = dependencies(stages)
+    order = TopologicalSorter(upstream)
+    order.prepare()  # raises graphlib.CycleError
+
+    if engine is None and any(
+        a.startswith("table:") for s in stages.values() for a in s["inputs"] + s["outputs"]
+    ):
+        from db import get_engine
+
+        engine = get_engine()
+
+    log_dir.mkdir(parents=True, exist_ok=True)
+    state_path = log_dir / STATE_FILE
+    state = _load_state(state_path)
+    force = set(stages) if force == "all" else set(force)
+
+    def output_exists(artifact):
+        return fingerprint(artifact, root, engine) is not None
+
+    started_at, started = datetime.now().isoformat(timespec="seconds"), time.perf_counter()
+    results = {}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while order.is_active():
+            for name in order.get_ready():
+                stage = stages[name]
+                blocked = sorted(
+                    u for u in upstream[name] if results[u]["status"] in ("failed", "blocked")
+                )
+                if blocked:
+                    results[name] = {
+                        "status": "blocked",
+                        "seconds": 0.0,
+                        "reason": ", ".join(blocked),
+                    }
+                    log.warning(f"⏭  {name}: blocked by {', '.join(blocked)}")
+                    order.done(name)
+                    continue
+                try:
+                    inputs = {a: fingerprint(a, root, engine) for a in stage["inputs"]}
+                    reason = "forced" if name in force else None
+                    reason = reason or stale_reason(
+                        name, stage, inputs, state, upstream[name], output_exists
+                    )
+                except Exception as e:
+                    results[name] = {"status": "failed", "seconds": 0.0, "reason": str(e)}
+                    log.error(f"❌ {name}: could not fingerprint inputs: {e}")
+                    order.done(name)
+                    continue
+                if reason is None:
+                    results[name] = {"status": "skipped", "seconds": 0.0, "reason": "up to date"}
+                    log.info(f"✓  {name}: up to date, skipped")
+                    order.done(name)
+                    continue
+                log.info(f"▶  {name}: running ({reason})")
+                running[pool.submit(_timed, stage["run"])] = (name, inputs, reason)
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, inputs, reason = running.pop(future)
+                seconds, error, details = future.result()
+                if error is None:
+                    state[name] = {"inputs": inputs, "finished": time.time(), "seconds": seconds}
+                    results[name] = {"status": "ran", "seconds": seconds, "reason": reason}
+                    if details:
+                        results[name]["details"] = details
+                    log.info(f"✅ {name}: done in {seconds:.1f}s")
+                else:
+                    state.pop(name, None)
+                    results[name] = {"status": "failed", "seconds": seconds, "reason": error}
+                    log.error(f"❌ {name}: failed after {seconds:.1f}s: {error}")
+                # Saved per stage, so a crash mid-run still resumes from here
+                state_path.write_text(json.dumps(state, indent=2, sort_keys=True))
+                order.done(name)
+
+    record = {
+        "started_at": started_at,
+        "seconds": time.perf_counter() - started,
+        "stages": results,
+    }
+    with open(log_dir / RUNS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    return record
+
+
+def log_run(record):
+    """Per-stage summary of a run_dag() record."""
+    log.info("=" * 70)
+    for name, result in record["stages"].items():
+        log.info(
+            f"  {name:<16} {result['status']:<8} {result['seconds']:8.1f}s  {result['reason']}"
+        )
+    log.info(f"  {'total':<16} {'':<8} {record['seconds']:8.1f}s")
+    log.info("=" * 70)
+
+
+def main(argv=None):
+    """CLI entrypoint (also scripts/run_daily.py)."""
+    parser = argparse.ArgumentParser(description="Vita Markets daily run (stage DAG)")
+    parser.add_argument("--force", action="store_true", help="Rerun every stage")
+    parser.add_argument(
+        "--from",
+        dest="from_stage",
+        action="append",
+        default=[],
+        metavar="STAGE",
+        help="Rerun this stage (and so everything downstream of it); repeatable",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Stages run at once (default: 4)")
+    parser.add_argument(
+        "--full-dbt",
+        action="store_true",
+        help="Rebuild every dbt model, not only those downstream of changes",
+    )
+    args = parser.parse_args(argv)
+
+    stages = daily_stages(full_dbt=args.full_dbt)
+    unknown = set(args.from_stage) - set(stages)
+    if unknown:
+        parser.error(f"unknown stage(s) {sorted(unknown)}; choose from {sorted(stages)}")
+
+    LOG_DIR.mkdir(exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+        handlers=[
+            logging.FileHandler(LOG_DIR / "run_daily.log", encoding="utf-8"),
+            logging.StreamHandler(),
+        ],
+    )
+    record = run_dag(
+        stages, force="all" if args.force else args.from_stage, max_workers=args.workers
+    )
+    log_run(record)
+    failed = [name for name, r in record["stages"].items() if r["status"] == "failed"]
+    if failed:
+        log.error(f"Daily run failed at {', '.join(failed)}; rerun to resume from there")
+        sys.exit(1)
+    log.info("✅ Daily job completed.")
+
+
+if __name__ == "__main__":
+    main()
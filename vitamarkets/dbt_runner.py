@@ -0,0 +1,170 @@
+"""
+In-process dbt with cached deps, one parse per process and state-based selection.
+
+dbt is invoked through its programmatic runner (dbt.cli.main.dbtRunner, dbt-core
+>= 1.5, installed with `pip install dbt-postgres`) instead of `dbt ...` subprocesses:
+
+    deps     only when packages.yml / package-lock.yml changed or dbt_packages/ is
+             missing (their hash is kept in dbt_packages/.deps_hash), so installed
+             packages keep their mtimes and partial parsing stays valid
+    parse    once per process, with partial parsing (target/partial_parse.msgpack);
+             the manifest is handed to every later invoke instead of reparsing
+    run      only what changed since the last successful run:
+                 state:modified+         models whose SQL/config changed, plus downstream
+                 source_status:fresher+  models downstream of sources with newer data
+             compared against the manifest.json and sources.json saved in
+             target/last_success/ (`dbt source freshness` runs first). Without saved
+             state, or with full=True, every model is built. Freshness only sees newer
+             sales dates (loaded_at_field), so raw rows restated in place select
+             nothing; a selection that comes back empty is rerun as a full build,
+             since callers (vitamarkets.daily) only run dbt when an input changed.
+
+run_models() returns per-model status and seconds; vitamarkets.daily records them in
+logs/daily_runs.jsonl. render_model() gives a model's plain SQL for places that build
+the mart without dbt (benchmarks/end_to_end.py, the DuckDB backend in duckdb_store).
+"""
+
+import hashlib
+import logging
+import re
+import shutil
+import time
+
+from vitamarkets.config import DBT_DIR
+
+log = logging.getLogger(__name__)
+
+PACKAGES_DIR = DBT_DIR / "dbt_packages"
+DEPS_HASH_FILE = PACKAGES_DIR / ".deps_hash"
+TARGET_DIR = DBT_DIR / "target"
+STATE_DIR = TARGET_DIR / "last_success"
+STATE_FILES = ("manifest.json", "sources.json")
+MODELS_DIR = DBT_DIR / "models"
+_JINJA_RELATION = re.compile(r"\{\{\s*(?:ref|source)\(([^)]*)\)\s*\}\}")
+
+CHANGED_SELECTORS = ["state:modified+", "source_status:fresher+"]
+
+
+def _project_args():
+    return ["--project-dir", str(DBT_DIR)]
+
+
+def _invoke(runner, args):
+    """runner.invoke(args); raises RuntimeError unless dbt reports success."""
+    result = runner.invoke(args + _project_args())
+    if not result.success:
+        raise RuntimeError(f"dbt {' '.join(args)} failed: {result.exception or 'see dbt log'}")
+    return result.result
+
+
+def _runner(manifest=None):
+    try:
+        from dbt.cli.main import dbtRunner
+    except ImportError as e:
+        raise ImportError("dbt-core is not installed (pip install dbt-postgres)") from e
+    return dbtRunner(manifest=manifest)
+
+
+def render_model(name):
+    """A dbt model's SQL with ref()/source() replaced by bare relation names."""
+    sql = (MODELS_DIR / f"{name}.sql").read_text()
+    return _JINJA_RELATION.sub(lambda m: m.group(1).split(",")[-1].strip(" '\""), sql)
+
+
+def deps_hash():
+    """Hash of packages.yml + package-lock.yml (missing files hash as empty)."""
+    digest = hashlib.sha256()
+    for name in ("packages.yml", "package-lock.yml"):
+        path = DBT_DIR / name
+        digest.update(path.read_bytes() if path.exists() else b"")
+    return digest.hexdigest()
+
+
+def ensure_deps(force=False):
+    """Run `dbt deps` unless dbt_packages/ matches the package files. Returns True if run."""
+    if not force and DEPS_HASH_FILE.exists() and DEPS_HASH_FILE.read_text() == deps_hash():
+        log.info("dbt deps: packages up to date, skipped")
+        return False
+    _invoke(_runner(), ["deps"])
+    # deps may write package-lock.yml, so hash afterwards
+    DEPS_HASH_FILE.write_text(deps_hash())
+    return True
+
+
+def parse():
+    """dbtRunner holding a freshly (partially) parsed manifest."""
+    manifest = _invoke(_runner(), ["parse", "--partial-parse"])
+    return _runner(manifest)
+
+
+def selectors(state_dir=STATE_DIR, full=False):
+    """--select/--state arguments for changed models ([] = build everything)."""
+    if full or not (state_dir / "manifest.json").exists():
+        return []
+    chosen = CHANGED_SELECTORS[:1]
+    if (state_dir / "sources.json").exists():
+        chosen = CHANGED_SELECTORS
+    return ["--select", *chosen, "--state", str(state_dir)]
+
+
+def save_state(target_dir=TARGET_DIR, state_dir=STATE_DIR):
+    """Keep this run's manifest/sources as the baseline for the next selection."""
+    state_dir.mkdir(parents=True, exist_ok=True)
+    for name in STATE_FILES:
+        if (target_dir / name).exists():
+            shutil.copy2(target_dir / name, state_dir / name)
+
+
+def check_freshness(runner):
+    """`dbt source freshness` (writes target/sources.json); {source: status}."""
+    result = runner.invoke(["source", "freshness"] + _project_args())
+    if result.result is None:
+        log.warning(f"dbt source freshness failed: {result.exception}")
+        return {}
+    statuses = {r.node.unique_id: str(r.status) for r in result.result.results}
+    stale = [source for source, status in statuses.items() if status != "pass"]
+    if stale:
+        log.warning(f"Sources past their freshness threshold: {', '.join(stale)}")
+    return statuses
+
+
+def run_models(full=False):
+    """
+    Build changed models in-process (every model with full=True or no saved state).
+
+    Returns {"select", "freshness", "models": {name: {"status", "seconds"}}, "seconds"}
+    and saves state for the next run; raises RuntimeError if any model failed.
+    """
+    started = time.perf_counter()
+    runner = parse()
+    freshness = check_freshness(runner)
+    selection = selectors(full=full)
+    select = " ".join(selection[1:-2]) if selection else "all"
+    log.info(f"dbt run: selecting {select}")
+
+    result = runner.invoke(["run", *selection] + _project_args())
+    if selection and result.result is not None and not result.result.results:
+        # e.g. vitamarkets_raw rows corrected without a newer date: freshness can't see
+        # it, and saving this state would make the stale mart the new baseline
+        log.warning("dbt run: state selection matched no models; rebuilding every model")
+        select = "all (empty state selection)"
+        result = runner.invoke(["run"] + _project_args())
+    if result.result is None:
+        raise RuntimeError(f"dbt run failed: {result.exception}")
+    models = {
+        r.node.name: {"status": str(r.status), "seconds": round(r.execution_time, 3)}
+        for r in result.result.results
+    }
+    for name, model in sorted(models.items(), key=lambda m: -m[1]["seconds"]):
+        log.info(f"   {name:<32} {model['status']:<8} {model['seconds']:8.2f}s")
+    if not result.success:
+        failed = [name for name, model in models.items() if model["status"] != "success"]
+        raise RuntimeError(f"dbt run failed for {', '.join(failed) or 'the project'}")
+
+    save_state()
+    return {
+        "select": select,
+        "freshness": freshness,
+        "models": models,
+        "seconds": time.perf_counter() - started,
+    }
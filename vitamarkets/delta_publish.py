@@ -0,0 +1,245 @@
+"""
+Delta publishing: keep one published copy of the forecasts and rewrite only the SKUs
+whose forecast changed.
+
+A full publish (vitamarkets.publish.write_run_tables) writes every row of every run
+to new tables, and every row carries the new run id. So the stable views change
+completely and Power BI has to reload everything. A delta publish keeps these
+PostgreSQL tables instead:
+
+    published_forecasts          the run table layout (forecasting.FORECAST_COLUMNS)
+    published_forecast_metrics   the contract's metric columns (METRIC_COLUMNS)
+    published_forecast_hashes    sku, content_hash, run_id, published_at
+    forecast_change_log          run_id, sku, change, rows, logged_at
+
+Each SKU's content hash covers its forecast rows and its metrics, with every value
+rounded to a multiple of `tolerance`. A failed SKU has metrics but no forecast rows and
+is hashed and published like any other, as a full publish keeps its metrics row. A
+change of at least `tolerance` in any value always changes the hash. Smaller changes
+are skipped unless they cross a rounding step. Delta runs seed Prophet's sampled
+intervals (forecasting.prophet_predict), so a refit on unchanged history hashes the
+same. A run's SKUs are compared with the stored hashes:
+
+    added      new SKU: rows inserted
+    updated    hash changed: the SKU's rows replaced
+    removed    SKU in neither the run's forecasts nor its metrics: rows deleted
+    (unchanged SKUs keep their rows, including the run_id that last changed them)
+
+Everything is applied in one transaction, with one change-log row per added, updated
+or removed SKU (kept CHANGE_LOG_DAYS). The stable views are then pointed at the
+published tables (publish.publish_views). Only the changed SKUs' rows differ, so the
+concurrent refresh is cheap and dashboards can reload just the SKUs the change log
+names for the latest run.
+"""
+
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from vitamarkets.config import DELTA_TOLERANCE
+
+log = logging.getLogger(__name__)
+
+FORECASTS_TABLE = "published_forecasts"
+METRICS_TABLE = "published_forecast_metrics"
+HASH_TABLE = "published_forecast_hashes"
+CHANGE_LOG_TABLE = "forecast_change_log"
+
+# Change-log rows older than this are pruned at each publish
+CHANGE_LOG_DAYS = 90
+
+# Metric columns published (and hashed), as the contract views read them
+METRIC_COLUMNS = [
+    "sku",
+    "test_mae",
+    "test_rmse",
+    "test_mape_pct",
+    "test_bias",
+    "test_coverage_pct",
+    "n_train",
+    "n_test",
+    "run_id",
+]
+VALUE_COLUMNS = ["yhat", "yhat_lower", "yhat_upper"]
+# forecasting.FORECAST_COLUMNS
+FORECAST_COLUMNS = ["ds", *VALUE_COLUMNS, "sku", "run_id", "type"]
+
+# Templates over {schema}
+DELTA_DDL = f"""
+CREATE TABLE IF NOT EXISTS {{schema}}.{FORECASTS_TABLE} (
+    ds TIMESTAMP NOT NULL,
+    yhat DOUBLE PRECISION,
+    yhat_lower DOUBLE PRECISION,
+    yhat_upper DOUBLE PRECISION,
+    sku TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    PRIMARY KEY (sku, type, ds)
+);
+CREATE TABLE IF NOT EXISTS {{schema}}.{METRICS_TABLE} (
+    sku TEXT PRIMARY KEY,
+    test_mae DOUBLE PRECISION,
+    test_rmse DOUBLE PRECISION,
+    test_mape_pct DOUBLE PRECISION,
+    test_bias DOUBLE PRECISION,
+    test_coverage_pct DOUBLE PRECISION,
+    n_train BIGINT,
+    n_test BIGINT,
+    run_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS {{schema}}.{HASH_TABLE} (
+    sku TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    published_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE TABLE IF NOT EXISTS {{schema}}.{CHANGE_LOG_TABLE} (
+    run_id TEXT NOT NULL,
+    sku TEXT NOT NULL,
+    change TEXT NOT NULL,
+    rows BIGINT NOT NULL,
+    logged_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (run_id, sku)
+)
+"""
+
+
+def _row_hashes(frame, tolerance):
+    """uint64 hash per row, with numeric columns rounded to multiples of `tolerance`."""
+    rounded = frame.copy()
+    for column in rounded.columns:
+        values = rounded[column]
+        # Integer columns as floats too: one failed SKU's NaN n_train makes the column
+        # float, which must not change every other SKU's hash
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            # + 0.0 folds -0.0 into 0.0, which would hash differently
+            rounded[column] = np.round(values.to_numpy(dtype=float) / tolerance) + 0.0
+    return pd.util.hash_pandas_object(rounded, index=False).to_numpy()
+
+
+def sku_hashes(all_forecasts, metrics_df, tolerance=DELTA_TOLERANCE):
+    """
+    {sku: hex digest} over each SKU's forecast rows (type, ds, values) and metrics.
+
+    Every SKU in either frame gets a digest, so a SKU whose fit failed (a metrics row
+    but no forecast rows) is published like in a full publish, not removed.
+    Digests depend on pandas' row hashing; a pandas upgrade that changes it makes the
+    next delta publish rewrite every SKU once.
+    """
+    forecasts = all_forecasts.sort_values(["sku", "type", "ds"], kind="stable")
+    row_hashes = _row_hashes(forecasts[["type", "ds", *VALUE_COLUMNS]], tolerance)
+    skus, starts = np.unique(forecasts["sku"].to_numpy(), return_index=True)
+    ends = np.r_[starts[1:], len(forecasts)]
+    forecast_bytes = {
+        sku: row_hashes[start:end].tobytes() for sku, start, end in zip(skus, starts, ends)
+    }
+
+    metrics = metrics_df.set_index("sku")[METRIC_COLUMNS[1:-1]]
+    metric_hashes = dict(zip(metrics.index, _row_hashes(metrics, tolerance)))
+    return {
+        sku: hashlib.blake2b(
+            forecast_bytes.get(sku, b"") + np.uint64(metric_hashes.get(sku, 0)).tobytes(),
+            digest_size=16,
+        ).hexdigest()
+        for sku in sorted(forecast_bytes.keys() | metric_hashes.keys())
+    }
+
+
+def _published_hashes(conn, schema):
+    rows = conn.execute(text(f"SELECT sku, content_hash FROM {schema}.{HASH_TABLE}"))
+    return dict(rows.fetchall())
+
+
+def write_delta_tables(
+    engine, all_forecasts, metrics_df, run_id, tolerance=DELTA_TOLERANCE, schema="public"
+):
+    """
+    Upsert the SKUs whose content hash changed into the published tables.
+
+    Returns (forecasts_table, metrics_table, report). The report has the run_id, SKU
+    counts ("added", "updated", "removed", "unchanged") and "rows_written",
+    "rows_deleted" and "rows_skipped" (forecast rows of unchanged SKUs).
+    """
+    hashes = sku_hashes(all_forecasts, metrics_df, tolerance)
+    with engine.begin() as conn:
+        for statement in DELTA_DDL.format(schema=schema).split(";"):
+            conn.execute(text(statement))
+        published = _published_hashes(conn, schema)
+
+    changes = {sku: "added" for sku in hashes.keys() - published.keys()}
+    changes.update(
+        {
+            sku: "updated"
+            for sku in hashes.keys() & published.keys()
+            if hashes[sku] != published[sku]
+        }
+    )
+    changes.update({sku: "removed" for sku in published.keys() - hashes.keys()})
+    written = [sku for sku, change in changes.items() if change != "removed"]
+
+    forecasts = all_forecasts.loc[all_forecasts["sku"].isin(written), FORECAST_COLUMNS]
+    metrics = metrics_df.loc[metrics_df["sku"].isin(written), METRIC_COLUMNS]
+    rows = forecasts.groupby("sku").size()
+    change_log = pd.DataFrame(
+        {
+            "run_id": run_id,
+            "sku": list(changes),
+            "change": list(changes.values()),
+            "rows": [int(rows.get(sku, 0)) for sku in changes],
+        }
+    )
+
+    with engine.begin() as conn:
+        stale = list(changes)
+        deleted = conn.execute(
+            text(f"DELETE FROM {schema}.{FORECASTS_TABLE} WHERE sku = ANY(:skus)"),
+            {"skus": stale},
+        ).rowcount
+        for table in (METRICS_TABLE, HASH_TABLE):
+            conn.execute(
+                text(f"DELETE FROM {schema}.{table} WHERE sku = ANY(:skus)"), {"skus": stale}
+            )
+        # Re-publishing a run id (--resume) replaces its rows for SKUs that changed again
+        conn.execute(
+            text(
+                f"DELETE FROM {schema}.{CHANGE_LOG_TABLE} "
+                "WHERE run_id = :run_id AND sku = ANY(:skus)"
+            ),
+            {"run_id": run_id, "skus": stale},
+        )
+        conn.execute(
+            text(
+                f"DELETE FROM {schema}.{CHANGE_LOG_TABLE} "
+                f"WHERE logged_at < now() - interval '{CHANGE_LOG_DAYS} days'"
+            )
+        )
+
+        forecasts.assign(run_id=run_id).to_sql(
+            FORECASTS_TABLE, conn, schema=schema, if_exists="append", index=False, chunksize=10_000
+        )
+        metrics.assign(run_id=run_id).to_sql(
+            METRICS_TABLE, conn, schema=schema, if_exists="append", index=False
+        )
+        pd.DataFrame(
+            {"sku": written, "content_hash": [hashes[sku] for sku in written], "run_id": run_id}
+        ).to_sql(HASH_TABLE, conn, schema=schema, if_exists="append", index=False)
+        change_log.to_sql(CHANGE_LOG_TABLE, conn, schema=schema, if_exists="append", index=False)
+
+    counts = change_log["change"].value_counts()
+    report = {
+        "run_id": run_id,
+        **{change: int(counts.get(change, 0)) for change in ("added", "updated", "removed")},
+        "unchanged": len(hashes) - len(written),
+        "rows_written": len(forecasts),
+        "rows_deleted": deleted,
+        "rows_skipped": len(all_forecasts) - len(forecasts),
+    }
+    log.info(
+        f"   -> Delta publish: {report['added']} SKUs added, {report['updated']} updated, "
+        f"{report['removed']} removed, {report['unchanged']} unchanged; "
+        f"{report['rows_written']:,} rows written, {report['rows_skipped']:,} skipped"
+    )
+    return FORECASTS_TABLE, METRICS_TABLE, report
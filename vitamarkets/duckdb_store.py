@@ -0,0 +1,242 @@
+"""
+Embedded DuckDB-over-Parquet storage backend for local runs without PostgreSQL.
+
+Every relation the Postgres backend keeps in the database is a Parquet file under the
+store directory (config.LOCAL_STORE_DIR by default):
+
+    raw/vitamarkets_raw.parquet     the raw load (load_raw)
+    mart_sales_summary.parquet      the mart, built from the dbt models' SQL (build_mart)
+    runs/<table>.parquet            run forecast/metrics tables (write_run)
+    views.json                      which run tables the stable views point at
+
+Each call opens an in-memory DuckDB connection with one view per Parquet file, so no
+database file is held open between stages. The mart and the stable/compatibility views
+use the same SQL as Postgres (dbt_runner.render_model, publish.view_statements), so
+both backends expose the same columns. Files are written to a temporary name and
+renamed into place, so a crashed write leaves the previous version.
+
+sku_series_stats isn't kept: series_stats() aggregates the mart in one query, which
+DuckDB does in well under a second at sample scale. Neither are the KPI rollup tables
+(vitamarkets.rollups), which only the Power BI dashboards on Postgres read.
+
+Needs duckdb (pip install duckdb); vitamarkets.storage picks this backend with
+--backend duckdb.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+
+from vitamarkets.config import HISTORY_START, LOCAL_STORE_DIR
+
+log = logging.getLogger(__name__)
+
+RAW_FILE = Path("raw") / "vitamarkets_raw.parquet"
+MART_FILE = Path("mart_sales_summary.parquet")
+RUNS_DIR = Path("runs")
+VIEWS_FILE = "views.json"
+
+# vitamarkets_raw column types (synthetic.RAW_DDL, with NUMERIC as DOUBLE: DuckDB's
+# default DECIMAL(18,3) would round the raw values before the staging model does)
+RAW_TYPES = {
+    "date": "DATE",
+    "sku": "VARCHAR",
+    "category": "VARCHAR",
+    "units_sold": "DOUBLE",
+    "order_value": "DOUBLE",
+    "channel": "VARCHAR",
+    "country": "VARCHAR",
+    "customer_segment": "VARCHAR",
+    "cost_per_unit": "DOUBLE",
+    "margin_pct": "DOUBLE",
+    "promo_flag": "INTEGER",
+    "event": "VARCHAR",
+    "ad_spend": "DOUBLE",
+    "web_traffic": "DOUBLE",
+    "review_score": "DOUBLE",
+    "discontinued_flag": "INTEGER",
+    "launch_date": "DATE",
+    "discontinue_date": "DATE",
+    "archetype": "VARCHAR",
+}
+
+# series_stats.STATS_QUERY's columns, aggregated straight from the mart
+SERIES_STATS_QUERY = f"""
+WITH days AS (
+    SELECT sku, date::date AS ds, SUM(total_units_sold) AS units
+    FROM mart_sales_summary
+    WHERE date::date >= DATE '{HISTORY_START}'
+      AND total_units_sold >= 0
+    GROUP BY sku, date::date
+)
+SELECT
+    sku,
+    MIN(ds) AS first_date,
+    MAX(ds) AS last_date,
+    SUM(units)::DOUBLE AS total_units,
+    COUNT(*)::INTEGER AS n_days,
+    (MAX(ds) - MIN(ds))::INTEGER AS span_days
+FROM days
+GROUP BY sku
+ORDER BY sku
+"""
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("The DuckDB backend needs duckdb: pip install duckdb") from e
+    return duckdb
+
+
+def _literal(path):
+    """A path as a SQL string literal."""
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _store(store_dir):
+    return Path(store_dir or LOCAL_STORE_DIR)
+
+
+def _copy_to(con, query, path):
+    """COPY a query to Parquet at `path` via a temporary file; returns its row count."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    con.execute(f"COPY ({query}) TO {_literal(tmp)} (FORMAT parquet)")
+    os.replace(tmp, path)
+    return con.execute(f"SELECT COUNT(*) FROM read_parquet({_literal(path)})").fetchone()[0]
+
+
+def connect(store_dir=None):
+    """In-memory DuckDB connection with a view per stored relation and the published views."""
+    from vitamarkets.dbt_runner import render_model
+    from vitamarkets.publish import view_statements
+
+    store = _store(store_dir)
+    con = _duckdb().connect()
+    relations = {"vitamarkets_raw": store / RAW_FILE, "mart_sales_summary": store / MART_FILE}
+    relations.update({path.stem: path for path in sorted((store / RUNS_DIR).glob("*.parquet"))})
+    for name, path in relations.items():
+        if path.exists():
+            con.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet({_literal(path)})")
+    if (store / RAW_FILE).exists():
+        con.execute(f"CREATE VIEW stg_vitamarkets AS {render_model('stg_vitamarkets')}")
+
+    views = store / VIEWS_FILE
+    if views.exists():
+        published = json.loads(views.read_text())
+        for statement in view_statements(published["forecasts"], published["metrics"], "main"):
+            con.execute(statement)
+    return con
+
+
+def load_raw(store_dir, csv_path):
+    """Replace the raw load with a CSV in the sample's layout; returns rows loaded."""
+    columns = ", ".join(f"{_literal(name)}: {_literal(kind)}" for name, kind in RAW_TYPES.items())
+    con = _duckdb().connect()
+    try:
+        rows = _copy_to(
+            con,
+            f"SELECT * FROM read_csv({_literal(csv_path)}, header = true, columns = {{{columns}}})",
+            _store(store_dir) / RAW_FILE,
+        )
+    finally:
+        con.close()
+    log.info(f"   -> Loaded {rows:,} raw rows into {_store(store_dir) / RAW_FILE}")
+    return rows
+
+
+def build_mart(store_dir=None, full=True):
+    """
+    Rebuild mart_sales_summary from the raw load with the dbt models' SQL; returns rows.
+
+    The mart is always rebuilt whole; `full` matches the Postgres backend's signature.
+    """
+    from vitamarkets.dbt_runner import render_model
+
+    con = connect(store_dir)
+    try:
+        rows = _copy_to(con, render_model("mart_sales_summary"), _store(store_dir) / MART_FILE)
+    finally:
+        con.close()
+    log.info(f"   -> Built mart_sales_summary: {rows:,} rows")
+    return rows
+
+
+def _query(store_dir, sql, params=None):
+    con = connect(store_dir)
+    try:
+        return con.execute(sql, params).df()
+    finally:
+        con.close()
+
+
+def series_stats(store_dir=None):
+    """SKU-indexed eligibility stats, as series_stats.load_series_stats returns them."""
+    return _query(store_dir, SERIES_STATS_QUERY).set_index("sku")
+
+
+def load_history(store_dir=None, skus=None):
+    """Mart history for every SKU or only `skus`, as forecasting.load_history returns it."""
+    from vitamarkets.forecasting import HISTORY_FOR_SKUS_QUERY, HISTORY_QUERY
+
+    if skus is None:
+        df_raw = _query(store_dir, HISTORY_QUERY)
+    else:
+        sql = HISTORY_FOR_SKUS_QUERY.replace(":skus", "$skus")
+        df_raw = _query(store_dir, sql, {"skus": list(skus)})
+    log.info(f"   -> Loaded {len(df_raw):,} rows across {df_raw['sku'].nunique()} SKUs")
+    return df_raw
+
+
+def sku_groups(store_dir=None):
+    """{sku: category} from the mart (pooled.load_sku_groups)."""
+    from vitamarkets.pooled import SKU_GROUPS_QUERY
+
+    groups = _query(store_dir, SKU_GROUPS_QUERY)
+    return dict(zip(groups["sku"], groups["category"]))
+
+
+def write_run(store_dir, all_forecasts, metrics_df, run_id, use_versioned_tables=True):
+    """Write a run's forecast/metrics tables as Parquet. Returns the table names."""
+    from vitamarkets.publish import run_table_names
+
+    tables = run_table_names(run_id, use_versioned_tables)
+    con = _duckdb().connect()
+    try:
+        for table, frame in zip(tables, (all_forecasts, metrics_df)):
+            con.register("frame", frame)
+            rows = _copy_to(
+                con, "SELECT * FROM frame", _store(store_dir) / RUNS_DIR / f"{table}.parquet"
+            )
+            con.unregister("frame")
+            log.info(f"   -> Wrote {rows:,} rows to {table}")
+    finally:
+        con.close()
+    return tables
+
+
+def publish_views(store_dir, table_forecasts, table_metrics):
+    """Point the stable and compatibility views at the given run tables."""
+    from vitamarkets.publish import view_statements
+
+    # Compile the views over these tables first, so a failure keeps the old pointer
+    con = connect(store_dir)
+    try:
+        for statement in view_statements(table_forecasts, table_metrics, "main"):
+            con.execute(statement)
+    finally:
+        con.close()
+
+    path = _store(store_dir) / VIEWS_FILE
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"forecasts": table_forecasts, "metrics": table_metrics}))
+    os.replace(tmp, path)
+    log.info("   -> Stable and compatibility views updated successfully")
+
+
+def read_relation(store_dir, name):
+    """Every row of a stored table or published view."""
+    return _query(store_dir, f"SELECT * FROM {name}")
@@ -0,0 +1,1104 @@
+"""
+VITA MARKETS FORECASTING PIPELINE v2.0 as an importable library.
+
+forecast_prophet_v2.py is a thin wrapper around :func:`main`. Each stage is a plain
+function so it can be reused (and benchmarked) on its own:
+
+    series_stats.load_series_stats -> select_eligible_skus -> load_history
+    -> preprocessing.preprocess -> build_holidays -> forecast_all -> publish
+    -> purchasing.recommend [-> simulation.simulate]
+
+Prophet and joblib are imported inside the functions that use them, so importing this
+module only costs pandas/numpy. Holdout accuracy comes from vitamarkets.metrics.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from vitamarkets.baselines import seasonal_naive
+from vitamarkets.checkpoint import (
+    checkpoint_path,
+    completed_skus,
+    load_run,
+    run_dir,
+    save_sku,
+)
+from vitamarkets.config import (
+    DELTA_TOLERANCE,
+    FORECAST_DAYS,
+    GAP_FILL_POLICY,
+    HISTORY_START,
+    HOLIDAY_EVENTS,
+    HOLIDAY_YEARS,
+    MIN_N_DAYS,
+    MIN_SPAN_DAYS,
+    MIN_TOTAL_UNITS,
+    POOLED_MIN_N_DAYS,
+    POOLED_MIN_SPAN_DAYS,
+    STABLE_VIEW_METRICS,
+    TEST_DAYS,
+)
+from vitamarkets.metrics import METRICS, naive_scale, score_one
+from vitamarkets.preprocessing import FILL_POLICIES, preprocess
+from vitamarkets.profiling import stage, start_profile, summary_lines, write_profile
+from vitamarkets.purchasing import (
+    ALL,
+    LOCATION_COLUMNS,
+    RECOMMENDATIONS_TABLE,
+    empty_positions,
+    load_demand_shares,
+    load_positions,
+    recommend,
+    write_recommendations,
+)
+from vitamarkets.scheduling import (
+    DEFAULT_FIT_TIMEOUT,
+    RETRY_FIT_KWARGS,
+    load_past_fit_seconds,
+    order_longest_first,
+    save_fit_seconds,
+    status_counts,
+)
+from vitamarkets.series_stats import STATS_TABLE
+from vitamarkets.storage import BACKENDS, open_backend
+from vitamarkets.telemetry import (
+    TELEMETRY_TABLE,
+    describe,
+    fit_telemetry,
+    record_fit,
+    write_telemetry,
+)
+
+log = logging.getLogger(__name__)
+
+HISTORY_QUERY = f"""
+SELECT
+    date::date as ds,
+    sku,
+    total_units_sold as y,
+    COALESCE(promo_flag, 0) as is_promo
+FROM mart_sales_summary
+WHERE date >= '{HISTORY_START}'
+ORDER BY sku, date
+"""
+
+HISTORY_FOR_SKUS_QUERY = f"""
+SELECT
+    date::date as ds,
+    sku,
+    total_units_sold as y,
+    COALESCE(promo_flag, 0) as is_promo
+FROM mart_sales_summary
+WHERE date >= '{HISTORY_START}'
+  AND sku = ANY(:skus)
+ORDER BY sku, date
+"""
+
+FORECAST_COLUMNS = ["ds", "yhat", "yhat_lower", "yhat_upper", "sku", "run_id", "type"]
+
+
+def new_run_id():
+    """Run identifier used for versioned tables and output folders (YYYYMMDD_HHMM)."""
+    return datetime.now().strftime("%Y%m%d_%H%M")
+
+
+def setup_logging(output_dir):
+    """Log to stdout and <output_dir>/forecast_run.log."""
+    # Force UTF-8 output on Windows to prevent UnicodeEncodeError
+    if sys.platform == "win32":
+        sys.stdout.reconfigure(encoding="utf-8")
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(message)s",
+        handlers=[
+            logging.FileHandler(os.path.join(output_dir, "forecast_run.log")),
+            logging.StreamHandler(),
+        ],
+    )
+
+
+# ------------------- 1. DATA INGESTION -------------------
+def load_history(engine, skus=None):
+    """Pull mart history, for every SKU or only `skus` (e.g. the eligible ones)."""
+    from sqlalchemy import text
+
+    if skus is None:
+        df_raw = pd.read_sql(HISTORY_QUERY, engine)
+    else:
+        df_raw = pd.read_sql(text(HISTORY_FOR_SKUS_QUERY), engine, params={"skus": list(skus)})
+    log.info(f"   -> Loaded {len(df_raw):,} rows across {df_raw['sku'].nunique()} SKUs")
+    return df_raw
+
+
+# ------------------- 2-3. PREPROCESSING & ELIGIBLE SKUs -------------------
+def select_eligible_skus(
+    sku_stats,
+    min_span_days=MIN_SPAN_DAYS,
+    min_total_units=MIN_TOTAL_UNITS,
+    min_n_days=MIN_N_DAYS,
+):
+    """
+    Return SKUs with enough history and volume to forecast.
+
+    `sku_stats` is SKU-indexed with span_days, total_units and n_days, as
+    series_stats.load_series_stats() and preprocessing.preprocess() return it.
+    """
+    return sku_stats.index[
+        (sku_stats["span_days"] >= min_span_days)
+        & (sku_stats["total_units"] > min_total_units)
+        & (sku_stats["n_days"] >= min_n_days)
+    ].tolist()
+
+
+# ------------------- 4. DYNAMIC HOLIDAYS -------------------
+def build_holidays(events=HOLIDAY_EVENTS, years=HOLIDAY_YEARS):
+    """Holiday calendar with +/- windows for every year in `years` (inclusive)."""
+    holidays_list = []
+    for name, date_str, window in events:
+        for year in range(years[0], years[1] + 1):
+            try:
+                date = pd.to_datetime(f"{year}-{date_str}")
+                holidays_list.append(
+                    {
+                        "holiday": name,
+                        "ds": date,
+                        "lower_window": -window,
+                        "upper_window": window,
+                    }
+                )
+            except Exception:
+                continue
+
+    return pd.DataFrame(holidays_list)
+
+
+# ------------------- 5. PER-SKU FORECASTING -------------------
+def make_prophet(holidays_df, has_promo=False, weekly_seasonality=True):
+    """Prophet configured per docs/FORECASTING_POLICIES.md (v2 settings)."""
+    from prophet import Prophet
+
+    m = Prophet(
+        yearly_seasonality=True,
+        weekly_seasonality=weekly_seasonality,
+        daily_seasonality=False,
+        holidays=holidays_df,
+        seasonality_mode="multiplicative",
+        interval_width=0.80,
+        changepoint_prior_scale=0.05,
+        seasonality_prior_scale=10.0,
+    )
+    if has_promo:
+        m.add_regressor("is_promo", standardize=False)
+    return m
+
+
+# Prophet samples yhat_lower/yhat_upper from numpy's global RNG. Delta publishing
+# (run(delta_publish=True)) passes PREDICT_SEED so that a refit on unchanged data
+# reproduces its intervals; other runs predict unseeded. A seeded predict holds
+# _PREDICT_LOCK so concurrent predicts (--executor threads) can't draw from each
+# other's stream, which serializes the predict step of threaded delta runs.
+PREDICT_SEED = 0
+_PREDICT_LOCK = threading.Lock()
+
+
+def prophet_predict(m, future, seed=None):
+    """
+    m.predict(future); with a seed, the uncertainty samples are drawn from it and
+    numpy's global RNG state is restored afterwards.
+    """
+    if seed is None:
+        return m.predict(future)
+    with _PREDICT_LOCK:
+        state = np.random.get_state()
+        np.random.seed(seed)
+        try:
+            return m.predict(future)
+        finally:
+            np.random.set_state(state)
+
+
+def prophet_fit_predict(
+    train, future, holidays_df, has_promo, fit_kwargs=None, telemetry=None, predict_seed=None
+):
+    """
+    Fit Prophet on `train` and predict `future`; fit_kwargs go to cmdstanpy's optimize,
+    predict_seed to prophet_predict.
+    Fit/predict seconds and optimizer iterations are added to `telemetry` if given.
+    """
+    fit_cols = ["ds", "y"] + (["is_promo"] if has_promo else [])
+    m = make_prophet(holidays_df, has_promo)
+    started = time.perf_counter()
+    m.fit(train[fit_cols], **(fit_kwargs or {}))
+    fitted = time.perf_counter()
+    forecast = prophet_predict(m, future, predict_seed)
+    if telemetry is not None:
+        record_fit(telemetry, m, fitted - started, time.perf_counter() - fitted)
+    return forecast
+
+
+def future_frame(sub, has_promo, periods=FORECAST_DAYS):
+    """History dates plus `periods` future days (as Prophet.make_future_dataframe)."""
+    history = pd.Series(sub["ds"].unique()).sort_values()
+    horizon = pd.date_range(history.iloc[-1], periods=periods + 1, freq="D")[1:]
+    future = pd.DataFrame({"ds": pd.concat([history, pd.Series(horizon)], ignore_index=True)})
+    if has_promo:
+        # Forward-fill promo flag
+        last_promo = sub["is_promo"].iloc[-1]
+        promo = sub.groupby("ds")["is_promo"].max().reset_index()
+        future = future.merge(promo, on="ds", how="left")
+        future["is_promo"] = future["is_promo"].fillna(last_promo)
+    return future
+
+
+def failed_metrics(
+    sku_id, run_id, n_train, n_test, started, cpu_started, error, grain="daily", telemetry=None
+):
+    """
+    Metrics row of a SKU that got no forecast: fit_status "failed", NaN scores and the
+    time since `started` (perf_counter) / `cpu_started` (thread_time).
+    """
+    return {
+        "sku": sku_id,
+        "run_id": run_id,
+        "n_train": n_train,
+        "n_test": n_test,
+        **{f"test_{name}": np.nan for name in METRICS},
+        "fit_status": "failed",
+        "fit_seconds": time.perf_counter() - started,
+        "python_seconds": time.thread_time() - cpu_started,
+        "model": None,
+        "grain": grain,
+        **fit_telemetry(telemetry),
+        "error": error,
+    }
+
+
+def forecast_sku(
+    sub,
+    sku_id,
+    holidays_df,
+    run_id,
+    fit_timeout=DEFAULT_FIT_TIMEOUT,
+    grain="daily",
+    predict_seed=None,
+):
+    """
+    Forecast a single SKU with a fit time budget and fallbacks.
+
+    `sub` is the SKU's preprocessed history (vitamarkets.preprocessing: one row per day,
+    outliers already clipped).
+
+    Each attempt (holdout fit + full fit) runs in order until one succeeds: Prophet,
+    Prophet again with tighter optimizer limits, then the seasonal-naive baseline.
+    `fit_timeout` (seconds, None = unlimited) bounds the SKU, not each fit: every
+    cmdstan optimization gets the time left of it, and once it is used up the SKU goes
+    straight to the baseline. A slow SKU can therefore hold a worker for about
+    fit_timeout plus one Prophet predict (its uncertainty sampling isn't interruptible). The winning attempt is recorded as
+    metrics["fit_status"] (see vitamarkets.scheduling) and the model that produced the
+    forecast as metrics["model"]. metrics["python_seconds"] is the CPU time this SKU
+    spent in the calling thread, i.e. the GIL-bound Python/pandas part of the fit
+    (cmdstan optimizes in a subprocess and doesn't count). Fit/predict seconds,
+    optimizer iterations, worker and peak memory are added as vitamarkets.telemetry keys.
+
+    With grain="weekly" Prophet fits on weekly buckets and the forecast is split back
+    to days (vitamarkets.weekly); output stays daily and metrics["grain"] records it.
+    predict_seed makes Prophet's sampled intervals reproducible (prophet_predict).
+
+    Returns (combined_df, metrics_dict) on success, (None, metrics_dict) with
+    fit_status "failed" (and an "error" key) if every attempt failed, or
+    (None, reason_str) if the SKU has too little data to evaluate.
+    """
+    started = time.perf_counter()
+    cpu_started = time.thread_time()
+    n_train = n_test = 0
+    telemetry = {}
+    try:
+        sub = sub.sort_values("ds").reset_index(drop=True)
+        if len(sub) < 365:
+            return None, f"Insufficient data for {sku_id}"
+
+        # Check for regressor availability
+        has_promo = "is_promo" in sub.columns and sub["is_promo"].nunique() > 1
+
+        # Final holdout evaluation (last 30 days)
+        cutoff = sub["ds"].max() - pd.Timedelta(days=TEST_DAYS)
+        train_cv = sub[sub["ds"] <= cutoff]
+        test_cv = sub[sub["ds"] > cutoff]
+        n_train, n_test = len(train_cv), len(test_cv)
+
+        if len(test_cv) < 10:
+            return None, f"Insufficient test data ({len(test_cv)} days) for {sku_id}"
+
+        future_test = test_cv[["ds"]].copy()
+        if has_promo:
+            future_test = future_test.merge(sub[["ds", "is_promo"]], on="ds", how="left")
+        future = future_frame(sub, has_promo)
+        fit_predict = prophet_fit_predict
+        if grain == "weekly":
+            from vitamarkets.weekly import weekly_fit_predict as fit_predict
+
+        deadline = None if fit_timeout is None else started + fit_timeout
+
+        def budget(fit_kwargs):
+            """fit_kwargs plus the time left for this SKU as cmdstan's timeout."""
+            if deadline is None:
+                return fit_kwargs
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                raise TimeoutError(f"fit budget of {fit_timeout}s used up")
+            return {**fit_kwargs, "timeout": left}
+
+        attempts = [("prophet", {}), ("retried", RETRY_FIT_KWARGS), ("fallback", None)]
+        errors = []
+        for fit_status, fit_kwargs in attempts:
+            try:
+                if fit_kwargs is None:
+                    forecast_test = seasonal_naive(train_cv, future_test)
+                    forecast_full = seasonal_naive(sub, future)
+                else:
+                    forecast_test = fit_predict(
+                        train_cv,
+                        future_test,
+                        holidays_df,
+                        has_promo,
+                        budget(fit_kwargs),
+                        telemetry,
+                        predict_seed,
+                    )
+                    forecast_full = fit_predict(
+                        sub,
+                        future,
+                        holidays_df,
+                        has_promo,
+                        budget(fit_kwargs),
+                        telemetry,
+                        predict_seed,
+                    )
+                break
+            except Exception as e:
+                errors.append(f"{fit_status}: {e}")
+        else:
+            return None, failed_metrics(
+                sku_id,
+                run_id,
+                n_train,
+                n_test,
+                started,
+                cpu_started,
+                "; ".join(errors),
+                grain,
+                telemetry,
+            )
+
+        scores = score_one(
+            test_cv["y"].values,
+            forecast_test["yhat"].values,
+            forecast_test["yhat_lower"].values,
+            forecast_test["yhat_upper"].values,
+            scale=naive_scale(train_cv.assign(sku=sku_id)).get(sku_id, np.nan),
+        )
+
+        forecast_full["sku"] = sku_id
+        forecast_full["run_id"] = run_id
+
+        metrics = {
+            "sku": sku_id,
+            "run_id": run_id,
+            "n_train": n_train,
+            "n_test": n_test,
+            **scores,
+            "fit_status": fit_status,
+            "fit_seconds": time.perf_counter() - started,
+            "python_seconds": time.thread_time() - cpu_started,
+            "model": "seasonal_naive" if fit_status == "fallback" else "prophet",
+            "grain": grain,
+            **fit_telemetry(telemetry),
+        }
+
+        out_forecast = forecast_full[
+            ["ds", "yhat", "yhat_lower", "yhat_upper", "sku", "run_id"]
+        ].copy()
+        out_forecast["type"] = "forecast"
+
+        # Add actuals overlay
+        actuals = sub[["ds", "y"]].copy()
+        actuals["yhat"] = actuals["y"]
+        actuals["yhat_lower"] = actuals["y"]
+        actuals["yhat_upper"] = actuals["y"]
+        actuals["sku"] = sku_id
+        actuals["run_id"] = run_id
+        actuals["type"] = "actual"
+        actuals = actuals[FORECAST_COLUMNS]
+
+        combined = pd.concat([actuals, out_forecast], ignore_index=True)
+
+        return combined, metrics
+
+    except Exception as e:
+        return None, failed_metrics(
+            sku_id, run_id, n_train, n_test, started, cpu_started, str(e), grain, telemetry
+        )
+
+
+# ------------------- 6. RUN IN PARALLEL -------------------
+def forecast_all(
+    df,
+    eligible_skus,
+    holidays_df,
+    run_id,
+    n_jobs=-1,
+    threads_per_worker=1,
+    fit_timeout=DEFAULT_FIT_TIMEOUT,
+    past_fit_seconds=None,
+    on_result=None,
+    verbose=10,
+    weekly_skus=(),
+    executor="processes",
+    predict_seed=None,
+):
+    """
+    Forecast every eligible SKU in parallel.
+
+    Each task receives only its own SKU slice, so workers never pickle the full history.
+    Workers are capped at `threads_per_worker` BLAS/OpenMP/Stan threads so that
+    n_jobs x threads stays within the machine (see vitamarkets.resources). SKUs are
+    dispatched one at a time, longest expected fit first, so stragglers start early.
+    SKUs in `weekly_skus` are fitted at weekly grain, and predict_seed is passed on
+    (see forecast_sku).
+
+    executor="processes" runs fits in loky worker processes; executor="threads" runs
+    them on a thread pool in this process, which shares one copy of the data and of
+    the imported libraries. Prophet's optimization runs in a cmdstan subprocess either
+    way, so threads only serialize on the GIL for the Python parts of a fit
+    (metrics["python_seconds"]).
+
+    Results are consumed as workers finish. If `on_result(combined_df, metrics)` is
+    given it is called for every SKU outcome (e.g. to checkpoint it) and forecast
+    frames are not kept in memory.
+    Returns (forecast_dfs, metrics_list, failed_messages).
+    """
+    from joblib import Parallel, delayed, parallel_backend
+
+    from vitamarkets.resources import apply_thread_limits
+
+    sku_df = df[df["sku"].isin(eligible_skus)]
+    groups = dict(tuple(sku_df.groupby("sku", sort=False)))
+    ordered_skus = order_longest_first(sku_df.groupby("sku").size(), past_fit_seconds)
+
+    if executor == "threads":
+        # Import once up front rather than racing the first import across threads
+        import prophet  # noqa: F401
+
+        backend = parallel_backend("threading")
+    else:
+        backend = parallel_backend("loky", inner_max_num_threads=threads_per_worker)
+    # loky workers and cmdstan subprocesses inherit the parent's environment; the caps
+    # are lifted again once every fit has been consumed
+    with apply_thread_limits(threads_per_worker), backend:
+        results = Parallel(
+            n_jobs=n_jobs, verbose=verbose, batch_size=1, return_as="generator_unordered"
+        )(
+            delayed(forecast_sku)(
+                groups[sku],
+                sku,
+                holidays_df,
+                run_id,
+                fit_timeout,
+                "weekly" if sku in weekly_skus else "daily",
+                predict_seed,
+            )
+            for sku in ordered_skus
+        )
+
+        forecast_dfs = []
+        metrics_list = []
+        failed_skus = []
+        for combined, outcome in results:
+            if isinstance(outcome, str):
+                failed_skus.append(outcome)
+                continue
+            if "error" in outcome:
+                failed_skus.append(f"Error on {outcome['sku']}: {outcome.pop('error')}")
+            metrics_list.append(outcome)
+            if on_result is not None:
+                on_result(combined, outcome)
+            elif combined is not None:
+                forecast_dfs.append(combined)
+    return forecast_dfs, metrics_list, failed_skus
+
+
+# ------------------- SUMMARY & RECOMMENDATIONS -------------------
+def log_gil_share(metrics_list, wall_seconds):
+    """Log how much of the Prophet stage was GIL-bound Python work vs. cmdstan."""
+    fit = sum(m["fit_seconds"] for m in metrics_list)
+    python = sum(m.get("python_seconds") or 0 for m in metrics_list)
+    if not fit:
+        return
+    log.info(
+        f"   -> {len(metrics_list)} fits in {wall_seconds:.1f}s wall: {fit:.1f}s fit time, "
+        f"of which {python:.1f}s ({100 * python / fit:.0f}%) GIL-bound Python"
+    )
+
+
+def forecast_quality(median_mape):
+    """Map median MAPE to the quality label used in logs and reports."""
+    quality_map = {
+        10: "EXCELLENT",
+        15: "GOOD",
+        20: "ACCEPTABLE",
+    }
+    return next((v for k, v in quality_map.items() if median_mape < k), "NEEDS IMPROVEMENT")
+
+
+def log_run_summary(metrics_df, n_eligible, output_dir):
+    log.info("\n" + "=" * 70)
+    log.info("FORECASTING COMPLETE — RUN SUMMARY")
+    log.info("=" * 70)
+
+    median_mape = metrics_df["test_mape_pct"].median()
+    n_ok = int((metrics_df["fit_status"] != "failed").sum())
+    log.info(f"Successful SKUs: {n_ok} / {n_eligible}")
+    counts = status_counts(metrics_df)
+    log.info("Fit outcomes: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+    log.info(f"Median MAPE: {median_mape:.1f}%")
+    log.info(f"Median MAE: {metrics_df['test_mae'].median():.1f}")
+    log.info(f"Median WAPE: {metrics_df['test_wape_pct'].median():.1f}%")
+    log.info(f"Median MASE: {metrics_df['test_mase'].median():.2f}")
+    log.info(f"Median Coverage (80% PI): {metrics_df['test_coverage_pct'].median():.1f}%")
+    log.info(f"\nFORECAST QUALITY: {forecast_quality(median_mape)}")
+    log.info(f"\nResults saved in: {output_dir}")
+
+
+def log_recommendations(recs, top=10):
+    log.info("\n" + "=" * 70)
+    log.info("PURCHASE RECOMMENDATIONS — NEXT REORDER CYCLE")
+    log.info("=" * 70)
+    n_reorder = int((recs["purchase_qty"] > 0).sum())
+    log.info(f"{n_reorder} of {len(recs)} positions below their reorder point")
+    log.info("\n" + "-" * 70)
+
+    for rec in recs.head(top).to_dict("records"):
+        where = " / ".join(v for v in (rec["channel"], rec["country"]) if v != ALL)
+        status = "⚠️ REORDER NOW" if rec["purchase_qty"] > 0 else "✅ Stock OK"
+        log.info(f"\n{rec['sku']}{f' ({where})' if where else ''}  |  {status}")
+        log.info(f"  On Hand: {rec['on_hand']:.0f} units (+{rec['on_order']:.0f} on order)")
+        log.info(
+            f"  {rec['lead_time_days']}-Day Demand: {rec['lead_time_demand']:.0f} units "
+            f"(MAPE: {rec['mape_pct']}% - {rec['forecast_quality']} confidence)"
+        )
+        log.info(
+            f"  Safety Stock: {rec['safety_stock']:.0f} units "
+            f"({rec['service_level']:.0%} service level)"
+        )
+        log.info(f"  → PURCHASE: {rec['purchase_qty']:.0f} units")
+
+
+def log_simulation(all_forecasts, positions, by, shares, n_samples, engine, run_id):
+    """Simulate service levels, save them (table + CSV) and log throughput; returns stats."""
+    from vitamarkets.simulation import SIMULATION_TABLE, simulate, write_simulation
+
+    log.info(f"\n🎲 Simulating {n_samples:,} lead-time demand paths per position...")
+    sims, stats = simulate(all_forecasts, positions, n_samples=n_samples, by=by, shares=shares)
+    write_simulation(engine, sims, run_id)
+    sims.to_csv(os.path.join(run_dir(run_id), "service_level_simulation.csv"), index=False)
+    log.info(
+        f"   -> {stats['targets']:,} positions x {stats['samples']:,} samples in "
+        f"{stats['simulate_seconds']:.2f}s ({stats['sims_per_second']:,.0f} "
+        f"SKU-simulations/sec, {stats['chunks']} chunks of {stats['chunk_mb']:.0f} MB)"
+    )
+    at_risk = sims.drop_duplicates(["sku", *LOCATION_COLUMNS])
+    log.info(
+        f"   -> {int((at_risk['stockout_pct'] > 50).sum())} positions more likely than not "
+        f"to stock out within their lead time; saved to public.{SIMULATION_TABLE}"
+    )
+    return stats
+
+
+def log_power_bi_contract():
+    log.info("\n" + "=" * 70)
+    log.info("POWER BI CONNECTION CONTRACT")
+    log.info("=" * 70)
+    log.info("Power BI should query these compatibility views (auto-update every run):")
+    log.info("")
+    log.info("  1) Forecast Data: public.simple_prophet_forecast")
+    log.info("     SELECT ds, sku, yhat, yhat_lower, yhat_upper, data_type, forecast_run_id")
+    log.info("     FROM public.simple_prophet_forecast;")
+    log.info("")
+    log.info("  2) Accuracy Metrics: public.forecast_error_metrics")
+    log.info("     SELECT sku, test_mape_pct, test_mae, test_rmse, test_bias, test_coverage_pct")
+    log.info("     FROM public.forecast_error_metrics;")
+    log.info("")
+    log.info("Sanity check SQL:")
+    log.info("  SELECT MAX(ds), MAX(forecast_run_id) FROM public.simple_prophet_forecast;")
+    log.info(f"  SELECT MAX(mean_absolute_pct_error) FROM public.{STABLE_VIEW_METRICS};")
+    log.info("")
+    log.info("DO NOT query versioned tables directly (prophet_forecasts_YYYYMMDD_HHMM).")
+    log.info("=" * 70)
+
+
+def log_profile(profile):
+    """Write run_profile.json and log the per-stage table."""
+    path = write_profile(profile)
+    log.info(f"Run profile ({len(profile['stages'])} stages) saved: {path}")
+    for line in summary_lines(profile):
+        log.info(f"   {line}")
+
+
+# ------------------- ENTRYPOINT -------------------
+def run(
+    run_id=None,
+    use_versioned_tables=True,
+    n_jobs=None,
+    threads_per_worker=None,
+    fit_timeout=DEFAULT_FIT_TIMEOUT,
+    resume=False,
+    model="prophet",
+    max_cheap_mape=None,
+    weekly_skus=(),
+    executor="processes",
+    gap_fill=GAP_FILL_POLICY,
+    recommend_by=(),
+    simulate_samples=0,
+    profile_stages=False,
+    pstats=False,
+    backend="postgres",
+    store_dir=None,
+    delta_publish=False,
+    delta_tolerance=DELTA_TOLERANCE,
+):
+    """
+    Run the full v2 pipeline. Returns (all_forecasts, metrics_df) or (None, None).
+
+    model picks the engine: "prophet" (one fit per SKU, in parallel), "lite"
+    (vitamarkets.prophet_lite, every SKU in one batched solve) or "pooled"
+    (vitamarkets.pooled, one Stan fit per category group, relaxed eligibility) or
+    "tournament" (vitamarkets.tournament: cheap models first, Prophet only for SKUs
+    whose best cheap holdout MAPE exceeds max_cheap_mape).
+
+    Prophet fits for SKUs in `weekly_skus` ("all" for every SKU) run at weekly grain
+    and are disaggregated back to days (vitamarkets.weekly).
+
+    n_jobs/threads_per_worker default to the calibrated layout for this machine
+    (python -m vitamarkets.resources --calibrate), else a plan from fit cost.
+    fit_timeout is each SKU's Prophet time budget in seconds (None = unlimited; see
+    forecast_sku).
+    executor runs Prophet fits in worker "processes" or "threads" (see forecast_all).
+    gap_fill is the calendar gap policy (vitamarkets.preprocessing.FILL_POLICIES).
+    recommend_by splits purchase recommendations by "channel" and/or "country"
+    (vitamarkets.purchasing); by default there is one per SKU. simulate_samples > 0
+    also simulates that many bootstrapped lead-time demand paths per SKU/location and
+    reports reorder points at SIMULATED_SERVICE_LEVELS (vitamarkets.simulation).
+    profile_stages=True times every stage (wall/CPU time, peak memory, rows) into
+    run_profile.json in the run folder, with a cProfile dump per stage if pstats=True
+    (vitamarkets.profiling).
+
+    backend is where history is read and the run published (vitamarkets.storage):
+    "postgres", or "duckdb" for Parquet files in store_dir with no database server.
+    DuckDB runs skip fit telemetry and the recommendation/simulation tables (the
+    recommendations CSV is still written, against empty inventory positions), so
+    recommend_by and simulate_samples need PostgreSQL.
+
+    delta_publish=True (PostgreSQL only) publishes into the fixed published_* tables
+    instead of new run tables, rewriting only SKUs whose forecast or metrics moved by
+    delta_tolerance or more (vitamarkets.delta_publish); use_versioned_tables is then
+    ignored.
+
+    Every SKU result is checkpointed under prophet_forecasts_<run_id>/. With
+    resume=True, SKUs already checkpointed for `run_id` are not refitted, and the
+    published tables are assembled from the checkpoint store.
+    """
+    from vitamarkets.resources import resolve_layout
+    from vitamarkets.tournament import DEFAULT_MAX_MAPE
+
+    warnings.filterwarnings("ignore")
+    max_cheap_mape = DEFAULT_MAX_MAPE if max_cheap_mape is None else max_cheap_mape
+
+    if backend != "postgres" and (recommend_by or simulate_samples):
+        raise ValueError("recommend_by and simulate_samples need the postgres backend")
+    if backend != "postgres" and delta_publish:
+        raise ValueError("delta_publish needs the postgres backend")
+
+    run_id = run_id or new_run_id()
+    output_dir = run_dir(run_id)
+    store = checkpoint_path(run_id)
+    if resume and not store.exists():
+        raise FileNotFoundError(f"No checkpoints to resume for run {run_id}: {store}")
+    os.makedirs(output_dir, exist_ok=True)
+    setup_logging(output_dir)
+
+    log.info("=" * 70)
+    log.info("VITA MARKETS FORECASTING PIPELINE v2.0")
+    log.info("=" * 70)
+
+    storage = open_backend(backend, store_dir)
+    engine = storage["engine"]
+    profile = None
+    if profile_stages:
+        profile = start_profile(output_dir, f"forecast_prophet_v2 --model {model}", pstats)
+    try:
+        min_span_days, min_n_days = MIN_SPAN_DAYS, MIN_N_DAYS
+        if model == "pooled":
+            min_span_days, min_n_days = POOLED_MIN_SPAN_DAYS, POOLED_MIN_N_DAYS
+        log.info(
+            f"[1/7] Selecting eligible SKUs from {STATS_TABLE} "
+            f"({min_span_days}+ days span, {MIN_TOTAL_UNITS}+ units)..."
+        )
+        with stage(profile, "select_skus") as record:
+            series_stats = storage["series_stats"]()
+            eligible_skus = select_eligible_skus(
+                series_stats, min_span_days=min_span_days, min_n_days=min_n_days
+            )
+            record["rows"] = len(series_stats)
+        log.info(f"   -> {len(eligible_skus)} SKUs eligible out of {len(series_stats)} total")
+
+        log.info(f"[2/7] Loading history for {len(eligible_skus)} eligible SKUs...")
+        with stage(profile, "load_history") as record:
+            df_raw = storage["load_history"](eligible_skus)
+            record["rows"] = len(df_raw)
+
+        log.info(f"[3/7] Cleaning & preparing data (gap fill: {gap_fill})...")
+        with stage(profile, "preprocess") as record:
+            prepared = preprocess(df_raw, fill=gap_fill)
+            df, sku_stats = prepared["history"], prepared["stats"]
+            record["rows"] = len(df)
+        log.info(
+            f"   -> {len(df):,} SKU-days after cleaning, aggregation and gap fill "
+            f"({int(sku_stats['n_filled'].sum()):,} days filled)"
+        )
+
+        log.info(
+            f"[4/7] Building dynamic holiday calendar ({HOLIDAY_YEARS[0]}–{HOLIDAY_YEARS[1]})..."
+        )
+        with stage(profile, "holidays") as record:
+            holidays_df = build_holidays()
+            record["rows"] = len(holidays_df)
+        log.info(f"   -> {len(holidays_df)} holiday occurrences added")
+
+        todo_skus = eligible_skus
+        if resume:
+            done = completed_skus(store)
+            todo_skus = [sku for sku in eligible_skus if sku not in done]
+            log.info(
+                f"   -> Resuming run {run_id}: {len(eligible_skus) - len(todo_skus)} SKUs "
+                f"checkpointed, {len(todo_skus)} left to fit"
+            )
+
+        sku_fit_seconds = []
+
+        def checkpoint(combined, metrics):
+            sku_fit_seconds.append(metrics.get("fit_seconds", 0.0))
+            save_sku(store, metrics["sku"], combined, metrics)
+
+        with stage(profile, "fit_predict") as record:
+            record.update(rows=int(df["sku"].isin(todo_skus).sum()), skus=len(todo_skus))
+            prophet_skus = todo_skus if model == "prophet" else []
+            failed_skus = []
+            if model == "lite":
+                from vitamarkets import prophet_lite
+
+                log.info(f"[5/7] Forecasting {len(todo_skus)} SKUs with the batched lite engine...")
+                results, failed_skus = prophet_lite.forecast_batch(
+                    df[df["sku"].isin(todo_skus)], holidays_df, run_id
+                )
+                for combined, metrics in results:
+                    checkpoint(combined, metrics)
+            elif model == "pooled":
+                from vitamarkets import pooled
+
+                log.info(f"[5/7] Forecasting {len(todo_skus)} SKUs with pooled group fits...")
+                results, failed_skus = pooled.forecast_pooled(
+                    df[df["sku"].isin(todo_skus)],
+                    storage["sku_groups"](),
+                    holidays_df,
+                    run_id,
+                    fit_timeout=fit_timeout,
+                )
+                for combined, metrics in results:
+                    checkpoint(combined, metrics)
+            elif model == "tournament":
+                from vitamarkets import tournament
+
+                log.info(
+                    f"[5/7] Scoring cheap models for {len(todo_skus)} SKUs "
+                    f"(Prophet only above {max_cheap_mape:.0f}% holdout MAPE)..."
+                )
+                cheap_started = time.perf_counter()
+                results, prophet_skus, scores, failed_skus = tournament.forecast_cheap(
+                    df[df["sku"].isin(todo_skus)], holidays_df, run_id, max_cheap_mape
+                )
+                for combined, metrics in results:
+                    checkpoint(combined, metrics)
+                cheap_seconds = time.perf_counter() - cheap_started
+                log.info(
+                    f"   -> {len(results)} SKUs won by cheap models in {cheap_seconds:.1f}s, "
+                    f"{len(prophet_skus)} left for Prophet"
+                )
+
+            if prophet_skus:
+                if weekly_skus == "all":
+                    weekly_skus = prophet_skus
+                weekly_skus = set(weekly_skus) & set(prophet_skus)
+                layout = resolve_layout(len(prophet_skus), n_jobs, threads_per_worker, executor)
+                log.info(
+                    f"[5/7] Forecasting {len(prophet_skus)} SKUs with Prophet in parallel "
+                    f"({layout['n_workers']} workers x {layout['threads_per_worker']} threads as "
+                    f"{executor}, {len(weekly_skus)} at weekly grain)..."
+                )
+                prophet_started = time.perf_counter()
+                _, prophet_metrics, prophet_failed = forecast_all(
+                    df,
+                    prophet_skus,
+                    holidays_df,
+                    run_id,
+                    n_jobs=layout["n_workers"],
+                    threads_per_worker=layout["threads_per_worker"],
+                    fit_timeout=fit_timeout,
+                    past_fit_seconds=load_past_fit_seconds(),
+                    on_result=checkpoint,
+                    weekly_skus=weekly_skus,
+                    executor=executor,
+                    # Reproducible intervals, so unchanged SKUs hash the same
+                    predict_seed=PREDICT_SEED if delta_publish else None,
+                )
+                failed_skus += prophet_failed
+                log_gil_share(prophet_metrics, time.perf_counter() - prophet_started)
+
+            if model == "tournament" and len(scores):
+                scores.to_csv(os.path.join(output_dir, "tournament_scores.csv"))
+                report = tournament.summarize(
+                    scores,
+                    cheap_seconds,
+                    [m["fit_seconds"] for m in prophet_metrics] if prophet_skus else [],
+                    n_workers=layout["n_workers"] if prophet_skus else 1,
+                    past_fit_seconds=load_past_fit_seconds(),
+                )
+                log.info(
+                    f"   -> Tournament: {report['skipped_prophet']}/{report['skus']} SKUs "
+                    f"({report['skipped_share_pct']}%) skipped Prophet {report['winners']}, "
+                    f"est. {report['est_wall_seconds_saved']:.0f}s wall time saved"
+                )
+            if failed_skus:
+                log.warning(f"{len(failed_skus)} SKUs failed:")
+                for fail in failed_skus[:5]:
+                    log.warning(f"  {fail}")
+            # Worker-side fit + predict seconds summed over SKUs (wall time is parallel)
+            record["sku_fit_seconds"] = round(float(np.nansum(sku_fit_seconds)), 3)
+
+        log.info("[6/7] Assembling run from checkpoints and exporting...")
+        if not completed_skus(store):
+            log.error("No forecasts generated. Check logs above.")
+            log.info("=" * 70)
+            return None, None
+
+        with stage(profile, "assemble_export") as record:
+            all_forecasts, metrics_df = load_run(store)
+            save_fit_seconds(metrics_df)
+
+            # Save locally
+            all_forecasts.to_csv(os.path.join(output_dir, "prophet_forecasts.csv"), index=False)
+            metrics_df.to_csv(os.path.join(output_dir, "forecast_error_metrics.csv"), index=False)
+            record["rows"] = len(all_forecasts)
+
+        # Save to the storage backend (versioned, fixed or delta-published tables)
+        log.info(f"[7/7] Writing results to {backend}...")
+        with stage(profile, "db_write") as record:
+            rows_written = len(all_forecasts)
+            if delta_publish:
+                from vitamarkets.delta_publish import write_delta_tables
+
+                table_forecasts, table_metrics, report = write_delta_tables(
+                    engine, all_forecasts, metrics_df, run_id, delta_tolerance
+                )
+                rows_written = report["rows_written"]
+                record["rows_skipped"] = report["rows_skipped"]
+            else:
+                table_forecasts, table_metrics = storage["write_run"](
+                    all_forecasts, metrics_df, run_id, use_versioned_tables
+                )
+            storage["publish_views"](table_forecasts, table_metrics)
+            n_telemetry = write_telemetry(engine, metrics_df, run_id) if engine else 0
+            record["rows"] = rows_written + len(metrics_df) + n_telemetry
+        if engine:
+            log.info(
+                f"   -> Fit telemetry for {n_telemetry} SKUs saved to public.{TELEMETRY_TABLE}: "
+                f"{describe(metrics_df)}"
+            )
+
+        log_run_summary(metrics_df, len(eligible_skus), output_dir)
+
+        with stage(profile, "recommend") as record:
+            positions = load_positions(engine) if engine else empty_positions()
+            shares = load_demand_shares(engine, recommend_by) if engine else None
+            recs = recommend(all_forecasts, metrics_df, positions, by=recommend_by, shares=shares)
+            if engine:
+                write_recommendations(engine, recs, run_id)
+            record["rows"] = len(recs)
+        log_recommendations(recs)
+
+        # Save recommendations to CSV
+        recs.to_csv(os.path.join(output_dir, "purchase_recommendations.csv"), index=False)
+        saved_to = f"public.{RECOMMENDATIONS_TABLE} and " if engine else ""
+        log.info(
+            f"\n📊 Purchase recommendations saved: {saved_to}"
+            f"{output_dir}/purchase_recommendations.csv"
+        )
+        if simulate_samples:
+            with stage(profile, "simulate") as record:
+                stats = log_simulation(
+                    all_forecasts, positions, recommend_by, shares, simulate_samples, engine, run_id
+                )
+                record.update(rows=stats["targets"], samples=stats["samples"])
+        log.info("Next: Refresh Power BI -> Check 'Forecast vs Actuals' dashboard")
+
+        log_power_bi_contract()
+        return all_forecasts, metrics_df
+    finally:
+        if profile is not None:
+            log_profile(profile)
+
+
+def main(argv=None):
+    """CLI entrypoint for forecast_prophet_v2.py."""
+    parser = argparse.ArgumentParser(description="Vita Markets forecasting pipeline v2")
+    parser.add_argument(
+        "--n-jobs", type=int, default=None, help="Worker count (default: calibrated/planned)"
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=None,
+        help="BLAS/OpenMP/Stan threads per worker (default: calibrated, else 1)",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Continue a crashed run: skip checkpointed SKUs, then publish the whole run",
+    )
+    parser.add_argument(
+        "--fit-timeout",
+        type=float,
+        default=DEFAULT_FIT_TIMEOUT,
+        help="Seconds of Prophet fitting per SKU, shared by its holdout and full fits and "
+        "the retry; once used up the SKU falls back to seasonal naive. A SKU can take this "
+        f"plus one predict (default: {DEFAULT_FIT_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--model",
+        choices=["prophet", "lite", "pooled", "tournament"],
+        default="prophet",
+        help="Forecast engine: per-SKU Prophet, batched linear lite, pooled Stan groups, "
+        "or a cheap-first tournament that fits Prophet only where needed",
+    )
+    parser.add_argument(
+        "--max-cheap-mape",
+        type=float,
+        default=None,
+        help="Tournament: holdout MAPE %% a cheap model must reach to skip Prophet (default: 20)",
+    )
+    parser.add_argument(
+        "--weekly-skus",
+        default="",
+        help="Comma-separated SKUs (or 'all') whose Prophet fits run at weekly grain "
+        "and are split back to days",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=["processes", "threads"],
+        default="processes",
+        help="Run Prophet fits in worker processes (loky) or on a thread pool in this "
+        "process (cmdstan does the heavy work in subprocesses either way)",
+    )
+    parser.add_argument(
+        "--gap-fill",
+        choices=FILL_POLICIES,
+        default=GAP_FILL_POLICY,
+        help=f"How missing calendar days are filled (default: {GAP_FILL_POLICY})",
+    )
+    parser.add_argument(
+        "--recommend-by",
+        default="",
+        help=f"Comma-separated {'/'.join(LOCATION_COLUMNS)} to split purchase "
+        "recommendations by (default: one per SKU)",
+    )
+    parser.add_argument(
+        "--simulate",
+        type=int,
+        default=0,
+        metavar="SAMPLES",
+        help="Also simulate this many bootstrapped demand paths per position and report "
+        "reorder points at several service levels (default: off)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every stage (wall/CPU, peak memory, rows) into run_profile.json in the "
+        "run folder",
+    )
+    parser.add_argument(
+        "--pstats",
+        action="store_true",
+        help="With --profile, also dump cProfile stats per stage to pstats/<stage>.pstats",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="postgres",
+        help="Read history from and publish the run to PostgreSQL, or to Parquet files "
+        "queried with embedded DuckDB (no database server; see vitamarkets.storage)",
+    )
+    parser.add_argument(
+        "--store",
+        default=None,
+        metavar="DIR",
+        help="Parquet directory for --backend duckdb (default: local_store/)",
+    )
+    parser.add_argument(
+        "--delta-publish",
+        action="store_true",
+        help="Publish into fixed tables, rewriting only SKUs whose forecast changed "
+        "(PostgreSQL; see vitamarkets.delta_publish). Seeds Prophet's interval sampling "
+        "so refits reproduce; with --executor threads the seeded predicts run one at a "
+        "time",
+    )
+    parser.add_argument(
+        "--delta-tolerance",
+        type=float,
+        default=DELTA_TOLERANCE,
+        help="With --delta-publish, the resolution forecast values are compared at "
+        f"(default: {DELTA_TOLERANCE})",
+    )
+    args = parser.parse_args(argv)
+    weekly_skus = args.weekly_skus.strip()
+    if weekly_skus != "all":
+        weekly_skus = [sku.strip() for sku in weekly_skus.split(",") if sku.strip()]
+
+    run(
+        run_id=args.resume,
+        resume=args.resume is not None,
+        n_jobs=args.n_jobs,
+        threads_per_worker=args.threads_per_worker,
+        fit_timeout=args.fit_timeout,
+        model=args.model,
+        max_cheap_mape=args.max_cheap_mape,
+        weekly_skus=weekly_skus,
+        executor=args.executor,
+        gap_fill=args.gap_fill,
+        recommend_by=[col.strip() for col in args.recommend_by.split(",") if col.strip()],
+        simulate_samples=args.simulate,
+        profile_stages=args.profile or args.pstats,
+        pstats=args.pstats,
+        backend=args.backend,
+        store_dir=args.store,
+        delta_publish=args.delta_publish,
+        delta_tolerance=args.delta_tolerance,
+    )
@@ -0,0 +1,137 @@
+"""
+Forecast accuracy metrics for many series in one grouped pass.
+
+score() takes aligned rows (y, yhat, optionally yhat_lower/yhat_upper, plus key
+columns such as sku, horizon or cutoff) for every SKU at once and reduces them per
+group with np.bincount, so the same kernel scores one SKU inside the fit loop, a whole
+panel per SKU, or a backtest per horizon step or cutoff. Only numpy and pandas are
+imported (no sklearn).
+
+    mae           mean |yhat - y|
+    rmse          sqrt(mean (yhat - y)^2)
+    mape_pct      mean |yhat - y| / y, with y = 0 counted as 1
+    wape_pct      sum |yhat - y| / sum y
+    mase          mean |yhat - y| / the SKU's naive_scale() (in-sample seasonal naive MAE)
+    bias          mean (yhat - y); positive = over-forecast
+    pinball       mean quantile loss of yhat_lower, yhat and yhat_upper, read as the
+                  (1 - width) / 2, 0.5 and (1 + width) / 2 quantiles
+    coverage_pct  share of y within [yhat_lower, yhat_upper]
+
+Definitions are documented in docs/FORECASTING_POLICIES.md (Metrics Reference).
+"""
+
+import numpy as np
+import pandas as pd
+
+METRICS = (
+    "mae",
+    "rmse",
+    "mape_pct",
+    "wape_pct",
+    "mase",
+    "bias",
+    "pinball",
+    "coverage_pct",
+)
+
+# Nominal width of the yhat_lower..yhat_upper interval (Prophet's interval_width)
+INTERVAL_WIDTH = 0.80
+
+# Seasonal period (days) of the naive forecast that scales MASE
+SEASON = 7
+
+
+def naive_scale(history, season=SEASON):
+    """
+    In-sample MAE of the seasonal naive forecast (y on the same weekday a season
+    earlier) per SKU, the MASE denominator. `history` has sku, ds, y, one row per
+    SKU-day; days whose lag is missing are skipped.
+    """
+    history = history[["sku", "ds", "y"]]
+    lagged = history.assign(ds=history["ds"] + pd.Timedelta(days=season))
+    pairs = history.merge(lagged, on=["sku", "ds"], suffixes=("", "_lag"))
+    return (pairs["y"] - pairs["y_lag"]).abs().groupby(pairs["sku"]).mean()
+
+
+def horizon_steps(ds, cutoff):
+    """Days ahead of the forecast origin (1 = the day after `cutoff`)."""
+    return (pd.to_datetime(ds) - pd.to_datetime(cutoff)).dt.days.to_numpy()
+
+
+def _pinball(y, q_pred, q):
+    diff = y - q_pred
+    return np.maximum(q * diff, (q - 1) * diff)
+
+
+def score(frame, by="sku", scale=None, interval_width=INTERVAL_WIDTH):
+    """
+    Accuracy per group of `by` columns (a name, a list, or () for one overall row).
+
+    `frame` needs y and yhat; pinball and coverage_pct also need yhat_lower and
+    yhat_upper (NaN otherwise). `scale` is naive_scale() output, a Series indexed by
+    sku (mase is NaN without it). Returns a DataFrame indexed by the groups with n and
+    the METRICS columns.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    if by:
+        keys = pd.MultiIndex.from_frame(frame[by]) if len(by) > 1 else pd.Index(frame[by[0]])
+        codes, groups = keys.factorize(sort=True)
+        groups = groups.set_names(by if len(by) > 1 else by[0])
+    else:
+        codes, groups = np.zeros(len(frame), dtype=np.intp), pd.RangeIndex(1)
+    k = len(groups)
+    n = np.bincount(codes, minlength=k).astype(float)
+
+    def mean(values):
+        return np.bincount(codes, weights=values, minlength=k) / n
+
+    def ratio(num, den):
+        return np.divide(num, den, out=np.full(k, np.nan), where=den > 0)
+
+    y = frame["y"].to_numpy(dtype=float)
+    yhat = frame["yhat"].to_numpy(dtype=float)
+    err = yhat - y
+    abs_err = np.abs(err)
+
+    sku_scale = (
+        frame["sku"].map(scale).to_numpy(dtype=float)
+        if scale is not None
+        else np.full(len(frame), np.nan)
+    )
+    scaled = np.divide(abs_err, sku_scale, out=np.full(len(frame), np.nan), where=sku_scale > 0)
+
+    out = {
+        "n": n.astype(int),
+        "mae": mean(abs_err),
+        "rmse": np.sqrt(mean(err**2)),
+        "mape_pct": mean(abs_err / np.maximum(y, 1)) * 100,
+        "wape_pct": ratio(
+            np.bincount(codes, weights=abs_err, minlength=k),
+            np.bincount(codes, weights=np.abs(y), minlength=k),
+        )
+        * 100,
+        "mase": mean(scaled),
+        "bias": mean(err),
+        "pinball": np.full(k, np.nan),
+        "coverage_pct": np.full(k, np.nan),
+    }
+    if {"yhat_lower", "yhat_upper"} <= set(frame.columns):
+        lower = frame["yhat_lower"].to_numpy(dtype=float)
+        upper = frame["yhat_upper"].to_numpy(dtype=float)
+        alpha = (1 - interval_width) / 2
+        loss = (
+            _pinball(y, lower, alpha) + _pinball(y, yhat, 0.5) + _pinball(y, upper, 1 - alpha)
+        ) / 3
+        out["pinball"] = mean(loss)
+        out["coverage_pct"] = mean((y >= lower) & (y <= upper)) * 100
+    return pd.DataFrame(out, index=groups)
+
+
+def score_one(y, yhat, lower=None, upper=None, scale=np.nan, interval_width=INTERVAL_WIDTH):
+    """score() for a single series from arrays; returns {"test_<metric>": value}."""
+    frame = pd.DataFrame({"sku": 0, "y": np.asarray(y), "yhat": np.asarray(yhat)})
+    if lower is not None and upper is not None:
+        frame["yhat_lower"] = np.asarray(lower)
+        frame["yhat_upper"] = np.asarray(upper)
+    row = score(frame, by=(), scale=pd.Series({0: scale}), interval_width=interval_width)
+    return {f"test_{name}": float(row[name].iloc[0]) for name in METRICS}
@@ -15,40 +15,46 @@ Usage:
     python -m vitamarkets.pipeline --forecast
     python -m vitamarkets.pipeline --metrics
     python -m vitamarkets.pipeline --report
+    python -m vitamarkets.pipeline --run-all --profile   # + outputs/run_profile.json
 """
 
 import argparse
-import subprocess
 import sys
+import time
 from datetime import datetime
-from pathlib import Path
 
-import numpy as np
-import pandas as pd
-from prophet import Prophet
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-from sqlalchemy import text
-
-# Add repo root to path
-ROOT = Path(__file__).parent.parent
-sys.path.insert(0, str(ROOT))
-
-from db import get_engine  # noqa: E402
-
-# Constants
-FORECAST_DAYS = 90
-TEST_DAYS = 30
-OUTPUT_DIR = ROOT / "prophet_forecasts"
-REPORTS_DIR = ROOT / "reports"
-DBT_DIR = ROOT / "vitamarkets_dbt" / "vitamarkets"
+# Heavy dependencies (pandas, numpy, prophet, sklearn, sqlalchemy, db) are imported inside
+# the stage functions that need them, so `--report` or `--help` never pays Prophet's
+# import cost. Keep module-level imports to the standard library, vitamarkets.config and
+# vitamarkets.profiling.
+from vitamarkets.config import (
+    DBT_DIR,
+    FORECAST_DAYS,
+    OUTPUT_DIR,
+    REPORTS_DIR,
+    TEST_DAYS,
+)
+from vitamarkets.profiling import stage, start_profile, summary_lines, write_profile
+
+# Modules each subcommand imports lazily. benchmarks/import_time.py budgets these.
+STAGE_IMPORTS = {
+    "etl": ["pandas", "sqlalchemy", "db"],
+    "forecast": ["pandas", "prophet", "sqlalchemy", "db"],
+    "metrics": ["numpy", "pandas", "prophet", "db"],
+    "report": ["pandas", "db"],
+}
 
 # Ensure directories exist
 OUTPUT_DIR.mkdir(exist_ok=True)
 REPORTS_DIR.mkdir(exist_ok=True)
 
 
-def run_dbt():
-    """Run dbt transformations."""
+def run_dbt(full=False, profile=None):
+    """
+    Run dbt in-process (vitamarkets.dbt_runner: only models downstream of changed SQL or
+    fresher sources, every model with full=True), then merge new mart days into
+    sku_series_stats and the KPI rollup tables.
+    """
     print("\n" + "=" * 70)
     print("STEP 1: DBT TRANSFORMATIONS")
     print("=" * 70)
@@ -58,29 +64,54 @@ def run_dbt():
         print("   Skipping dbt step")
         return
 
-    # Run dbt deps and dbt run
-    commands = ["dbt deps", "dbt run"]
-
-    for cmd in commands:
-        print(f"\n▶ Running: {cmd}")
-        result = subprocess.run(cmd, cwd=DBT_DIR, shell=True, capture_output=True, text=True)
+    # In-process dbt: cached deps, partial parsing, only changed models rebuilt
+    from vitamarkets.dbt_runner import ensure_deps, run_models
 
-        if result.returncode != 0:
-            print(f"❌ Command failed: {cmd}")
-            print(result.stderr)
-            sys.exit(1)
+    try:
+        with stage(profile, "dbt") as record:
+            ensure_deps()
+            build = run_models(full=full)
+            record["rows"] = len(build["models"])
+    except (ImportError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
 
-        print(result.stdout)
+    print(f"\n▶ dbt run ({build['select']}): {len(build['models'])} models")
+    for name, model in build["models"].items():
+        print(f"   {name:<32} {model['status']:<8} {model['seconds']:8.2f}s")
 
     print("\n✅ dbt transformations complete")
 
+    from db import get_engine
+    from vitamarkets.series_stats import refresh_series_stats
 
-def run_forecast():
+    with stage(profile, "series_stats") as record:
+        updated = refresh_series_stats(get_engine())
+        record["rows"] = updated
+    print(f"✅ sku_series_stats updated for {updated} SKUs")
+
+    from vitamarkets.rollups import refresh_rollups
+
+    with stage(profile, "kpi_rollups") as record:
+        written = refresh_rollups(get_engine(), full_refresh=full)
+        record["rows"] = sum(written.values())
+    print(f"✅ KPI rollups refreshed ({sum(written.values()):,} rows recomputed)")
+
+
+def run_forecast(profile=None):
     """Generate forecasts using Prophet."""
     print("\n" + "=" * 70)
     print("STEP 2: GENERATE FORECASTS")
     print("=" * 70)
 
+    import pandas as pd
+    from prophet import Prophet
+    from sqlalchemy import text
+
+    from db import get_engine
+    from vitamarkets.forecasting import select_eligible_skus
+    from vitamarkets.preprocessing import preprocess
+
     engine = get_engine()
 
     # Pull data from mart
@@ -90,85 +121,76 @@ def run_forecast():
     FROM mart_sales_summary
     ORDER BY sku, date
     """
-    df = pd.read_sql(query, engine)
+    with stage(profile, "mart_read") as record:
+        df = pd.read_sql(query, engine)
+        record["rows"] = len(df)
     print(f"   → Loaded {len(df):,} rows")
     print(f"   → Columns: {df.columns.tolist()}")
 
-    # Clean & prep
+    # Clean, aggregate to SKU-days, clip outliers (99th percentile)
     print("\n[2/5] Cleaning and preparing data...")
-    df = df[df["total_units_sold"] >= 0].copy()
-    df = df.dropna(subset=["total_units_sold"])
-    df = df.rename(columns={"date": "ds", "total_units_sold": "y"})
-    df["ds"] = pd.to_datetime(df["ds"])
+    with stage(profile, "preprocess") as record:
+        df = df.rename(columns={"date": "ds", "total_units_sold": "y"})
+        prepared = preprocess(df, clip_factor=1.0)
+        df, sku_stats = prepared["history"], prepared["stats"]
+        record["rows"] = len(df)
 
     # Filter eligible SKUs
     print("\n[3/5] Filtering eligible SKUs (2+ years, 500+ units)...")
-    sku_stats = (
-        df.groupby("sku")
-        .agg(
-            n_obs=("ds", "count"),
-            first_date=("ds", "min"),
-            last_date=("ds", "max"),
-            total_units=("y", "sum"),
-        )
-        .reset_index()
-    )
-    sku_stats["span_days"] = (sku_stats["last_date"] - sku_stats["first_date"]).dt.days
-    eligible_skus = sku_stats[(sku_stats["span_days"] >= 730) & (sku_stats["total_units"] > 500)][
-        "sku"
-    ].tolist()
+    eligible_skus = select_eligible_skus(sku_stats, min_n_days=0)
 
     print(f"   → {len(eligible_skus)} SKUs eligible for forecasting")
     df = df[df["sku"].isin(eligible_skus)]
-
-    # Clip outliers
-    print("\n[4/5] Clipping outliers (99th percentile)...")
-
-    def clip_outliers(sub):
-        clip_val = sub["y"].quantile(0.99)
-        sub = sub.copy()
-        sub["y"] = sub["y"].clip(upper=clip_val)
-        return sub
-
-    df = df.groupby("sku", group_keys=False, sort=False).apply(clip_outliers, include_groups=True)
+    print("\n[4/5] Outliers clipped (99th percentile)")
 
     # Train models and generate forecasts
     print("\n[5/5] Training Prophet models...")
     all_forecasts = []
+    fit_seconds = predict_seconds = 0.0
 
-    for idx, sku in enumerate(eligible_skus, 1):
-        print(f"   [{idx}/{len(eligible_skus)}] {sku}...")
+    with stage(profile, "fit_predict") as record:
+        for idx, sku in enumerate(eligible_skus, 1):
+            print(f"   [{idx}/{len(eligible_skus)}] {sku}...")
 
-        sub = df[df["sku"] == sku].sort_values("ds").reset_index(drop=True)
+            sub = df[df["sku"] == sku].sort_values("ds").reset_index(drop=True)
 
-        # Train on full data for production forecast
-        m = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=True,
-            daily_seasonality=False,
-            interval_width=0.8,
+            # Train on full data for production forecast
+            m = Prophet(
+                yearly_seasonality=True,
+                weekly_seasonality=True,
+                daily_seasonality=False,
+                interval_width=0.8,
+            )
+            started = time.perf_counter()
+            m.fit(sub[["ds", "y"]])
+            fit_seconds += time.perf_counter() - started
+
+            # Generate future forecast
+            future = m.make_future_dataframe(periods=FORECAST_DAYS)
+            started = time.perf_counter()
+            forecast = m.predict(future)
+            predict_seconds += time.perf_counter() - started
+            forecast["sku"] = sku
+            forecast["type"] = "forecast"
+            out = forecast[["ds", "yhat", "yhat_lower", "yhat_upper", "sku", "type"]]
+
+            # Actuals
+            actuals = sub[["ds", "y"]].copy()
+            actuals["sku"] = sku
+            actuals["yhat"] = actuals["y"]
+            actuals["yhat_lower"] = actuals["y"]
+            actuals["yhat_upper"] = actuals["y"]
+            actuals["type"] = "actual"
+            actuals = actuals[["ds", "yhat", "yhat_lower", "yhat_upper", "sku", "type"]]
+
+            # Combine
+            combined = pd.concat([actuals, out], ignore_index=True)
+            all_forecasts.append(combined)
+        record.update(
+            rows=len(df),
+            fit_seconds=round(fit_seconds, 3),
+            predict_seconds=round(predict_seconds, 3),
         )
-        m.fit(sub[["ds", "y"]])
-
-        # Generate future forecast
-        future = m.make_future_dataframe(periods=FORECAST_DAYS)
-        forecast = m.predict(future)
-        forecast["sku"] = sku
-        forecast["type"] = "forecast"
-        out = forecast[["ds", "yhat", "yhat_lower", "yhat_upper", "sku", "type"]]
-
-        # Actuals
-        actuals = sub[["ds", "y"]].copy()
-        actuals["sku"] = sku
-        actuals["yhat"] = actuals["y"]
-        actuals["yhat_lower"] = actuals["y"]
-        actuals["yhat_upper"] = actuals["y"]
-        actuals["type"] = "actual"
-        actuals = actuals[["ds", "yhat", "yhat_lower", "yhat_upper", "sku", "type"]]
-
-        # Combine
-        combined = pd.concat([actuals, out], ignore_index=True)
-        all_forecasts.append(combined)
 
     # Combine all forecasts
     result = pd.concat(all_forecasts, ignore_index=True)
@@ -176,30 +198,39 @@ def run_forecast():
     # Write to database
     print("\n✅ Writing forecasts to database...")
 
-    # Drop tables first (to_sql will error on views with if_exists="replace")
-    with engine.begin() as conn:
-        conn.execute(text("DROP TABLE IF EXISTS public.simple_prophet_forecast CASCADE"))
-        conn.execute(text("DROP TABLE IF EXISTS public.forecast_error_metrics CASCADE"))
+    with stage(profile, "forecast_write") as record:
+        # Drop tables first (to_sql will error on views with if_exists="replace")
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS public.simple_prophet_forecast CASCADE"))
+            conn.execute(text("DROP TABLE IF EXISTS public.forecast_error_metrics CASCADE"))
 
-    result.to_sql(
-        "simple_prophet_forecast", engine, schema="public", if_exists="replace", index=False
-    )
+        result.to_sql(
+            "simple_prophet_forecast", engine, schema="public", if_exists="replace", index=False
+        )
 
-    # Also save to CSV
-    csv_path = OUTPUT_DIR / "simple_prophet_forecast.csv"
-    result.to_csv(csv_path, index=False)
+        # Also save to CSV
+        csv_path = OUTPUT_DIR / "simple_prophet_forecast.csv"
+        result.to_csv(csv_path, index=False)
+        record["rows"] = len(result)
     print(f"   → Saved to {csv_path}")
 
     print(f"\n✅ Forecasts generated for {len(eligible_skus)} SKUs")
     return eligible_skus
 
 
-def compute_metrics(eligible_skus=None):
+def compute_metrics(eligible_skus=None, profile=None):
     """Compute evaluation metrics on holdout test set."""
     print("\n" + "=" * 70)
     print("STEP 3: COMPUTE EVALUATION METRICS")
     print("=" * 70)
 
+    import pandas as pd
+    from prophet import Prophet
+
+    from db import get_engine
+    from vitamarkets.metrics import METRICS, horizon_steps, naive_scale, score
+    from vitamarkets.preprocessing import aggregate_sku_days, clean
+
     engine = get_engine()
 
     # Pull data
@@ -209,73 +240,94 @@ def compute_metrics(eligible_skus=None):
     FROM mart_sales_summary
     ORDER BY sku, date
     """
-    df = pd.read_sql(query, engine)
-    df = df.rename(columns={"date": "ds", "total_units_sold": "y"})
-    df["ds"] = pd.to_datetime(df["ds"])
+    with stage(profile, "metrics_read") as record:
+        df = pd.read_sql(query, engine)
+        df = df.rename(columns={"date": "ds", "total_units_sold": "y"})
+        # One row per SKU-day, unclipped: the holdout is scored against actual units
+        df = aggregate_sku_days(clean(df))
+        record["rows"] = len(df)
 
     if eligible_skus:
         df = df[df["sku"].isin(eligible_skus)]
 
-    # Compute metrics per SKU
+    # Fit per SKU, then score every holdout row in one grouped pass
     print("\n[2/3] Computing metrics on 30-day holdout test set...")
-    error_metrics = []
-
-    for sku in df["sku"].unique():
-        sub = df[df["sku"] == sku].sort_values("ds").reset_index(drop=True)
-
-        # Train/test split
-        split_date = sub["ds"].max() - pd.Timedelta(days=TEST_DAYS)
-        train = sub[sub["ds"] <= split_date]
-        test = sub[sub["ds"] > split_date]
-
-        if len(test) < 10:
-            continue
-
-        # Fit on train
-        m = Prophet(yearly_seasonality=True, weekly_seasonality=True, daily_seasonality=False)
-        m.fit(train[["ds", "y"]])
-
-        # Predict on test
-        test_forecast = m.predict(test[["ds"]])
-        y_true = test["y"].values
-        y_pred = test_forecast["yhat"].values
-
-        # Metrics
-        mae = mean_absolute_error(y_true, y_pred)
-        rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-        mape = np.mean(np.abs((y_true - y_pred) / np.maximum(y_true, 1))) * 100
-        bias = np.mean(y_pred - y_true)
-
-        # Coverage
-        within_interval = (y_true >= test_forecast["yhat_lower"].values) & (
-            y_true <= test_forecast["yhat_upper"].values
-        )
-        coverage = within_interval.mean() * 100
-
-        error_metrics.append(
-            {
-                "sku": sku,
-                "test_mae": mae,
-                "test_rmse": rmse,
-                "test_mape_pct": mape,
-                "test_bias": bias,
-                "test_coverage_pct": coverage,
-                "n_train": len(train),
-                "n_test": len(test),
-            }
+    holdouts, trains = [], []
+    fit_seconds = predict_seconds = 0.0
+
+    with stage(profile, "metrics_fit_predict") as record:
+        for sku in df["sku"].unique():
+            sub = df[df["sku"] == sku].sort_values("ds").reset_index(drop=True)
+
+            # Train/test split
+            split_date = sub["ds"].max() - pd.Timedelta(days=TEST_DAYS)
+            train = sub[sub["ds"] <= split_date]
+            test = sub[sub["ds"] > split_date]
+
+            if len(test) < 10:
+                continue
+
+            # Fit on train
+            m = Prophet(yearly_seasonality=True, weekly_seasonality=True, daily_seasonality=False)
+            started = time.perf_counter()
+            m.fit(train[["ds", "y"]])
+            fit_seconds += time.perf_counter() - started
+
+            # Predict on test
+            started = time.perf_counter()
+            test_forecast = m.predict(test[["ds"]])
+            predict_seconds += time.perf_counter() - started
+            holdouts.append(
+                test[["sku", "ds", "y"]].assign(
+                    horizon=horizon_steps(test["ds"], split_date),
+                    yhat=test_forecast["yhat"].to_numpy(),
+                    yhat_lower=test_forecast["yhat_lower"].to_numpy(),
+                    yhat_upper=test_forecast["yhat_upper"].to_numpy(),
+                )
+            )
+            trains.append(train)
+
+        if holdouts:
+            holdout = pd.concat(holdouts, ignore_index=True)
+            train = pd.concat(trains, ignore_index=True)
+            scale = naive_scale(train)
+            metrics_df = (
+                score(holdout, scale=scale)[list(METRICS)]
+                .add_prefix("test_")
+                .assign(
+                    n_train=train.groupby("sku").size(),
+                    n_test=holdout.groupby("sku").size(),
+                )
+                .rename_axis("sku")
+                .reset_index()
+            )
+        else:
+            # No SKU has enough test days
+            metrics_df = pd.DataFrame(
+                columns=["sku", *(f"test_{name}" for name in METRICS), "n_train", "n_test"]
+            )
+        record.update(
+            rows=len(df),
+            fit_seconds=round(fit_seconds, 3),
+            predict_seconds=round(predict_seconds, 3),
         )
 
-    metrics_df = pd.DataFrame(error_metrics)
+    # Accuracy by days ahead of the split, across SKUs
+    if holdouts:
+        by_horizon = score(holdout, by="horizon", scale=scale)
+        by_horizon.to_csv(OUTPUT_DIR / "forecast_error_by_horizon.csv")
 
     # Write to database
     print("\n[3/3] Writing metrics to database...")
-    metrics_df.to_sql(
-        "forecast_error_metrics", engine, schema="public", if_exists="replace", index=False
-    )
+    with stage(profile, "metrics_write") as record:
+        metrics_df.to_sql(
+            "forecast_error_metrics", engine, schema="public", if_exists="replace", index=False
+        )
 
-    # Save to CSV
-    csv_path = OUTPUT_DIR / "forecast_error_metrics.csv"
-    metrics_df.to_csv(csv_path, index=False)
+        # Save to CSV
+        csv_path = OUTPUT_DIR / "forecast_error_metrics.csv"
+        metrics_df.to_csv(csv_path, index=False)
+        record["rows"] = len(metrics_df)
     print(f"   → Saved to {csv_path}")
 
     print(f"\n✅ Metrics computed for {len(metrics_df)} SKUs")
@@ -302,35 +354,37 @@ def generate_report(metrics_df):
         f.write(f"- **SKUs Evaluated:** {len(metrics_df)}\n\n")
 
         # Metrics summary
+        summary = [
+            ("MAE", "test_mae", ".2f"),
+            ("RMSE", "test_rmse", ".2f"),
+            ("MAPE (%)", "test_mape_pct", ".1f"),
+            ("WAPE (%)", "test_wape_pct", ".1f"),
+            ("MASE", "test_mase", ".2f"),
+            ("Bias", "test_bias", ".2f"),
+            ("Pinball", "test_pinball", ".2f"),
+            ("Coverage (%)", "test_coverage_pct", ".1f"),
+        ]
+        summary = [row for row in summary if row[1] in metrics_df.columns]
+        stats = metrics_df[[col for _, col, _ in summary]].agg(["median", "mean", "min", "max"])
         f.write("## Metrics Summary\n\n")
         f.write("| Metric | Median | Mean | Min | Max |\n")
         f.write("|--------|--------|------|-----|-----|\n")
-        f.write(
-            f"| MAE | {metrics_df['test_mae'].median():.2f} | {metrics_df['test_mae'].mean():.2f} | {metrics_df['test_mae'].min():.2f} | {metrics_df['test_mae'].max():.2f} |\n"
-        )
-        f.write(
-            f"| RMSE | {metrics_df['test_rmse'].median():.2f} | {metrics_df['test_rmse'].mean():.2f} | {metrics_df['test_rmse'].min():.2f} | {metrics_df['test_rmse'].max():.2f} |\n"
-        )
-        f.write(
-            f"| MAPE (%) | {metrics_df['test_mape_pct'].median():.1f} | {metrics_df['test_mape_pct'].mean():.1f} | {metrics_df['test_mape_pct'].min():.1f} | {metrics_df['test_mape_pct'].max():.1f} |\n"
-        )
-        f.write(
-            f"| Bias | {metrics_df['test_bias'].median():.2f} | {metrics_df['test_bias'].mean():.2f} | {metrics_df['test_bias'].min():.2f} | {metrics_df['test_bias'].max():.2f} |\n"
-        )
-        f.write(
-            f"| Coverage (%) | {metrics_df['test_coverage_pct'].median():.1f} | {metrics_df['test_coverage_pct'].mean():.1f} | {metrics_df['test_coverage_pct'].min():.1f} | {metrics_df['test_coverage_pct'].max():.1f} |\n\n"
-        )
+        for label, col, fmt in summary:
+            f.write(f"| {label} | " + " | ".join(format(v, fmt) for v in stats[col]) + " |\n")
+        f.write("\n")
 
         # Per-SKU details
         f.write("## Per-SKU Performance\n\n")
         f.write("| SKU | MAPE (%) | MAE | RMSE | Bias | Coverage (%) |\n")
         f.write("|-----|----------|-----|------|------|-------------|\n")
 
-        for _, row in metrics_df.sort_values("test_mape_pct").iterrows():
-            f.write(
-                f"| {row['sku']} | {row['test_mape_pct']:.1f} | {row['test_mae']:.1f} | {row['test_rmse']:.1f} | {row['test_bias']:.1f} | {row['test_coverage_pct']:.1f} |\n"
-            )
-
+        per_sku = metrics_df.sort_values("test_mape_pct")
+        cells = [per_sku["sku"].astype(str)] + [
+            per_sku[col].map("{:.1f}".format)
+            for col in ["test_mape_pct", "test_mae", "test_rmse", "test_bias", "test_coverage_pct"]
+        ]
+        rows = cells[0].str.cat(cells[1:], sep=" | ")
+        f.write("".join("| " + rows + " |\n"))
         f.write("\n---\n\n")
 
         # Interpretation
@@ -371,6 +425,14 @@ def generate_report(metrics_df):
     print(f"\n✅ Report generated: {report_path}")
 
 
+def print_profile(profile):
+    """Write run_profile.json next to the CSV outputs and print the per-stage table."""
+    path = write_profile(profile)
+    print(f"\n⏱  Run profile saved: {path}")
+    for line in summary_lines(profile):
+        print(f"   {line}")
+
+
 def main():
     """Main CLI entrypoint."""
     parser = argparse.ArgumentParser(
@@ -383,6 +445,22 @@ def main():
     parser.add_argument("--forecast", action="store_true", help="Run forecasting only")
     parser.add_argument("--metrics", action="store_true", help="Compute metrics only")
     parser.add_argument("--report", action="store_true", help="Generate report only")
+    parser.add_argument(
+        "--full-dbt",
+        action="store_true",
+        help="Rebuild every dbt model, not only those downstream of changes",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every stage (wall/CPU, peak memory, rows) into run_profile.json next to "
+        "the CSV outputs",
+    )
+    parser.add_argument(
+        "--pstats",
+        action="store_true",
+        help="With --profile, also dump cProfile stats per stage to pstats/<stage>.pstats",
+    )
 
     args = parser.parse_args()
 
@@ -394,24 +472,36 @@ def main():
     print("VITA MARKETS ANALYTICS PIPELINE")
     print("=" * 70)
 
+    profile = None
+    if args.profile or args.pstats:
+        profile = start_profile(
+            OUTPUT_DIR, "vitamarkets.pipeline " + " ".join(sys.argv[1:]), args.pstats
+        )
+
     try:
         if args.run_all or args.etl:
-            run_dbt()
+            run_dbt(full=args.full_dbt, profile=profile)
 
         eligible_skus = None
         if args.run_all or args.forecast:
-            eligible_skus = run_forecast()
+            eligible_skus = run_forecast(profile)
 
         metrics_df = None
         if args.run_all or args.metrics:
-            metrics_df = compute_metrics(eligible_skus)
+            metrics_df = compute_metrics(eligible_skus, profile)
 
         if args.run_all or args.report:
             if metrics_df is None:
                 # Load from database
+                import pandas as pd
+
+                from db import get_engine
+
                 engine = get_engine()
                 metrics_df = pd.read_sql("SELECT * FROM forecast_error_metrics", engine)
-            generate_report(metrics_df)
+            with stage(profile, "report") as record:
+                generate_report(metrics_df)
+                record["rows"] = len(metrics_df)
 
         print("\n" + "=" * 70)
         print("✅ PIPELINE COMPLETE")
@@ -430,6 +520,9 @@ def main():
 
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if profile is not None:
+            print_profile(profile)
 
 
 if __name__ == "__main__":
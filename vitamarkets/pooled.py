@@ -0,0 +1,248 @@
+"""
+Pooled multi-SKU fitting: one Stan program per group of related SKUs.
+
+Per-SKU Prophet means one cmdstan process per SKU (twice, with the holdout fit) and no
+sharing between similar SKUs. Here SKUs are grouped by category (chunks of at most
+MAX_GROUP_SIZE) and each group is fitted in a single optimization of
+stan/pooled_prophet.stan: per-SKU trends, promo effects and noise, with yearly/weekly
+seasonality and holiday effects partially pooled around a group mean. Short series
+borrow the group's seasonal shape, so the eligibility filter is relaxed
+(POOLED_MIN_SPAN_DAYS / POOLED_MIN_N_DAYS).
+
+Features, SKU x day panel and output format are shared with vitamarkets.prophet_lite;
+metrics rows carry fit_status "pooled". Select with `forecast_prophet_v2.py --model
+pooled`. Needs a working CmdStan installation (cmdstanpy.install_cmdstan()); the model
+is compiled on first use.
+"""
+
+import logging
+import time
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+
+from vitamarkets.config import FORECAST_DAYS, TEST_DAYS
+from vitamarkets.prophet_lite import INTERVAL_WIDTH, assemble_results, feature_blocks, prepare_panel
+
+log = logging.getLogger(__name__)
+
+STAN_FILE = Path(__file__).parent / "stan" / "pooled_prophet.stan"
+
+MAX_GROUP_SIZE = 50
+
+# Minimum rows per SKU for pooled fits (per-SKU Prophet needs 365)
+POOLED_MIN_ROWS = 120
+
+# Prior scales, as in the v2 Prophet configuration
+CHANGEPOINT_PRIOR_SCALE = 0.05
+SEASONALITY_PRIOR_SCALE = 10.0
+HOLIDAY_PRIOR_SCALE = 10.0
+
+SKU_GROUPS_QUERY = """
+SELECT sku, MIN(category) AS category
+FROM mart_sales_summary
+GROUP BY sku
+"""
+
+
+def load_model():
+    """Compile (first use only) and return the pooled CmdStanModel."""
+    from cmdstanpy import CmdStanModel
+
+    return CmdStanModel(stan_file=str(STAN_FILE))
+
+
+def load_sku_groups(engine):
+    """{sku: category} from the mart."""
+    import pandas as pd
+
+    groups = pd.read_sql(SKU_GROUPS_QUERY, engine)
+    return dict(zip(groups["sku"], groups["category"]))
+
+
+def split_groups(skus, sku_groups, max_group_size=MAX_GROUP_SIZE):
+    """
+    {group_name: [sku, ...]} with at most `max_group_size` SKUs per group.
+
+    SKUs missing from `sku_groups` go to "ungrouped"; large groups are split into
+    "<name> #1", "<name> #2", ... chunks of similar size.
+    """
+    by_group = {}
+    for sku in sorted(skus):
+        by_group.setdefault(sku_groups.get(sku) or "ungrouped", []).append(sku)
+
+    groups = {}
+    for name, members in sorted(by_group.items()):
+        n_chunks = -(-len(members) // max_group_size)
+        if n_chunks == 1:
+            groups[name] = members
+            continue
+        for i in range(n_chunks):
+            groups[f"{name} #{i + 1}"] = members[i::n_chunks]
+    return groups
+
+
+def stan_data(features, Y, Z, mask):
+    """
+    Data dict for one group fit.
+
+    `features` is feature_blocks() for the calendar; Y, Z, mask are calendar x SKU
+    matrices for the group's SKUs. Only days up to the group's last fitted day are
+    passed. Returns (data, scale) where scale is each SKU's max observed value.
+    """
+    last_row = int(np.flatnonzero(mask.any(axis=1)).max()) + 1
+    scale = np.nanmax(np.where(mask, Y, np.nan), axis=0)
+    scale = np.where(scale > 0, scale, 1.0)
+
+    obs_t, obs_k = np.nonzero(mask[:last_row])
+    return {
+        "T": last_row,
+        "K": Y.shape[1],
+        "S": features["changepoint"].shape[1],
+        "F": features["seasonality"].shape[1],
+        "H": features["holiday"].shape[1],
+        "N": len(obs_t),
+        "t": features["trend"][:last_row, 0],
+        "hinge": features["changepoint"][:last_row],
+        "X_season": features["seasonality"][:last_row],
+        "X_holiday": features["holiday"][:last_row],
+        "promo": Z[:last_row],
+        "obs_t": obs_t + 1,
+        "obs_k": obs_k + 1,
+        "y": Y[obs_t, obs_k] / scale[obs_k],
+        "changepoint_scale": CHANGEPOINT_PRIOR_SCALE,
+        "seasonality_scale": SEASONALITY_PRIOR_SCALE,
+        "holiday_scale": HOLIDAY_PRIOR_SCALE,
+    }, scale
+
+
+def initial_values(data):
+    """Start at each SKU's mean level with flat trend and no effects."""
+    K = data["K"]
+    level = np.bincount(data["obs_k"] - 1, weights=data["y"], minlength=K) / np.maximum(
+        np.bincount(data["obs_k"] - 1, minlength=K), 1
+    )
+    return {
+        "level": level,
+        "slope": np.zeros(K),
+        "delta": np.zeros((data["S"], K)),
+        "season_mu": np.zeros(data["F"]),
+        "season_tau": 0.1,
+        "season_raw": np.zeros((data["F"], K)),
+        "holiday_mu": np.zeros(data["H"]),
+        "holiday_tau": 0.1,
+        "holiday_raw": np.zeros((data["H"], K)),
+        "promo_beta": np.zeros(K),
+        "sigma": np.full(K, 0.5),
+    }
+
+
+def predict(params, features, Z, scale, interval_width=INTERVAL_WIDTH):
+    """
+    (yhat, lower, upper) on the full calendar from optimized parameters.
+
+    Intervals are yhat +/- z * sigma (the fitted per-SKU noise), clipped at zero.
+    """
+    trend = (
+        params["level"][None, :]
+        + features["trend"] * params["slope"][None, :]
+        + features["changepoint"] @ params["delta"]
+    )
+    effect = (
+        features["seasonality"] @ params["season_beta"]
+        + features["holiday"] @ params["holiday_beta"]
+        + Z * params["promo_beta"][None, :]
+    )
+    yhat = trend * (1 + effect) * scale
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+    half = z * params["sigma"][None, :] * scale
+    return yhat.clip(min=0), (yhat - half).clip(min=0), (yhat + half).clip(min=0)
+
+
+def fit_group(model, features, Y, Z, mask, fit_kwargs=None):
+    """One Stan optimization for a group; returns (yhat, lower, upper) on the calendar."""
+    data, scale = stan_data(features, Y, Z, mask)
+    fit = model.optimize(data=data, inits=initial_values(data), **(fit_kwargs or {}))
+    # cmdstanpy returns vectors/matrices in their declared shapes
+    params = {name: np.asarray(value) for name, value in fit.stan_variables().items()}
+    return predict(params, features, Z, scale)
+
+
+def forecast_pooled(
+    df,
+    sku_groups,
+    holidays_df,
+    run_id,
+    periods=FORECAST_DAYS,
+    test_days=TEST_DAYS,
+    max_group_size=MAX_GROUP_SIZE,
+    fit_timeout=None,
+):
+    """
+    Forecast every SKU in `df` (ds, sku, y, is_promo) with one pooled fit per group.
+
+    Each group is optimized twice, on the holdout training window and on the full
+    history. `fit_timeout` is a per-SKU budget; a group gets it times its size.
+    Returns (results, failed) like prophet_lite.forecast_batch. SKUs of a group whose
+    fit fails are reported in `failed` and get a fit_status "failed" metrics row (no
+    forecast rows) in `results`, as forecast_sku records them.
+    """
+    from vitamarkets.forecasting import failed_metrics
+
+    started = time.perf_counter()
+    panel = prepare_panel(df, periods, test_days, min_rows=POOLED_MIN_ROWS)
+    failed = panel["failed"]
+    skus = panel["skus"]
+    if not len(skus):
+        return [], failed
+
+    model = load_model()
+    features = feature_blocks(panel["dates"], panel["history_end"], holidays_df)
+    shape = panel["Y"].shape
+    forecast = tuple(np.full(shape, np.nan) for _ in range(3))
+    holdout = tuple(np.full(shape, np.nan) for _ in range(3))
+
+    skipped = []
+    group_failures = []
+    n_test = panel["test"].groupby("sku").size()
+    n_train = panel["df"].groupby("sku").size() - n_test
+    groups = split_groups(skus, sku_groups, max_group_size)
+    for i, (name, members) in enumerate(groups.items(), 1):
+        cols = skus.get_indexer(members)
+        Y, Z = panel["Y"][:, cols], panel["Z"][:, cols]
+        fit_kwargs = {"algorithm": "LBFGS"}
+        if fit_timeout:
+            fit_kwargs["timeout"] = fit_timeout * len(cols)
+        group_started, group_cpu_started = time.perf_counter(), time.thread_time()
+        try:
+            for target, mask in ((holdout, panel["train_mask"]), (forecast, panel["observed"])):
+                fitted = fit_group(model, features, Y, Z, mask[:, cols], fit_kwargs)
+                for out, values in zip(target, fitted):
+                    out[:, cols] = values
+        except Exception as e:
+            skipped += members
+            failed += [f"Pooled fit failed for {sku} (group {name}): {e}" for sku in members]
+            for sku in members:
+                metrics = failed_metrics(
+                    sku,
+                    run_id,
+                    int(n_train[sku]),
+                    int(n_test[sku]),
+                    group_started,
+                    group_cpu_started,
+                    str(e),
+                )
+                # Already reported in `failed`; metrics rows carry no error column
+                metrics.pop("error")
+                group_failures.append((None, metrics))
+            continue
+        log.info(
+            f"   -> [{i}/{len(groups)}] {name}: {len(cols)} SKUs in "
+            f"{time.perf_counter() - group_started:.1f}s"
+        )
+
+    results = assemble_results(
+        panel, forecast, holdout, run_id, "pooled", time.perf_counter() - started, skip=skipped
+    )
+    return results + group_failures, failed
@@ -0,0 +1,141 @@
+"""
+Preprocessing shared by every forecasting entry point.
+
+    clean -> SKU-day aggregation -> eligibility stats -> gap fill -> outlier clip
+
+Every step is a vectorized groupby aggregation/transform over the whole history, with
+no per-SKU Python callbacks, so cost stays linear in rows at 10k+ SKUs. preprocess()
+returns the long history (ds, sku, y[, is_promo]; one row per SKU-day, sorted by sku
+and ds) plus one row of stats per SKU, indexed by sku:
+
+    first_date, last_date, span_days, n_days, total_units   eligibility inputs
+    n_filled                                                 calendar days added
+    clip_value                                               cap applied to y
+
+Policies are documented in docs/FORECASTING_POLICIES.md (Data Preparation).
+"""
+
+import numpy as np
+import pandas as pd
+
+from vitamarkets.config import CLIP_FACTOR, CLIP_QUANTILE, GAP_FILL_POLICY
+
+# How calendar days without a mart row are filled (within each SKU's first..last day)
+#   none         leave the gap (Prophet and the batch engines handle missing days)
+#   zero         no row means no sales
+#   ffill        repeat the previous day
+#   interpolate  linear between the surrounding days
+FILL_POLICIES = ("none", "zero", "ffill", "interpolate")
+
+NS_PER_DAY = 86_400 * 10**9
+
+
+def clean(df_raw):
+    """Drop rows with null/negative units or null dates and parse dates."""
+    df = df_raw[df_raw["y"].notna() & (df_raw["y"] >= 0) & df_raw["ds"].notna()]
+    return df.assign(ds=pd.to_datetime(df["ds"]))
+
+
+def aggregate_sku_days(df):
+    """One row per SKU-day: units summed across channel/country/segment, promo if any."""
+    agg = {"y": "sum"}
+    if "is_promo" in df.columns:
+        agg["is_promo"] = "max"
+    return df.groupby(["sku", "ds"], observed=True, sort=True).agg(agg).reset_index()
+
+
+def sku_stats(daily):
+    """Eligibility stats per SKU from a one-row-per-SKU-day frame, indexed by sku."""
+    stats = daily.groupby("sku", observed=True, sort=True).agg(
+        first_date=("ds", "min"),
+        last_date=("ds", "max"),
+        total_units=("y", "sum"),
+        n_days=("ds", "size"),
+    )
+    stats["span_days"] = (stats["last_date"] - stats["first_date"]).dt.days
+    return stats
+
+
+def fill_gaps(daily, policy=GAP_FILL_POLICY):
+    """
+    Add every missing day between each SKU's first and last row and fill it per `policy`.
+
+    `daily` must be sorted by sku then ds (as aggregate_sku_days returns it). Each SKU's
+    block starts and ends on an observed day, so ffill/interpolate over the whole
+    column never leak across SKUs.
+    """
+    if policy not in FILL_POLICIES:
+        raise ValueError(f"Unknown gap fill policy {policy!r}; choose from {FILL_POLICIES}")
+    if policy == "none" or daily.empty:
+        return daily
+
+    codes = pd.factorize(daily["sku"])[0]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    block = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(codes)]))
+    day = daily["ds"].to_numpy().astype("datetime64[ns]").view(np.int64) // NS_PER_DAY
+    first_day = day[starts]
+    last_day = day[np.r_[starts[1:] - 1, len(day) - 1]]
+    n_days = last_day - first_day + 1
+    block_start = np.r_[0, np.cumsum(n_days)[:-1]]
+
+    total = int(n_days.sum())
+    offset = np.arange(total) - np.repeat(block_start, n_days)
+    full = pd.DataFrame(
+        {
+            # take() keeps the sku dtype (e.g. categorical)
+            "sku": daily["sku"].take(np.repeat(starts, n_days)).reset_index(drop=True),
+            "ds": ((np.repeat(first_day, n_days) + offset) * NS_PER_DAY).view("datetime64[ns]"),
+        }
+    )
+    pos = block_start[block] + (day - first_day[block])
+    # Index of the last observed row at or before each day (for ffill)
+    prev = np.zeros(total, dtype=np.int64)
+    prev[pos] = pos
+    prev = np.maximum.accumulate(prev)
+    for col in daily.columns.drop(["sku", "ds"]):
+        observed = daily[col].to_numpy(dtype=float)
+        if policy == "zero":
+            values = np.zeros(total)
+            values[pos] = observed
+        elif policy == "interpolate" and col == "y":
+            values = np.interp(np.arange(total), pos, observed)
+        else:
+            values = np.empty(total)
+            values[pos] = observed
+            values = values[prev]
+        full[col] = values
+    return full
+
+
+def clip_values(daily, quantile=CLIP_QUANTILE, factor=CLIP_FACTOR):
+    """Per-SKU cap: `factor` x the `quantile` of the SKU's units (cythonized groupby)."""
+    return daily.groupby("sku", observed=True, sort=True)["y"].quantile(quantile) * factor
+
+
+def clip_outliers(daily, caps):
+    """Cap y at each SKU's value in `caps` (a Series indexed by sku)."""
+    cap = daily["sku"].map(caps).to_numpy(dtype=float)
+    return daily.assign(y=np.minimum(daily["y"].to_numpy(), cap))
+
+
+def preprocess(
+    df_raw,
+    fill=GAP_FILL_POLICY,
+    clip_quantile=CLIP_QUANTILE,
+    clip_factor=CLIP_FACTOR,
+):
+    """
+    Clean, aggregate, fill and clip mart rows (ds, sku, y[, is_promo]).
+
+    Stats and clip caps are computed on observed days only, before gap filling, so
+    eligibility and caps don't depend on the fill policy.
+    Returns {"history": one row per SKU-day, "stats": SKU-indexed stats}.
+    """
+    daily = aggregate_sku_days(clean(df_raw))
+    stats = sku_stats(daily)
+    caps = clip_values(daily, clip_quantile, clip_factor)
+
+    history = clip_outliers(fill_gaps(daily, fill), caps)
+    stats["n_filled"] = stats["span_days"] + 1 - stats["n_days"] if fill != "none" else 0
+    stats["clip_value"] = caps
+    return {"history": history, "stats": stats}
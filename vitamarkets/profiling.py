@@ -0,0 +1,148 @@
+"""
+Per-stage run profiles for `--profile` (vitamarkets.pipeline, forecast_prophet_v2.py).
+
+A profile is a plain dict started with start_profile(); each stage is wrapped in
+
+    with stage(profile, "load_history") as record:
+        df = load_history(...)
+        record["rows"] = len(df)
+
+which records, per stage:
+
+    wall_seconds          perf_counter time
+    cpu_seconds           CPU time of this process (all threads)
+    children_cpu_seconds  CPU time of reaped child processes (cmdstan, dbt adapters);
+                          loky workers are reused across stages and not counted
+    py_peak_mb            peak traced Python/numpy memory while the stage ran (tracemalloc;
+                          None with trace_memory=False)
+    rss_peak_mb           process peak RSS so far (resource; None on Windows)
+    rows                  rows processed, set by the caller (plus any other keys)
+
+With pstats=True each stage also runs under cProfile and is dumped to
+<output_dir>/pstats/<stage>.pstats (python -m pstats FILE to browse). Stages must not
+be nested. write_profile() saves the profile as <output_dir>/run_profile.json next to
+the run's CSV outputs. With profile=None, stage() is a no-op, so call sites need no
+branches. tracemalloc slows allocation-heavy stages (to_csv, to_sql) several fold, so
+benchmarks comparing wall times pass trace_memory=False.
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_FILE = "run_profile.json"
+PSTATS_DIR = "pstats"
+
+
+def rss_peak_mb(who="self"):
+    """Peak resident set size in MB for this process or its reaped children."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    which = resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN
+    peak = resource.getrusage(which).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return round(peak / 2**20 if sys.platform == "darwin" else peak / 2**10, 1)
+
+
+def _children_cpu():
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def start_profile(output_dir, command, pstats=False, trace_memory=True):
+    """New profile for a run writing to output_dir; starts tracemalloc if needed."""
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    return {
+        "command": command,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "output_dir": str(output_dir),
+        "pstats": pstats,
+        "python": sys.version.split()[0],
+        "stages": [],
+        "_tracemalloc": started_tracing,
+    }
+
+
+@contextmanager
+def stage(profile, name):
+    """Time the block as stage `name`; yields the record dict (callers add "rows")."""
+    record = {"stage": name}
+    if profile is None:
+        yield record
+        return
+
+    profiler = None
+    if profile["pstats"]:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    tracemalloc.reset_peak()
+    wall, cpu, children_cpu = time.perf_counter(), time.process_time(), _children_cpu()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        record.update(
+            wall_seconds=round(time.perf_counter() - wall, 4),
+            cpu_seconds=round(time.process_time() - cpu, 4),
+            children_cpu_seconds=round(_children_cpu() - children_cpu, 4),
+            py_peak_mb=(
+                round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+                if tracemalloc.is_tracing()
+                else None
+            ),
+            rss_peak_mb=rss_peak_mb(),
+            children_rss_peak_mb=rss_peak_mb("children"),
+        )
+        record.setdefault("rows", None)
+        if profiler is not None:
+            pstats_dir = Path(profile["output_dir"]) / PSTATS_DIR
+            pstats_dir.mkdir(parents=True, exist_ok=True)
+            record["pstats"] = str(pstats_dir / f"{name}.pstats")
+            profiler.dump_stats(record["pstats"])
+        profile["stages"].append(record)
+
+
+def summary_lines(profile):
+    """Fixed-width table of the profile's stages, slowest first."""
+    lines = [
+        f"{'stage':<22} {'wall s':>9} {'cpu s':>9} {'child s':>9} {'py MB':>8} "
+        f"{'rss MB':>8} {'rows':>11}"
+    ]
+    for record in sorted(profile["stages"], key=lambda r: -r["wall_seconds"]):
+        rss, py_peak = record["rss_peak_mb"], record["py_peak_mb"]
+        rows = record["rows"]
+        lines.append(
+            f"{record['stage']:<22} {record['wall_seconds']:9.2f} {record['cpu_seconds']:9.2f} "
+            f"{record['children_cpu_seconds']:9.2f} "
+            f"{'-' if py_peak is None else format(py_peak, '.1f'):>8} "
+            f"{'-' if rss is None else format(rss, '.0f'):>8} "
+            f"{'-' if rows is None else format(rows, ','):>11}"
+        )
+    return lines
+
+
+def write_profile(profile):
+    """Write <output_dir>/run_profile.json (stops tracemalloc if start_profile started it)."""
+    if profile.pop("_tracemalloc", False):
+        tracemalloc.stop()
+    profile["total_wall_seconds"] = round(sum(r["wall_seconds"] for r in profile["stages"]), 4)
+    path = Path(profile["output_dir"]) / PROFILE_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(profile, indent=2, default=str))
+    return path
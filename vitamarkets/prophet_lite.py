@@ -0,0 +1,339 @@
+"""
+Prophet-lite: a batched linear forecasting engine.
+
+Prophet's mean model is a piecewise-linear trend plus Fourier seasonality plus
+holiday/regressor terms. With the trend changepoints fixed on a grid that model is linear
+in its parameters, so instead of one cmdstan optimization per SKU we build one design
+matrix on the shared calendar and solve ridge-regularized least squares for every SKU at
+once (a multi-right-hand-side solve). The target is log1p(units), which makes
+seasonality and holiday effects multiplicative like the v2 Prophet configuration.
+Prediction intervals are empirical quantiles of each SKU's in-sample residuals.
+
+Output matches forecasting.forecast_sku: the same forecast rows (actuals + forecast) and
+metrics columns, with fit_status "lite". Select it per run with
+`forecast_prophet_v2.py --model lite`.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from vitamarkets.config import FORECAST_DAYS, TEST_DAYS
+from vitamarkets.metrics import METRICS, naive_scale, score
+from vitamarkets.telemetry import fit_telemetry
+
+N_CHANGEPOINTS = 25
+CHANGEPOINT_RANGE = 0.8
+YEARLY_ORDER = 10
+WEEKLY_ORDER = 3
+INTERVAL_WIDTH = 0.80
+
+# Ridge penalties per column group (on the log1p scale). Changepoint deltas get the
+# strongest shrinkage, mirroring Prophet's sparse changepoint prior.
+PENALTIES = {
+    "intercept": 0.0,
+    "trend": 1e-3,
+    "changepoint": 5.0,
+    "seasonality": 0.1,
+    "holiday": 1.0,
+    "promo": 1.0,
+}
+
+# Max SKUs per batched (K, p+1, p+1) Gram build and solve; bounds memory at
+# SOLVE_CHUNK x (p+1)^2 floats
+SOLVE_CHUNK = 1_000
+
+# Minimum data per SKU, same as forecasting.forecast_sku
+MIN_ROWS = 365
+MIN_TEST_ROWS = 10
+
+
+def fourier_terms(t_days, period, order):
+    """sin/cos pairs for `order` harmonics of `period` days."""
+    x = 2 * np.pi * np.outer(t_days, np.arange(1, order + 1)) / period
+    return np.hstack([np.sin(x), np.cos(x)])
+
+
+def holiday_indicators(dates, holidays_df):
+    """One 0/1 column per holiday name covering its [lower_window, upper_window] days."""
+    names = sorted(holidays_df["holiday"].unique()) if len(holidays_df) else []
+    out = np.zeros((len(dates), len(names)))
+    for j, name in enumerate(names):
+        h = holidays_df[holidays_df["holiday"] == name]
+        offsets = [
+            pd.to_datetime(h["ds"]) + pd.Timedelta(days=d)
+            for d in range(int(h["lower_window"].min()), int(h["upper_window"].max()) + 1)
+        ]
+        out[:, j] = dates.isin(pd.DatetimeIndex(np.concatenate(offsets)))
+    return out, names
+
+
+def feature_blocks(dates, history_end, holidays_df, n_changepoints=N_CHANGEPOINTS):
+    """
+    Prophet-style regressors over `dates`, keyed by penalty group.
+
+    trend is time scaled to [0, 1] over the history, changepoint the hinges
+    max(0, t - c) for changepoints evenly spaced over the first CHANGEPOINT_RANGE of
+    it, seasonality the yearly then weekly Fourier terms, holiday the window indicators.
+    """
+    t_days = (dates - dates[0]).days.to_numpy(dtype=float)
+    span = max((history_end - dates[0]).days, 1)
+    t = t_days / span
+
+    changepoints = np.linspace(0, CHANGEPOINT_RANGE, n_changepoints + 1)[1:]
+    return {
+        "intercept": np.ones((len(dates), 1)),
+        "trend": t[:, None],
+        "changepoint": np.maximum(t[:, None] - changepoints[None, :], 0),
+        "seasonality": np.hstack(
+            [fourier_terms(t_days, 365.25, YEARLY_ORDER), fourier_terms(t_days, 7, WEEKLY_ORDER)]
+        ),
+        "holiday": holiday_indicators(dates, holidays_df)[0],
+    }
+
+
+def design_matrix(dates, history_end, holidays_df, n_changepoints=N_CHANGEPOINTS):
+    """Shared design matrix over `dates` (all feature_blocks) plus per-column penalties."""
+    blocks = feature_blocks(dates, history_end, holidays_df, n_changepoints)
+    X = np.hstack(list(blocks.values()))
+    penalty = np.concatenate([np.full(b.shape[1], PENALTIES[name]) for name, b in blocks.items()])
+    return X, penalty
+
+
+def ridge_solve(X, Y, mask, Z, penalty, promo_penalty=PENALTIES["promo"]):
+    """
+    Ridge coefficients for every column of Y at once.
+
+    X (n, p) is shared; Y (n, K) holds each SKU's target, `mask` (n, K) which rows each
+    SKU is fitted on, and Z (n, K) each SKU's promo regressor (all zeros = no promo).
+    Every SKU has its own masked Gram matrix; they are built SOLVE_CHUNK SKUs at a time
+    with one matrix product against the row-wise outer products of X, and solved as one
+    batched (K, p+1, p+1) system per chunk.
+    Returns coefficients of shape (p + 1, K); the last row is the promo effect.
+    """
+    n, p = X.shape
+    K = Y.shape[1]
+    coef = np.zeros((p + 1, K))
+    # Row i holds X[i]' X[i], so mask' XX is every SKU's masked X'X at once
+    XX = (X[:, :, None] * X[:, None, :]).reshape(n, p * p)
+
+    for start in range(0, K, SOLVE_CHUNK):
+        cols = slice(start, min(start + SOLVE_CHUNK, K))
+        M = mask[:, cols].astype(float)
+        Ym, Zm = Y[:, cols] * M, Z[:, cols] * M
+        ZtZ = (Zm * Z[:, cols]).sum(axis=0)
+
+        A = np.empty((M.shape[1], p + 1, p + 1))
+        A[:, :p, :p] = (M.T @ XX).reshape(-1, p, p) + np.diag(penalty)
+        A[:, :p, p] = A[:, p, :p] = (X.T @ Zm).T
+        # SKUs without promo get an identity row, so their promo coefficient is 0
+        A[:, p, p] = np.where(ZtZ > 0, ZtZ + promo_penalty, 1.0)
+        b = np.vstack([X.T @ Ym, (Zm * Y[:, cols]).sum(axis=0)[None, :]]).T
+        coef[:, cols] = np.linalg.solve(A, b[..., None])[..., 0].T
+    return coef
+
+
+def fit_predict(X, logY, mask, Z, penalty, interval_width):
+    """Fit on `mask`, predict every row. Returns (yhat, lower, upper) on the unit scale."""
+    coef = ridge_solve(X, np.where(mask, logY, 0.0), mask, Z, penalty)
+    pred = X @ coef[:-1] + Z * coef[-1]
+
+    alpha = (1 - interval_width) / 2
+    resid = np.where(mask, logY - pred, np.nan)
+    q_lo, q_hi = np.nanquantile(resid, [alpha, 1 - alpha], axis=0)
+
+    yhat = np.expm1(pred).clip(min=0)
+    lower = np.expm1(pred + q_lo).clip(min=0)
+    upper = np.expm1(pred + q_hi).clip(min=0)
+    return yhat, lower, upper
+
+
+def holdout_metrics(test, yhat, lower, upper, scale=None):
+    """
+    Holdout metrics per SKU from the raw test rows (vitamarkets.metrics, as forecast_sku).
+
+    `scale` is metrics.naive_scale() of the training rows; test_mase is NaN without it.
+    """
+    rows, cols = test["_row"].to_numpy(), test["_col"].to_numpy()
+    frame = pd.DataFrame(
+        {
+            "sku": test["sku"].to_numpy(),
+            "y": test["y"].to_numpy(),
+            "yhat": yhat[rows, cols],
+            "yhat_lower": lower[rows, cols],
+            "yhat_upper": upper[rows, cols],
+        }
+    )
+    return score(frame, scale=scale)[list(METRICS)].add_prefix("test_")
+
+
+def prepare_panel(df, periods=FORECAST_DAYS, test_days=TEST_DAYS, min_rows=MIN_ROWS):
+    """
+    SKU x day matrices on a shared calendar, for engines that fit many SKUs at once.
+
+    `df` is preprocessed history (vitamarkets.preprocessing). Applies forecast_sku's
+    guards (`min_rows` rows, MIN_TEST_ROWS holdout rows) and averages any duplicate
+    rows per SKU-day. Returns a dict with the kept rows (`df`), `dates`, `skus`, `Y` (NaN where unobserved), promo regressor
+    `Z`, masks `observed`/`train_mask`/`in_future`, the raw holdout rows `test` and
+    `failed` reasons; `skus` is empty if nothing survives the guards.
+    """
+    df = df[["ds", "sku", "y"] + (["is_promo"] if "is_promo" in df.columns else [])].copy()
+    if "is_promo" not in df.columns:
+        df["is_promo"] = 0
+    df["ds"] = pd.to_datetime(df["ds"])
+
+    # Same guards as forecast_sku
+    last = df.groupby("sku")["ds"].transform("max")
+    cutoff = last - pd.Timedelta(days=test_days)
+    n_rows = df.groupby("sku").size()
+    n_test = (df["ds"] > cutoff).groupby(df["sku"]).sum()
+    failed = [f"Insufficient data for {sku}" for sku in n_rows.index[n_rows < min_rows]]
+    short_test = n_rows.index[(n_rows >= min_rows) & (n_test < MIN_TEST_ROWS)]
+    failed += [f"Insufficient test data ({n_test[sku]} days) for {sku}" for sku in short_test]
+    keep = n_rows.index[(n_rows >= min_rows) & (n_test >= MIN_TEST_ROWS)]
+    df = df[df["sku"].isin(keep)]
+    if df.empty:
+        return {"skus": pd.Index([]), "failed": failed}
+
+    daily = df.groupby(["ds", "sku"]).agg(y=("y", "mean"), is_promo=("is_promo", "max"))
+    history_end = df["ds"].max()
+    dates = pd.date_range(df["ds"].min(), history_end + pd.Timedelta(days=periods), freq="D")
+    skus = daily.index.get_level_values("sku").unique().sort_values()
+    Y = daily["y"].unstack("sku").reindex(index=dates, columns=skus).to_numpy()
+    promo = daily["is_promo"].unstack("sku").reindex(index=dates, columns=skus)
+
+    observed = ~np.isnan(Y)
+    sku_last = df.groupby("sku")["ds"].max().reindex(skus)
+    last_row = dates.get_indexer(sku_last)
+    row_idx = np.arange(len(dates))[:, None]
+    in_future = (row_idx > last_row) & (row_idx <= last_row + periods)
+    cutoff_row = dates.get_indexer(sku_last - pd.Timedelta(days=test_days))
+
+    # Future promo = last observed raw value (as future_frame); gaps in history = 0
+    last_promo = df.sort_values("ds").groupby("sku")["is_promo"].last().reindex(skus)
+    Z = promo.fillna(0).to_numpy(dtype=float)
+    Z = np.where(in_future, last_promo.to_numpy(dtype=float), Z)
+    Z[:, (df.groupby("sku")["is_promo"].nunique().reindex(skus) <= 1).to_numpy()] = 0.0
+
+    test = df[df["ds"] > df["sku"].map(sku_last - pd.Timedelta(days=test_days))].copy()
+    test["_row"] = dates.get_indexer(test["ds"])
+    test["_col"] = skus.get_indexer(test["sku"])
+
+    return {
+        "df": df,
+        "dates": dates,
+        "history_end": history_end,
+        "skus": skus,
+        "Y": Y,
+        "Z": Z,
+        "observed": observed,
+        "train_mask": observed & (row_idx <= cutoff_row),
+        "in_future": in_future,
+        "test": test,
+        "failed": failed,
+    }
+
+
+def assemble_results(panel, forecast, holdout, run_id, fit_status, seconds, skip=(), model=None):
+    """
+    Per-SKU (combined_df, metrics_dict) pairs in forecast_sku's format.
+
+    `forecast` and `holdout` are (yhat, lower, upper) calendar x SKU matrices from the
+    full-history and holdout fits; `seconds` is split evenly across the SKUs. SKUs in
+    `skip` (e.g. whose fit failed) are left out. metrics["model"] is `model`, either a
+    name or a {sku: name} mapping (default: fit_status).
+    """
+    from vitamarkets.forecasting import FORECAST_COLUMNS
+
+    df, dates, skus = panel["df"], panel["dates"], panel["skus"]
+    yhat, lower, upper = forecast
+    metrics = holdout_metrics(
+        panel["test"], *holdout, scale=naive_scale(df.drop(index=panel["test"].index))
+    )
+    n_test = panel["test"].groupby("sku").size()
+    n_train = df.groupby("sku").size() - n_test
+
+    rows, cols = np.nonzero(panel["observed"] | panel["in_future"])
+    forecasts = pd.DataFrame(
+        {
+            "ds": dates[rows],
+            "yhat": yhat[rows, cols],
+            "yhat_lower": lower[rows, cols],
+            "yhat_upper": upper[rows, cols],
+            "sku": skus[cols],
+            "run_id": run_id,
+            "type": "forecast",
+        }
+    )
+    actuals = df[["ds", "sku", "y"]].assign(
+        yhat=df["y"], yhat_lower=df["y"], yhat_upper=df["y"], run_id=run_id, type="actual"
+    )[FORECAST_COLUMNS]
+    actuals_by_sku = dict(tuple(actuals.groupby("sku", sort=False)))
+    forecasts_by_sku = dict(tuple(forecasts.groupby("sku", sort=False)))
+
+    per_sku_seconds = seconds / len(skus)
+    # Batched: no per-SKU optimizer run, one worker for the whole batch
+    telemetry = fit_telemetry()
+    results = []
+    for sku in skus:
+        if sku in skip:
+            continue
+        combined = pd.concat(
+            [actuals_by_sku[sku].sort_values("ds"), forecasts_by_sku[sku]], ignore_index=True
+        )
+        m = metrics.loc[sku]
+        results.append(
+            (
+                combined,
+                {
+                    "sku": sku,
+                    "run_id": run_id,
+                    "n_train": int(n_train[sku]),
+                    "n_test": int(n_test[sku]),
+                    **m.to_dict(),
+                    "fit_status": fit_status,
+                    "fit_seconds": per_sku_seconds,
+                    "python_seconds": np.nan,
+                    "model": model.get(sku) if isinstance(model, dict) else model or fit_status,
+                    "grain": "daily",
+                    **telemetry,
+                },
+            )
+        )
+    return results
+
+
+def forecast_batch(
+    df,
+    holidays_df,
+    run_id,
+    periods=FORECAST_DAYS,
+    test_days=TEST_DAYS,
+    interval_width=INTERVAL_WIDTH,
+):
+    """
+    Forecast every SKU in `df` (ds, sku, y, is_promo) in one pass.
+
+    Two batched solves are made: one on each SKU's history up to its holdout cutoff
+    (last `test_days` days) for the test metrics, and one on the full history for the
+    published forecast. fit_seconds is the batch time divided by the number of SKUs.
+
+    Returns (results, failed) where results is a list of (combined_df, metrics_dict)
+    per SKU and failed lists reasons for SKUs with too little data.
+    """
+    started = time.perf_counter()
+    panel = prepare_panel(df, periods, test_days)
+    if not len(panel["skus"]):
+        return [], panel["failed"]
+
+    X, penalty = design_matrix(panel["dates"], panel["history_end"], holidays_df)
+    logY = np.log1p(np.nan_to_num(panel["Y"]))
+    Z = panel["Z"]
+    holdout = fit_predict(X, logY, panel["train_mask"], Z, penalty, interval_width)
+    forecast = fit_predict(X, logY, panel["observed"], Z, penalty, interval_width)
+
+    results = assemble_results(
+        panel, forecast, holdout, run_id, "lite", time.perf_counter() - started
+    )
+    return results, panel["failed"]
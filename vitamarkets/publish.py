@@ -0,0 +1,248 @@
+"""
+Publish a forecast run to PostgreSQL.
+
+Writes the run's forecast/metrics tables and re-points the stable Power BI views
+(v_forecast_daily_latest, v_forecast_sku_metrics_latest) plus the legacy compatibility
+views (simple_prophet_forecast, forecast_error_metrics) at them. Everything lands in
+`schema` (public by default; benchmarks/end_to_end.py publishes to a scratch schema).
+
+The stable views are materialized, sorted and uniquely indexed, so dashboard queries
+read a prepared copy instead of re-sorting the run table on every refresh; the
+compatibility views only rename their columns. Each publish refreshes them
+CONCURRENTLY (benchmarks/dashboard_views.py compares both layouts).
+"""
+
+import logging
+
+from sqlalchemy import text
+
+from vitamarkets.config import STABLE_VIEW_FORECASTS, STABLE_VIEW_METRICS
+
+log = logging.getLogger(__name__)
+
+
+def run_table_names(run_id, use_versioned_tables=True):
+    """Return (forecast_table, metrics_table) for a run."""
+    if use_versioned_tables:
+        return f"prophet_forecasts_{run_id}", f"prophet_forecast_metrics_{run_id}"
+    return "simple_prophet_forecast", "forecast_error_metrics"
+
+
+def write_run_tables(
+    engine, all_forecasts, metrics_df, run_id, use_versioned_tables=True, schema="public"
+):
+    """Write forecasts + metrics for a run and log a sanity check. Returns the table names."""
+    table_forecasts, table_metrics = run_table_names(run_id, use_versioned_tables)
+
+    # Re-publishing a run (e.g. after --resume) replaces tables the views depend on;
+    # to_sql(if_exists="replace") can't drop them, so drop with CASCADE first.
+    # publish_views() recreates the views right after.
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {schema}.{table_forecasts} CASCADE"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {schema}.{table_metrics} CASCADE"))
+
+    all_forecasts.to_sql(table_forecasts, engine, schema=schema, if_exists="replace", index=False)
+    metrics_df.to_sql(table_metrics, engine, schema=schema, if_exists="replace", index=False)
+
+    # Sanity check: verify written data
+    with engine.connect() as conn:
+        result = conn.execute(text(f"SELECT COUNT(*), MAX(ds) FROM {schema}.{table_forecasts}"))
+        row = result.fetchone()
+        row_count, max_date = row[0], row[1]
+        log.info(f"   -> Wrote {row_count:,} rows to {table_forecasts}, max date: {max_date}")
+
+        result_metrics = conn.execute(text(f"SELECT COUNT(*) FROM {schema}.{table_metrics}"))
+        metrics_count = result_metrics.scalar()
+        log.info(f"   -> Wrote {metrics_count:,} rows to {table_metrics}")
+
+    return table_forecasts, table_metrics
+
+
+# Stable contract views: the SELECT over a run table, the materialized view's sort
+# order and its unique key (actual and forecast rows share dates, hence data_type)
+STABLE_VIEWS = {
+    STABLE_VIEW_FORECASTS: {
+        "select": """
+            SELECT
+                CAST(ds AS date) AS forecast_date,
+                sku,
+                yhat AS predicted_units,
+                yhat_lower AS lower_bound_80pct,
+                yhat_upper AS upper_bound_80pct,
+                type AS data_type,
+                run_id AS forecast_run_id
+            FROM {source}
+        """,
+        "order_by": "sku, forecast_date",
+        "unique": "sku, forecast_date, data_type",
+    },
+    STABLE_VIEW_METRICS: {
+        "select": """
+            SELECT
+                sku,
+                test_mae AS mean_absolute_error,
+                test_rmse AS root_mean_squared_error,
+                test_mape_pct AS mean_absolute_pct_error,
+                test_bias AS forecast_bias,
+                test_coverage_pct AS prediction_interval_coverage_pct,
+                n_train AS training_days,
+                n_test AS test_days,
+                run_id AS forecast_run_id
+            FROM {source}
+        """,
+        "order_by": "mean_absolute_pct_error",
+        "unique": "sku",
+    },
+}
+
+# Compatibility views over the stable ones, for legacy Power BI queries
+COMPAT_VIEWS = {
+    "simple_prophet_forecast": f"""
+            SELECT
+                forecast_date AS ds,
+                sku,
+                predicted_units AS yhat,
+                lower_bound_80pct AS yhat_lower,
+                upper_bound_80pct AS yhat_upper,
+                data_type,
+                forecast_run_id
+            FROM {{schema}}.{STABLE_VIEW_FORECASTS}
+        """,
+    "forecast_error_metrics": f"""
+            SELECT
+                sku,
+                mean_absolute_error AS test_mae,
+                root_mean_squared_error AS test_rmse,
+                mean_absolute_pct_error AS test_mape_pct,
+                forecast_bias AS test_bias,
+                prediction_interval_coverage_pct AS test_coverage_pct,
+                training_days AS n_train,
+                test_days AS n_test,
+                forecast_run_id AS run_id
+            FROM {{schema}}.{STABLE_VIEW_METRICS}
+        """,
+}
+
+# Plain view over the run table that each materialized view is refreshed from
+SOURCE_SUFFIX = "_source"
+
+
+def _run_tables(table_forecasts, table_metrics):
+    return {STABLE_VIEW_FORECASTS: table_forecasts, STABLE_VIEW_METRICS: table_metrics}
+
+
+def _compat_statements(schema):
+    return [
+        f"CREATE OR REPLACE VIEW {schema}.{name} AS {sql.format(schema=schema)}"
+        for name, sql in COMPAT_VIEWS.items()
+    ]
+
+
+def view_statements(table_forecasts, table_metrics, schema="public"):
+    """
+    SQL that (re)creates the stable and compatibility views as plain views over the
+    given run tables (the DuckDB backend; PostgreSQL materializes them, see
+    publish_views).
+    """
+    statements = [f"DROP VIEW IF EXISTS {schema}.{name}" for name in COMPAT_VIEWS]
+    statements += [f"DROP VIEW IF EXISTS {schema}.{name}" for name in STABLE_VIEWS]
+    for name, table in _run_tables(table_forecasts, table_metrics).items():
+        view = STABLE_VIEWS[name]
+        select = view["select"].format(source=f"{schema}.{table}")
+        statements.append(
+            f"CREATE OR REPLACE VIEW {schema}.{name} AS {select} ORDER BY {view['order_by']}"
+        )
+    return statements + _compat_statements(schema)
+
+
+def _source_statements(table_forecasts, table_metrics, schema):
+    return [
+        f"CREATE OR REPLACE VIEW {schema}.{name}{SOURCE_SUFFIX} AS "
+        + STABLE_VIEWS[name]["select"].format(source=f"{schema}.{table}")
+        for name, table in _run_tables(table_forecasts, table_metrics).items()
+    ]
+
+
+def materialized_view_statements(table_forecasts, table_metrics, schema="public", kinds=None):
+    """
+    SQL that rebuilds the stable views as indexed materialized views over `<view>_source`
+    plain views of the given run tables, plus the compatibility views over them.
+
+    kinds ({relation: pg_class.relkind}) says whether an existing stable view is a plain
+    ("v") or materialized ("m") view, so either can be dropped.
+    """
+    kinds = kinds or {}
+    statements = [f"DROP VIEW IF EXISTS {schema}.{name}" for name in COMPAT_VIEWS]
+    for name in STABLE_VIEWS:
+        kind = "MATERIALIZED VIEW" if kinds.get(name) == "m" else "VIEW"
+        statements.append(f"DROP {kind} IF EXISTS {schema}.{name} CASCADE")
+        statements.append(f"DROP VIEW IF EXISTS {schema}.{name}{SOURCE_SUFFIX} CASCADE")
+    statements += _source_statements(table_forecasts, table_metrics, schema)
+    for name, view in STABLE_VIEWS.items():
+        statements.append(
+            f"CREATE MATERIALIZED VIEW {schema}.{name} AS "
+            f"SELECT * FROM {schema}.{name}{SOURCE_SUFFIX} ORDER BY {view['order_by']}"
+        )
+        # REFRESH ... CONCURRENTLY needs a unique index without a WHERE clause
+        statements.append(f"CREATE UNIQUE INDEX ON {schema}.{name} ({view['unique']})")
+        statements.append(f"ANALYZE {schema}.{name}")
+    return statements + _compat_statements(schema)
+
+
+def relation_kinds(conn, schema="public"):
+    """{name: relkind} for the stable views present in `schema`."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname, c.relkind FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = :schema AND c.relname = ANY(:names)"
+        ),
+        {"schema": schema, "names": list(STABLE_VIEWS)},
+    )
+    return dict(rows.fetchall())
+
+
+def publish_views(engine, table_forecasts, table_metrics, schema="public", concurrent=True):
+    """
+    Point the stable materialized views (and the compatibility views over them) at the
+    given run tables.
+
+    When both materialized views exist, their `<view>_source` views are re-pointed and
+    the views refreshed in one transaction. CONCURRENTLY (the default) lets dashboards
+    keep reading the previous run until it commits. Every row carries the run id, though,
+    so a new run rewrites the whole view, and the concurrent diff costs about 10x a
+    plain REFRESH. concurrent=False takes that faster path but blocks readers while it
+    runs. Otherwise (first publish, plain views from an older release, or a republish
+    whose run tables were dropped with CASCADE) the views are rebuilt.
+    """
+    from sqlalchemy.exc import DBAPIError
+
+    with engine.connect() as conn:
+        kinds = relation_kinds(conn, schema)
+
+    if all(kinds.get(name) == "m" for name in STABLE_VIEWS):
+        mode = "CONCURRENTLY " if concurrent else ""
+        log.info(f"   -> Refreshing {', '.join(STABLE_VIEWS)} {mode.lower()}...")
+        try:
+            with engine.begin() as conn:
+                for statement in _source_statements(table_forecasts, table_metrics, schema):
+                    conn.execute(text(statement))
+                for name in STABLE_VIEWS:
+                    conn.execute(text(f"REFRESH MATERIALIZED VIEW {mode}{schema}.{name}"))
+                    conn.execute(text(f"ANALYZE {schema}.{name}"))
+            log.info("   -> Stable views refreshed; compatibility views unchanged")
+            return
+        except DBAPIError as e:
+            # e.g. a run table whose column types changed can't replace the source view
+            log.warning(f"   -> Refresh failed, rebuilding the views: {e.orig}")
+
+    log.info(
+        f"   -> Creating stable materialized views ({STABLE_VIEW_FORECASTS}, "
+        f"{STABLE_VIEW_METRICS}) and compatibility views..."
+    )
+    with engine.begin() as conn:
+        for statement in materialized_view_statements(
+            table_forecasts, table_metrics, schema, kinds
+        ):
+            conn.execute(text(statement))
+    log.info("   -> Stable and compatibility views updated successfully")
@@ -0,0 +1,210 @@
+"""
+Purchase recommendations from a run's forecasts and a DB inventory table.
+
+public.inventory_positions holds stock per SKU, optionally split by channel/country
+(ALL where a position isn't split): on_hand, on_order, lead_time_days and
+service_level. recommend() joins the run's future forecast days with those positions
+and computes, in one grouped pass for every SKU (or SKU x channel/country):
+
+    lead_time_demand  sum of yhat over the first lead_time_days forecast days
+    safety_stock      z(service_level) x sqrt(sum of daily forecast variance over the
+                      lead time); the daily sigma is read off the yhat interval
+    reorder_point     lead_time_demand + safety_stock
+    purchase_qty      max(0, reorder_point - on_hand - on_order), in whole units
+
+Below SKU level, each location gets its share of the SKU forecast from the last
+SHARE_DAYS of mart sales. Results go to public.purchase_recommendations for Power BI.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from vitamarkets.config import DEFAULT_LEAD_TIME_DAYS, DEFAULT_SERVICE_LEVEL
+from vitamarkets.metrics import INTERVAL_WIDTH
+
+INVENTORY_TABLE = "inventory_positions"
+RECOMMENDATIONS_TABLE = "purchase_recommendations"
+
+# Value of channel/country on positions (and recommendations) that aren't split
+ALL = "ALL"
+LOCATION_COLUMNS = ("channel", "country")
+
+POSITION_COLUMNS = ["sku", "channel", "country", "on_hand", "on_order"]
+POSITION_COLUMNS += ["lead_time_days", "service_level"]
+
+# Days of mart sales used to split a SKU forecast across channels/countries
+SHARE_DAYS = 90
+
+INVENTORY_DDL = f"""
+CREATE TABLE IF NOT EXISTS public.{INVENTORY_TABLE} (
+    sku TEXT NOT NULL,
+    channel TEXT NOT NULL DEFAULT '{ALL}',
+    country TEXT NOT NULL DEFAULT '{ALL}',
+    on_hand DOUBLE PRECISION NOT NULL DEFAULT 0,
+    on_order DOUBLE PRECISION NOT NULL DEFAULT 0,
+    lead_time_days INTEGER,
+    service_level DOUBLE PRECISION CHECK (service_level > 0 AND service_level < 1),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (sku, channel, country)
+)
+"""
+
+SHARES_QUERY = """
+SELECT sku, {columns}, SUM(total_units_sold) AS units
+FROM mart_sales_summary
+WHERE date::date > (SELECT MAX(date::date) FROM mart_sales_summary) - :days
+  AND total_units_sold >= 0
+GROUP BY sku, {columns}
+"""
+
+
+def location_keys(by):
+    """sku plus the location columns in `by` (a name or list), validated."""
+    by = [by] if isinstance(by, str) else list(by)
+    unknown = set(by) - set(LOCATION_COLUMNS)
+    if unknown:
+        raise ValueError(f"Can only split recommendations by {LOCATION_COLUMNS}, not {unknown}")
+    return ["sku"] + [c for c in LOCATION_COLUMNS if c in by]
+
+
+def load_positions(engine):
+    """Inventory positions (creates the empty table on first use)."""
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        conn.execute(text(INVENTORY_DDL))
+    return pd.read_sql(
+        f"SELECT {', '.join(POSITION_COLUMNS)} FROM public.{INVENTORY_TABLE}", engine
+    )
+
+
+def empty_positions():
+    """No inventory positions (every SKU gets the defaults), for runs without the table."""
+    return pd.DataFrame(columns=POSITION_COLUMNS)
+
+
+def load_demand_shares(engine, by, days=SHARE_DAYS):
+    """Each location's share of its SKU's units over the last `days` of the mart."""
+    from sqlalchemy import text
+
+    keys = location_keys(by)
+    if len(keys) == 1:
+        return None
+    units = pd.read_sql(
+        text(SHARES_QUERY.format(columns=", ".join(keys[1:]))), engine, params={"days": days}
+    )
+    total = units.groupby("sku")["units"].transform("sum")
+    return units.assign(share=units["units"] / total.where(total > 0))[keys + ["share"]]
+
+
+def future_forecasts(all_forecasts):
+    """Forecast rows after each SKU's last actual, with step = days ahead (1, 2, ...)."""
+    last_actual = all_forecasts[all_forecasts["type"] == "actual"].groupby("sku")["ds"].max()
+    fc = all_forecasts[all_forecasts["type"] == "forecast"]
+    fc = fc[fc["ds"] > fc["sku"].map(last_actual)].sort_values(["sku", "ds"])
+    return fc.assign(step=fc.groupby("sku").cumcount() + 1)
+
+
+def _z(levels):
+    """Standard normal quantile for each service level."""
+    levels = pd.Series(levels)
+    z = {level: NormalDist().inv_cdf(level) for level in levels.unique()}
+    return levels.map(z).to_numpy()
+
+
+def position_targets(skus, positions, keys, shares, lead_time_days, service_level):
+    """
+    One row per SKU (x location for `keys` beyond sku) with its demand share and the
+    summed stock, lead time and service level of the matching positions (defaults
+    where a SKU has none). Shared by recommend() and vitamarkets.simulation.
+    """
+    skus = pd.DataFrame({"sku": skus})
+    locations = skus.assign(share=1.0) if len(keys) == 1 else skus.merge(shares, on="sku")
+
+    # An empty table reads back as object columns
+    numeric = ["on_hand", "on_order", "lead_time_days", "service_level"]
+    positions = positions.astype(dict.fromkeys(numeric, float))
+    for col in set(LOCATION_COLUMNS) - set(keys):
+        positions[col] = ALL
+    stock = positions.groupby(keys, as_index=False).agg(
+        on_hand=("on_hand", "sum"),
+        on_order=("on_order", "sum"),
+        lead_time_days=("lead_time_days", "max"),
+        service_level=("service_level", "max"),
+    )
+    targets = locations.merge(stock, on=keys, how="left").fillna(
+        {
+            "on_hand": 0.0,
+            "on_order": 0.0,
+            "lead_time_days": lead_time_days,
+            "service_level": service_level,
+        }
+    )
+    return targets.assign(lead_time_days=targets["lead_time_days"].astype(int))
+
+
+def recommend(
+    all_forecasts,
+    metrics_df,
+    positions,
+    by=(),
+    shares=None,
+    lead_time_days=DEFAULT_LEAD_TIME_DAYS,
+    service_level=DEFAULT_SERVICE_LEVEL,
+    interval_width=INTERVAL_WIDTH,
+):
+    """
+    Recommendations for every forecast SKU, or SKU x `by` ("channel"/"country").
+
+    `positions` is load_positions() output; rows at a finer grain than `by` are
+    summed, and SKUs without a position get on_hand 0 and the default lead time and
+    service level. `shares` (load_demand_shares(), needed when `by` is set) splits each
+    SKU's forecast across the locations that sold it; positions must then be at least
+    as fine as `by`. Returns one row per key, largest purchase_qty first.
+    """
+    keys = location_keys(by)
+    future = future_forecasts(all_forecasts)
+    interval_z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+    future = future.assign(
+        var=((future["yhat_upper"] - future["yhat_lower"]) / (2 * interval_z)) ** 2
+    )[["sku", "step", "yhat", "var"]]
+
+    targets = position_targets(
+        future["sku"].unique(), positions, keys, shares, lead_time_days, service_level
+    )
+
+    # Lead-time window of every SKU/location in one grouped sum
+    rows = targets[keys + ["share", "lead_time_days"]].merge(future, on="sku")
+    in_lead_time = (rows["step"] <= rows["lead_time_days"]).to_numpy()
+    rows = rows.assign(
+        demand=np.where(in_lead_time, rows["yhat"] * rows["share"], 0.0),
+        var=np.where(in_lead_time, rows["var"] * rows["share"] ** 2, 0.0),
+    )
+    window = rows.groupby(keys, as_index=False)[["demand", "var"]].sum()
+
+    recs = targets.merge(window, on=keys, how="left")
+    recs["lead_time_demand"] = recs["demand"]
+    recs["safety_stock"] = _z(recs["service_level"]) * np.sqrt(recs["var"])
+    recs["reorder_point"] = recs["lead_time_demand"] + recs["safety_stock"]
+    shortfall = recs["reorder_point"] - recs["on_hand"] - recs["on_order"]
+    recs["purchase_qty"] = np.ceil(shortfall.clip(lower=0))
+
+    mape = recs["sku"].map(metrics_df.set_index("sku")["test_mape_pct"])
+    recs["forecast_quality"] = np.select([mape < 15, mape < 25], ["HIGH", "MEDIUM"], "LOW")
+    recs["mape_pct"] = mape.round(1)
+    for col in set(LOCATION_COLUMNS) - set(keys):
+        recs[col] = ALL
+
+    columns = ["sku", *LOCATION_COLUMNS, "on_hand", "on_order", "lead_time_days"]
+    columns += ["service_level", "lead_time_demand", "safety_stock", "reorder_point"]
+    columns += ["purchase_qty", "forecast_quality", "mape_pct"]
+    return recs[columns].sort_values("purchase_qty", ascending=False, ignore_index=True)
+
+
+def write_recommendations(engine, recs, run_id):
+    """Replace public.purchase_recommendations with this run's recommendations."""
+    recs.assign(run_id=run_id, created_at=pd.Timestamp.now()).to_sql(
+        RECOMMENDATIONS_TABLE, engine, schema="public", if_exists="replace", index=False
+    )
@@ -0,0 +1,262 @@
+"""
+CPU layout for parallel Prophet fits: how many workers, and how many threads each.
+
+joblib's default (`n_jobs=-1`) starts one worker per core, and every worker can then
+start multithreaded BLAS/OpenMP work and cmdstan on top, which oversubscribes the
+machine. This module caps per-worker threads via the usual environment variables for
+the duration of the fit stage, and picks the worker count either from a calibration
+file or from the measured fit cost.
+
+Usage:
+    python -m vitamarkets.resources --calibrate --sample 16
+    python -m vitamarkets.resources --show
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from vitamarkets.config import OUTPUT_DIR
+
+# Environment variables read by BLAS/OpenMP runtimes and Stan's threading
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "STAN_NUM_THREADS",
+]
+
+LAYOUT_PATH = OUTPUT_DIR / "resource_layout.json"
+
+# Rough cost of starting a loky worker that imports Prophet (seconds). A worker should
+# get at least WORK_PER_WORKER_FACTOR times this much fitting to be worth starting.
+WORKER_STARTUP_SECONDS = 2.0
+# Threads share the parent's imports; starting one costs next to nothing
+THREAD_STARTUP_SECONDS = 0.1
+WORK_PER_WORKER_FACTOR = 5
+DEFAULT_FIT_SECONDS = 3.0
+
+
+def available_cpus():
+    """CPUs this process may run on (respects affinity/cgroup pinning where exposed)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def thread_limits(threads):
+    """Environment variables that cap native thread pools at `threads`."""
+    return {var: str(threads) for var in THREAD_ENV_VARS}
+
+
+@contextmanager
+def apply_thread_limits(threads):
+    """
+    Cap native thread pools at `threads` while the block runs, then restore them.
+
+    Environment variables are inherited by loky workers and cmdstan subprocesses
+    started inside the block; threadpoolctl (shipped with scikit-learn) also limits
+    pools that are already loaded in this process. Both are put back on exit, so stages
+    that run in this process afterwards get their threads back.
+    """
+    saved = {var: os.environ.get(var) for var in THREAD_ENV_VARS}
+    os.environ.update(thread_limits(threads))
+    try:
+        from threadpoolctl import threadpool_limits
+
+        limiter = threadpool_limits(limits=threads)
+    except ImportError:
+        limiter = nullcontext()
+    try:
+        with limiter:
+            yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def plan_layout(
+    n_skus,
+    fit_seconds=DEFAULT_FIT_SECONDS,
+    cpus=None,
+    threads_per_worker=1,
+    startup_seconds=WORKER_STARTUP_SECONDS,
+):
+    """
+    Pick a worker count from the expected fit cost.
+
+    Uses at most cpus // threads_per_worker workers, never more workers than SKUs, and
+    no more workers than the total work can amortize given worker startup cost.
+    """
+    cpus = cpus or available_cpus()
+    threads_per_worker = max(1, min(threads_per_worker, cpus))
+    max_workers = max(1, cpus // threads_per_worker)
+
+    total_work = max(n_skus, 1) * fit_seconds
+    amortized = int(total_work // (startup_seconds * WORK_PER_WORKER_FACTOR))
+
+    n_workers = max(1, min(max_workers, n_skus, amortized or 1))
+    return {"n_workers": n_workers, "threads_per_worker": threads_per_worker}
+
+
+def candidate_layouts(cpus=None):
+    """Worker x thread layouts to benchmark: full, half and quarter occupancy at 1/2/4 threads."""
+    cpus = cpus or available_cpus()
+    layouts = []
+    for threads in (1, 2, 4):
+        if threads > cpus:
+            continue
+        full = cpus // threads
+        for n_workers in sorted({full, max(1, full // 2), max(1, full // 4)}, reverse=True):
+            layout = {"n_workers": n_workers, "threads_per_worker": threads}
+            if layout not in layouts:
+                layouts.append(layout)
+    return layouts
+
+
+def save_layout(layout, path=LAYOUT_PATH):
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(json.dumps(layout, indent=2))
+
+
+def load_layout(path=LAYOUT_PATH):
+    """Calibrated layout, or None if calibration has not been run on this machine."""
+    if not path.exists():
+        return None
+    layout = json.loads(path.read_text())
+    if layout.get("cpus") != available_cpus():
+        # Calibrated on a different core count; the result doesn't transfer
+        return None
+    return layout
+
+
+def resolve_layout(n_skus, n_jobs=None, threads_per_worker=None, executor="processes"):
+    """
+    Layout for a forecast run.
+
+    Explicit n_jobs/threads_per_worker win; otherwise use the calibrated layout for this
+    machine; otherwise plan from the calibrated (or default) per-SKU fit cost and the
+    executor's worker startup cost.
+    """
+    calibrated = load_layout()
+    if n_jobs and n_jobs > 0:
+        return {
+            "n_workers": min(n_jobs, max(n_skus, 1)),
+            "threads_per_worker": threads_per_worker or 1,
+        }
+    if calibrated and threads_per_worker is None:
+        return {
+            "n_workers": min(calibrated["n_workers"], max(n_skus, 1)),
+            "threads_per_worker": calibrated["threads_per_worker"],
+        }
+    fit_seconds = calibrated["fit_seconds_per_sku"] if calibrated else DEFAULT_FIT_SECONDS
+    startup = THREAD_STARTUP_SECONDS if executor == "threads" else WORKER_STARTUP_SECONDS
+    return plan_layout(
+        n_skus,
+        fit_seconds,
+        threads_per_worker=threads_per_worker or 1,
+        startup_seconds=startup,
+    )
+
+
+def calibrate(df, skus, holidays_df, layouts=None):
+    """
+    Time forecast_all on `skus` under each layout.
+
+    Returns (results, best) where results is a list of dicts with wall seconds and
+    throughput per layout, and best is the fastest layout plus the measured per-SKU fit
+    cost in core-seconds, which plan_layout uses when the SKU count changes.
+    """
+    from vitamarkets.forecasting import forecast_all
+
+    layouts = layouts or candidate_layouts()
+    results = []
+    for layout in layouts:
+        start = time.perf_counter()
+        forecast_all(
+            df,
+            skus,
+            holidays_df,
+            run_id="calibration",
+            n_jobs=layout["n_workers"],
+            threads_per_worker=layout["threads_per_worker"],
+            verbose=0,
+        )
+        wall = time.perf_counter() - start
+        results.append(
+            {
+                **layout,
+                "wall_seconds": round(wall, 2),
+                "skus_per_minute": round(len(skus) / wall * 60, 1),
+            }
+        )
+
+    best = min(results, key=lambda r: r["wall_seconds"])
+    # Per-SKU cost in core-seconds: wall time x cores used / SKUs
+    cores_used = best["n_workers"] * best["threads_per_worker"]
+    best = {
+        "n_workers": best["n_workers"],
+        "threads_per_worker": best["threads_per_worker"],
+        "fit_seconds_per_sku": round(best["wall_seconds"] * cores_used / len(skus), 2),
+        "cpus": available_cpus(),
+        "sample_skus": len(skus),
+        "calibrated_at": datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+    return results, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker x thread layout for Prophet fits")
+    parser.add_argument(
+        "--calibrate", action="store_true", help="Benchmark layouts and save the best"
+    )
+    parser.add_argument("--sample", type=int, default=16, help="Number of SKUs to calibrate on")
+    parser.add_argument("--show", action="store_true", help="Print the saved layout")
+    args = parser.parse_args()
+
+    if args.show or not args.calibrate:
+        layout = load_layout()
+        print(json.dumps(layout, indent=2) if layout else "No calibrated layout for this machine")
+        return
+
+    from db import get_engine
+    from vitamarkets.forecasting import build_holidays, load_history, select_eligible_skus
+    from vitamarkets.preprocessing import preprocess
+    from vitamarkets.series_stats import load_series_stats
+
+    engine = get_engine()
+    eligible = select_eligible_skus(load_series_stats(engine))
+    # Spread the sample over the SKU list so it isn't all one archetype
+    step = max(1, math.ceil(len(eligible) / args.sample))
+    sample = eligible[::step][: args.sample]
+    df = preprocess(load_history(engine, sample))["history"]
+
+    print(f"Calibrating on {len(sample)} SKUs, {available_cpus()} CPUs")
+    results, best = calibrate(df, sample, build_holidays())
+
+    print(f"\n{'Workers':>8} {'Threads':>8} {'Wall s':>8} {'SKU/min':>8}")
+    for r in results:
+        print(
+            f"{r['n_workers']:>8} {r['threads_per_worker']:>8} {r['wall_seconds']:>8} {r['skus_per_minute']:>8}"
+        )
+
+    save_layout(best)
+    print(
+        f"\nBest: {best['n_workers']} workers x {best['threads_per_worker']} threads "
+        f"(saved to {LAYOUT_PATH})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Pre-aggregated KPI rollups of mart_sales_summary for the dashboards, refreshed
+incrementally.
+
+One table per grain, with period_start the day, the ISO week's Monday or the month's
+first day:
+
+    kpi_rollup_daily     kpi_rollup_weekly     kpi_rollup_monthly
+
+Each row sums one period for one combination of category/channel/country/
+customer_segment in ROLLUP_GROUPS; dimensions a row is not split by hold ALL (as in
+vitamarkets.purchasing). So the portfolio total of a week is the row with ALL in all
+four, and channel mix is the rows split by channel only. The measures
+(total_units_sold, total_order_value, transaction_count) are additive. n_days counts
+the mart days in the period, so a partial current week or month is visible. The
+columns are a contract for Power BI (docs/DATA_CONTRACT.md,
+tests/test_contract_rollups.py).
+
+A refresh recomputes only the periods touched by new mart days. Those are the
+periods from each table's latest period_start on, so the latest period is always
+redone. The refresh deletes and reinserts them in one transaction, so readers see the
+old or the new rollup, never a mix. Like sku_series_stats, this assumes past days are
+not restated. After a backfill or correction, pass --since DATE (periods from DATE's
+period on) or --full-refresh. etl/refresh_actuals.py replaces the whole mart, so it
+always rebuilds.
+
+Usage:
+    python -m vitamarkets.rollups [--full-refresh | --since YYYY-MM-DD]
+"""
+
+import argparse
+import logging
+
+from vitamarkets.purchasing import ALL
+
+log = logging.getLogger(__name__)
+
+# {table: date_trunc field}
+ROLLUP_TABLES = {
+    "kpi_rollup_daily": "day",
+    "kpi_rollup_weekly": "week",
+    "kpi_rollup_monthly": "month",
+}
+DIMENSIONS = ("category", "channel", "country", "customer_segment")
+MEASURES = ("total_units_sold", "total_order_value", "transaction_count")
+
+# Dimension combinations the dashboards slice by: portfolio totals (KPIs 1-4), each
+# dimension alone (channel mix, segment performance) and the category x channel x
+# country slicers
+ROLLUP_GROUPS = (
+    (),
+    ("category",),
+    ("channel",),
+    ("country",),
+    ("customer_segment",),
+    ("category", "channel", "country"),
+)
+
+# Dimension value for mart rows where it is missing
+UNKNOWN = "UNKNOWN"
+
+# Templates over {schema} and {table}
+ROLLUP_DDL = """
+CREATE TABLE IF NOT EXISTS {schema}.{table} (
+    period_start DATE NOT NULL,
+    category TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    country TEXT NOT NULL,
+    customer_segment TEXT NOT NULL,
+    total_units_sold DOUBLE PRECISION NOT NULL,
+    total_order_value NUMERIC NOT NULL,
+    transaction_count BIGINT NOT NULL,
+    n_days INTEGER NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (period_start, category, channel, country, customer_segment)
+)
+"""
+
+# A dimension's value, or ALL on rows not split by it
+_LABELS = ",\n    ".join(
+    f"CASE WHEN GROUPING({dim}) = 1 THEN '{ALL}' ELSE COALESCE({dim}, '{UNKNOWN}') END"
+    for dim in DIMENSIONS
+)
+
+# Periods from the given one on; the mart's date may be text, hence date::date
+REFRESH_SQL = f"""
+INSERT INTO {{schema}}.{{table}}
+    (period_start, {", ".join(DIMENSIONS)}, {", ".join(MEASURES)}, n_days)
+SELECT
+    date_trunc('{{field}}', date::date)::date,
+    {_LABELS},
+    COALESCE(SUM(total_units_sold), 0),
+    COALESCE(SUM(total_order_value), 0),
+    COALESCE(SUM(transaction_count), 0),
+    COUNT(DISTINCT date::date)
+FROM {{schema}}.mart_sales_summary
+WHERE date::date >= CAST(:since AS date)
+GROUP BY
+    date_trunc('{{field}}', date::date),
+    GROUPING SETS ({", ".join("(" + ", ".join(group) + ")" for group in ROLLUP_GROUPS)})
+"""
+
+
+def _first_period(conn, schema, table, field, since, full_refresh):
+    """First period to recompute, or None for every period."""
+    from sqlalchemy import text
+
+    if full_refresh:
+        return None
+    if since is None:
+        since = conn.execute(text(f"SELECT MAX(period_start) FROM {schema}.{table}")).scalar()
+        if since is None:
+            return None
+    return conn.execute(
+        text(f"SELECT date_trunc('{field}', CAST(:since AS date))::date"), {"since": since}
+    ).scalar()
+
+
+def refresh_rollups(engine, full_refresh=False, since=None, schema="public"):
+    """
+    Recompute the rollup periods touched by new mart days; returns {table: rows written}.
+
+    Periods from each table's latest period_start are rebuilt, or from the period
+    holding `since` (a date, for backfills), or every period with full_refresh=True (or
+    when a table is new or empty).
+    """
+    from sqlalchemy import text
+
+    written = {}
+    with engine.begin() as conn:
+        for table, field in ROLLUP_TABLES.items():
+            conn.execute(text(ROLLUP_DDL.format(schema=schema, table=table)))
+            first = _first_period(conn, schema, table, field, since, full_refresh)
+            if first is None:
+                conn.execute(text(f"TRUNCATE {schema}.{table}"))
+            else:
+                conn.execute(
+                    text(f"DELETE FROM {schema}.{table} WHERE period_start >= :first"),
+                    {"first": first},
+                )
+            written[table] = conn.execute(
+                text(REFRESH_SQL.format(schema=schema, table=table, field=field)),
+                {"since": first or "-infinity"},
+            ).rowcount
+            log.info(
+                f"   -> {table}: {written[table]:,} rows "
+                f"{'rebuilt' if first is None else f'recomputed from {first}'}"
+            )
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the KPI rollup tables")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--full-refresh", action="store_true", help="Rebuild every period from the whole mart"
+    )
+    group.add_argument(
+        "--since", metavar="YYYY-MM-DD", help="Recompute periods from the one holding this date"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    from db import get_engine
+
+    refresh_rollups(get_engine(), full_refresh=args.full_refresh, since=args.since)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Straggler-aware ordering and per-SKU fit budgets for parallel forecasting.
+
+A handful of long-history or badly conditioned SKUs decide total wall time when they
+are dispatched last. SKUs are therefore submitted longest-expected-first, using past
+fit times where we have them and series length otherwise, and each SKU's Prophet fits
+share one time budget. Fit outcomes are tracked per SKU:
+
+    prophet   first fit succeeded
+    retried   first fit timed out/failed; succeeded with tighter optimizer limits
+    fallback  both Prophet attempts failed; seasonal-naive baseline used
+    failed    no forecast produced
+    lite      batched linear engine (vitamarkets.prophet_lite), no Prophet fit
+    pooled    fitted jointly with its category group (vitamarkets.pooled)
+    cheap     a cheap model won the tournament, Prophet skipped (vitamarkets.tournament)
+"""
+
+import json
+
+import pandas as pd
+
+from vitamarkets.config import OUTPUT_DIR
+
+FIT_TIMES_PATH = OUTPUT_DIR / "sku_fit_seconds.json"
+
+# Default Prophet budget per SKU, across all of its fits (seconds)
+DEFAULT_FIT_TIMEOUT = 120
+
+# Second attempt: cap LBFGS iterations and loosen the objective tolerance so the
+# optimizer stops early instead of grinding on a badly conditioned series.
+RETRY_FIT_KWARGS = {"algorithm": "LBFGS", "iter": 1000, "tol_rel_obj": 1e6}
+
+FIT_STATUSES = ["prophet", "retried", "fallback", "failed", "lite", "pooled", "cheap"]
+
+# Outcomes whose fit_seconds is a share of a batch, not a per-SKU Prophet fit
+BATCH_FIT_STATUSES = ["lite", "pooled", "cheap"]
+
+
+def load_past_fit_seconds(path=FIT_TIMES_PATH):
+    """{sku: fit_seconds} from previous runs (empty if none recorded yet)."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def save_fit_seconds(metrics_df, path=FIT_TIMES_PATH):
+    """Merge this run's per-SKU fit_seconds into the fit-time history (Prophet fits only)."""
+    fit_times = load_past_fit_seconds(path)
+    if "fit_status" in metrics_df.columns:
+        metrics_df = metrics_df[~metrics_df["fit_status"].isin(BATCH_FIT_STATUSES)]
+    measured = metrics_df.dropna(subset=["fit_seconds"])
+    fit_times.update(dict(zip(measured["sku"], measured["fit_seconds"].round(3))))
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(json.dumps(fit_times, indent=2, sort_keys=True))
+
+
+def expected_fit_seconds(series_lengths, past_fit_seconds=None):
+    """
+    Expected fit cost per SKU.
+
+    SKUs with a recorded fit time use it. The rest are estimated from series length
+    at the median seconds-per-observation of the SKUs we do know (1.0 if none), so
+    both kinds land on the same scale.
+    """
+    lengths = pd.Series(series_lengths, dtype=float)
+    past = pd.Series(past_fit_seconds or {}, dtype=float).reindex(lengths.index)
+
+    known = past.notna() & (lengths > 0)
+    rate = (past[known] / lengths[known]).median() if known.any() else 1.0
+    return past.fillna(lengths * rate)
+
+
+def order_longest_first(series_lengths, past_fit_seconds=None):
+    """SKUs sorted by expected fit cost, most expensive first (ties by name)."""
+    cost = expected_fit_seconds(series_lengths, past_fit_seconds)
+    return (
+        cost.rename("cost")
+        .rename_axis("sku")
+        .reset_index()
+        .sort_values(["cost", "sku"], ascending=[False, True])["sku"]
+        .tolist()
+    )
+
+
+def status_counts(metrics_df):
+    """Number of SKUs per fit outcome, in FIT_STATUSES order."""
+    return metrics_df["fit_status"].value_counts().reindex(FIT_STATUSES, fill_value=0)
@@ -0,0 +1,129 @@
+"""
+Per-SKU series statistics maintained incrementally in PostgreSQL.
+
+public.sku_series_stats holds one row per SKU with the eligibility inputs the
+forecasting stage needs (first_date, last_date, total_units, n_days, span_days), on
+the same grain as vitamarkets.preprocessing: mart rows since HISTORY_START with
+non-negative units, summed to SKU-days. Forecasting reads eligibility from it and pulls
+history only for eligible SKUs instead of scanning the whole mart in pandas.
+
+dbt runs (vitamarkets.pipeline) refresh the table after each build. A refresh only
+aggregates mart days after each SKU's stored last_date and merges them in, so its cost
+follows the new actuals, not the history. That assumes actuals land a whole day at a
+time and past days are not restated; after a backfill or correction, rebuild with
+`--full-refresh`. The ETL step (etl/refresh_actuals.py) replaces the whole mart, so it
+always rebuilds.
+
+Usage:
+    python -m vitamarkets.series_stats [--full-refresh]
+"""
+
+import argparse
+import logging
+
+import pandas as pd
+
+from vitamarkets.config import HISTORY_START
+
+log = logging.getLogger(__name__)
+
+STATS_TABLE = "sku_series_stats"
+
+# Templates over {schema}, which holds both mart_sales_summary and the stats table
+STATS_DDL = f"""
+CREATE TABLE IF NOT EXISTS {{schema}}.{STATS_TABLE} (
+    sku TEXT PRIMARY KEY,
+    first_date DATE NOT NULL,
+    last_date DATE NOT NULL,
+    total_units DOUBLE PRECISION NOT NULL,
+    n_days INTEGER NOT NULL,
+    span_days INTEGER GENERATED ALWAYS AS (last_date - first_date) STORED,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+# New SKU-days (after each SKU's stored last_date) merged into the running stats
+MERGE_NEW_DAYS_SQL = f"""
+WITH new_days AS (
+    SELECT m.sku, m.date::date AS ds, SUM(m.total_units_sold) AS units
+    FROM {{schema}}.mart_sales_summary m
+    LEFT JOIN {{schema}}.{STATS_TABLE} s ON s.sku = m.sku
+    WHERE m.date::date >= DATE '{HISTORY_START}'
+      AND m.total_units_sold >= 0
+      AND (s.last_date IS NULL OR m.date::date > s.last_date)
+    GROUP BY m.sku, m.date::date
+)
+INSERT INTO {{schema}}.{STATS_TABLE} AS s (sku, first_date, last_date, total_units, n_days)
+SELECT sku, MIN(ds), MAX(ds), SUM(units), COUNT(*)
+FROM new_days
+GROUP BY sku
+ON CONFLICT (sku) DO UPDATE SET
+    first_date = LEAST(s.first_date, EXCLUDED.first_date),
+    last_date = GREATEST(s.last_date, EXCLUDED.last_date),
+    total_units = s.total_units + EXCLUDED.total_units,
+    n_days = s.n_days + EXCLUDED.n_days,
+    updated_at = now()
+"""
+
+STATS_QUERY = f"""
+SELECT sku, first_date, last_date, total_units, n_days, span_days
+FROM {{schema}}.{STATS_TABLE}
+ORDER BY sku
+"""
+
+
+def refresh_series_stats(engine, full_refresh=False, schema="public"):
+    """
+    Merge new mart days into sku_series_stats; returns the number of SKUs updated.
+
+    With full_refresh=True (or when the table is new) every row is rebuilt from the
+    whole mart.
+    """
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        conn.execute(text(STATS_DDL.format(schema=schema)))
+        if full_refresh:
+            conn.execute(text(f"TRUNCATE {schema}.{STATS_TABLE}"))
+        updated = conn.execute(text(MERGE_NEW_DAYS_SQL.format(schema=schema))).rowcount
+    log.info(f"   -> {STATS_TABLE}: {updated} SKUs {'rebuilt' if full_refresh else 'updated'}")
+    return updated
+
+
+def load_series_stats(engine, schema="public"):
+    """
+    SKU-indexed stats for select_eligible_skus (the preprocessing.sku_stats columns).
+
+    Builds the table first if it doesn't exist yet, e.g. on a database set up before
+    the ETL step maintained it.
+    """
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        exists = conn.execute(
+            text("SELECT to_regclass(:name)"), {"name": f"{schema}.{STATS_TABLE}"}
+        ).scalar()
+    if not exists:
+        log.info(f"   -> {STATS_TABLE} missing; building it from mart_sales_summary")
+        refresh_series_stats(engine, schema=schema)
+    stats = pd.read_sql(
+        STATS_QUERY.format(schema=schema), engine, parse_dates=["first_date", "last_date"]
+    )
+    return stats.set_index("sku")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh public.sku_series_stats")
+    parser.add_argument(
+        "--full-refresh", action="store_true", help="Rebuild every SKU from the whole mart"
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    from db import get_engine
+
+    refresh_series_stats(get_engine(), full_refresh=args.full_refresh)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Monte Carlo service levels from bootstrapped forecast sample paths.
+
+purchasing.recommend() sizes safety stock from the forecast interval, which assumes
+normal, independent daily errors. simulate() drops that assumption: for every SKU (or
+SKU x channel/country) it draws n_samples demand paths over the lead time as
+
+    demand[t] = max(0, yhat[t] + residual[start + t])
+
+where the residuals (actual - fitted over the SKU's last RESIDUAL_DAYS of history)
+are taken as one contiguous block per sample (a moving-block bootstrap with block =
+lead time), so autocorrelated errors and skew carry over to the simulation. The same
+path works for every engine (Prophet, lite, pooled, seasonal naive), since every run
+writes in-sample fitted rows next to the actuals.
+
+Inventory over the lead time is the starting position minus cumulative demand; with
+demand >= 0 it runs out iff lead-time demand exceeds the position. Per target service
+level (a cycle service level: P(no stockout before the order arrives)) the reorder
+point is that quantile of simulated lead-time demand.
+
+All targets x samples x lead-time days are simulated as NumPy arrays, in chunks of
+targets sized so one chunk's arrays stay under max_bytes.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from vitamarkets.config import (
+    DEFAULT_LEAD_TIME_DAYS,
+    DEFAULT_SERVICE_LEVEL,
+    SIMULATED_SERVICE_LEVELS,
+)
+from vitamarkets.purchasing import (
+    ALL,
+    LOCATION_COLUMNS,
+    future_forecasts,
+    location_keys,
+    position_targets,
+)
+
+SIMULATION_TABLE = "service_level_simulation"
+
+# Most recent in-sample residuals per SKU kept for the bootstrap
+RESIDUAL_DAYS = 365
+
+# Per-chunk budget for the (targets x samples x days) arrays
+MAX_CHUNK_BYTES = 256 * 2**20
+
+# float64 paths + int64 gather index, per simulated day
+_BYTES_PER_DAY = 16
+
+
+def residual_pool(all_forecasts, days=RESIDUAL_DAYS):
+    """
+    In-sample residuals (actual - fitted yhat) of each SKU's last `days` actual days
+    as one flat array in (sku, ds) order. Returns (pool, offsets, lengths), the last
+    two Series indexed by sku.
+    """
+    is_actual = (all_forecasts["type"] == "actual").to_numpy()
+    last_actual = all_forecasts.loc[is_actual].groupby("sku")["ds"].max()
+    recent = (
+        all_forecasts["ds"] > all_forecasts["sku"].map(last_actual) - pd.Timedelta(days=days)
+    ).to_numpy()
+    columns = ["sku", "ds", "yhat"]
+    actuals = all_forecasts.loc[is_actual & recent, columns]
+    fitted = all_forecasts.loc[~is_actual & recent, columns]
+    pairs = actuals.merge(fitted, on=["sku", "ds"], suffixes=("", "_fit"))
+    pairs = pairs.sort_values(["sku", "ds"])
+    pairs = pairs[pairs.groupby("sku").cumcount(ascending=False) < days]
+
+    lengths = pairs.groupby("sku").size()
+    offsets = lengths.cumsum() - lengths
+    pool = (pairs["yhat"] - pairs["yhat_fit"]).to_numpy(dtype=float)
+    return pool, offsets, lengths
+
+
+def _simulate_chunk(yhat, lead_times, pool, offsets, lengths, n_samples, rng):
+    """
+    Lead-time demand (targets x samples) for one chunk. yhat is (targets x days),
+    zero past each target's forecast horizon; offsets/lengths locate each target's
+    residuals in `pool` (length 0 = no residuals, demand = yhat).
+    """
+    k, days = yhat.shape
+    steps = np.arange(days)
+    n = np.maximum(lengths, 1)
+    # Block starts leave room for a whole lead time where the history allows it
+    high = np.maximum(n - lead_times + 1, 1)
+    start = (rng.random((k, n_samples)) * high[:, None]).astype(np.int64)
+
+    # In place: the gather index and the paths are the chunk's two big arrays
+    idx = start[:, :, None] + steps
+    idx %= n[:, None, None]
+    idx += offsets[:, None, None]
+    paths = pool[idx]
+    del idx
+    paths[lengths == 0] = 0.0
+    paths += yhat[:, None, :]
+    np.maximum(paths, 0.0, out=paths)
+    paths *= (steps < lead_times[:, None])[:, None, :]
+    return paths.sum(axis=2)
+
+
+def simulate(
+    all_forecasts,
+    positions,
+    service_levels=SIMULATED_SERVICE_LEVELS,
+    n_samples=1000,
+    by=(),
+    shares=None,
+    lead_time_days=DEFAULT_LEAD_TIME_DAYS,
+    max_bytes=MAX_CHUNK_BYTES,
+    seed=0,
+):
+    """
+    Simulated reorder points at each of `service_levels` for every forecast SKU, or
+    SKU x `by` ("channel"/"country"; `shares` and positions as for
+    purchasing.recommend()).
+
+    Returns (sims, stats). sims has one row per target x service level:
+    mean_lead_time_demand, stockout_pct (chance the current on_hand + on_order runs
+    out within the lead time), reorder_point, safety_stock (reorder point - mean
+    demand), purchase_qty and fill_rate_pct (expected share of lead-time demand met
+    when ordering up to the reorder point). stats has targets, samples, chunks,
+    chunk_mb (array memory per chunk), setup_seconds (residuals, positions),
+    simulate_seconds and sims_per_second (target x sample paths per simulate second).
+    """
+    started = time.perf_counter()
+    keys = location_keys(by)
+    levels = np.asarray(sorted(service_levels), dtype=float)
+    rng = np.random.default_rng(seed)
+
+    future = future_forecasts(all_forecasts)
+    targets = position_targets(
+        future["sku"].unique(), positions, keys, shares, lead_time_days, DEFAULT_SERVICE_LEVEL
+    ).drop(columns="service_level")
+    pool, offsets, lengths = residual_pool(all_forecasts)
+    pool = pool if len(pool) else np.zeros(1)
+
+    horizon = int(targets["lead_time_days"].max()) if len(targets) else 1
+    future = future[future["step"] <= horizon]
+    yhat_by_sku = future.pivot(index="sku", columns="step", values="yhat")
+    yhat_by_sku = yhat_by_sku.reindex(columns=range(1, horizon + 1)).fillna(0.0)
+
+    per_target = n_samples * (horizon * _BYTES_PER_DAY + len(levels) * 8)
+    chunk = max(1, max_bytes // per_target)
+    setup_seconds = time.perf_counter() - started
+    position = (targets["on_hand"] + targets["on_order"]).to_numpy()
+    mean = np.empty(len(targets))
+    stockout = np.empty(len(targets))
+    reorder = np.empty((len(levels), len(targets)))
+    fill = np.empty((len(levels), len(targets)))
+    for lo in range(0, len(targets), chunk):
+        part = targets.iloc[lo : lo + chunk]
+        rows = slice(lo, lo + len(part))
+        skus = part["sku"]
+        demand = _simulate_chunk(
+            yhat_by_sku.loc[skus].to_numpy(),
+            part["lead_time_days"].to_numpy(),
+            pool,
+            offsets.reindex(skus).fillna(0).to_numpy(dtype=np.int64),
+            lengths.reindex(skus).fillna(0).to_numpy(dtype=np.int64),
+            n_samples,
+            rng,
+        )
+        demand *= part["share"].to_numpy()[:, None]
+
+        mean[rows] = demand.mean(axis=1)
+        stockout[rows] = 100 * (demand > position[rows, None]).mean(axis=1)
+        reorder[:, rows] = np.quantile(demand, levels, axis=1)
+        short = np.maximum(demand[None] - reorder[:, rows, None], 0.0).mean(axis=2)
+        fill[:, rows] = 100 * (
+            1 - np.divide(short, mean[rows], out=np.zeros_like(short), where=mean[rows] > 0)
+        )
+
+    base = targets.assign(mean_lead_time_demand=mean, stockout_pct=stockout)
+    sims = pd.concat(
+        [
+            base.assign(
+                service_level=level,
+                reorder_point=reorder[i],
+                safety_stock=reorder[i] - mean,
+                purchase_qty=np.ceil(np.maximum(reorder[i] - position, 0)),
+                fill_rate_pct=fill[i],
+            )
+            for i, level in enumerate(levels)
+        ],
+        ignore_index=True,
+    )
+    for col in set(LOCATION_COLUMNS) - set(keys):
+        sims[col] = ALL
+
+    columns = ["sku", *LOCATION_COLUMNS, "on_hand", "on_order", "lead_time_days"]
+    columns += ["mean_lead_time_demand", "stockout_pct", "service_level", "reorder_point"]
+    columns += ["safety_stock", "purchase_qty", "fill_rate_pct"]
+    simulate_seconds = time.perf_counter() - started - setup_seconds
+    stats = {
+        "targets": len(targets),
+        "samples": n_samples,
+        "chunks": -(-len(targets) // chunk),
+        "chunk_mb": min(chunk, len(targets)) * per_target / 2**20,
+        "setup_seconds": setup_seconds,
+        "simulate_seconds": simulate_seconds,
+        "sims_per_second": len(targets) * n_samples / simulate_seconds,
+    }
+    return sims[columns].sort_values(keys + ["service_level"], ignore_index=True), stats
+
+
+def write_simulation(engine, sims, run_id):
+    """Replace public.service_level_simulation with this run's simulation."""
+    sims.assign(run_id=run_id, created_at=pd.Timestamp.now()).to_sql(
+        SIMULATION_TABLE, engine, schema="public", if_exists="replace", index=False
+    )
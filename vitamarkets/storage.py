@@ -0,0 +1,176 @@
+"""
+Storage backends: where raw data, the mart, run tables and the stable views live.
+
+    postgres   the production database (db.get_engine): raw COPY, dbt for the mart,
+               public.sku_series_stats and KPI rollups (vitamarkets.rollups), run
+               tables + views via vitamarkets.publish
+    duckdb     Parquet files under a local directory queried with embedded DuckDB
+               (vitamarkets.duckdb_store), for runs without a database server
+
+open_backend() returns the same operations for either, each bound to its engine or
+store directory:
+
+    load_raw(csv_path)                  replace vitamarkets_raw with a CSV; rows loaded
+    build_mart(full=False)              rebuild mart_sales_summary (and series stats)
+    series_stats()                      SKU-indexed eligibility stats
+    load_history(skus=None)             mart history (ds, sku, y, is_promo)
+    sku_groups()                        {sku: category}
+    write_run(forecasts, metrics, run_id, use_versioned_tables=True) -> table names
+    publish_views(table_forecasts, table_metrics)
+    read_relation(name)                 every row of a table or view
+
+plus "name" and "engine" (the SQLAlchemy engine, None for duckdb). Tables only the
+Postgres deployment has (fit telemetry, inventory positions, recommendations,
+simulations) are not part of the contract; callers check "engine".
+
+Usage:
+    python -m vitamarkets.storage --backend duckdb --load-raw data.csv --build-mart
+"""
+
+import argparse
+import logging
+import sys
+from functools import partial
+
+import pandas as pd
+
+from vitamarkets.config import ROOT
+
+log = logging.getLogger(__name__)
+
+BACKENDS = ("postgres", "duckdb")
+OPERATIONS = (
+    "load_raw",
+    "build_mart",
+    "series_stats",
+    "load_history",
+    "sku_groups",
+    "write_run",
+    "publish_views",
+    "read_relation",
+)
+
+SAMPLE_CSV = ROOT / "vitamarkets_ultrarealistic_sampledataset.csv"
+
+
+def load_raw(engine, csv_path):
+    """TRUNCATE public.vitamarkets_raw and COPY the CSV in; returns rows loaded."""
+    from vitamarkets.synthetic import RAW_DDL, RAW_TABLE
+
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(RAW_DDL.format(schema="public"))
+        cursor.execute(f"TRUNCATE public.{RAW_TABLE}")
+        with open(csv_path) as f:
+            cursor.copy_expert(f"COPY public.{RAW_TABLE} FROM STDIN WITH (FORMAT csv, HEADER)", f)
+        conn.commit()
+        rows = cursor.rowcount
+    finally:
+        conn.close()
+    log.info(f"   -> Loaded {rows:,} raw rows into public.{RAW_TABLE}")
+    return rows
+
+
+def build_mart(engine, full=False):
+    """dbt run (vitamarkets.dbt_runner), then merge new mart days into stats and rollups."""
+    from vitamarkets.dbt_runner import ensure_deps, run_models
+    from vitamarkets.rollups import refresh_rollups
+    from vitamarkets.series_stats import refresh_series_stats
+
+    ensure_deps()
+    build = run_models(full=full)
+    refresh_series_stats(engine, full_refresh=full)
+    refresh_rollups(engine, full_refresh=full)
+    return build
+
+
+def series_stats(engine):
+    """series_stats.load_series_stats (builds sku_series_stats if missing)."""
+    from vitamarkets.series_stats import load_series_stats
+
+    return load_series_stats(engine)
+
+
+def load_history(engine, skus=None):
+    """forecasting.load_history."""
+    from vitamarkets.forecasting import load_history as load
+
+    return load(engine, skus)
+
+
+def sku_groups(engine):
+    """pooled.load_sku_groups."""
+    from vitamarkets.pooled import load_sku_groups
+
+    return load_sku_groups(engine)
+
+
+def write_run(engine, all_forecasts, metrics_df, run_id, use_versioned_tables=True):
+    """publish.write_run_tables into public."""
+    from vitamarkets.publish import write_run_tables
+
+    return write_run_tables(engine, all_forecasts, metrics_df, run_id, use_versioned_tables)
+
+
+def publish_views(engine, table_forecasts, table_metrics):
+    """publish.publish_views in public."""
+    from vitamarkets.publish import publish_views as publish
+
+    publish(engine, table_forecasts, table_metrics)
+
+
+def read_relation(engine, name):
+    """Every row of public.<name>."""
+    return pd.read_sql(f"SELECT * FROM public.{name}", engine)
+
+
+def open_backend(name="postgres", store_dir=None):
+    """
+    {"name", "engine", <operation>: callable} for the "postgres" or "duckdb" backend.
+
+    store_dir is the duckdb Parquet directory (default config.LOCAL_STORE_DIR).
+    """
+    if name == "postgres":
+        from db import get_engine
+
+        target = engine = get_engine()
+        module = sys.modules[__name__]
+    elif name == "duckdb":
+        from vitamarkets import duckdb_store as module
+        from vitamarkets.config import LOCAL_STORE_DIR
+
+        target, engine = store_dir or LOCAL_STORE_DIR, None
+    else:
+        raise ValueError(f"Unknown storage backend {name!r}; choose from {', '.join(BACKENDS)}")
+
+    backend = {"name": name, "engine": engine}
+    backend.update({op: partial(getattr(module, op), target) for op in OPERATIONS})
+    return backend
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load raw data and build the mart")
+    parser.add_argument("--backend", choices=BACKENDS, default="postgres")
+    parser.add_argument("--store", help="Parquet directory for --backend duckdb")
+    parser.add_argument(
+        "--load-raw",
+        nargs="?",
+        const=str(SAMPLE_CSV),
+        metavar="CSV",
+        help="Replace vitamarkets_raw with this CSV (default: the sample dataset)",
+    )
+    parser.add_argument("--build-mart", action="store_true", help="Rebuild mart_sales_summary")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    backend = open_backend(args.backend, args.store)
+    if args.load_raw:
+        backend["load_raw"](args.load_raw)
+    if args.build_mart:
+        # A fresh raw load may restate past days, so rebuild rather than merge
+        backend["build_mart"](full=bool(args.load_raw))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,599 @@
+"""
+Synthetic vitamarkets_raw data for load testing.
+
+The sample CSV has nine SKUs, one per demand archetype. generate() produces the same
+columns for any number of SKUs, channels, countries, customer segments and years, with
+each SKU drawn from one of ARCHETYPES (assigned round-robin) and its level, trend,
+seasonal peak, launch date, price and channel/country mix jittered around the
+archetype's calibration to the sample data.
+
+Daily demand per SKU is
+
+    mu[d] = level * trend(d) * season(d) * weekend(d) * events(d) * promo(d) * outage(d)
+
+with gamma noise per SKU-day (so cells of the same day move together), split over the
+SKU's channel x country cells by its own mix and drawn as Poisson counts. Every active
+SKU-day has one row per channel x country cell, so the primary key of
+public.vitamarkets_raw (date, sku, channel, country, customer_segment) stays unique;
+the segment is drawn per row. With --channels 1 --countries 1 the grain matches the
+sample CSV. Like the sample, about 0.5% of units_sold and 0.3% of order_value are
+missing (the latter tagged "|missing" in event).
+
+Rows are built as NumPy arrays for a block of SKUs at a time, sized to about
+chunk_rows rows, and streamed to CSV, Parquet (needs pyarrow) or PostgreSQL COPY, so
+memory stays flat however large the output. Generating is cheap (about 2M rows/s per
+core); formatting CSV text for the file or COPY costs about 40x more (roughly 80k rows/s
+per core), so chunks are built and formatted in joblib workers and written in order.
+Output is reproducible for a given seed and chunk_rows, whatever the worker count.
+
+Usage:
+    python -m vitamarkets.synthetic --skus 10000 --out data/synthetic.csv
+    python -m vitamarkets.synthetic --skus 10000 --format parquet --out data/synthetic.parquet
+    python -m vitamarkets.synthetic --skus 500 --years 2 --format copy [--replace]
+"""
+
+import argparse
+import io
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+RAW_TABLE = "vitamarkets_raw"
+
+# Column order of public.vitamarkets_raw and the sample CSV
+RAW_COLUMNS = [
+    "date",
+    "sku",
+    "category",
+    "units_sold",
+    "order_value",
+    "channel",
+    "country",
+    "customer_segment",
+    "cost_per_unit",
+    "margin_pct",
+    "promo_flag",
+    "event",
+    "ad_spend",
+    "web_traffic",
+    "review_score",
+    "discontinued_flag",
+    "launch_date",
+    "discontinue_date",
+    "archetype",
+]
+
+# Same columns as sql/init.sql, without the primary key so bulk COPY stays fast
+RAW_DDL = f"""
+CREATE TABLE IF NOT EXISTS {{schema}}.{RAW_TABLE} (
+    date DATE NOT NULL,
+    sku TEXT NOT NULL,
+    category TEXT,
+    units_sold NUMERIC,
+    order_value NUMERIC,
+    channel TEXT,
+    country TEXT,
+    customer_segment TEXT,
+    cost_per_unit NUMERIC,
+    margin_pct NUMERIC,
+    promo_flag INTEGER,
+    event TEXT,
+    ad_spend NUMERIC,
+    web_traffic NUMERIC,
+    review_score NUMERIC,
+    discontinued_flag INTEGER,
+    launch_date DATE,
+    discontinue_date DATE,
+    archetype TEXT
+)
+"""
+
+# Per-archetype calibration to the sample CSV. level is units per SKU-day at the start
+# before weekend/event/promo lifts (about +15% on average); trend is the yearly change as a fraction of level; season is the amplitude of
+# an annual cycle peaking on day-of-year peak_day; launch/discontinue/outage/cannibal
+# are fractions of the horizon. Optional keys: prime_day (promo events in July),
+# spike (month, lift) with viral_campaign events, launch_campaign (lift over the first
+# 30 days), outage (30 days at zero then 30 at half), cannibal (level drop after it).
+ARCHETYPES = {
+    "growth": {
+        "sku": "Flagship Growth",
+        "category": "Tech",
+        "cost": 80.0,
+        "margin": 0.32,
+        "level": 33.0,
+        "trend": 0.33,
+        "season": 0.2,
+        "peak_day": 100,
+    },
+    "seasonal": {
+        "sku": "Classic Seasonal",
+        "category": "Home",
+        "cost": 22.0,
+        "margin": 0.22,
+        "level": 24.5,
+        "trend": 0.0,
+        "season": 1.1,
+        "peak_day": 100,
+    },
+    "promo": {
+        "sku": "Promo Dependent",
+        "category": "Health",
+        "cost": 6.0,
+        "margin": 0.45,
+        "level": 8.0,
+        "trend": 0.0,
+        "season": 0.1,
+        "peak_day": 190,
+        "promo_rate": 0.08,
+        "promo_lift": (5.0, 9.0),
+        "prime_day": True,
+        "launch": 0.15,
+    },
+    "decline": {
+        "sku": "Slow Decliner",
+        "category": "Toys",
+        "cost": 10.0,
+        "margin": 0.12,
+        "level": 27.0,
+        "trend": -0.2,
+        "season": 0.15,
+        "peak_day": 330,
+        "launch": 0.1,
+    },
+    "viral": {
+        "sku": "Viral Spike",
+        "category": "Apparel",
+        "cost": 17.0,
+        "margin": 0.40,
+        "level": 8.0,
+        "trend": 0.0,
+        "season": 0.1,
+        "peak_day": 45,
+        "spike": (2, 5.0),
+        "launch": 0.28,
+    },
+    "disrupted": {
+        "sku": "Supply Disrupted",
+        "category": "Outdoor",
+        "cost": 25.0,
+        "margin": 0.26,
+        "level": 20.0,
+        "trend": 0.0,
+        "season": 0.4,
+        "peak_day": 160,
+        "outage": 0.58,
+    },
+    "cannibalized": {
+        "sku": "Cannibalized",
+        "category": "Apparel",
+        "cost": 13.0,
+        "margin": 0.33,
+        "level": 10.0,
+        "trend": 0.0,
+        "season": 0.1,
+        "peak_day": 120,
+        "launch": 0.25,
+        "cannibal": 0.6,
+    },
+    "launch": {
+        "sku": "New Launch",
+        "category": "Health",
+        "cost": 50.0,
+        "margin": 0.38,
+        "level": 27.0,
+        "trend": 0.1,
+        "season": 0.1,
+        "peak_day": 100,
+        "launch": 0.56,
+        "launch_campaign": 1.6,
+    },
+    "stable": {
+        "sku": "Discontinued",
+        "category": "Tech",
+        "cost": 35.0,
+        "margin": 0.18,
+        "level": 30.0,
+        "trend": 0.0,
+        "season": 0.1,
+        "peak_day": 100,
+        "discontinue": 0.54,
+    },
+}
+
+# (name, weight); counts past the end of a list get generated names at EXTRA_WEIGHT
+CHANNELS = [
+    ("amazon", 0.33),
+    ("website", 0.34),
+    ("mobile", 0.33),
+    ("retail", 0.15),
+    ("wholesale", 0.1),
+    ("marketplace", 0.1),
+]
+COUNTRIES = [
+    ("US", 0.9),
+    ("CA", 0.1),
+    ("GB", 0.08),
+    ("DE", 0.06),
+    ("AU", 0.05),
+    ("FR", 0.05),
+    ("MX", 0.04),
+    ("JP", 0.04),
+]
+SEGMENTS = [("Family", 0.5), ("Young Pro", 0.34), ("Older Adult", 0.16), ("Student", 0.08)]
+EXTRA_WEIGHT = 0.03
+
+START_DATE = "2021-01-01"
+CHUNK_ROWS = 1_000_000
+
+WEEKEND_LIFT = 1.2
+PROMO_RATE = 0.011
+PROMO_LIFT = (2.0, 7.0)
+HOLIDAY_LIFT = 2.5
+PRIME_DAY_LIFT = 3.0
+CANNIBAL_LOSS = 0.7  # demand kept once a cannibalized SKU's replacement launches
+NOISE_SHAPE = 6.0  # gamma shape of the SKU-day multiplier (CV ~0.4)
+MIX_CONCENTRATION = 50.0  # Dirichlet concentration of each SKU's channel/country mix
+MISSING_UNITS_RATE = 0.002
+MISSING_ORDER_RATE = 0.003  # both units and order_value, tagged "|missing"
+
+# Event labels: base event x campaign suffix x missing suffix (code = 6b + 2c + m)
+_BASE_EVENTS = ["", "holiday", "prime_day"]
+_CAMPAIGNS = ["", "|launch_campaign", "|viral_campaign"]
+EVENT_LABELS = [b + c + m for b in _BASE_EVENTS for c in _CAMPAIGNS for m in ("", "|missing")]
+
+
+def dimension(spec, n, prefix):
+    """First n (names, normalized weights) of a CHANNELS-style list, padded with prefix_k."""
+    names = [name for name, _ in spec[:n]] + [f"{prefix}_{k}" for k in range(len(spec) + 1, n + 1)]
+    weights = np.array([w for _, w in spec[:n]] + [EXTRA_WEIGHT] * max(0, n - len(spec)))
+    return names, weights / weights.sum()
+
+
+def _archetype_spec(name):
+    """ARCHETYPES[name] with every optional key filled in."""
+    spec = ARCHETYPES[name]
+    promo_lo, promo_hi = spec.get("promo_lift", PROMO_LIFT)
+    spike_month, spike_lift = spec.get("spike", (0, 1.0))
+    return {
+        **{k: spec[k] for k in ("sku", "category", "level", "trend", "season", "peak_day")},
+        "cost": spec["cost"],
+        "margin": spec["margin"],
+        "promo_rate": spec.get("promo_rate", PROMO_RATE),
+        "promo_lo": promo_lo,
+        "promo_hi": promo_hi,
+        "prime_day": spec.get("prime_day", False),
+        "spike_month": spike_month,
+        "spike_lift": spike_lift,
+        "launch_lift": spec.get("launch_campaign", 1.0),
+        **{k: spec.get(k, np.nan) for k in ("launch", "discontinue", "outage", "cannibal")},
+    }
+
+
+def plan_skus(n_skus, n_days, cell_weights, seed=0):
+    """
+    One row per SKU with its archetype and jittered demand parameters.
+
+    launch, discontinue, outage and cannibal are day indices into the horizon (-1 when
+    unused); mix holds each SKU's share of demand per channel x country cell.
+    """
+    rng = np.random.default_rng([seed, 0])
+    names = list(ARCHETYPES)
+    archetype = [names[i % len(names)] for i in range(n_skus)]
+    plan = pd.DataFrame([_archetype_spec(name) for name in archetype])
+    plan.insert(1, "archetype", archetype)
+    plan["sku"] = [f"{sku} {i + 1:05d}" for i, sku in enumerate(plan["sku"])]
+
+    plan["level"] *= rng.lognormal(-0.125, 0.5, n_skus)  # mean 1
+    plan["trend"] *= rng.uniform(0.7, 1.3, n_skus)
+    plan["season"] *= rng.uniform(0.8, 1.2, n_skus)
+    plan["peak_day"] += rng.integers(-15, 16, n_skus)
+    # Whole currency units like the sample (bootstrap's to_sql types the column BIGINT)
+    plan["cost"] = (plan["cost"] * rng.uniform(0.8, 1.2, n_skus)).round().clip(1).astype(int)
+    plan["margin"] = (plan["margin"] + rng.uniform(-0.03, 0.03, n_skus)).round(3)
+    for key in ("launch", "discontinue", "outage", "cannibal"):
+        day = ((plan[key] + rng.uniform(-0.04, 0.04, n_skus)).clip(0, 0.95) * n_days).round()
+        plan[key] = day.fillna(-1).astype(int)
+    plan["launch"] = plan["launch"].clip(lower=0)
+    # Every discontinued SKU sells for at least 30 days
+    discontinued = plan["discontinue"] >= 0
+    plan.loc[discontinued, "discontinue"] = np.minimum(
+        np.maximum(plan["discontinue"], plan["launch"] + 30), n_days - 1
+    )[discontinued]
+    plan["mix"] = list(rng.dirichlet(MIX_CONCENTRATION * cell_weights, n_skus))
+    return plan
+
+
+def _daily_means(plan, days, rng):
+    """(SKUs x days) expected units, promo flags and event codes for a block of SKUs."""
+    n_days = len(days)
+    index = np.arange(n_days)
+    years = index / 365.25
+    doy = days.dayofyear.to_numpy()
+    month = days.month.to_numpy()
+    month_day = days.strftime("%m-%d").to_numpy()
+    holiday = ((month_day >= "11-24") & (month_day <= "12-02")) | (month_day == "12-25")
+    prime = (month_day >= "07-09") & (month_day <= "07-12")
+
+    col = {k: plan[k].to_numpy()[:, None] for k in plan.columns if k not in ("mix",)}
+    mu = (
+        col["level"]
+        * np.clip(1 + col["trend"] * years, 0.05, None)
+        * np.clip(1 + col["season"] * np.cos(2 * np.pi * (doy - col["peak_day"]) / 365.25), 0, None)
+        * np.where(days.dayofweek.to_numpy() >= 5, WEEKEND_LIFT, 1.0)
+    )
+    promo = rng.random(mu.shape) < col["promo_rate"]
+    mu = mu * np.where(promo, rng.uniform(col["promo_lo"], col["promo_hi"], mu.shape), 1.0)
+
+    prime_day = prime & col["prime_day"]
+    mu = mu * np.where(holiday, HOLIDAY_LIFT, 1.0) * np.where(prime_day, PRIME_DAY_LIFT, 1.0)
+    base_event = np.where(prime_day, 2, np.where(holiday, 1, 0))
+
+    spike = month == col["spike_month"]
+    mu = mu * np.where(spike, col["spike_lift"], 1.0)
+    since_launch = index - col["launch"]
+    campaign = (since_launch >= 0) & (since_launch < 30) & (col["launch_lift"] > 1)
+    mu = mu * np.where(campaign, col["launch_lift"], 1.0)
+    event = 6 * base_event + 2 * np.where(spike, 2, np.where(campaign, 1, 0))
+
+    since_outage = np.where(col["outage"] >= 0, index - col["outage"], -1)
+    mu = mu * np.where((since_outage >= 0) & (since_outage < 30), 0.0, 1.0)
+    mu = mu * np.where((since_outage >= 30) & (since_outage < 60), 0.5, 1.0)
+    mu = mu * np.where((col["cannibal"] >= 0) & (index >= col["cannibal"]), CANNIBAL_LOSS, 1.0)
+
+    mu = mu * rng.gamma(NOISE_SHAPE, 1 / NOISE_SHAPE, mu.shape)
+    active = (index >= col["launch"]) & ((col["discontinue"] < 0) | (index <= col["discontinue"]))
+    return mu, promo, event, active
+
+
+def _chunk_frame(plan, days, cells, segments, rng):
+    """All rows for a block of SKUs as a DataFrame in RAW_COLUMNS order."""
+    mu, promo, event, active = _daily_means(plan, days, rng)
+    channel_names, channel_of, country_names, country_of = cells
+    segment_names, segment_weights = segments
+    n_cells = len(channel_of)
+
+    sku_idx, day_idx = np.nonzero(active)
+    rows = len(sku_idx) * n_cells
+    mix = np.stack(plan["mix"].to_numpy())
+    cell_mu = mu[sku_idx, day_idx][:, None] * mix[sku_idx]
+    units = rng.poisson(cell_mu.ravel())
+    sku_idx = np.repeat(sku_idx, n_cells)
+    day_idx = np.repeat(day_idx, n_cells)
+    cell = np.tile(np.arange(n_cells), rows // n_cells)
+
+    cost = plan["cost"].to_numpy()[sku_idx]
+    margin = plan["margin"].to_numpy()[sku_idx]
+    order_value = (units * cost / (1 - margin) * rng.normal(1.07, 0.05, rows)).round(2)
+    missing = rng.random(rows) < MISSING_ORDER_RATE
+    order_value[missing] = np.nan
+    # Units are counts: a nullable integer column writes faster than floats
+    units = pd.arrays.IntegerArray(units, missing | (rng.random(rows) < MISSING_UNITS_RATE))
+    event_code = event[sku_idx, day_idx] + missing
+    launch = plan["launch"].to_numpy()
+    discontinue = plan["discontinue"].to_numpy()
+
+    date_labels = days.strftime("%Y-%m-%d")
+    sku_dates = np.append(date_labels.to_numpy(), None)
+
+    def categorical(codes, labels):
+        return pd.Categorical.from_codes(codes, categories=pd.Index(labels))
+
+    return pd.DataFrame(
+        {
+            "date": pd.Categorical.from_codes(day_idx, categories=date_labels, ordered=True),
+            "sku": categorical(sku_idx, plan["sku"]),
+            "category": pd.Categorical(plan["category"]).take(sku_idx),
+            "units_sold": units,
+            "order_value": order_value,
+            "channel": categorical(channel_of[cell], channel_names),
+            "country": categorical(country_of[cell], country_names),
+            "customer_segment": categorical(
+                rng.choice(len(segment_names), rows, p=segment_weights), segment_names
+            ),
+            "cost_per_unit": cost,
+            "margin_pct": margin,
+            "promo_flag": promo[sku_idx, day_idx].astype(np.int8),
+            "event": categorical(np.where(event_code == 0, -1, event_code), EVENT_LABELS),
+            "ad_spend": rng.normal(296, 90, rows).clip(0).round(2),
+            "web_traffic": rng.normal(1100, 210, rows).clip(0).round(1),
+            "review_score": rng.normal(4.3, 0.12, rows).clip(1, 5).round(2),
+            "discontinued_flag": (day_idx == discontinue[sku_idx]).astype(np.int8),
+            "launch_date": sku_dates[launch][sku_idx],
+            "discontinue_date": sku_dates[discontinue][sku_idx],
+            "archetype": pd.Categorical(plan["archetype"]).take(sku_idx),
+        }
+    )
+
+
+def _chunk(skus, days, cells, segments, seed, first, as_csv):
+    """One generate() chunk; its random stream depends only on seed and its first SKU."""
+    frame = _chunk_frame(skus, days, cells, segments, np.random.default_rng([seed, 1, first]))
+    return (len(frame), frame.to_csv(header=False, index=False)) if as_csv else frame
+
+
+def generate(
+    n_skus,
+    channels=3,
+    countries=2,
+    segments=3,
+    years=4,
+    start=START_DATE,
+    chunk_rows=CHUNK_ROWS,
+    seed=0,
+    n_jobs=1,
+    as_csv=False,
+):
+    """
+    Yield chunks of about chunk_rows rows (a block of whole SKUs each), in order.
+
+    Chunks are RAW_COLUMNS DataFrames, or with as_csv=True (rows, CSV text without a
+    header), which is what the CSV and COPY writers need: formatting text costs far
+    more than generating the rows, so with n_jobs > 1 (-1 for every core) both run in
+    joblib workers.
+    """
+    days = pd.date_range(start, pd.Timestamp(start) + pd.DateOffset(years=years), inclusive="left")
+    channel_names, channel_weights = dimension(CHANNELS, channels, "channel")
+    country_names, country_weights = dimension(COUNTRIES, countries, "country")
+    cells = (
+        channel_names,
+        np.repeat(np.arange(channels), countries),
+        country_names,
+        np.tile(np.arange(countries), channels),
+    )
+    plan = plan_skus(n_skus, len(days), np.outer(channel_weights, country_weights).ravel(), seed)
+    block = max(1, chunk_rows // (len(days) * channels * countries))
+    tasks = (
+        (
+            plan.iloc[first : first + block].reset_index(drop=True),
+            days,
+            cells,
+            dimension(SEGMENTS, segments, "segment"),
+            seed,
+            first,
+            as_csv,
+        )
+        for first in range(0, n_skus, block)
+    )
+    if n_jobs == 1:
+        yield from (_chunk(*task) for task in tasks)
+        return
+
+    from joblib import Parallel, delayed
+
+    yield from Parallel(n_jobs=n_jobs, return_as="generator")(
+        delayed(_chunk)(*task) for task in tasks
+    )
+
+
+def _progress(chunks):
+    """Pass generate() chunks through, logging cumulative rows and throughput."""
+    started, rows = time.perf_counter(), 0
+    for chunk in chunks:
+        yield chunk
+        rows += chunk[0] if isinstance(chunk, tuple) else len(chunk)
+        elapsed = time.perf_counter() - started
+        log.info(f"   -> {rows:,} rows ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def write_csv(chunks, path):
+    """Stream generate(as_csv=True) chunks to one CSV with the sample's header."""
+    rows = 0
+    with open(path, "w", newline="") as f:
+        f.write(",".join(RAW_COLUMNS) + "\n")
+        for n, text in _progress(chunks):
+            f.write(text)
+            rows += n
+    return rows
+
+
+def write_parquet(frames, path):
+    """Stream generate() frames to one Parquet file, a row group per chunk."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from e
+
+    rows, writer = 0, None
+    try:
+        for frame in _progress(frames):
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                # Chunks carry their own categories, so store text columns as plain strings
+                schema = pa.schema(
+                    pa.field(f.name, pa.string())
+                    if pa.types.is_dictionary(f.type) or pa.types.is_null(f.type)
+                    else f
+                    for f in table.schema
+                )
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(table.cast(schema))
+            rows += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def copy_rows(engine, chunks, schema="public", replace=False):
+    """
+    COPY generate(as_csv=True) chunks into {schema}.vitamarkets_raw in one transaction.
+
+    Creates the table (without the init.sql primary key) if it doesn't exist; with
+    replace=True it is truncated first. Returns the row count.
+    """
+    rows = 0
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(RAW_DDL.format(schema=schema))
+        if replace:
+            cursor.execute(f"TRUNCATE {schema}.{RAW_TABLE}")
+        copy_sql = (
+            f"COPY {schema}.{RAW_TABLE} ({', '.join(RAW_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        )
+        for n, text in _progress(chunks):
+            cursor.copy_expert(copy_sql, io.StringIO(text))
+            rows += n
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic vitamarkets_raw data")
+    parser.add_argument("--skus", type=int, default=len(ARCHETYPES), help="Number of SKUs")
+    parser.add_argument("--channels", type=int, default=3, help="Channels per SKU")
+    parser.add_argument("--countries", type=int, default=2, help="Countries per SKU")
+    parser.add_argument("--segments", type=int, default=3, help="Customer segments")
+    parser.add_argument("--years", type=int, default=4, help="Years of daily history")
+    parser.add_argument("--start", default=START_DATE, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--format", choices=["csv", "parquet", "copy"], default="csv")
+    parser.add_argument("--out", help="Output file for csv/parquet")
+    parser.add_argument("--schema", default="public", help="Target schema for --format copy")
+    parser.add_argument(
+        "--replace", action="store_true", help="Truncate vitamarkets_raw before COPY"
+    )
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows per chunk")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes (-1 = all cores)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+    if args.format != "copy" and not args.out:
+        parser.error(f"--out is required for --format {args.format}")
+
+    frames = generate(
+        args.skus,
+        channels=args.channels,
+        countries=args.countries,
+        segments=args.segments,
+        years=args.years,
+        start=args.start,
+        chunk_rows=args.chunk_rows,
+        seed=args.seed,
+        n_jobs=args.n_jobs,
+        as_csv=args.format != "parquet",
+    )
+    started = time.perf_counter()
+    if args.format == "csv":
+        rows = write_csv(frames, args.out)
+    elif args.format == "parquet":
+        rows = write_parquet(frames, args.out)
+    else:
+        from db import get_engine
+
+        rows = copy_rows(get_engine(), frames, schema=args.schema, replace=args.replace)
+    target = args.out or f"{args.schema}.{RAW_TABLE}"
+    log.info(f"Wrote {rows:,} rows to {target} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
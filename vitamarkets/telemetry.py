@@ -0,0 +1,213 @@
+"""
+Per-SKU fit telemetry for capacity planning.
+
+Every forecast_sku() outcome (and every batched lite/pooled/cheap result) carries these
+keys in its metrics dict next to fit_seconds/python_seconds:
+
+    optimize_seconds      time in Prophet.fit (cmdstan optimize), summed over the SKU's
+                          holdout + full fits and any retry
+    predict_seconds       time in Prophet.predict, summed likewise
+    optimizer_iterations  optimizer iterations, summed likewise (from cmdstan's output)
+    optimizer_status      how the last successful optimization terminated
+    worker_id             host:pid:thread that ran the fit
+    peak_rss_mb           that worker's peak RSS after the fit (a high-water mark for the
+                          worker process, so it bounds per-worker memory, not per-SKU)
+    child_peak_rss_mb     peak RSS of the worker's finished child processes (cmdstan)
+
+Batched engines fit many SKUs at once, so they leave the per-fit keys empty. After a
+run is published, write_telemetry() appends one row per SKU to
+public.forecast_fit_telemetry (keyed by run_id, sku) in one bulk insert, and
+v_forecast_fit_telemetry summarizes each run: fit time percentiles, seconds per 1k
+observations, iterations, peak memory and the slowest SKUs.
+"""
+
+import math
+import os
+import re
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+
+from vitamarkets.profiling import rss_peak_mb
+
+TELEMETRY_TABLE = "forecast_fit_telemetry"
+TELEMETRY_VIEW = "v_forecast_fit_telemetry"
+SLOWEST_SKUS = 10
+
+TELEMETRY_KEYS = [
+    "optimize_seconds",
+    "predict_seconds",
+    "optimizer_iterations",
+    "optimizer_status",
+    "worker_id",
+    "peak_rss_mb",
+    "child_peak_rss_mb",
+]
+
+# Table columns, in order; n_obs is n_train + n_test from the metrics row
+TELEMETRY_COLUMNS = [
+    "run_id",
+    "sku",
+    "model",
+    "fit_status",
+    "grain",
+    "n_obs",
+    "fit_seconds",
+    "python_seconds",
+    *TELEMETRY_KEYS,
+]
+
+# Templates over {schema}
+TELEMETRY_DDL = f"""
+CREATE TABLE IF NOT EXISTS {{schema}}.{TELEMETRY_TABLE} (
+    run_id TEXT NOT NULL,
+    sku TEXT NOT NULL,
+    model TEXT,
+    fit_status TEXT NOT NULL,
+    grain TEXT,
+    n_obs INTEGER,
+    fit_seconds DOUBLE PRECISION,
+    python_seconds DOUBLE PRECISION,
+    optimize_seconds DOUBLE PRECISION,
+    predict_seconds DOUBLE PRECISION,
+    optimizer_iterations INTEGER,
+    optimizer_status TEXT,
+    worker_id TEXT,
+    peak_rss_mb DOUBLE PRECISION,
+    child_peak_rss_mb DOUBLE PRECISION,
+    recorded_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (run_id, sku)
+)
+"""
+
+TELEMETRY_VIEW_SQL = f"""
+CREATE OR REPLACE VIEW {{schema}}.{TELEMETRY_VIEW} AS
+SELECT
+    run_id,
+    MIN(recorded_at) AS recorded_at,
+    COUNT(*) AS skus,
+    COUNT(DISTINCT worker_id) AS workers,
+    SUM(n_obs) AS total_obs,
+    SUM(fit_seconds) AS total_fit_seconds,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY fit_seconds) AS p50_fit_seconds,
+    percentile_cont(0.9) WITHIN GROUP (ORDER BY fit_seconds) AS p90_fit_seconds,
+    percentile_cont(0.99) WITHIN GROUP (ORDER BY fit_seconds) AS p99_fit_seconds,
+    MAX(fit_seconds) AS max_fit_seconds,
+    1000 * SUM(fit_seconds) / NULLIF(SUM(n_obs), 0) AS fit_seconds_per_1k_obs,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY predict_seconds) AS p50_predict_seconds,
+    percentile_cont(0.9) WITHIN GROUP (ORDER BY predict_seconds) AS p90_predict_seconds,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY optimizer_iterations) AS p50_iterations,
+    MAX(optimizer_iterations) AS max_iterations,
+    MAX(peak_rss_mb) AS max_peak_rss_mb,
+    MAX(child_peak_rss_mb) AS max_child_peak_rss_mb,
+    (ARRAY_AGG(sku ORDER BY fit_seconds DESC NULLS LAST))[1:{SLOWEST_SKUS}] AS slowest_skus
+FROM {{schema}}.{TELEMETRY_TABLE}
+GROUP BY run_id
+"""
+
+# cmdstan optimize stdout: LBFGS/BFGS progress rows start with the iteration number,
+# Newton prints "Iteration  N. Log joint probability = ..."
+_ITERATION_ROW = re.compile(r"^\s*(\d+)\s+-?[\d.]", re.MULTILINE)
+_NEWTON_ITERATION = re.compile(r"^Iteration\s+(\d+)\.", re.MULTILINE)
+_TERMINATED = re.compile(r"Optimization terminated (normally|with error):\s*\n?\s*(.*)")
+
+
+def worker_id():
+    """host:pid:thread of the code calling it (unique per loky worker or pool thread)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def parse_optimizer_output(stdout):
+    """(iterations, status) from cmdstan optimize console output; None where absent."""
+    newton = [int(n) for n in _NEWTON_ITERATION.findall(stdout)]
+    rows = [int(n) for n in _ITERATION_ROW.findall(stdout)] + newton
+    # Newton prints no termination message
+    status = "newton" if newton else None
+    terminated = _TERMINATED.search(stdout)
+    if terminated:
+        outcome, detail = terminated.groups()
+        detail = detail.strip().removeprefix("Convergence detected: ")
+        status = detail or ("converged" if outcome == "normally" else "error")
+    return (max(rows) if rows else None), status
+
+
+def record_fit(telemetry, model, optimize_seconds, predict_seconds):
+    """Add one Prophet fit + predict (and its optimizer output) to a SKU's telemetry."""
+    telemetry["optimize_seconds"] = telemetry.get("optimize_seconds", 0.0) + optimize_seconds
+    telemetry["predict_seconds"] = telemetry.get("predict_seconds", 0.0) + predict_seconds
+    try:
+        stdout_file = model.stan_backend.stan_fit.runset.stdout_files[0]
+        with open(stdout_file) as f:
+            iterations, status = parse_optimizer_output(f.read())
+    except (AttributeError, IndexError, OSError):
+        iterations, status = None, None
+    if iterations is not None:
+        telemetry["optimizer_iterations"] = telemetry.get("optimizer_iterations", 0) + iterations
+    telemetry["optimizer_status"] = status
+
+
+def fit_telemetry(telemetry=None):
+    """All TELEMETRY_KEYS for a metrics dict: the recorded fits plus worker and memory."""
+    telemetry = telemetry or {}
+    return {
+        "optimize_seconds": telemetry.get("optimize_seconds", np.nan),
+        "predict_seconds": telemetry.get("predict_seconds", np.nan),
+        "optimizer_iterations": telemetry.get("optimizer_iterations", np.nan),
+        "optimizer_status": telemetry.get("optimizer_status"),
+        "worker_id": worker_id(),
+        "peak_rss_mb": rss_peak_mb(),
+        "child_peak_rss_mb": rss_peak_mb("children"),
+    }
+
+
+def telemetry_frame(metrics_df, run_id):
+    """One TELEMETRY_COLUMNS row per SKU from a run's metrics (missing keys stay NULL)."""
+    frame = metrics_df.reindex(columns=TELEMETRY_COLUMNS).assign(run_id=run_id)
+    frame["n_obs"] = metrics_df["n_train"] + metrics_df["n_test"]
+    frame["optimizer_iterations"] = frame["optimizer_iterations"].astype("Int64")
+    return frame
+
+
+def write_telemetry(engine, metrics_df, run_id, schema="public"):
+    """
+    Replace run_id's rows in forecast_fit_telemetry with one bulk insert; returns the row
+    count. Creates the table and summary view on first use.
+    """
+    from sqlalchemy import text
+
+    frame = telemetry_frame(metrics_df, run_id)
+    with engine.begin() as conn:
+        conn.execute(text(TELEMETRY_DDL.format(schema=schema)))
+        conn.execute(text(TELEMETRY_VIEW_SQL.format(schema=schema)))
+        conn.execute(
+            text(f"DELETE FROM {schema}.{TELEMETRY_TABLE} WHERE run_id = :run_id"),
+            {"run_id": run_id},
+        )
+        frame.to_sql(
+            TELEMETRY_TABLE,
+            conn,
+            schema=schema,
+            if_exists="append",
+            index=False,
+            method="multi",
+            chunksize=1000,
+        )
+    return len(frame)
+
+
+def describe(metrics_df, top=3):
+    """One-line fit time summary of a run's metrics for the log."""
+    seconds = pd.to_numeric(metrics_df["fit_seconds"], errors="coerce").dropna()
+    if seconds.empty:
+        return "no fit times recorded"
+    p50, p90 = seconds.quantile([0.5, 0.9])
+    slowest = metrics_df.loc[seconds.nlargest(top).index]
+    peak = pd.to_numeric(metrics_df.get("peak_rss_mb", pd.Series()), errors="coerce").max()
+    return (
+        f"fit p50 {p50:.1f}s, p90 {p90:.1f}s, max {seconds.max():.1f}s"
+        + ("" if math.isnan(peak) else f", worker peak RSS {peak:.0f} MB")
+        + "; slowest: "
+        + ", ".join(f"{r.sku} ({r.fit_seconds:.1f}s)" for r in slowest.itertuples())
+    )
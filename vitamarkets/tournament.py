@@ -0,0 +1,148 @@
+"""
+Cheap-first model tournament.
+
+Most SKUs don't need Prophet: a stable series is forecast as well by a weekday profile
+or the batched linear engine. Before any Prophet fit, every SKU is scored on the holdout
+window by cheap candidates that run vectorized over all SKUs at once:
+
+    seasonal_naive  weekday profile of the last 4 weeks (baselines.seasonal_naive_panel)
+    lite            batched ridge approximation of Prophet (vitamarkets.prophet_lite)
+
+A SKU whose best cheap holdout MAPE is within `max_mape` is published from that winner
+with fit_status "cheap"; only the rest are fitted with Prophet. The winning model is
+recorded in metrics["model"]. Select with `forecast_prophet_v2.py --model tournament`.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from vitamarkets import prophet_lite
+from vitamarkets.baselines import seasonal_naive_panel
+from vitamarkets.resources import DEFAULT_FIT_SECONDS
+
+CANDIDATES = ("seasonal_naive", "lite")
+
+# Holdout MAPE (%) a cheap model must reach for the SKU to skip Prophet
+DEFAULT_MAX_MAPE = 20.0
+
+
+def _last_row(mask):
+    """Index of the last True row per column (-1 if none)."""
+    return np.where(mask.any(axis=0), mask.shape[0] - 1 - np.argmax(mask[::-1], axis=0), -1)
+
+
+def candidate_forecasts(panel, holidays_df):
+    """
+    {candidate: (forecast, holdout)} for every SKU of a prepare_panel() result.
+
+    forecast is fitted on the full history, holdout on the history up to the holdout
+    cutoff; each is a (yhat, lower, upper) tuple of calendar x SKU matrices.
+    """
+    Y, Z, dates = panel["Y"], panel["Z"], panel["dates"]
+    observed, train_mask = panel["observed"], panel["train_mask"]
+
+    X, penalty = prophet_lite.design_matrix(dates, panel["history_end"], holidays_df)
+    logY = np.log1p(np.nan_to_num(Y))
+    width = prophet_lite.INTERVAL_WIDTH
+    return {
+        "seasonal_naive": (
+            seasonal_naive_panel(Y, dates, _last_row(observed)),
+            seasonal_naive_panel(Y, dates, _last_row(train_mask)),
+        ),
+        "lite": (
+            prophet_lite.fit_predict(X, logY, observed, Z, penalty, width),
+            prophet_lite.fit_predict(X, logY, train_mask, Z, penalty, width),
+        ),
+    }
+
+
+def score_candidates(panel, candidates, max_mape=DEFAULT_MAX_MAPE):
+    """
+    Holdout MAPE per SKU and candidate, the best candidate and whether Prophet is needed.
+
+    Returns a DataFrame indexed by sku with one mape_<candidate> column per candidate,
+    best_model, best_mape and needs_prophet.
+    """
+    mape = pd.DataFrame(
+        {
+            f"mape_{name}": prophet_lite.holdout_metrics(panel["test"], *holdout)["test_mape_pct"]
+            for name, (_, holdout) in candidates.items()
+        }
+    ).reindex(panel["skus"])
+    scores = mape.copy()
+    scores["best_model"] = mape.fillna(np.inf).idxmin(axis=1).str.removeprefix("mape_")
+    scores["best_mape"] = mape.min(axis=1)
+    scores["needs_prophet"] = ~(scores["best_mape"] <= max_mape)
+    return scores.rename_axis("sku")
+
+
+def forecast_cheap(df, holidays_df, run_id, max_mape=DEFAULT_MAX_MAPE):
+    """
+    Run the cheap stage of the tournament for every SKU in `df` (ds, sku, y, is_promo).
+
+    Returns (results, prophet_skus, scores, failed): (combined_df, metrics_dict) for
+    SKUs won by a cheap model, the SKUs that still need Prophet, score_candidates()
+    output and reasons for SKUs with too little data.
+    """
+    started = time.perf_counter()
+    panel = prophet_lite.prepare_panel(df)
+    if not len(panel["skus"]):
+        return [], [], pd.DataFrame(), panel["failed"]
+
+    candidates = candidate_forecasts(panel, holidays_df)
+    scores = score_candidates(panel, candidates, max_mape)
+
+    # Per SKU, take every matrix column from its winning candidate
+    winner = scores["best_model"].to_numpy()
+    forecast, holdout = candidates[CANDIDATES[0]]
+    for name in CANDIDATES[1:]:
+        won = (winner == name)[None, :]
+        forecast = tuple(np.where(won, new, old) for new, old in zip(candidates[name][0], forecast))
+        holdout = tuple(np.where(won, new, old) for new, old in zip(candidates[name][1], holdout))
+
+    prophet_skus = scores.index[scores["needs_prophet"]].tolist()
+    results = prophet_lite.assemble_results(
+        panel,
+        forecast,
+        holdout,
+        run_id,
+        "cheap",
+        time.perf_counter() - started,
+        skip=set(prophet_skus),
+        model=scores["best_model"].to_dict(),
+    )
+    return results, prophet_skus, scores, panel["failed"]
+
+
+def summarize(scores, cheap_seconds, prophet_fit_seconds, n_workers=1, past_fit_seconds=None):
+    """
+    Share of SKUs that skipped Prophet and the wall time that saved.
+
+    The Prophet cost of a skipped SKU is estimated from this run's Prophet fits, else
+    past fit times, else resources.DEFAULT_FIT_SECONDS, and spread over `n_workers`.
+    """
+    n_skus = len(scores)
+    n_skipped = int((~scores["needs_prophet"]).sum()) if n_skus else 0
+    measured = pd.Series(prophet_fit_seconds, dtype=float).dropna()
+    past = pd.Series(past_fit_seconds or {}, dtype=float)
+    if len(measured):
+        per_sku = measured.median()
+    elif len(past):
+        per_sku = past.median()
+    else:
+        per_sku = DEFAULT_FIT_SECONDS
+
+    avoided = n_skipped * per_sku / max(n_workers, 1)
+    return {
+        "skus": n_skus,
+        "skipped_prophet": n_skipped,
+        "skipped_share_pct": round(100 * n_skipped / n_skus, 1) if n_skus else 0.0,
+        "winners": scores.loc[~scores["needs_prophet"], "best_model"].value_counts().to_dict()
+        if n_skus
+        else {},
+        "cheap_stage_seconds": round(cheap_seconds, 2),
+        "est_prophet_seconds_per_sku": round(float(per_sku), 2),
+        "est_wall_seconds_saved": round(avoided - cheap_seconds, 1),
+    }
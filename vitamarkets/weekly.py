@@ -0,0 +1,144 @@
+"""
+Weekly-grain Prophet fits with daily disaggregation.
+
+Prophet's fit and predict cost grow with the number of rows, and for many SKUs daily
+noise adds cost without improving a 90-day horizon. In weekly mode a SKU's history is
+aggregated to 7-day buckets (anchored on the last training day, so the final bucket is
+complete), Prophet fits and forecasts ~7x fewer points without weekly seasonality, and
+each week is split back to days with the SKU's day-of-week profile. Output is daily and
+matches prophet_fit_predict(), so v_forecast_daily_latest is unchanged.
+
+Selected per SKU with `forecast_prophet_v2.py --weekly-skus SKU,SKU` (or `all`);
+metrics rows record the grain in metrics["grain"].
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+# Weeks of training history used to estimate each SKU's day-of-week profile
+PROFILE_WEEKS = 52
+
+INTERVAL_WIDTH = 0.80
+
+
+def week_start(ds, anchor):
+    """First day of the 7-day bucket holding each date; buckets end on `anchor`."""
+    ds = pd.to_datetime(pd.Series(ds))
+    weeks_back = (anchor - ds).dt.days // 7
+    return anchor - pd.to_timedelta(7 * weeks_back + 6, unit="D")
+
+
+def daily_values(train):
+    """One row per day: mean y of duplicate rows (and max is_promo, if present)."""
+    agg = {"y": "mean"}
+    if "is_promo" in train.columns:
+        agg["is_promo"] = "max"
+    return train.groupby("ds", as_index=False).agg(agg).sort_values("ds")
+
+
+def to_weekly(daily, anchor):
+    """
+    Weekly buckets of a daily_values() frame.
+
+    y is 7x the mean of the observed days (so gaps don't bias a week low); is_promo is
+    the share of promo days.
+    """
+    agg = {"y": "mean"}
+    if "is_promo" in daily.columns:
+        agg["is_promo"] = "mean"
+    weekly = (
+        daily.assign(ds=week_start(daily["ds"], anchor).to_numpy())
+        .groupby("ds", as_index=False)
+        .agg(agg)
+    )
+    weekly["y"] *= 7
+    return weekly
+
+
+def weekly_holidays(holidays_df, anchor):
+    """Holiday calendar on weekly buckets: every day of a holiday window marks its week."""
+    if holidays_df is None or holidays_df.empty:
+        return holidays_df
+    days = [
+        holidays_df.assign(ds=holidays_df["ds"] + pd.Timedelta(days=offset))[
+            (offset >= holidays_df["lower_window"]) & (offset <= holidays_df["upper_window"])
+        ]
+        for offset in range(
+            int(holidays_df["lower_window"].min()), int(holidays_df["upper_window"].max()) + 1
+        )
+    ]
+    weeks = pd.concat(days)[["holiday", "ds"]]
+    weeks["ds"] = week_start(weeks["ds"], anchor).to_numpy()
+    return weeks.drop_duplicates().assign(lower_window=0, upper_window=0)
+
+
+def dow_profile(daily, anchor, weeks=PROFILE_WEEKS):
+    """
+    Day-of-week multipliers (mean 1) from the last `weeks` weeks before `anchor`.
+
+    Each day is divided by its week's mean day; weekdays without data get 1.
+    """
+    recent = daily[daily["ds"] > anchor - pd.Timedelta(weeks=weeks)]
+    week = week_start(recent["ds"], anchor).to_numpy()
+    week_mean = recent.groupby(week)["y"].transform("mean").to_numpy()
+    ratio = pd.Series(
+        np.divide(
+            recent["y"].to_numpy(), week_mean, out=np.full(len(recent), np.nan), where=week_mean > 0
+        ),
+        index=recent["ds"].dt.dayofweek.to_numpy(),
+    )
+    profile = ratio.groupby(level=0).mean().reindex(range(7)).fillna(1.0).to_numpy()
+    return profile / profile.mean() if profile.mean() > 0 else np.ones(7)
+
+
+def weekly_fit_predict(
+    train, future, holidays_df, has_promo, fit_kwargs=None, telemetry=None, predict_seed=None
+):
+    """
+    prophet_fit_predict() at weekly grain: fit on weekly buckets, return daily rows.
+
+    Daily intervals combine the weekly forecast interval (split like the point forecast)
+    with the residual quantiles of the day-of-week split in the training data.
+    """
+    from vitamarkets.forecasting import make_prophet, prophet_predict
+    from vitamarkets.telemetry import record_fit
+
+    anchor = train["ds"].max()
+    daily = daily_values(train)
+    weekly = to_weekly(daily, anchor)
+    profile = dow_profile(daily, anchor)
+
+    fit_cols = ["ds", "y"] + (["is_promo"] if has_promo else [])
+    m = make_prophet(weekly_holidays(holidays_df, anchor), has_promo, weekly_seasonality=False)
+    started = time.perf_counter()
+    m.fit(weekly[fit_cols], **(fit_kwargs or {}))
+    fitted = time.perf_counter()
+
+    ds = pd.to_datetime(future["ds"]).reset_index(drop=True)
+    buckets = future.assign(ds=week_start(ds, anchor).to_numpy())
+    weekly_future = buckets.groupby("ds", as_index=False)[fit_cols[2:]].mean()
+    predicted = prophet_predict(m, weekly_future, predict_seed).set_index("ds")
+    if telemetry is not None:
+        record_fit(telemetry, m, fitted - started, time.perf_counter() - fitted)
+
+    # Residuals of splitting each actual week with the profile
+    split = week_start(daily["ds"], anchor).map(weekly.set_index("ds")["y"]).to_numpy() / 7
+    resid = daily["y"].to_numpy() - split * profile[daily["ds"].dt.dayofweek.to_numpy()]
+    alpha = (1 - INTERVAL_WIDTH) / 2
+    q_lo, q_hi = np.quantile(resid, [alpha, 1 - alpha])
+
+    share = profile[ds.dt.dayofweek.to_numpy()] / 7
+    week = predicted.reindex(buckets["ds"])
+    yhat = week["yhat"].to_numpy() * share
+    below = (week["yhat"] - week["yhat_lower"]).to_numpy() * share
+    above = (week["yhat_upper"] - week["yhat"]).to_numpy() * share
+    return pd.DataFrame(
+        {
+            "ds": ds,
+            "yhat": yhat,
+            "yhat_lower": (yhat - np.hypot(below, q_lo)).clip(min=0),
+            "yhat_upper": yhat + np.hypot(above, q_hi),
+        }
+    )
@@ -0,0 +1,670 @@
+"""
+Multi-node forecasting through a PostgreSQL job queue.
+
+A coordinator enqueues one job per eligible SKU for a run; any number of worker
+processes, on any host that can reach the database, claim batches with
+`SELECT ... FOR UPDATE SKIP LOCKED`, keep their leases alive with a heartbeat thread,
+fit, and write results back in the same transaction that marks the job done.
+
+    pending --claim--> running --complete--> done
+                          |
+                          +-- lease expired (worker crashed) --> claimable again
+                          +-- lease expired after MAX_ATTEMPTS  --> failed
+
+Views are only flipped once every job is done or failed (run-completion barrier), and
+only one coordinator can publish a run.
+
+Usage:
+    python -m vitamarkets.work_queue enqueue [--run-id RUN_ID]
+    python -m vitamarkets.work_queue worker --run-id RUN_ID [--processes 4]
+    python -m vitamarkets.work_queue status --run-id RUN_ID
+    python -m vitamarkets.work_queue publish --run-id RUN_ID [--wait]
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+from sqlalchemy import text
+
+from vitamarkets.scheduling import DEFAULT_FIT_TIMEOUT
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 4
+DEFAULT_LEASE_SECONDS = 300
+HEARTBEAT_SECONDS = 60
+POLL_SECONDS = 10
+MAX_ATTEMPTS = 3
+
+QUEUE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS public.forecast_runs (
+        run_id TEXT PRIMARY KEY,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        n_jobs INTEGER NOT NULL,
+        params JSONB NOT NULL DEFAULT '{}'::jsonb,
+        status TEXT NOT NULL DEFAULT 'running',
+        published_at TIMESTAMPTZ
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS public.forecast_jobs (
+        run_id TEXT NOT NULL REFERENCES public.forecast_runs (run_id) ON DELETE CASCADE,
+        sku TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        expected_cost DOUBLE PRECISION NOT NULL DEFAULT 0,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker_id TEXT,
+        lease_expires_at TIMESTAMPTZ,
+        heartbeat_at TIMESTAMPTZ,
+        finished_at TIMESTAMPTZ,
+        fit_status TEXT,
+        error TEXT,
+        PRIMARY KEY (run_id, sku)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_forecast_jobs_claim
+        ON public.forecast_jobs (run_id, status, expected_cost DESC)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS public.forecast_queue_forecasts (
+        run_id TEXT NOT NULL,
+        sku TEXT NOT NULL,
+        ds TIMESTAMP NOT NULL,
+        yhat DOUBLE PRECISION,
+        yhat_lower DOUBLE PRECISION,
+        yhat_upper DOUBLE PRECISION,
+        type TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_forecast_queue_forecasts_run_sku
+        ON public.forecast_queue_forecasts (run_id, sku)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS public.forecast_queue_metrics (
+        run_id TEXT NOT NULL,
+        sku TEXT NOT NULL,
+        metrics JSONB NOT NULL,
+        PRIMARY KEY (run_id, sku)
+    )
+    """,
+]
+
+CLAIM_SQL = """
+WITH claimable AS (
+    SELECT run_id, sku
+    FROM public.forecast_jobs
+    WHERE run_id = :run_id
+      AND attempts < :max_attempts
+      AND (status = 'pending' OR (status = 'running' AND lease_expires_at < now()))
+    ORDER BY expected_cost DESC, sku
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE public.forecast_jobs j
+SET status = 'running',
+    worker_id = :worker_id,
+    attempts = j.attempts + 1,
+    heartbeat_at = now(),
+    lease_expires_at = now() + make_interval(secs => :lease_seconds)
+FROM claimable c
+WHERE j.run_id = c.run_id AND j.sku = c.sku
+RETURNING j.sku, j.expected_cost
+"""
+
+
+def new_worker_id():
+    """host:pid:random, unique across hosts and restarts."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def ensure_queue_tables(engine):
+    with engine.begin() as conn:
+        for ddl in QUEUE_DDL:
+            conn.execute(text(ddl))
+
+
+# ------------------- COORDINATOR -------------------
+def enqueue_run(engine, run_id, expected_costs, params=None):
+    """
+    Register a run and one pending job per SKU.
+
+    `expected_costs` maps sku -> expected fit seconds; workers claim the most expensive
+    jobs first. Re-enqueueing an existing run only adds SKUs it doesn't have yet.
+    Returns the number of jobs in the run.
+    """
+    ensure_queue_tables(engine)
+    rows = [{"run_id": run_id, "sku": sku, "cost": float(c)} for sku, c in expected_costs.items()]
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                INSERT INTO public.forecast_runs (run_id, n_jobs, params)
+                VALUES (:run_id, :n_jobs, CAST(:params AS jsonb))
+                ON CONFLICT (run_id) DO NOTHING
+                """
+            ),
+            {"run_id": run_id, "n_jobs": len(rows), "params": json.dumps(params or {})},
+        )
+        if rows:
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO public.forecast_jobs (run_id, sku, expected_cost)
+                    VALUES (:run_id, :sku, :cost)
+                    ON CONFLICT (run_id, sku) DO NOTHING
+                    """
+                ),
+                rows,
+            )
+        n_jobs = conn.execute(
+            text("SELECT COUNT(*) FROM public.forecast_jobs WHERE run_id = :run_id"),
+            {"run_id": run_id},
+        ).scalar()
+        conn.execute(
+            text("UPDATE public.forecast_runs SET n_jobs = :n WHERE run_id = :run_id"),
+            {"n": n_jobs, "run_id": run_id},
+        )
+    return n_jobs
+
+
+def _exhausted_metrics(sku, run_id):
+    """Metrics row for a job that never completed (no fit to report, like a failed fit)."""
+    from vitamarkets.metrics import METRICS
+
+    return {
+        "sku": sku,
+        "run_id": run_id,
+        "n_train": None,
+        "n_test": None,
+        **{f"test_{name}": None for name in METRICS},
+        "fit_status": "failed",
+        "fit_seconds": None,
+        "model": None,
+        "grain": "daily",
+    }
+
+
+def fail_exhausted_jobs(engine, run_id, max_attempts=MAX_ATTEMPTS):
+    """
+    Mark jobs whose lease expired after their last allowed attempt as failed.
+
+    Each gets a fit_status "failed" metrics row in the same transaction, so the
+    published run records every SKU's outcome, as forecast_all does.
+    """
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text(
+                """
+                UPDATE public.forecast_jobs
+                SET status = 'failed', finished_at = now(), lease_expires_at = NULL,
+                    fit_status = 'failed',
+                    error = COALESCE(error, 'lease expired after final attempt')
+                WHERE run_id = :run_id
+                  AND status = 'running'
+                  AND lease_expires_at < now()
+                  AND attempts >= :max_attempts
+                RETURNING sku
+                """
+            ),
+            {"run_id": run_id, "max_attempts": max_attempts},
+        ).fetchall()
+        skus = [sku for (sku,) in rows]
+        if skus:
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO public.forecast_queue_metrics (run_id, sku, metrics)
+                    VALUES (:run_id, :sku, CAST(:metrics AS jsonb))
+                    ON CONFLICT (run_id, sku) DO UPDATE SET metrics = EXCLUDED.metrics
+                    """
+                ),
+                [
+                    {
+                        "run_id": run_id,
+                        "sku": sku,
+                        "metrics": pd.Series(_exhausted_metrics(sku, run_id)).to_json(),
+                    }
+                    for sku in skus
+                ],
+            )
+    return len(skus)
+
+
+def run_status(engine, run_id):
+    """Job counts per status for a run, e.g. {"pending": 3, "running": 2, "done": 95}."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT status, COUNT(*) FROM public.forecast_jobs
+                WHERE run_id = :run_id GROUP BY status
+                """
+            ),
+            {"run_id": run_id},
+        ).fetchall()
+    counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+    counts.update(dict(rows))
+    return counts
+
+
+def run_complete(engine, run_id, max_attempts=MAX_ATTEMPTS):
+    """Run-completion barrier: True once every job is done or failed."""
+    fail_exhausted_jobs(engine, run_id, max_attempts)
+    counts = run_status(engine, run_id)
+    return counts["pending"] == 0 and counts["running"] == 0
+
+
+def wait_for_run(engine, run_id, poll_seconds=POLL_SECONDS, timeout=None):
+    """Block until the run passes the completion barrier. Returns False on timeout."""
+    started = time.monotonic()
+    while not run_complete(engine, run_id):
+        if timeout is not None and time.monotonic() - started > timeout:
+            return False
+        counts = run_status(engine, run_id)
+        log.info(
+            f"   -> {run_id}: {counts['done']} done, {counts['running']} running, "
+            f"{counts['pending']} pending, {counts['failed']} failed"
+        )
+        time.sleep(poll_seconds)
+    return True
+
+
+def load_run_results(engine, run_id):
+    """Assemble (all_forecasts, metrics_df) for a run from the queue result tables."""
+    all_forecasts = pd.read_sql(
+        text(
+            """
+            SELECT ds, yhat, yhat_lower, yhat_upper, sku, run_id, type
+            FROM public.forecast_queue_forecasts
+            WHERE run_id = :run_id
+            ORDER BY sku, type, ds
+            """
+        ),
+        engine,
+        params={"run_id": run_id},
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT metrics FROM public.forecast_queue_metrics
+                WHERE run_id = :run_id ORDER BY sku
+                """
+            ),
+            {"run_id": run_id},
+        ).fetchall()
+    metrics_df = pd.DataFrame([row[0] for row in rows])
+    return all_forecasts, metrics_df
+
+
+def publish_run(engine, run_id):
+    """
+    Publish a completed run: write versioned tables and flip the stable views.
+
+    Refuses to publish before the completion barrier, and claims the run with a
+    conditional UPDATE so two coordinators can't both flip the views.
+    Returns (all_forecasts, metrics_df).
+    """
+    from vitamarkets.publish import publish_views, write_run_tables
+    from vitamarkets.telemetry import write_telemetry
+
+    if not run_complete(engine, run_id):
+        raise RuntimeError(
+            f"Run {run_id} still has pending/running jobs: {run_status(engine, run_id)}"
+        )
+
+    with engine.begin() as conn:
+        claimed = conn.execute(
+            text(
+                """
+                UPDATE public.forecast_runs SET status = 'publishing'
+                WHERE run_id = :run_id AND status = 'running'
+                """
+            ),
+            {"run_id": run_id},
+        ).rowcount
+    if not claimed:
+        raise RuntimeError(f"Run {run_id} is already being published or was published")
+
+    try:
+        all_forecasts, metrics_df = load_run_results(engine, run_id)
+        if metrics_df.empty:
+            raise RuntimeError(f"Run {run_id} produced no results")
+        table_forecasts, table_metrics = write_run_tables(engine, all_forecasts, metrics_df, run_id)
+        publish_views(engine, table_forecasts, table_metrics)
+        write_telemetry(engine, metrics_df, run_id)
+    except Exception:
+        with engine.begin() as conn:
+            conn.execute(
+                text("UPDATE public.forecast_runs SET status = 'running' WHERE run_id = :run_id"),
+                {"run_id": run_id},
+            )
+        raise
+
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                UPDATE public.forecast_runs SET status = 'published', published_at = now()
+                WHERE run_id = :run_id
+                """
+            ),
+            {"run_id": run_id},
+        )
+        # Versioned tables now hold the run; keep jobs/metrics for audit
+        conn.execute(
+            text("DELETE FROM public.forecast_queue_forecasts WHERE run_id = :run_id"),
+            {"run_id": run_id},
+        )
+    return all_forecasts, metrics_df
+
+
+# ------------------- WORKER -------------------
+def claim_batch(
+    engine,
+    run_id,
+    worker_id,
+    batch_size=DEFAULT_BATCH_SIZE,
+    lease_seconds=DEFAULT_LEASE_SECONDS,
+    max_attempts=MAX_ATTEMPTS,
+):
+    """Claim up to `batch_size` jobs (most expensive first). Returns the claimed SKUs."""
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text(CLAIM_SQL),
+            {
+                "run_id": run_id,
+                "worker_id": worker_id,
+                "batch_size": batch_size,
+                "lease_seconds": lease_seconds,
+                "max_attempts": max_attempts,
+            },
+        ).fetchall()
+    # UPDATE ... RETURNING doesn't preserve the CTE's order
+    return [sku for sku, _ in sorted(rows, key=lambda r: (-r[1], r[0]))]
+
+
+def extend_leases(engine, run_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Heartbeat: push out the lease on every job this worker holds."""
+    with engine.begin() as conn:
+        result = conn.execute(
+            text(
+                """
+                UPDATE public.forecast_jobs
+                SET heartbeat_at = now(),
+                    lease_expires_at = now() + make_interval(secs => :lease_seconds)
+                WHERE run_id = :run_id AND worker_id = :worker_id AND status = 'running'
+                """
+            ),
+            {"run_id": run_id, "worker_id": worker_id, "lease_seconds": lease_seconds},
+        )
+    return result.rowcount
+
+
+@contextmanager
+def heartbeat(engine, run_id, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS, interval=None):
+    """Extend this worker's leases in a background thread while the block runs."""
+    interval = interval or min(HEARTBEAT_SECONDS, lease_seconds / 3)
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                extend_leases(engine, run_id, worker_id, lease_seconds)
+            except Exception as e:
+                log.warning(f"Heartbeat failed for {worker_id}: {e}")
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{worker_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def complete_job(engine, run_id, sku, worker_id, combined, outcome):
+    """
+    Record a SKU's result and mark its job done, atomically.
+
+    The job update is conditional on this worker still holding the job; if the lease
+    was lost (and the job possibly re-claimed) the result is discarded and False is
+    returned.
+    """
+    metrics = outcome if isinstance(outcome, dict) else None
+    error = outcome if isinstance(outcome, str) else (metrics or {}).get("error")
+    with engine.begin() as conn:
+        owned = conn.execute(
+            text(
+                """
+                UPDATE public.forecast_jobs
+                SET status = 'done', finished_at = now(), lease_expires_at = NULL,
+                    fit_status = :fit_status, error = :error
+                WHERE run_id = :run_id AND sku = :sku
+                  AND worker_id = :worker_id AND status = 'running'
+                """
+            ),
+            {
+                "run_id": run_id,
+                "sku": sku,
+                "worker_id": worker_id,
+                "fit_status": metrics["fit_status"] if metrics else None,
+                "error": error,
+            },
+        ).rowcount
+        if not owned:
+            return False
+
+        params = {"run_id": run_id, "sku": sku}
+        conn.execute(
+            text(
+                "DELETE FROM public.forecast_queue_forecasts WHERE run_id = :run_id AND sku = :sku"
+            ),
+            params,
+        )
+        conn.execute(
+            text("DELETE FROM public.forecast_queue_metrics WHERE run_id = :run_id AND sku = :sku"),
+            params,
+        )
+        if combined is not None:
+            combined[["run_id", "sku", "ds", "yhat", "yhat_lower", "yhat_upper", "type"]].to_sql(
+                "forecast_queue_forecasts",
+                conn,
+                schema="public",
+                if_exists="append",
+                index=False,
+                method="multi",
+                chunksize=5_000,
+            )
+        if metrics:
+            clean = {k: v for k, v in metrics.items() if k != "error"}
+            conn.execute(
+                text(
+                    """
+                    INSERT INTO public.forecast_queue_metrics (run_id, sku, metrics)
+                    VALUES (:run_id, :sku, CAST(:metrics AS jsonb))
+                    """
+                ),
+                {**params, "metrics": pd.Series(clean).to_json()},
+            )
+    return True
+
+
+def load_history_for_skus(engine, skus):
+    """Preprocessed history for just the claimed SKUs (stats and caps are per SKU)."""
+    from vitamarkets.forecasting import load_history
+    from vitamarkets.preprocessing import preprocess
+
+    return preprocess(load_history(engine, skus))["history"]
+
+
+def run_worker(
+    engine,
+    run_id,
+    worker_id=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    lease_seconds=DEFAULT_LEASE_SECONDS,
+    poll_seconds=POLL_SECONDS,
+):
+    """
+    Claim, fit and complete jobs until the run passes the completion barrier.
+
+    When nothing is claimable but other workers still hold jobs, the worker keeps
+    polling so it can pick up jobs whose lease expires (crashed worker).
+    Returns the number of jobs this worker completed.
+    """
+    from vitamarkets.forecasting import build_holidays, forecast_sku
+
+    worker_id = worker_id or new_worker_id()
+    with engine.connect() as conn:
+        params = conn.execute(
+            text("SELECT params FROM public.forecast_runs WHERE run_id = :run_id"),
+            {"run_id": run_id},
+        ).scalar()
+    if params is None:
+        raise RuntimeError(f"Run {run_id} has not been enqueued")
+    fit_timeout = params.get("fit_timeout", DEFAULT_FIT_TIMEOUT)
+    holidays_df = build_holidays()
+
+    completed = 0
+    with heartbeat(engine, run_id, worker_id, lease_seconds):
+        while True:
+            skus = claim_batch(engine, run_id, worker_id, batch_size, lease_seconds)
+            if not skus:
+                if run_complete(engine, run_id):
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            history = load_history_for_skus(engine, skus)
+            groups = dict(tuple(history.groupby("sku", sort=False)))
+            for sku in skus:
+                sub = groups.get(sku, history.iloc[0:0])
+                combined, outcome = forecast_sku(sub, sku, holidays_df, run_id, fit_timeout)
+                if complete_job(engine, run_id, sku, worker_id, combined, outcome):
+                    completed += 1
+                else:
+                    log.warning(f"{worker_id}: lost lease on {sku}; result discarded")
+
+    log.info(f"{worker_id}: completed {completed} jobs for run {run_id}")
+    return completed
+
+
+def _worker_process(run_id, batch_size, lease_seconds):
+    """Entry point for local worker processes (each needs its own engine)."""
+    from db import get_engine
+    from vitamarkets.resources import apply_thread_limits
+
+    with apply_thread_limits(1):
+        run_worker(get_engine(), run_id, batch_size=batch_size, lease_seconds=lease_seconds)
+
+
+def run_local_workers(
+    run_id, processes, batch_size=DEFAULT_BATCH_SIZE, lease_seconds=DEFAULT_LEASE_SECONDS
+):
+    """Start `processes` worker processes on this host and wait for them."""
+    import multiprocessing
+
+    procs = [
+        multiprocessing.Process(target=_worker_process, args=(run_id, batch_size, lease_seconds))
+        for _ in range(processes)
+    ]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    return [proc.exitcode for proc in procs]
+
+
+def enqueue_eligible(engine, run_id, fit_timeout=DEFAULT_FIT_TIMEOUT):
+    """
+    Coordinator step: enqueue eligible SKUs with expected costs.
+
+    Both come from sku_series_stats (n_days is the series length), so the coordinator
+    never pulls history.
+    """
+    from vitamarkets.forecasting import select_eligible_skus
+    from vitamarkets.scheduling import expected_fit_seconds, load_past_fit_seconds
+    from vitamarkets.series_stats import load_series_stats
+
+    stats = load_series_stats(engine)
+    lengths = stats.loc[select_eligible_skus(stats), "n_days"]
+    costs = expected_fit_seconds(lengths, load_past_fit_seconds())
+    return enqueue_run(engine, run_id, costs.to_dict(), params={"fit_timeout": fit_timeout})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PostgreSQL-backed forecast work queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_enqueue = sub.add_parser("enqueue", help="Coordinator: enqueue eligible SKUs for a run")
+    p_enqueue.add_argument("--run-id", help="Run id (default: new YYYYMMDD_HHMM)")
+    p_enqueue.add_argument(
+        "--fit-timeout",
+        type=float,
+        default=DEFAULT_FIT_TIMEOUT,
+        help="Seconds of Prophet fitting per SKU before the seasonal-naive fallback",
+    )
+
+    p_worker = sub.add_parser("worker", help="Claim and fit jobs until the run completes")
+    p_worker.add_argument("--run-id", required=True)
+    p_worker.add_argument("--processes", type=int, default=1, help="Local worker processes")
+    p_worker.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    p_worker.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS)
+
+    p_status = sub.add_parser("status", help="Job counts for a run")
+    p_status.add_argument("--run-id", required=True)
+
+    p_publish = sub.add_parser("publish", help="Coordinator: publish a completed run")
+    p_publish.add_argument("--run-id", required=True)
+    p_publish.add_argument("--wait", action="store_true", help="Wait for the completion barrier")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    from db import get_engine
+
+    engine = get_engine()
+
+    if args.command == "enqueue":
+        from vitamarkets.forecasting import new_run_id
+
+        run_id = args.run_id or new_run_id()
+        n_jobs = enqueue_eligible(engine, run_id, args.fit_timeout)
+        print(f"Enqueued {n_jobs} SKUs for run {run_id}")
+    elif args.command == "worker":
+        if args.processes > 1:
+            run_local_workers(args.run_id, args.processes, args.batch_size, args.lease_seconds)
+        else:
+            from vitamarkets.resources import apply_thread_limits
+
+            # Same single-threaded BLAS layout as each of the local worker processes
+            with apply_thread_limits(1):
+                run_worker(
+                    engine,
+                    args.run_id,
+                    batch_size=args.batch_size,
+                    lease_seconds=args.lease_seconds,
+                )
+    elif args.command == "status":
+        print(json.dumps(run_status(engine, args.run_id), indent=2))
+    elif args.command == "publish":
+        if args.wait:
+            wait_for_run(engine, args.run_id)
+        _, metrics_df = publish_run(engine, args.run_id)
+        print(f"Published run {args.run_id}: {len(metrics_df)} SKUs")
+
+
+if __name__ == "__main__":
+    main()
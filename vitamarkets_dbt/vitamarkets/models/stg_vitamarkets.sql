@@ -1,6 +1,6 @@
 with raw as (
     select *
-    from public.vitamarkets_raw
+    from {{ source('public', 'vitamarkets_raw') }}
 )
 select
     date,